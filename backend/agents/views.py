@@ -10,6 +10,7 @@ from .serializers import (
     AIServiceInfoSerializer
 )
 from .api_keys import AIServiceConfig
+from opencode.events import publish_event
 
 
 class AgentViewSet(viewsets.ModelViewSet):
@@ -54,6 +55,7 @@ class AgentViewSet(viewsets.ModelViewSet):
         
         agent.status = new_status
         agent.save()
+        publish_event(agent.project_id, 'agent.status', agent_id=agent.pk, name=agent.name, status=new_status)
         
         serializer = self.get_serializer(agent)
         return Response(serializer.data)
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the OpenCode execution pipeline.
+"""
+
+# Made with Bob
@@ -0,0 +1,223 @@
+"""
+Executor Benchmark
+Measures OpenCodeExecutor overhead and throughput against a fake `opencode` binary.
+
+Usage (from backend/):
+    python -m benchmarks.executor_bench --output bench_results/executor.json
+    python -m benchmarks.executor_bench --quick
+
+Scenarios:
+- spawn:      per-task overhead of execute_task with a no-op fake
+- tree_scan:  get_generated_files / snapshot_workspace cost as the workspace grows
+- throughput: end-to-end tasks/second of execute_parallel_tasks per max_workers
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from opencode.dependency_cache import DependencyCache
+from opencode.executor import OpenCodeExecutor
+from opencode.sandbox import SandboxPool
+
+FAKE_OPENCODE = Path(__file__).resolve().parent / 'fake_opencode.py'
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _timing_summary(values: List[float]) -> Dict:
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.mean(values) * 1000, 3),
+        'p50_ms': round(_percentile(values, 50) * 1000, 3),
+        'p95_ms': round(_percentile(values, 95) * 1000, 3),
+        'max_ms': round(max(values) * 1000, 3),
+    }
+
+
+@contextmanager
+def fake_opencode_on_path(**config):
+    """Put a fake `opencode` first on PATH, configured through FAKE_OPENCODE_* variables"""
+    bin_dir = Path(tempfile.mkdtemp(prefix='fake-opencode-bin-'))
+    shim = bin_dir / 'opencode'
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_OPENCODE}" "$@"\n')
+    shim.chmod(0o755)
+
+    saved = {key: os.environ.get(key) for key in ['PATH'] + [f'FAKE_OPENCODE_{k.upper()}' for k in config]}
+    os.environ['PATH'] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+    for key, value in config.items():
+        os.environ[f'FAKE_OPENCODE_{key.upper()}'] = str(value)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(bin_dir, ignore_errors=True)
+
+
+def _make_executor(workspace: Path, cache_dir: Path, max_processes: int) -> OpenCodeExecutor:
+    return OpenCodeExecutor(
+        str(workspace),
+        pool=SandboxPool(max_processes=max_processes, max_load_per_cpu=1000),
+        dependency_cache=DependencyCache(str(cache_dir), max_bytes=0),
+    )
+
+
+def bench_spawn(scratch: Path, iterations: int) -> Dict:
+    """Overhead of one execute_task call when OpenCode itself does nothing"""
+    with fake_opencode_on_path(sleep=0, files=0, output_bytes=0, failure_rate=0):
+        executor = _make_executor(scratch / 'spawn', scratch / 'cache', 1)
+        check_times, task_times = [], []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            executor.check_opencode_installed()
+            check_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            result = executor.execute_task('benchmark', timeout=30)
+            task_times.append(time.perf_counter() - started)
+            assert result['success'], result
+
+    return {
+        'version_check': _timing_summary(check_times),
+        'execute_task': _timing_summary(task_times),
+    }
+
+
+def _populate_tree(root: Path, files: int, fanout: int = 50):
+    for i in range(files):
+        directory = root / f'dir_{i // fanout:04d}'
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f'file_{i}.py').write_text('pass\n')
+
+
+def bench_tree_scan(scratch: Path, sizes: List[int], repeats: int) -> List[Dict]:
+    """Cost of listing/snapshotting the workspace as the tree grows"""
+    results = []
+    for size in sizes:
+        workspace = scratch / f'tree_{size}'
+        _populate_tree(workspace, size)
+        executor = _make_executor(workspace, scratch / 'cache', 1)
+
+        listing, snapshot = [], []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            executor.get_generated_files()
+            listing.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            executor.snapshot_workspace()
+            snapshot.append(time.perf_counter() - started)
+
+        results.append({
+            'files': size,
+            'get_generated_files': _timing_summary(listing),
+            'snapshot_workspace': _timing_summary(snapshot),
+        })
+        shutil.rmtree(workspace, ignore_errors=True)
+    return results
+
+
+def bench_throughput(scratch: Path, worker_counts: List[int], tasks: int, sleep: float,
+                     files: int, output_bytes: int, failure_rate: float) -> List[Dict]:
+    """End-to-end throughput of execute_parallel_tasks at different max_workers"""
+    results = []
+    with fake_opencode_on_path(sleep=sleep, files=files, output_bytes=output_bytes,
+                               failure_rate=failure_rate):
+        for workers in worker_counts:
+            workspace = scratch / f'throughput_{workers}'
+            executor = _make_executor(workspace, scratch / 'cache', workers)
+            task_list = [
+                {'id': f'task_{i}', 'title': f'Task {i}', 'prompt': f'benchmark task {i}'}
+                for i in range(tasks)
+            ]
+
+            started = time.perf_counter()
+            task_results = executor.execute_parallel_tasks(task_list, max_workers=workers)
+            elapsed = time.perf_counter() - started
+
+            results.append({
+                'max_workers': workers,
+                'tasks': tasks,
+                'succeeded': sum(1 for r in task_results if r.get('success')),
+                'failed': sum(1 for r in task_results if not r.get('success')),
+                'elapsed_seconds': round(elapsed, 3),
+                'tasks_per_second': round(tasks / elapsed, 3),
+                'ideal_tasks_per_second': round(workers / sleep, 3) if sleep else None,
+            })
+            shutil.rmtree(workspace, ignore_errors=True)
+    return results
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Write JSON results to this path (default: stdout only)')
+    parser.add_argument('--quick', action='store_true', help='Small sizes for a smoke run')
+    parser.add_argument('--spawn-iterations', type=int, default=20)
+    parser.add_argument('--tree-sizes', default='100,1000,10000')
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--tasks', type=int, default=16)
+    parser.add_argument('--task-sleep', type=float, default=0.5)
+    parser.add_argument('--task-files', type=int, default=10)
+    parser.add_argument('--output-bytes', type=int, default=64 * 1024)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.spawn_iterations = 3
+        args.tree_sizes = '100,1000'
+        args.workers = '1,2'
+        args.tasks = 4
+        args.task_sleep = 0.1
+
+    scratch = Path(tempfile.mkdtemp(prefix='executor-bench-'))
+    try:
+        results = {
+            'benchmark': 'executor',
+            'timestamp': datetime.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'parameters': vars(args),
+            'spawn': bench_spawn(scratch, args.spawn_iterations),
+            'tree_scan': bench_tree_scan(
+                scratch, [int(s) for s in args.tree_sizes.split(',')], repeats=3
+            ),
+            'throughput': bench_throughput(
+                scratch, [int(w) for w in args.workers.split(',')], args.tasks,
+                args.task_sleep, args.task_files, args.output_bytes, args.failure_rate
+            ),
+        }
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    print(output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
+
+# Made with Bob
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Fake OpenCode CLI
+Stands in for the real `opencode` binary in benchmarks.
+
+Behaviour is controlled through environment variables:
+    FAKE_OPENCODE_SLEEP          Seconds to run before exiting (default 0)
+    FAKE_OPENCODE_FILES          Number of files to write into the workspace (default 0)
+    FAKE_OPENCODE_FILE_BYTES     Size of each written file (default 1024)
+    FAKE_OPENCODE_OUTPUT_BYTES   Approximate bytes of JSON events on stdout (default 0)
+    FAKE_OPENCODE_FAILURE_RATE   Probability of exiting with an error (default 0)
+    FAKE_OPENCODE_STRAGGLER_RATE Probability of running FAKE_OPENCODE_STRAGGLER_SLEEP
+                                 seconds instead of FAKE_OPENCODE_SLEEP (default 0)
+"""
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+
+def main() -> int:
+    if '--version' in sys.argv:
+        print('opencode 0.0.0-fake')
+        return 0
+
+    sleep = float(os.environ.get('FAKE_OPENCODE_SLEEP', 0))
+    files = int(os.environ.get('FAKE_OPENCODE_FILES', 0))
+    file_bytes = int(os.environ.get('FAKE_OPENCODE_FILE_BYTES', 1024))
+    output_bytes = int(os.environ.get('FAKE_OPENCODE_OUTPUT_BYTES', 0))
+    failure_rate = float(os.environ.get('FAKE_OPENCODE_FAILURE_RATE', 0))
+    if random.random() < float(os.environ.get('FAKE_OPENCODE_STRAGGLER_RATE', 0)):
+        sleep = float(os.environ.get('FAKE_OPENCODE_STRAGGLER_SLEEP', 300))
+
+    run_id = uuid.uuid4().hex[:8]
+    steps = max(files, 1)
+    step_sleep = sleep / steps
+    written = 0
+
+    for i in range(steps):
+        time.sleep(step_sleep)
+        if i < files:
+            path = os.path.join('generated', f'{run_id}_{i}.txt')
+            os.makedirs('generated', exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('x' * file_bytes)
+            event = {'type': 'tool_use', 'part': {'tool': 'write', 'state': {'input': {'filePath': path}}}}
+            line = json.dumps(event)
+            print(line, flush=True)
+            written += len(line) + 1
+        print(json.dumps({'type': 'step_finish', 'step': i}), flush=True)
+
+    # Pad stdout up to the requested volume
+    padding = {'type': 'text', 'text': 'y' * 200}
+    padding_line = json.dumps(padding)
+    while written < output_bytes:
+        print(padding_line)
+        written += len(padding_line) + 1
+
+    if random.random() < failure_rate:
+        print('fake failure', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# Made with Bob
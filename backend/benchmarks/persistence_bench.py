@@ -0,0 +1,197 @@
+"""
+Persistence Benchmark
+Measures how many queries and how long saving a task result takes for a large
+workspace, comparing the previous per-file ORM loop with the bulk, delta-based
+ProjectOrchestrator._save_task_result.
+
+Usage (from backend/):
+    python -m benchmarks.persistence_bench --output bench_results/persistence.json
+    python -m benchmarks.persistence_bench --quick
+
+Scenarios:
+- initial: first save of a task that wrote every file in the workspace
+- rerun:   re-save after the task changed only --changed-files of them
+
+Runs against a throwaway SQLite database, workspace and artifact store.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from agents.models import Agent  # noqa: E402
+from codebase.blob_store import get_blob_store  # noqa: E402
+from projects.models import Project  # noqa: E402
+from tasks.models import Task, TaskOutput, OutputFile  # noqa: E402
+
+
+def legacy_save_task_result(orchestrator, task_info: Dict, result: Dict):
+    """The per-file save loop _save_task_result used before it went bulk"""
+    task, created = Task.objects.get_or_create(
+        project=orchestrator.project,
+        title=task_info['title'],
+        defaults={
+            'description': task_info['prompt'][:500],
+            'assigned_to': task_info.get('agent'),
+            'status': 'completed' if result['success'] else 'failed',
+            'priority': task_info.get('priority', 'high')
+        }
+    )
+    if not created:
+        task.status = 'completed' if result['success'] else 'failed'
+    if result['success']:
+        task.progress = 100
+        task.completed_at = timezone.now()
+    task.save()
+
+    if result['success']:
+        output, _ = TaskOutput.objects.get_or_create(
+            task=task,
+            defaults={'output_type': 'code', 'content': result.get('stdout', ''), 'metadata': {}}
+        )
+        blob_store = get_blob_store()
+        for file_path in orchestrator.executor.get_generated_files():
+            full_path = Path(orchestrator.project_dir) / file_path
+            if full_path.exists():
+                digest, size = blob_store.put_file(full_path)
+                OutputFile.objects.update_or_create(
+                    task_output=output,
+                    path=str(file_path),
+                    defaults={
+                        'name': full_path.name,
+                        'blob_digest': digest,
+                        'size': size,
+                        'language': orchestrator._detect_language(file_path)
+                    }
+                )
+
+
+def _populate_workspace(root: Path, files: int, file_bytes: int, fanout: int = 50) -> List[str]:
+    paths = []
+    for i in range(files):
+        path = Path(f'dir_{i // fanout:04d}') / f'module_{i}.py'
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(f'# module {i}\n' + 'x = 1\n' * (file_bytes // 6))
+        paths.append(str(path))
+    return paths
+
+
+def _measure(save: Callable[[], None]) -> Dict:
+    # Counted with an execute wrapper: the debug query log is capped at 9000 entries
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        save()
+        elapsed = time.perf_counter() - started
+    return {'queries': queries, 'elapsed_ms': round(elapsed * 1000, 3)}
+
+
+def bench_strategy(name: str, save: Callable, user: User, files: int, file_bytes: int,
+                   changed_files: int) -> Dict:
+    """Initial save and a small re-run save for one persistence strategy"""
+    from opencode.orchestrator import ProjectOrchestrator
+
+    project = Project.objects.create(name=f'persistence-bench-{name}', description='benchmark', created_by=user)
+    agent = Agent.objects.create(project=project, name='Bench Engineer', role='backend_developer')
+    orchestrator = ProjectOrchestrator(project)
+    workspace = Path(orchestrator.project_dir)
+    paths = _populate_workspace(workspace, files, file_bytes)
+    task_info = {'id': 'backend', 'title': 'Benchmark task', 'prompt': 'benchmark', 'agent': agent}
+
+    initial = _measure(lambda: save(orchestrator, task_info, {
+        'success': True, 'stdout': '', 'changes': {'changed': paths, 'deleted': []}
+    }))
+
+    touched = paths[:changed_files]
+    for path in touched:
+        with open(workspace / path, 'a') as f:
+            f.write('y = 2\n')
+    rerun = _measure(lambda: save(orchestrator, task_info, {
+        'success': True, 'stdout': '', 'changes': {'changed': touched, 'deleted': []}
+    }))
+
+    rows = OutputFile.objects.filter(task_output__task__project=project).count()
+    orchestrator.workspaces.release(project)
+    shutil.rmtree(workspace, ignore_errors=True)
+    return {'initial': initial, 'rerun': rerun, 'output_file_rows': rows}
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Write JSON results to this path (default: stdout only)')
+    parser.add_argument('--quick', action='store_true', help='Small sizes for a smoke run')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--file-bytes', type=int, default=2048)
+    parser.add_argument('--changed-files', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.files = 200
+        args.changed_files = 5
+
+    scratch = Path(tempfile.mkdtemp(prefix='persistence-bench-'))
+    os.environ['OPENCODE_WORKSPACE_DIR'] = str(scratch / 'workspaces')
+    os.environ['ARTIFACT_STORE_DIR'] = str(scratch / 'artifacts')
+    # A file database, so per-statement commits cost what they cost in production
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = str(scratch / 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        from opencode.orchestrator import ProjectOrchestrator
+
+        user = User.objects.create(username='persistence-bench')
+        strategies = {
+            'per_file': legacy_save_task_result,
+            'bulk': ProjectOrchestrator._save_task_result,
+        }
+        results = {
+            'benchmark': 'persistence',
+            'timestamp': datetime.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'database': connection.vendor,
+            },
+            'parameters': vars(args),
+            'strategies': {
+                name: bench_strategy(name, save, user, args.files, args.file_bytes, args.changed_files)
+                for name, save in strategies.items()
+            },
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    print(output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
+
+# Made with Bob
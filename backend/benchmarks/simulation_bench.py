@@ -0,0 +1,197 @@
+"""
+Simulation Load Benchmark
+Runs many simulated projects through start_project_development concurrently
+(LLM and OpenCode replaced by opencode.simulation) to load-test the
+orchestrator, the fair scheduler and DB persistence.
+
+Usage (from backend/):
+    python -m benchmarks.simulation_bench --output bench_results/simulation.json
+    python -m benchmarks.simulation_bench --projects 100 --users 10 --time-scale 0.01
+    python -m benchmarks.simulation_bench --quick
+
+Reports wall time, run latency percentiles, task throughput, simulated token
+spend and where the time went (span seconds by kind, summed over all runs).
+Set OPENCODE_*_BUDGET to exercise budget degradation and early stops.
+
+Runs against a throwaway SQLite database and scratch directories.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from agents.models import Agent  # noqa: E402
+from planning.models import PlanningDocument  # noqa: E402
+from projects.models import Project  # noqa: E402
+from tasks.models import OutputFile, Task  # noqa: E402
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def _make_projects(count: int, users: int) -> List[Project]:
+    owners = [User.objects.create(username=f'simulation-user-{i}') for i in range(users)]
+    projects = []
+    for i in range(count):
+        project = Project.objects.create(
+            name=f'Simulated project {i}', description='simulation benchmark', created_by=owners[i % users]
+        )
+        PlanningDocument.objects.create(
+            project=project,
+            executive_summary='Simulated project',
+            tech_stack={'backend': ['Django'], 'frontend': ['React']},
+        )
+        for role in ('backend_developer', 'frontend_developer', 'qa_engineer'):
+            Agent.objects.create(project=project, name=role, role=role, department='development')
+        projects.append(project)
+    return projects
+
+
+def run_load(projects: List[Project], simulation) -> Dict:
+    """Start every project's development at once and wait for all of them"""
+    from opencode.orchestrator import start_project_development
+
+    results: Dict[int, Dict] = {}
+
+    def develop(project: Project):
+        try:
+            results[project.id] = start_project_development(project.id, lane='bulk', simulation=simulation)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=develop, args=(project,)) for project in projects]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    runs = list(results.values())
+    succeeded = [r for r in runs if r.get('success') and not r.get('tasks_failed')]
+    durations = [r['timing']['wall_seconds'] for r in runs if r.get('timing')]
+    tasks = sum(r.get('tasks_executed', 0) for r in runs)
+
+    by_kind: Dict[str, float] = defaultdict(float)
+    for r in runs:
+        for kind, stats in r.get('timing', {}).get('by_kind', {}).items():
+            by_kind[kind] += stats['seconds']
+
+    return {
+        'wall_seconds': round(wall, 3),
+        'runs': len(runs),
+        'runs_succeeded': len(succeeded),
+        'errors': sorted({r['error'] for r in runs if r.get('error')})[:10],
+        'tasks_executed': tasks,
+        'tasks_failed': sum(r.get('tasks_failed', 0) for r in runs),
+        'tasks_per_second': round(tasks / wall, 2) if wall else 0.0,
+        'run_seconds': {
+            'p50': round(_percentile(durations, 50), 3),
+            'p95': round(_percentile(durations, 95), 3),
+            'max': round(max(durations, default=0.0), 3),
+        },
+        'queue_wait_seconds': round(sum(r.get('queue_wait_seconds', 0) for r in runs), 3),
+        'critical_path_seconds_mean': round(
+            sum(r['timing']['critical_path_seconds'] for r in runs if r.get('timing')) / max(len(durations), 1), 3
+        ),
+        'budget': {
+            'tokens': sum(r['budget']['prompt_tokens'] + r['budget']['completion_tokens']
+                          for r in runs if r.get('budget')),
+            'cost': round(sum(r['budget']['cost'] for r in runs if r.get('budget')), 4),
+            'degraded_calls': sum(r['budget']['degraded_calls'] for r in runs if r.get('budget')),
+            'runs_stopped': sum(1 for r in runs if r.get('budget', {}).get('stopped')),
+        },
+        'span_seconds_by_kind': {
+            kind: round(seconds, 3) for kind, seconds in sorted(by_kind.items(), key=lambda i: i[1], reverse=True)
+        },
+    }
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Write JSON results to this path (default: stdout only)')
+    parser.add_argument('--quick', action='store_true', help='Small sizes for a smoke run')
+    parser.add_argument('--projects', type=int, default=100)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--slots', type=int, default=16, help='Scheduler execution slots')
+    parser.add_argument('--time-scale', type=float, default=0.01,
+                        help='Multiplier on simulated LLM/OpenCode durations')
+    parser.add_argument('--breakdown-tasks', type=int, default=6)
+    parser.add_argument('--files-per-task', type=int, default=3)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.projects = 10
+        args.users = 3
+
+    scratch = Path(tempfile.mkdtemp(prefix='simulation-bench-'))
+    os.environ['ARTIFACT_STORE_DIR'] = str(scratch / 'artifacts')
+    os.environ['OPENCODE_SCHEDULER_SLOTS'] = str(args.slots)
+    # Runs without a GitHub repository never push; keep the publisher out regardless
+    os.environ['OPENCODE_GITHUB_PUSH'] = 'False'
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = str(scratch / 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        from opencode.simulation import Simulation
+
+        simulation = Simulation(
+            time_scale=args.time_scale,
+            breakdown_tasks=args.breakdown_tasks,
+            files_per_task=args.files_per_task,
+            failure_rate=args.failure_rate,
+            seed=args.seed,
+        )
+        projects = _make_projects(args.projects, args.users)
+        load = run_load(projects, simulation)
+        results = {
+            'benchmark': 'simulation',
+            'timestamp': datetime.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'database': connection.vendor,
+            },
+            'parameters': vars(args),
+            'load': load,
+            'rows': {
+                'tasks': Task.objects.count(),
+                'output_files': OutputFile.objects.count(),
+            },
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    print(output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
+
+# Made with Bob
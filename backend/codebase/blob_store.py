@@ -0,0 +1,206 @@
+"""
+Content-addressed blob store for generated artifacts.
+Blobs are named by the SHA-256 of their content and stored zstd-compressed on local disk.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+import zstandard
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobStore:
+    """
+    Stores each distinct file body exactly once.
+
+    Layout: <root>/<digest[:2]>/<digest[2:4]>/<digest>.zst
+
+    Features:
+    - Deduplication by SHA-256 content digest
+    - zstd compression with streaming writes and reads
+    - Atomic writes (temp file + rename)
+    - Garbage collection of unreferenced blobs
+    """
+
+    def __init__(self, root: str, level: int = 3):
+        self.root = Path(root)
+        self.level = level
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str) -> Path:
+        """Get on-disk path for a blob digest."""
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.zst"
+
+    def exists(self, digest: str) -> bool:
+        """Check if a blob is stored."""
+        return self.path_for(digest).exists()
+
+    def _touch(self, digest: str) -> bool:
+        """Refresh mtime of an existing blob so GC grace covers reuse. Returns False if missing."""
+        try:
+            os.utime(self.path_for(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def hash_file(path: Path) -> Tuple[str, int]:
+        """Compute (digest, size) of a file without loading it into memory."""
+        sha = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+                size += len(chunk)
+        return sha.hexdigest(), size
+
+    def _write(self, digest: str, source: BinaryIO) -> None:
+        """Compress a stream into the blob path for digest."""
+        target = self.path_for(digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                compressor = zstandard.ZstdCompressor(level=self.level)
+                compressor.copy_stream(source, tmp)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def put_file(self, path: str) -> Tuple[str, int]:
+        """
+        Store a file's content.
+
+        Args:
+            path: File to store
+
+        Returns:
+            Tuple of (digest, uncompressed size)
+        """
+        path = Path(path)
+        digest, size = self.hash_file(path)
+        if not self._touch(digest):
+            with open(path, 'rb') as f:
+                self._write(digest, f)
+        return digest, size
+
+    def put_files(self, paths: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Tuple[str, int]]:
+        """
+        Store many files concurrently (hashing and compression release the GIL).
+
+        Args:
+            paths: Files to store; missing files are skipped
+            max_workers: Reader threads (default: ThreadPoolExecutor's default)
+
+        Returns:
+            Mapping of path -> (digest, uncompressed size) for the stored files
+        """
+        def put(path):
+            try:
+                return path, self.put_file(path)
+            except FileNotFoundError:
+                return path, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return {path: stored for path, stored in executor.map(put, paths) if stored}
+
+    def put_bytes(self, data: bytes) -> str:
+        """Store raw bytes and return their digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self._touch(digest):
+            self._write(digest, io.BytesIO(data))
+        return digest
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open a blob as a decompressing binary stream."""
+        path = self.path_for(digest)
+        if not path.exists():
+            raise FileNotFoundError(f"Blob not found: {digest}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream decompressed blob content in chunks."""
+        with self.open(digest) as reader:
+            for chunk in iter(lambda: reader.read(chunk_size), b''):
+                yield chunk
+
+    def read_bytes(self, digest: str) -> bytes:
+        """Read a whole blob into memory."""
+        return b''.join(self.iter_chunks(digest))
+
+    def delete(self, digest: str) -> bool:
+        """Delete a blob. Returns True if it existed."""
+        path = self.path_for(digest)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    def iter_digests(self) -> Iterator[Tuple[str, Path]]:
+        """Iterate over (digest, path) of all stored blobs."""
+        for path in self.root.glob('*/*/*.zst'):
+            yield path.stem, path
+
+    def collect_garbage(self, ref_counts: Dict[str, int],
+                        grace_seconds: int = 3600) -> Dict[str, int]:
+        """
+        Delete blobs whose reference count is zero.
+
+        Args:
+            ref_counts: Mapping of digest -> number of live references
+            grace_seconds: Keep unreferenced blobs younger than this, so blobs
+                written just before their referencing rows are committed survive
+
+        Returns:
+            Dictionary with collection statistics
+        """
+        now = time.time()
+        stats = {'scanned': 0, 'deleted': 0, 'freed_bytes': 0}
+
+        for digest, path in self.iter_digests():
+            stats['scanned'] += 1
+            if ref_counts.get(digest, 0) > 0:
+                continue
+            try:
+                stat = path.stat()
+                if now - stat.st_mtime < grace_seconds:
+                    continue
+                path.unlink()
+                stats['deleted'] += 1
+                stats['freed_bytes'] += stat.st_size
+            except FileNotFoundError:
+                continue
+
+        logger.info(f"Blob GC: {stats}")
+        return stats
+
+
+# Singleton instance
+_store_instance = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get or create the artifact blob store."""
+    global _store_instance
+    if _store_instance is None:
+        root = os.environ.get(
+            'ARTIFACT_STORE_DIR',
+            str(settings.BASE_DIR.parent / 'artifact_store')
+        )
+        _store_instance = BlobStore(root)
+    return _store_instance
+
+# Made with Bob
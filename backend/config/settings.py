@@ -36,6 +36,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -93,6 +94,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Served by daphne (also under runserver) so the SSE event stream runs async
+ASGI_APPLICATION = "config.asgi.application"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -211,3 +215,26 @@ SOCIALACCOUNT_PROVIDERS = {
         ],
     }
 }
+
+# Celery Settings (background planning/development jobs)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Jobs are long-running; don't hoard them on one worker
+CELERY_TASK_IGNORE_RESULT = True  # Job status lives in the Job model
+# Run jobs inline (no broker/worker) - useful for local development
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+# Periodic maintenance (run with: celery -A config beat)
+CELERY_BEAT_SCHEDULE = {
+    'reclaim-stale-jobs': {
+        'task': 'opencode.reclaim_stale_jobs',
+        'schedule': 60.0,
+    },
+    'collect-artifact-garbage': {
+        'task': 'opencode.collect_artifact_garbage',
+        'schedule': float(os.environ.get('ARTIFACT_GC_INTERVAL_SECONDS', 6 * 3600)),
+    },
+    'archive-workspaces': {
+        'task': 'opencode.archive_workspaces',
+        'schedule': float(os.environ.get('OPENCODE_WORKSPACE_HOUSEKEEPING_SECONDS', 15 * 60)),
+    },
+}
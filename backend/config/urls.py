@@ -5,6 +5,7 @@ from projects.views import ProjectViewSet
 from agents.views import AgentViewSet, AIServiceAPIKeyViewSet
 from tasks.views import TaskViewSet
 from planning.views import PlanningDocumentViewSet
+from opencode.views import BudgetViewSet, JobViewSet, RunViewSet, project_events
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -13,9 +14,13 @@ router.register(r'agents', AgentViewSet, basename='agent')
 router.register(r'tasks', TaskViewSet, basename='task')
 router.register(r'api-keys', AIServiceAPIKeyViewSet, basename='api-key')
 router.register(r'planning', PlanningDocumentViewSet, basename='planning')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'runs', RunViewSet, basename='run')
+router.register(r'budgets', BudgetViewSet, basename='budget')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/projects/<int:project_id>/events/', project_events, name='project-events'),
     path('api/', include(router.urls)),
     path('api/auth/', include('auth_api.urls')),
     path('api/github/', include('github_integration.urls')),
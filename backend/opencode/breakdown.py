@@ -0,0 +1,301 @@
+"""
+Task Breakdown
+Turns the LLM task breakdown of a planning document into a validated execution DAG,
+carrying task keys and unaffected tasks over when the document is edited
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from planning.models import PlanningDocument
+from .checkpoints import section_hashes
+from .client import get_opencode_client
+from .models import TaskBreakdown
+
+# Upper bound on generated tasks; the rest of a runaway breakdown is dropped
+MAX_TASKS = int(os.environ.get('OPENCODE_BREAKDOWN_MAX_TASKS', 40))
+
+PRIORITIES = ('high', 'medium', 'low')
+
+# Planning sections a breakdown task can be derived from, and the ones assumed
+# when the breakdown does not say
+TASK_SECTIONS = ('executive_summary', 'technical_requirements', 'feature_specifications')
+DEFAULT_TASK_SECTIONS = ['technical_requirements', 'feature_specifications']
+
+
+def _normalize(reference) -> str:
+    return re.sub(r'[^a-z0-9]', '', str(reference).lower())
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-')[:50] or 'task'
+
+
+def build_task_graph(raw_tasks: List, reserved_keys: Tuple[str, ...] = ()) -> Tuple[List[Dict], List[str]]:
+    """
+    Normalize breakdown tasks and repair their dependency references
+
+    References may be task ids, titles or 1-based positions ("3", "task_3").
+    Unknown and self references are dropped and cycles are broken by removing
+    the edge that closes them.
+
+    Args:
+        raw_tasks: 'tasks' list returned by generate_task_breakdown
+        reserved_keys: Keys used by built-in tasks (e.g. 'setup')
+
+    Returns:
+        (nodes in breakdown order, list of repair notes)
+    """
+    repairs: List[str] = []
+    nodes: List[Dict] = []
+    used = set(reserved_keys)
+
+    for position, raw in enumerate(raw_tasks or [], 1):
+        if not isinstance(raw, dict) or not str(raw.get('title') or '').strip():
+            repairs.append(f"Dropped task #{position}: no title")
+            continue
+        if len(nodes) >= MAX_TASKS:
+            repairs.append(f"Dropped task #{position}: more than {MAX_TASKS} tasks")
+            continue
+
+        key = base = _slug(raw.get('id') or raw['title'])
+        suffix = 2
+        while key in used:
+            key = f"{base}-{suffix}"
+            suffix += 1
+        used.add(key)
+
+        try:
+            hours = max(float(raw.get('estimated_hours') or 1), 0.25)
+        except (TypeError, ValueError):
+            hours = 1.0
+        priority = str(raw.get('priority') or 'medium').lower()
+        dependencies = raw.get('dependencies') or []
+        sections = raw.get('sections') or []
+        sections = [
+            section for section in TASK_SECTIONS
+            if section in {str(s).lower() for s in (sections if isinstance(sections, list) else [sections])}
+        ]
+        nodes.append({
+            'key': key,
+            'title': str(raw['title']).strip()[:255],
+            'description': str(raw.get('description') or '').strip(),
+            'role': str(raw.get('assigned_role') or '').strip(),
+            'priority': priority if priority in PRIORITIES else 'medium',
+            'estimated_hours': hours,
+            'deliverables': [str(d) for d in raw.get('deliverables') or [] if d],
+            'sections': sections or list(DEFAULT_TASK_SECTIONS),
+            'position': position,
+            'raw_id': raw.get('id'),
+            'raw_dependencies': dependencies if isinstance(dependencies, list) else [dependencies],
+        })
+
+    # Every way a task may be referred to -> key
+    lookup: Dict[str, str] = {}
+    for node in nodes:
+        position = node['position']
+        for alias in (node['title'], node['key'], node['raw_id'], position,
+                      f"task{position}", f"t{position}", f"task_{position}"):
+            if alias is not None:
+                lookup.setdefault(_normalize(alias), node['key'])
+
+    for node in nodes:
+        dependencies = []
+        for reference in node.pop('raw_dependencies'):
+            key = lookup.get(_normalize(reference))
+            if key is None:
+                repairs.append(f"{node['key']}: dropped unknown dependency {reference!r}")
+            elif key == node['key']:
+                repairs.append(f"{node['key']}: dropped dependency on itself")
+            elif key not in dependencies:
+                dependencies.append(key)
+        node['dependencies'] = dependencies
+        del node['position'], node['raw_id']
+
+    _break_cycles(nodes, repairs)
+    return nodes, repairs
+
+
+def _break_cycles(nodes: List[Dict], repairs: List[str]):
+    """Drop the dependency edges that lead back onto the DFS path"""
+    by_key = {node['key']: node for node in nodes}
+    state: Dict[str, int] = {}  # 1 = on path, 2 = done
+
+    def visit(key: str):
+        state[key] = 1
+        node = by_key[key]
+        for dependency in list(node['dependencies']):
+            if state.get(dependency) == 1:
+                node['dependencies'].remove(dependency)
+                repairs.append(f"{key}: dropped dependency {dependency!r} to break a cycle")
+            elif dependency not in state:
+                visit(dependency)
+        state[key] = 2
+
+    for node in nodes:
+        if node['key'] not in state:
+            visit(node['key'])
+
+
+def task_sections(node: Dict) -> List[str]:
+    """Planning sections a breakdown task was derived from (older breakdowns did not record them)"""
+    return node.get('sections') or list(DEFAULT_TASK_SECTIONS)
+
+
+def merge_task_graph(
+    previous: List[Dict],
+    nodes: List[Dict],
+    changed_sections: List[str]
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Carry an earlier breakdown over to one regenerated after a planning edit
+
+    A regenerated breakdown words and keys its tasks differently even where the
+    plan did not change, which would re-run every task. New tasks matching an
+    earlier one by key or title keep its key; if none of the planning sections
+    the earlier task was derived from changed, the earlier task is kept as it
+    was (so its prompt, and checkpoint, stay valid). Earlier tasks missing from
+    the new breakdown are kept while their sections are unchanged; new tasks
+    are added under keys of their own.
+
+    Args:
+        previous: Nodes of the earlier breakdown
+        nodes: Nodes of the regenerated breakdown (see build_task_graph)
+        changed_sections: Planning sections edited since the earlier breakdown
+
+    Returns:
+        (merged nodes, list of repair notes)
+    """
+    changed = set(changed_sections)
+    earlier: Dict[str, Dict] = {}
+    for node in previous:
+        for alias in (node['key'], node['title']):
+            earlier.setdefault(_normalize(alias), node)
+
+    merged: List[Dict] = []
+    carried: List[Dict] = []  # Earlier tasks kept as they were (dependencies in earlier keys)
+    added: List[Dict] = []  # New tasks, still under their new keys
+    renames: Dict[str, str] = {}  # new key -> merged key
+    kept = set()
+    for node in nodes:
+        match = earlier.get(_normalize(node['key'])) or earlier.get(_normalize(node['title']))
+        if match is None or match['key'] in kept:
+            added.append(node)
+            merged.append(node)
+            continue
+        kept.add(match['key'])
+        renames[node['key']] = match['key']
+        if changed & set(task_sections(match)):
+            merged.append(dict(node, key=match['key']))
+        else:
+            carried.append(dict(match, role=node['role']))
+            merged.append(carried[-1])
+
+    for node in previous:
+        if node['key'] not in kept and not changed & set(task_sections(node)) and len(merged) < MAX_TASKS:
+            kept.add(node['key'])
+            carried.append(dict(node))
+            merged.append(carried[-1])
+
+    # New tasks take keys of their own, never one an earlier task had
+    used = kept | {node['key'] for node in previous}
+    for node in added:
+        key = base = node['key']
+        suffix = 2
+        while key in used:
+            key = f"{base}-{suffix}"
+            suffix += 1
+        used.add(key)
+        renames[node['key']] = key
+        node['key'] = key
+
+    repairs: List[str] = []
+    keys = {node['key'] for node in merged}
+    for node in merged:
+        dependencies = node['dependencies']
+        if not any(node is kept_node for kept_node in carried):
+            dependencies = [renames.get(dependency, dependency) for dependency in dependencies]
+        node['dependencies'] = [
+            dependency for dependency in dict.fromkeys(dependencies)
+            if dependency in keys and dependency != node['key']
+        ]
+    _break_cycles(merged, repairs)
+    return merged, repairs
+
+
+def breakdown_source_hash(planning_doc: PlanningDocument, roles: List[str]) -> str:
+    """Hash of everything the breakdown is generated from"""
+    source = json.dumps({
+        'document': planning_doc.full_document,
+        'tech_stack': planning_doc.tech_stack,
+        'roles': sorted(roles),
+        'max_tasks': MAX_TASKS,
+    }, sort_keys=True)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def get_task_breakdown(planning_doc: PlanningDocument, roles: List[str]) -> Optional[TaskBreakdown]:
+    """
+    Get the project's task graph, generating it when the plan or team changed
+
+    A regenerated graph is merged with the project's earlier one (see
+    merge_task_graph), so an edit only changes the tasks built from the edited
+    planning sections.
+
+    Returns:
+        TaskBreakdown, or None when no usable breakdown could be generated
+    """
+    project = planning_doc.project
+    source_hash = breakdown_source_hash(planning_doc, roles)
+    cached = TaskBreakdown.objects.filter(project=project).first()
+    if cached and cached.source_hash == source_hash:
+        return cached
+
+    client = get_opencode_client()
+    if not client.api_key:
+        return None
+    result = client.generate_task_breakdown(
+        planning_doc.full_document, roles,
+        existing_tasks=cached.tasks if cached else None
+    )
+    if not result.get('success'):
+        print(f"⚠️ Task breakdown failed: {result.get('error', 'unknown error')}")
+        return None
+
+    raw = result['tasks']
+    nodes, repairs = build_task_graph(
+        raw.get('tasks') if isinstance(raw, dict) else raw,
+        reserved_keys=('setup', 'tests')
+    )
+    if not nodes:
+        print("⚠️ Task breakdown contained no usable tasks")
+        return None
+
+    hashes = section_hashes(planning_doc)
+    if cached:
+        # Breakdowns stored before section hashes were recorded count as fully changed
+        changed = [
+            section for section in TASK_SECTIONS
+            if not cached.section_hashes or cached.section_hashes.get(section) != hashes[section]
+        ]
+        nodes, merge_repairs = merge_task_graph(cached.tasks, nodes, changed)
+        repairs += merge_repairs
+        print(f"🗂️ Merged task breakdown with the previous one (changed sections: {', '.join(changed) or 'none'})")
+    for repair in repairs:
+        print(f"🔧 Task graph repair: {repair}")
+
+    breakdown, _ = TaskBreakdown.objects.update_or_create(
+        project=project,
+        defaults={
+            'source_hash': source_hash,
+            'section_hashes': hashes,
+            'tasks': nodes,
+            'repairs': repairs,
+            'tokens_used': result.get('tokens_used', 0),
+        }
+    )
+    return breakdown
+
+# Made with Bob
@@ -0,0 +1,260 @@
+"""
+Token Budgets
+Ledger of the tokens and estimated cost of every LLM call and OpenCode
+execution, checked against project, user and run budgets: runs switch to
+cheaper models as a budget runs low and stop cleanly once it is spent
+"""
+import contextvars
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+from typing import Dict, Iterator, Optional
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from projects.models import Project
+from .models import Budget, LedgerEntry, Run
+
+# Share of a budget after which cheaper models are used
+DEGRADE_AT = float(os.environ.get('OPENCODE_BUDGET_DEGRADE_AT', 0.8))
+
+# Model for LLM API calls once a budget runs low
+FALLBACK_MODEL = os.environ.get('OPENCODE_FALLBACK_MODEL', 'gpt-4o-mini')
+
+# OpenCode CLI models (provider/model); unset leaves the choice to OpenCode, and
+# without a fallback executions keep their model however low the budget runs
+EXECUTION_MODEL = os.environ.get('OPENCODE_EXECUTION_MODEL') or None
+EXECUTION_FALLBACK_MODEL = os.environ.get('OPENCODE_EXECUTION_FALLBACK_MODEL') or None
+
+
+def _env_limit(name: str, cast=int):
+    value = os.environ.get(name)
+    return cast(value) if value else None
+
+
+def default_limits() -> Dict[str, Dict]:
+    """Budgets from settings, used where no Budget row sets a limit"""
+    return {
+        'project': {
+            'token_limit': _env_limit('OPENCODE_PROJECT_TOKEN_BUDGET'),
+            'cost_limit': _env_limit('OPENCODE_PROJECT_COST_BUDGET', float),
+        },
+        'user': {
+            'token_limit': _env_limit('OPENCODE_USER_TOKEN_BUDGET'),
+            'cost_limit': _env_limit('OPENCODE_USER_COST_BUDGET', float),
+        },
+        'run': {
+            'token_limit': _env_limit('OPENCODE_RUN_TOKEN_BUDGET'),
+            'cost_limit': _env_limit('OPENCODE_RUN_COST_BUDGET', float),
+        },
+    }
+
+
+def ledger_usage(project_id: Optional[int] = None, user_id: Optional[int] = None) -> Dict:
+    """
+    Tokens and cost counted against a project budget (lifetime) or a user
+    budget (this calendar month)
+    """
+    if project_id is not None:
+        entries = LedgerEntry.objects.filter(project_id=project_id)
+    else:
+        month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        entries = LedgerEntry.objects.filter(user_id=user_id, created_at__gte=month_start)
+    totals = entries.aggregate(
+        prompt_tokens=Sum('prompt_tokens'), completion_tokens=Sum('completion_tokens'), cost=Sum('cost')
+    )
+    return {
+        'tokens': (totals['prompt_tokens'] or 0) + (totals['completion_tokens'] or 0),
+        'cost': totals['cost'] or 0.0,
+    }
+
+
+class BudgetGuard:
+    """
+    Debits a project's calls to the ledger and tracks its budgets
+
+    The state is the most constrained of the project budget (lifetime), the
+    owner's budget (this calendar month) and the run budget: 'ok', 'degraded'
+    (DEGRADE_AT reached: cheaper models) or 'exceeded' (nothing new may start).
+    """
+
+    def __init__(self, project: Project, db_lock: Optional[threading.Lock] = None):
+        self.project = project
+        self.user_id = project.created_by_id
+        self.run: Optional[Run] = None
+        self._db_lock = db_lock or nullcontext()
+        self._lock = threading.Lock()
+        self.spent = {'prompt_tokens': 0, 'completion_tokens': 0, 'cost': 0.0, 'calls': 0}
+        self.degraded_calls = 0
+        self.stopped = False
+
+    def limits(self) -> Dict[str, Dict]:
+        limits = default_limits()
+        for budget in Budget.objects.filter(project=self.project) | Budget.objects.filter(user_id=self.user_id):
+            scope = limits['project' if budget.project_id else 'user']
+            if budget.token_limit is not None:
+                scope['token_limit'] = budget.token_limit
+            if budget.cost_limit is not None:
+                scope['cost_limit'] = budget.cost_limit
+        return limits
+
+    def _used(self, scope: str) -> Dict:
+        if scope == 'run':
+            with self._lock:
+                return {
+                    'tokens': self.spent['prompt_tokens'] + self.spent['completion_tokens'],
+                    'cost': self.spent['cost'],
+                }
+        if scope == 'project':
+            return ledger_usage(project_id=self.project.id)
+        return ledger_usage(user_id=self.user_id)
+
+    def status(self) -> Dict:
+        """
+        Usage against every limited budget
+
+        Returns:
+            {'state', 'ratio' (highest share used), 'reason', 'scopes': {scope: usage and limits}}
+        """
+        scopes, ratio, reason = {}, 0.0, ''
+        for scope, limit in self.limits().items():
+            if limit['token_limit'] is None and limit['cost_limit'] is None:
+                continue
+            used = self._used(scope)
+            scopes[scope] = {**used, **limit}
+            for used_value, limit_value, unit in (
+                (used['tokens'], limit['token_limit'], 'tokens'),
+                (used['cost'], limit['cost_limit'], 'cost'),
+            ):
+                if limit_value is None:
+                    continue
+                share = used_value / limit_value if limit_value > 0 else 1.0
+                if share > ratio:
+                    ratio, reason = share, f"{scope} {unit} budget {share:.0%} used"
+        state = 'exceeded' if ratio >= 1.0 else 'degraded' if ratio >= DEGRADE_AT else 'ok'
+        return {'state': state, 'ratio': round(ratio, 3), 'reason': reason, 'scopes': scopes}
+
+    def model_for(self, preferred: Optional[str], fallback: Optional[str]) -> Optional[str]:
+        """The preferred model, or the fallback once the budget is running low"""
+        if fallback and self.status()['state'] != 'ok':
+            with self._lock:
+                self.degraded_calls += 1
+            return fallback
+        return preferred
+
+    def stop(self) -> bool:
+        """Mark the run as stopped by its budget; True only for the first caller"""
+        with self._lock:
+            first, self.stopped = not self.stopped, True
+        return first
+
+    def debit(self, source: str, usage: Dict, task_key: str = '') -> LedgerEntry:
+        """Record a call's usage (see usage.usage_from_output for the shape)"""
+        with self._lock:
+            self.spent['prompt_tokens'] += usage['prompt_tokens']
+            self.spent['completion_tokens'] += usage['completion_tokens']
+            self.spent['cost'] += usage['cost']
+            self.spent['calls'] += 1
+        with self._db_lock:
+            return LedgerEntry.objects.create(
+                project=self.project,
+                user_id=self.user_id,
+                run=self.run,
+                task_key=task_key,
+                source=source,
+                model=usage.get('model') or '',
+                prompt_tokens=usage['prompt_tokens'],
+                completion_tokens=usage['completion_tokens'],
+                cost=usage['cost'],
+                estimated=usage.get('estimated', False),
+            )
+
+    def summary(self) -> Dict:
+        """What this guard debited, and the budget state it left"""
+        with self._lock:
+            spent = dict(self.spent, cost=round(self.spent['cost'], 6))
+        return {
+            **spent,
+            'degraded_calls': self.degraded_calls,
+            'stopped': self.stopped,
+            'status': self.status(),
+        }
+
+
+_current_guard: contextvars.ContextVar = contextvars.ContextVar('current_budget', default=None)
+
+
+@contextmanager
+def budget_scope(guard: BudgetGuard) -> Iterator[BudgetGuard]:
+    """LLM API calls made inside the block are checked against and debited to the guard"""
+    token = _current_guard.set(guard)
+    try:
+        yield guard
+    finally:
+        _current_guard.reset(token)
+
+
+def current_budget() -> Optional[BudgetGuard]:
+    return _current_guard.get()
+
+
+def usage_report(days: int = 30, **filters) -> Dict:
+    """
+    Aggregated ledger usage
+
+    Args:
+        days: Only entries from the last this many days (0 for all)
+        filters: LedgerEntry filters, e.g. project=project or user=user
+
+    Returns:
+        Totals plus breakdowns by source, model, project and day
+    """
+    entries = LedgerEntry.objects.filter(**filters)
+    if days:
+        entries = entries.filter(created_at__gte=timezone.now() - timedelta(days=days))
+    sums = dict(
+        calls=Count('id'),
+        prompt_tokens=Sum('prompt_tokens'),
+        completion_tokens=Sum('completion_tokens'),
+        cost=Sum('cost'),
+    )
+
+    def rows(*fields):
+        return [
+            {
+                **{field: row[field] for field in fields},
+                'calls': row['calls'],
+                'prompt_tokens': row['prompt_tokens'] or 0,
+                'completion_tokens': row['completion_tokens'] or 0,
+                'cost': round(row['cost'] or 0.0, 6),
+            }
+            for row in entries.values(*fields).annotate(**sums).order_by('-cost')
+        ]
+
+    totals = entries.aggregate(**sums)
+    by_day = entries.annotate(day=TruncDate('created_at')).values('day').annotate(**sums).order_by('day')
+    return {
+        'days': days,
+        'calls': totals['calls'],
+        'prompt_tokens': totals['prompt_tokens'] or 0,
+        'completion_tokens': totals['completion_tokens'] or 0,
+        'cost': round(totals['cost'] or 0.0, 6),
+        'estimated_calls': entries.filter(estimated=True).count(),
+        'by_source': rows('source'),
+        'by_model': rows('model'),
+        'by_project': rows('project', 'project__name'),
+        'by_day': [
+            {
+                'day': row['day'].isoformat(),
+                'calls': row['calls'],
+                'tokens': (row['prompt_tokens'] or 0) + (row['completion_tokens'] or 0),
+                'cost': round(row['cost'] or 0.0, 6),
+            }
+            for row in by_day
+        ],
+    }
+
+# Made with Bob
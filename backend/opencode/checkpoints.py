@@ -0,0 +1,145 @@
+"""
+Task Checkpoints
+Persists completed development tasks with input fingerprints so a restarted or
+re-triggered run resumes at the first incomplete task, and an edited planning
+document only re-runs the tasks built from the changed sections
+"""
+import hashlib
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from projects.models import Project
+from .delta import LocalTree
+from .models import TaskCheckpoint
+
+# Planning document fields that task prompts are built from
+PLANNING_SECTIONS = (
+    'executive_summary',
+    'technical_requirements',
+    'feature_specifications',
+    'tech_stack',
+)
+
+
+def _sha256(*parts: str) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part.encode())
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def section_hashes(planning_doc) -> Dict[str, str]:
+    """Hash each planning section (JSON sections in canonical form)"""
+    hashes = {}
+    for section in PLANNING_SECTIONS:
+        value = getattr(planning_doc, section)
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True)
+        hashes[section] = _sha256(value)
+    return hashes
+
+
+class CheckpointStore:
+    """
+    Fingerprints and checkpoints the tasks of one development run
+
+    A task's inputs are its prompt, the planning sections listed in its
+    'sections' and the workspace it builds on. The workspace part is the output
+    trees of its dependencies, so a task is re-run whenever an upstream task was
+    re-run with a different result. A checkpoint is only reused while the task's
+    own files are still in the workspace as it left them.
+    """
+
+    def __init__(self, project: Project, project_dir: str, planning_doc):
+        self.project = project
+        self.tree = LocalTree(project_dir)
+        self.section_hashes = section_hashes(planning_doc)
+        self._checkpoints: Dict[str, TaskCheckpoint] = {
+            checkpoint.task_key: checkpoint
+            for checkpoint in TaskCheckpoint.objects.filter(project=project)
+        }
+        # task id -> output tree hash of the task in this run
+        self._outputs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def tree_hash(self, paths: Iterable[str]) -> str:
+        """Content hash of the given workspace paths (missing paths hash as deleted)"""
+        paths = sorted(set(paths))
+        manifest = self.tree.manifest(paths)
+        return _sha256(*(f"{path}:{manifest[path][0] if path in manifest else '-'}" for path in paths))
+
+    def fingerprint(self, task: Dict) -> Dict:
+        """Input fingerprints of a task; its dependencies must have finished"""
+        with self._lock:
+            upstream = [f"{dep}:{self._outputs.get(dep, '')}" for dep in sorted(task.get('dependencies', []))]
+        return {
+            'prompt_hash': _sha256(task['prompt']),
+            'section_hashes': {s: self.section_hashes[s] for s in task.get('sections', [])},
+            'input_tree_hash': _sha256(*upstream),
+        }
+
+    def changed_sections(self) -> List[str]:
+        """Planning sections that differ from the ones used by the checkpointed tasks"""
+        changed = set()
+        for checkpoint in self._checkpoints.values():
+            for section, digest in checkpoint.section_hashes.items():
+                if self.section_hashes.get(section) != digest:
+                    changed.add(section)
+        return sorted(changed)
+
+    def reusable(self, task: Dict, fingerprint: Dict) -> Tuple[Optional[TaskCheckpoint], str]:
+        """
+        Return the task's checkpoint if its inputs and outputs are unchanged
+
+        Returns:
+            (checkpoint or None, reason the task has to run)
+        """
+        checkpoint = self._checkpoints.get(task['id'])
+        if checkpoint is None:
+            return None, 'not completed before'
+
+        changed = sorted(
+            section for section, digest in fingerprint['section_hashes'].items()
+            if checkpoint.section_hashes.get(section) != digest
+        )
+        if changed:
+            return None, f"planning sections changed ({', '.join(changed)})"
+        if checkpoint.prompt_hash != fingerprint['prompt_hash']:
+            return None, 'prompt changed'
+        if checkpoint.input_tree_hash != fingerprint['input_tree_hash']:
+            return None, 'dependencies produced new output'
+        if self.tree_hash(checkpoint.paths) != checkpoint.output_tree_hash:
+            return None, 'its files were modified in the workspace'
+
+        with self._lock:
+            self._outputs[task['id']] = checkpoint.output_tree_hash
+        return checkpoint, ''
+
+    def save(self, task: Dict, fingerprint: Dict, paths: List[str], result: Dict) -> TaskCheckpoint:
+        """Record a completed task"""
+        output_tree_hash = self.tree_hash(paths)
+        checkpoint, _ = TaskCheckpoint.objects.update_or_create(
+            project=self.project,
+            task_key=task['id'],
+            defaults={
+                **fingerprint,
+                'output_tree_hash': output_tree_hash,
+                'paths': sorted(set(paths)),
+                'result': result,
+            }
+        )
+        with self._lock:
+            self._checkpoints[task['id']] = checkpoint
+            self._outputs[task['id']] = output_tree_hash
+        return checkpoint
+
+    def invalidate(self, task: Dict):
+        """Forget a task's checkpoint after it failed or was re-run without success"""
+        TaskCheckpoint.objects.filter(project=self.project, task_key=task['id']).delete()
+        with self._lock:
+            self._checkpoints.pop(task['id'], None)
+            self._outputs.pop(task['id'], None)
+
+# Made with Bob
@@ -8,6 +8,9 @@ from typing import Dict, List, Optional, Generator
 from django.conf import settings
 import json
 
+from .budget import FALLBACK_MODEL, current_budget
+from .usage import CHARS_PER_TOKEN, estimate_cost, estimate_tokens
+
 
 class OpenCodeClient:
     """Client for interacting with OpenCode API"""
@@ -75,7 +78,22 @@ class OpenCodeClient:
         
         Returns:
             Generated code and metadata
+        
+        Inside a budget_scope the call is refused once the budget is spent, uses
+        the fallback model once it runs low, and is debited to the ledger.
         """
+        budget = current_budget()
+        if budget is not None:
+            status = budget.status()
+            if status['state'] == 'exceeded':
+                return {
+                    'success': False,
+                    'error': f"Budget exceeded: {status['reason']}",
+                    'budget_exceeded': True,
+                    'content': None
+                }
+            model = budget.model_for(model, FALLBACK_MODEL)
+        
         payload = {
             'model': model,
             'messages': [
@@ -88,7 +106,7 @@ class OpenCodeClient:
         
         try:
             if stream:
-                return self._stream_generate(payload)
+                return self._stream_generate(payload, budget)
             else:
                 response = requests.post(
                     f'{self.base_url}/chat/completions',
@@ -98,12 +116,27 @@ class OpenCodeClient:
                 )
                 response.raise_for_status()
                 data = response.json()
+                usage = data.get('usage', {})
+                content = data['choices'][0]['message']['content']
+                prompt_tokens = usage.get('prompt_tokens', estimate_tokens(prompt))
+                completion_tokens = usage.get('completion_tokens', estimate_tokens(content))
+                
+                if budget is not None:
+                    budget.debit('llm', {
+                        'model': data['model'],
+                        'prompt_tokens': prompt_tokens,
+                        'completion_tokens': completion_tokens,
+                        'cost': estimate_cost(data['model'], prompt_tokens, completion_tokens),
+                        'estimated': not usage,
+                    })
                 
                 return {
                     'success': True,
-                    'content': data['choices'][0]['message']['content'],
+                    'content': content,
                     'model': data['model'],
-                    'tokens_used': data.get('usage', {}).get('total_tokens', 0),
+                    'tokens_used': usage.get('total_tokens', prompt_tokens + completion_tokens),
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
                     'finish_reason': data['choices'][0].get('finish_reason')
                 }
         except requests.exceptions.RequestException as e:
@@ -113,8 +146,9 @@ class OpenCodeClient:
                 'content': None
             }
     
-    def _stream_generate(self, payload: Dict) -> Generator:
-        """Stream generation response"""
+    def _stream_generate(self, payload: Dict, budget=None) -> Generator:
+        """Stream generation response (debited by estimate when the stream ends)"""
+        streamed = 0
         try:
             response = requests.post(
                 f'{self.base_url}/chat/completions',
@@ -136,11 +170,23 @@ class OpenCodeClient:
                             chunk = json.loads(data)
                             content = chunk['choices'][0]['delta'].get('content', '')
                             if content:
+                                streamed += len(content)
                                 yield content
                         except json.JSONDecodeError:
                             continue
         except requests.exceptions.RequestException as e:
             yield f"Error: {str(e)}"
+        finally:
+            if budget is not None:
+                prompt_tokens = estimate_tokens(payload['messages'][0]['content'])
+                completion_tokens = (streamed + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+                budget.debit('llm', {
+                    'model': payload['model'],
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'cost': estimate_cost(payload['model'], prompt_tokens, completion_tokens),
+                    'estimated': True,
+                })
     
     def analyze_requirements(self, requirements: List[Dict]) -> Dict:
         """
@@ -263,17 +309,32 @@ Format the output in Markdown.
         
         return result
     
-    def generate_task_breakdown(self, prd_content: str, agent_roles: List[str]) -> Dict:
+    def generate_task_breakdown(
+        self,
+        prd_content: str,
+        agent_roles: List[str],
+        existing_tasks: Optional[List[Dict]] = None
+    ) -> Dict:
         """
         Break down PRD into specific tasks for agents
         
         Args:
             prd_content: PRD document content
             agent_roles: List of available agent roles
+            existing_tasks: Tasks of an earlier breakdown of this PRD, whose ids
+                should be kept for work that is still needed
         
         Returns:
             Task breakdown with assignments
         """
+        existing = ''
+        if existing_tasks:
+            listed = '\n'.join(f"- {task['key']}: {task['title']}" for task in existing_tasks)
+            existing = f"""
+Existing Tasks (from an earlier version of this PRD; reuse the id and title of
+every task that is still needed):
+{listed}
+"""
         prompt = f"""
 Based on the following PRD, create a detailed task breakdown for the development team.
 
@@ -282,27 +343,31 @@ Available Team Roles:
 
 PRD:
 {prd_content}
-
+{existing}
 Generate a task list in JSON format:
 {{
     "tasks": [
         {{
+            "id": "short-task-id",
             "title": "Task title",
             "description": "Detailed description",
             "assigned_role": "role_name",
             "priority": "high|medium|low",
             "estimated_hours": 8,
-            "dependencies": ["task_id1", "task_id2"],
-            "deliverables": ["deliverable1", "deliverable2"]
+            "dependencies": ["id-of-prerequisite-task"],
+            "deliverables": ["deliverable1", "deliverable2"],
+            "sections": ["feature_specifications"]
         }}
     ]
 }}
 
 Ensure tasks are:
 1. Specific and actionable
-2. Properly sequenced with dependencies
-3. Assigned to appropriate roles
-4. Include clear deliverables
+2. Properly sequenced with dependencies (referencing task ids)
+3. Small enough to be implemented independently, so unrelated tasks can run in parallel
+4. Assigned to appropriate roles
+5. Include clear deliverables
+6. Tagged with the PRD sections they are derived from (executive_summary, technical_requirements, feature_specifications)
 """
         
         result = self.generate_code(
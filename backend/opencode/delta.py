@@ -0,0 +1,266 @@
+"""
+Delta Sync
+rsync-style rolling-checksum deltas for keeping workspace copies in sync
+"""
+import hashlib
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .executor import INTERNAL_FILE_PREFIX, SNAPSHOT_IGNORED_DIRS
+
+# Block size for signatures; small enough that edits in source files only resend a few KB
+BLOCK_SIZE = 2048
+
+# Files above this size are sent whole (compressed) instead of rolling over every byte
+MAX_DELTA_BYTES = 4 * 1024 * 1024
+
+_MOD = 1 << 16
+
+
+def _weak(block: bytes) -> Tuple[int, int]:
+    """Adler-style checksum components (a, b) of a block"""
+    a = sum(block) % _MOD
+    b = sum((len(block) - i) * byte for i, byte in enumerate(block)) % _MOD
+    return a, b
+
+
+def _strong(block: bytes) -> bytes:
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def signature(data: bytes, block_size: int = BLOCK_SIZE) -> Dict:
+    """
+    Compute block signatures of the receiver's copy of a file
+
+    Returns:
+        Dictionary with block_size, length and (weak, strong) checksum per block
+    """
+    blocks = []
+    for offset in range(0, len(data), block_size):
+        block = data[offset:offset + block_size]
+        a, b = _weak(block)
+        blocks.append(((b << 16) | a, _strong(block)))
+    return {'block_size': block_size, 'length': len(data), 'blocks': blocks}
+
+
+def delta(sig: Optional[Dict], data: bytes) -> List[Tuple]:
+    """
+    Encode data as operations against a signature
+
+    Operations are ('copy', first_block, block_count) or ('data', zlib-compressed bytes).
+    Without a signature (new file) or for very large files the data is sent whole.
+    """
+    ops: List[Tuple] = []
+
+    def literal(chunk: bytes):
+        if chunk:
+            ops.append(('data', zlib.compress(chunk)))
+
+    def copy(index: int):
+        if ops and ops[-1][0] == 'copy' and ops[-1][1] + ops[-1][2] == index:
+            ops[-1] = ('copy', ops[-1][1], ops[-1][2] + 1)
+        else:
+            ops.append(('copy', index, 1))
+
+    if not sig or not sig['blocks'] or len(data) > MAX_DELTA_BYTES:
+        literal(data)
+        return ops
+
+    block_size = sig['block_size']
+    blocks = sig['blocks']
+    last_length = sig['length'] - (len(blocks) - 1) * block_size
+    table: Dict[int, List[int]] = {}
+    for index, (weak, _) in enumerate(blocks):
+        # Only full-size blocks can match a rolling window
+        if index < len(blocks) - 1 or last_length == block_size:
+            table.setdefault(weak, []).append(index)
+
+    n = len(data)
+    pos = literal_start = 0
+    if n >= block_size:
+        a, b = _weak(data[:block_size])
+
+    while pos + block_size <= n:
+        candidates = table.get((b << 16) | a)
+        if candidates:
+            strong = _strong(data[pos:pos + block_size])
+            match = next((i for i in candidates if blocks[i][1] == strong), None)
+            if match is not None:
+                literal(data[literal_start:pos])
+                copy(match)
+                pos += block_size
+                literal_start = pos
+                if pos + block_size <= n:
+                    a, b = _weak(data[pos:pos + block_size])
+                continue
+
+        # Roll the window one byte forward
+        if pos + block_size < n:
+            outgoing, incoming = data[pos], data[pos + block_size]
+            a = (a - outgoing + incoming) % _MOD
+            b = (b - block_size * outgoing + a) % _MOD
+        pos += 1
+
+    # A short final block can only match at the very end of the data
+    tail_start = n - last_length
+    if (last_length < block_size and tail_start >= literal_start
+            and _strong(data[tail_start:]) == blocks[-1][1]):
+        literal(data[literal_start:tail_start])
+        copy(len(blocks) - 1)
+    else:
+        literal(data[literal_start:])
+    return ops
+
+
+def patch(old: bytes, ops: Iterable[Tuple], block_size: int = BLOCK_SIZE) -> bytes:
+    """Rebuild the new file from the receiver's old copy and delta operations"""
+    out = bytearray()
+    for op in ops:
+        if op[0] == 'copy':
+            start = op[1] * block_size
+            out += old[start:start + op[2] * block_size]
+        else:
+            out += zlib.decompress(op[1])
+    return bytes(out)
+
+
+class LocalTree:
+    """
+    One side of a workspace sync, backed by a local directory.
+
+    RemoteTree in remote.py exposes the same methods over RPC, so sync_trees()
+    works in either direction.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # path -> (mtime_ns, size, digest) so unchanged files are not re-hashed
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+
+    def _resolve(self, relative_path: str) -> Path:
+        path = (self.root / relative_path).resolve()
+        if os.path.isabs(relative_path) or not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Path escapes workspace: {relative_path}")
+        return path
+
+    def _walk(self) -> Iterable[str]:
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SNAPSHOT_IGNORED_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and not entry.name.startswith(INTERNAL_FILE_PREFIX):
+                    yield os.path.relpath(entry.path, self.root)
+
+    def manifest(self, paths: Optional[List[str]] = None) -> Dict[str, Tuple[str, int]]:
+        """
+        Map relative path -> (sha256, mode) for the whole tree or the given paths
+
+        Paths that do not exist are left out.
+        """
+        manifest = {}
+        for relative_path in (self._walk() if paths is None else paths):
+            try:
+                stat = self._resolve(relative_path).stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            cached = self._digests.get(relative_path)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                digest = cached[2]
+            else:
+                digest = hashlib.sha256(self._resolve(relative_path).read_bytes()).hexdigest()
+                self._digests[relative_path] = (stat.st_mtime_ns, stat.st_size, digest)
+            manifest[relative_path] = (digest, stat.st_mode & 0o777)
+        return manifest
+
+    def signatures(self, paths: List[str]) -> Dict[str, Dict]:
+        """Block signatures of existing files, used by the sender to build deltas"""
+        sigs = {}
+        for relative_path in paths:
+            try:
+                sigs[relative_path] = signature(self._resolve(relative_path).read_bytes())
+            except FileNotFoundError:
+                continue
+        return sigs
+
+    def deltas(self, requests: Dict[str, Optional[Dict]]) -> Dict[str, List[Tuple]]:
+        """Encode requested files against the receiver's signatures (None = send whole)"""
+        return {
+            relative_path: delta(sig, self._resolve(relative_path).read_bytes())
+            for relative_path, sig in requests.items()
+        }
+
+    def apply(self, deltas: Dict[str, List[Tuple]], modes: Dict[str, int],
+              deleted: List[str] = ()) -> int:
+        """
+        Rebuild changed files from deltas and remove deleted ones
+
+        Returns:
+            Number of files written
+        """
+        for relative_path, ops in deltas.items():
+            path = self._resolve(relative_path)
+            old = path.read_bytes() if path.is_file() else b''
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{INTERNAL_FILE_PREFIX}{path.name}.tmp")
+            tmp_path.write_bytes(patch(old, ops))
+            tmp_path.chmod(modes.get(relative_path, 0o644))
+            os.replace(tmp_path, path)
+            self._digests.pop(relative_path, None)
+
+        for relative_path in deleted:
+            self._resolve(relative_path).unlink(missing_ok=True)
+            self._digests.pop(relative_path, None)
+        return len(deltas)
+
+
+def sync_trees(source, destination, paths: Optional[List[str]] = None,
+               deleted: Optional[List[str]] = None) -> Dict:
+    """
+    Make destination match source
+
+    Args:
+        source: LocalTree or RemoteTree holding the up-to-date files
+        destination: LocalTree or RemoteTree to update
+        paths: Only sync these paths (None mirrors the whole tree)
+        deleted: With paths, paths removed on the source side
+
+    Returns:
+        Dictionary with transfer statistics
+    """
+    source_manifest = source.manifest(paths)
+    destination_manifest = destination.manifest(paths)
+
+    changed = [p for p, entry in source_manifest.items() if destination_manifest.get(p) != entry]
+    if paths is None:
+        removed = [p for p in destination_manifest if p not in source_manifest]
+    else:
+        removed = [p for p in (deleted or []) if p in destination_manifest and p not in source_manifest]
+
+    # Files whose content differs get a delta; mode-only changes resend nothing but a copy
+    existing = [p for p in changed if p in destination_manifest]
+    sigs = destination.signatures(existing) if existing else {}
+    deltas = source.deltas({p: sigs.get(p) for p in changed}) if changed else {}
+
+    if deltas or removed:
+        destination.apply(deltas, {p: source_manifest[p][1] for p in changed}, removed)
+
+    literal_bytes = sum(len(op[1]) for ops in deltas.values() for op in ops if op[0] == 'data')
+    copied_blocks = sum(op[2] for ops in deltas.values() for op in ops if op[0] == 'copy')
+    return {
+        'files_sent': len(deltas),
+        'files_deleted': len(removed),
+        'literal_bytes': literal_bytes,
+        'matched_bytes': copied_blocks * BLOCK_SIZE,
+    }
+
+# Made with Bob
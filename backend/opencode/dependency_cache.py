@@ -0,0 +1,233 @@
+"""
+Dependency Cache
+Shares installed dependency trees (node_modules, .venv) across generated projects
+"""
+import hashlib
+import logging
+import os
+import platform
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fsutil import BACKEND_DIR, clone_tree, locked_json_file, tree_size
+
+logger = logging.getLogger(__name__)
+
+# Installed directory -> lockfiles that pin its content (first match wins).
+# Restored virtualenvs keep their site-packages usable via `python -m`, but
+# console-script shebangs still point at the workspace that populated the cache.
+DEPENDENCY_DIRS = {
+    'node_modules': ['package-lock.json', 'yarn.lock', 'pnpm-lock.yaml'],
+    '.venv': ['poetry.lock', 'Pipfile.lock', 'uv.lock', 'requirements.txt'],
+}
+
+# A restore pins its entry against eviction while it clones (outside the index
+# lock); pins of a process that died expire after this long
+RESTORE_PIN_SECONDS = 3600
+
+
+class DependencyCache:
+    """
+    Content-addressed cache of installed dependencies.
+
+    Entries are keyed by the hash of the lockfile (plus platform), stored once,
+    and cloned into new workspaces. The cache is bounded by total size with
+    least-recently-used eviction.
+
+    Restores use copy-on-write clones ('reflink', a plain copy where the
+    filesystem has no support). 'hardlink' is faster but opt-in only: linked
+    files share inodes with the cache, so a workspace that patches or
+    reinstalls a package in place corrupts the entry for every other project.
+    """
+
+    def __init__(self, root: str, max_bytes: int, link_mode: str = 'reflink'):
+        self.root = Path(root)
+        self.entries_dir = self.root / 'entries'
+        self.index_path = self.root / 'index.json'
+        self.max_bytes = max_bytes
+        self.link_mode = link_mode
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked_index(self):
+        """Load the index under a cross-process lock and save it on exit"""
+        with self._lock, locked_json_file(self.index_path) as index:
+            index.setdefault('entries', {})
+            index.setdefault('stats', {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0})
+            yield index
+
+    @staticmethod
+    def cache_key(dir_name: str, lockfile: Path) -> str:
+        """Hash of the lockfile content, scoped to the directory kind and platform"""
+        sha = hashlib.sha256()
+        sha.update(f"{dir_name}\0{platform.system()}\0{platform.machine()}\0".encode())
+        sha.update(lockfile.read_bytes())
+        return sha.hexdigest()
+
+    def _find_lockfile(self, workspace: Path, dir_name: str) -> Optional[Path]:
+        for name in DEPENDENCY_DIRS[dir_name]:
+            lockfile = workspace / name
+            if lockfile.is_file():
+                return lockfile
+        return None
+
+    def restore(self, workspace: str) -> List[str]:
+        """
+        Clone cached dependencies into a workspace that has a lockfile but no installed tree
+
+        Returns:
+            List of restored directory names
+        """
+        workspace = Path(workspace)
+        restored = []
+
+        for dir_name in DEPENDENCY_DIRS:
+            target = workspace / dir_name
+            lockfile = self._find_lockfile(workspace, dir_name)
+            if lockfile is None or target.exists():
+                continue
+
+            key = self.cache_key(dir_name, lockfile)
+            pin = f"{os.getpid()}.{threading.get_ident()}"
+            with self._locked_index() as index:
+                entry = index['entries'].get(key)
+                if entry is None:
+                    index['stats']['misses'] += 1
+                    continue
+                entry.setdefault('pins', {})[pin] = time.time() + RESTORE_PIN_SECONDS
+
+            # Clone outside the lock: without reflink support this is a full copy
+            try:
+                clone_tree(self.entries_dir / key / dir_name, target, self.link_mode)
+                error = None
+            except (OSError, shutil.Error) as e:
+                error = e
+                shutil.rmtree(target, ignore_errors=True)
+
+            with self._locked_index() as index:
+                entry = index['entries'].get(key)
+                if entry is not None:
+                    entry.get('pins', {}).pop(pin, None)
+                if error is not None:
+                    logger.warning(f"Failed to restore {dir_name} from cache: {error}")
+                    index['stats']['misses'] += 1
+                    continue
+                if entry is not None:
+                    entry['last_used'] = time.time()
+                    entry['hits'] = entry.get('hits', 0) + 1
+                index['stats']['hits'] += 1
+
+            restored.append(dir_name)
+            logger.info(f"Restored {dir_name} from dependency cache ({key[:12]})")
+
+        return restored
+
+    def store(self, workspace: str) -> List[str]:
+        """
+        Add installed dependency trees from a workspace to the cache
+
+        Returns:
+            List of stored directory names
+        """
+        workspace = Path(workspace)
+        stored = []
+
+        for dir_name in DEPENDENCY_DIRS:
+            source = workspace / dir_name
+            lockfile = self._find_lockfile(workspace, dir_name)
+            if lockfile is None or not source.is_dir():
+                continue
+
+            key = self.cache_key(dir_name, lockfile)
+            entry_dir = self.entries_dir / key
+            if entry_dir.exists():
+                continue
+
+            # Copy (not link) so later in-place edits in the workspace cannot corrupt
+            # the cache; done outside the index lock since trees can be large
+            staging = self.entries_dir / f"{key}.{os.getpid()}.{threading.get_ident()}.partial"
+            try:
+                shutil.copytree(source, staging / dir_name, symlinks=True)
+            except (OSError, shutil.Error) as e:
+                logger.warning(f"Failed to cache {dir_name}: {e}")
+                shutil.rmtree(staging, ignore_errors=True)
+                continue
+
+            with self._locked_index() as index:
+                if key in index['entries']:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    continue
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(staging, entry_dir)
+
+                now = time.time()
+                index['entries'][key] = {
+                    'dir_name': dir_name,
+                    'lockfile': lockfile.name,
+                    'size': tree_size(entry_dir),
+                    'created_at': now,
+                    'last_used': now,
+                    'hits': 0,
+                }
+                index['stats']['stores'] += 1
+                self._evict(index, keep=key)
+
+            stored.append(dir_name)
+
+        return stored
+
+    def _evict(self, index: Dict, keep: Optional[str] = None):
+        """Evict least recently used entries until the cache fits in max_bytes (pinned ones excepted)"""
+        entries = index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        now = time.time()
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep or any(expires > now for expires in entries[key].get('pins', {}).values()):
+                continue
+            total -= entries[key]['size']
+            shutil.rmtree(self.entries_dir / key, ignore_errors=True)
+            del entries[key]
+            index['stats']['evictions'] += 1
+            logger.info(f"Evicted dependency cache entry {key[:12]}")
+
+    def get_stats(self) -> Dict:
+        """Get cache size and hit-rate metrics"""
+        with self._locked_index() as index:
+            stats = dict(index['stats'])
+            lookups = stats['hits'] + stats['misses']
+            return {
+                **stats,
+                'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0,
+                'entries': len(index['entries']),
+                'total_bytes': sum(e['size'] for e in index['entries'].values()),
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Singleton instance
+_cache_instance = None
+
+
+def get_dependency_cache() -> DependencyCache:
+    """Get or create the shared dependency cache"""
+    global _cache_instance
+    if _cache_instance is None:
+        root = os.environ.get(
+            'OPENCODE_DEPCACHE_DIR',
+            str(BACKEND_DIR.parent / 'dependency_cache')
+        )
+        _cache_instance = DependencyCache(
+            root,
+            max_bytes=int(os.environ.get('OPENCODE_DEPCACHE_MAX_MB', 20480)) * 1024 * 1024,
+            link_mode=os.environ.get('OPENCODE_DEPCACHE_LINK_MODE', 'reflink'),
+        )
+    return _cache_instance
+
+# Made with Bob
@@ -0,0 +1,185 @@
+"""
+Event Bus
+Publishes project task/agent/job state changes over Redis pub/sub so clients can
+receive them as pushed events instead of polling the REST API
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'mycompany:events:project:'
+
+# After a Redis error, drop events for this long instead of stalling every publish
+REDIS_RETRY_SECONDS = 30
+
+
+def _channel(project_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{project_id}"
+
+
+class Subscription(ABC):
+    """Stream of events for one project, consumed on an event loop"""
+
+    @abstractmethod
+    async def get(self, timeout: float) -> Optional[Dict]:
+        """Next event, or None when nothing arrived within timeout seconds"""
+
+    @abstractmethod
+    async def close(self):
+        """Stop receiving events"""
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, redis_url: str, project_id: int):
+        from redis import asyncio as aioredis
+        self._client = aioredis.Redis.from_url(redis_url, socket_connect_timeout=2)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._channel = _channel(project_id)
+
+    async def start(self) -> '_RedisSubscription':
+        await self._pubsub.subscribe(self._channel)
+        return self
+
+    async def get(self, timeout: float) -> Optional[Dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message and message['type'] == 'message':
+                return json.loads(message['data'])
+
+    async def close(self):
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+
+class _LocalSubscription(Subscription):
+    def __init__(self, bus: 'EventBus', project_id: int):
+        self._bus = bus
+        self._project_id = project_id
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+    def deliver(self, event: Dict):
+        """Hand an event over from the publishing thread"""
+        try:
+            self._loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def _offer(self, event: Dict):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass  # Slow client; it still gets a fresh snapshot on reconnect
+
+    async def get(self, timeout: float) -> Optional[Dict]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self._bus._unsubscribe(self._project_id, self)
+
+
+class EventBus:
+    """
+    Project event bus.
+
+    With a Redis URL events fan out to every process (Celery workers publish,
+    web processes stream them to clients). Without one, events are delivered
+    in-process only, which covers eager/local development.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url
+        self._client = None
+        if redis_url:
+            import redis
+            self._client = redis.Redis.from_url(redis_url, socket_connect_timeout=2)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._redis_down_until = 0.0
+        self._local: Dict[int, List[_LocalSubscription]] = {}
+
+    def publish(self, project_id: int, event_type: str, data: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Publish an event; failures are logged and never interrupt the caller
+
+        Returns:
+            The published event, or None if publishing failed
+        """
+        event = {
+            'type': event_type,
+            'project': project_id,
+            'data': data or {},
+            'timestamp': time.time(),
+        }
+        try:
+            if self._client is not None:
+                if time.monotonic() < self._redis_down_until:
+                    return None
+                event['id'] = self._client.incr(f"{_channel(project_id)}:seq")
+                self._client.publish(_channel(project_id), json.dumps(event, default=str))
+            else:
+                with self._lock:
+                    self._sequence += 1
+                    event['id'] = self._sequence
+                    subscribers = list(self._local.get(project_id, []))
+                for subscriber in subscribers:
+                    subscriber.deliver(event)
+        except Exception as e:
+            logger.warning(f"Failed to publish {event_type} event: {e}")
+            if self._client is not None:
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+            return None
+        return event
+
+    async def subscribe(self, project_id: int) -> Subscription:
+        """Subscribe to a project's events from an event loop (close() the subscription when done)"""
+        if self._client is not None:
+            return await _RedisSubscription(self.redis_url, project_id).start()
+
+        subscription = _LocalSubscription(self, project_id)
+        with self._lock:
+            self._local.setdefault(project_id, []).append(subscription)
+        return subscription
+
+    def _unsubscribe(self, project_id: int, subscription: _LocalSubscription):
+        with self._lock:
+            subscribers = self._local.get(project_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._local.pop(project_id, None)
+
+
+# Singleton instance
+_bus_instance = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Get or create the process-wide event bus (Redis when REDIS_URL is set)"""
+    global _bus_instance
+    with _bus_lock:
+        if _bus_instance is None:
+            _bus_instance = EventBus(os.environ.get('REDIS_URL') or None)
+        return _bus_instance
+
+
+def publish_event(project_id: int, event_type: str, **data) -> Optional[Dict]:
+    """Publish a project event on the process-wide bus"""
+    return get_event_bus().publish(project_id, event_type, data)
+
+# Made with Bob
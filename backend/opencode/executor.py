@@ -5,22 +5,50 @@ Executes OpenCode CLI commands to generate code
 import subprocess
 import json
 import os
-from typing import Dict, List, Optional
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
+from .sandbox import SandboxCancelled, SandboxPool, get_sandbox_pool
+from .dependency_cache import DependencyCache, get_dependency_cache
+from .progress import ProgressEstimator
+from .usage import usage_from_output
+
+# Directories never walked when snapshotting a workspace (VCS data, dependencies, caches)
+SNAPSHOT_IGNORED_DIRS = {
+    '.git', 'node_modules', '.venv', 'venv', '__pycache__',
+    '.next', '.pytest_cache', '.mypy_cache', '.cache',
+}
+
+# Executor-internal files that never belong to a change set
+INTERNAL_FILE_PREFIX = '.opencode_'
+
 
 class OpenCodeExecutor:
     """Execute OpenCode CLI commands"""
     
-    def __init__(self, project_path: str):
+    def __init__(
+        self,
+        project_path: str,
+        pool: Optional[SandboxPool] = None,
+        dependency_cache: Optional[DependencyCache] = None
+    ):
         """
         Initialize OpenCode executor
         
         Args:
             project_path: Path to the project directory where code will be generated
+            pool: Sandbox pool that runs OpenCode processes (defaults to the shared pool)
+            dependency_cache: Shared installed-dependency cache (defaults to the shared cache)
         """
         self.project_path = Path(project_path)
         self.project_path.mkdir(parents=True, exist_ok=True)
+        self.pool = pool or get_sandbox_pool()
+        self.dependency_cache = dependency_cache or get_dependency_cache()
+        self._git_lock = threading.Lock()
+        # Called as on_commit(sha, message) under the git lock, so in commit order
+        self.on_commit: Optional[Callable[[str, str], None]] = None
     
     def check_opencode_installed(self) -> bool:
         """Check if OpenCode CLI is installed"""
@@ -39,7 +67,11 @@ class OpenCodeExecutor:
         self,
         prompt: str,
         agent_role: str = 'build',
-        timeout: int = 300
+        timeout: int = 300,
+        on_progress: Optional[Callable[[int], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        model: Optional[str] = None,
+        on_usage: Optional[Callable[[Dict], None]] = None
     ) -> Dict:
         """
         Execute a task using OpenCode
@@ -48,6 +80,12 @@ class OpenCodeExecutor:
             prompt: The task prompt/instruction
             agent_role: OpenCode agent to use ('build', 'plan', 'general')
             timeout: Timeout in seconds
+            on_progress: Optional callback receiving progress estimates (0-95)
+                parsed from OpenCode's JSON events while it runs
+            cancel_event: Optional event that kills the OpenCode process when set
+            model: OpenCode model (provider/model) to use instead of its default
+            on_usage: Optional callback receiving the execution's token usage
+                (see usage.usage_from_output), successful or not
         
         Returns:
             Dictionary with execution results
@@ -59,8 +97,11 @@ class OpenCodeExecutor:
             }
         
         try:
-            # Create a temporary prompt file
-            prompt_file = self.project_path / '.opencode_prompt.txt'
+            # Link previously installed dependencies for existing lockfiles
+            restored = self.dependency_cache.restore(str(self.project_path))
+            
+            # Create a temporary prompt file (unique, tasks may share the workspace concurrently)
+            prompt_file = self.project_path / f'{INTERNAL_FILE_PREFIX}prompt_{uuid.uuid4().hex[:12]}.txt'
             prompt_file.write_text(prompt)
             
             # Execute OpenCode in the project directory
@@ -71,17 +112,31 @@ class OpenCodeExecutor:
                 '--non-interactive',
                 '--json-output'
             ]
+            if model:
+                cmd += ['--model', model]
             
-            result = subprocess.run(
-                cmd,
-                cwd=str(self.project_path),
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+            # Parse JSON events incrementally when someone is listening for progress
+            estimator = ProgressEstimator(timeout=timeout)
+
+            def on_stdout_line(line):
+                on_progress(estimator.feed_line(line))
+            
+            # Run inside the sandbox pool (waits for capacity, applies resource limits)
+            try:
+                result = self.pool.run(
+                    cmd,
+                    cwd=str(self.project_path),
+                    timeout=timeout,
+                    on_stdout_line=on_stdout_line if on_progress else None,
+                    cancel_event=cancel_event
+                )
+            finally:
+                # Clean up prompt file
+                prompt_file.unlink(missing_ok=True)
             
-            # Clean up prompt file
-            prompt_file.unlink(missing_ok=True)
+            usage = usage_from_output(prompt, result.stdout, model)
+            if on_usage:
+                on_usage(usage)
             
             if result.returncode == 0:
                 # Parse JSON output if available
@@ -90,25 +145,43 @@ class OpenCodeExecutor:
                 except json.JSONDecodeError:
                     output_data = {'raw_output': result.stdout}
                 
+                # Share whatever the task installed with later projects
+                stored = self.dependency_cache.store(str(self.project_path))
+                
                 return {
                     'success': True,
                     'output': output_data,
                     'stdout': result.stdout,
-                    'stderr': result.stderr
+                    'stderr': result.stderr,
+                    'dependency_cache': {'restored': restored, 'stored': stored},
+                    'progress': estimator.summary(),
+                    'usage': usage
                 }
             else:
                 return {
                     'success': False,
                     'error': f'OpenCode execution failed with code {result.returncode}',
                     'stdout': result.stdout,
-                    'stderr': result.stderr
+                    'stderr': result.stderr,
+                    'usage': usage
                 }
         
         except subprocess.TimeoutExpired:
+            # The prompt was still sent; debit what can be estimated
+            if on_usage:
+                on_usage(usage_from_output(prompt, '', model))
             return {
                 'success': False,
                 'error': f'OpenCode execution timed out after {timeout} seconds'
             }
+        except SandboxCancelled:
+            if on_usage:
+                on_usage(usage_from_output(prompt, '', model))
+            return {
+                'success': False,
+                'cancelled': True,
+                'error': 'OpenCode execution was cancelled'
+            }
         except Exception as e:
             return {
                 'success': False,
@@ -169,9 +242,148 @@ class OpenCodeExecutor:
                 files.append(str(relative_path))
         return files
     
+    def snapshot_workspace(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Take a cheap stat snapshot of the workspace
+        
+        Returns:
+            Mapping of relative path -> (mtime_ns, size)
+        """
+        snapshot = {}
+        stack = [self.project_path]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SNAPSHOT_IGNORED_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and not entry.name.startswith(INTERNAL_FILE_PREFIX):
+                    stat = entry.stat(follow_symlinks=False)
+                    relative_path = os.path.relpath(entry.path, self.project_path)
+                    snapshot[relative_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    @staticmethod
+    def diff_snapshots(
+        before: Dict[str, Tuple[int, int]],
+        after: Dict[str, Tuple[int, int]]
+    ) -> Dict[str, List[str]]:
+        """
+        Compute the change set between two workspace snapshots
+        
+        Returns:
+            Dictionary with sorted 'changed' (added or modified) and 'deleted' paths
+        """
+        changed = [path for path, stat in after.items() if before.get(path) != stat]
+        deleted = [path for path in before if path not in after]
+        return {'changed': sorted(changed), 'deleted': sorted(deleted)}
+    
+    def _git(self, *args: str, input: Optional[str] = None, check: bool = True) -> subprocess.CompletedProcess:
+        """Run a git command in the workspace"""
+        return subprocess.run(
+            ['git', *args],
+            cwd=str(self.project_path),
+            input=input,
+            capture_output=True,
+            text=True,
+            check=check
+        )
+    
+    def _ensure_git_repository(self):
+        """Initialize the workspace repository and commit identity if needed"""
+        if not (self.project_path / '.git').exists():
+            self._git('init', '-q')
+        if not self._git('config', 'user.email', check=False).stdout.strip():
+            self._git('config', 'user.name', os.environ.get('GIT_AUTHOR_NAME', 'OpenCode Agent'))
+            self._git('config', 'user.email', os.environ.get('GIT_AUTHOR_EMAIL', 'opencode-agent@localhost'))
+    
+    def commit_changes(
+        self,
+        changed: Iterable[str],
+        commit_message: str,
+        deleted: Iterable[str] = ()
+    ) -> Dict:
+        """
+        Commit exactly the given change set using git index plumbing
+        
+        Only the listed paths are staged (update-index), so the cost is
+        proportional to the change set rather than the workspace size.
+        
+        Args:
+            changed: Added or modified paths relative to the workspace
+            commit_message: Git commit message
+            deleted: Removed paths relative to the workspace
+        
+        Returns:
+            Dictionary with commit results
+        """
+        paths = list(dict.fromkeys([*changed, *deleted]))
+        if not paths:
+            return {'success': True, 'message': 'No changes to commit', 'files': 0}
+        
+        try:
+            with self._git_lock:
+                self._ensure_git_repository()
+                
+                # Respect .gitignore for the change set only
+                ignored = self._git(
+                    'check-ignore', '-z', '--stdin',
+                    input='\0'.join(paths) + '\0', check=False
+                ).stdout
+                ignored_paths = set(filter(None, ignored.split('\0')))
+                paths = [p for p in paths if p not in ignored_paths]
+                if not paths:
+                    return {'success': True, 'message': 'No changes to commit', 'files': 0}
+                
+                # Stage exactly these paths (--remove drops entries for deleted files)
+                self._git(
+                    'update-index', '--add', '--remove', '-z', '--stdin',
+                    input='\0'.join(paths) + '\0'
+                )
+                tree = self._git('write-tree').stdout.strip()
+                
+                parent = self._git('rev-parse', '-q', '--verify', 'HEAD', check=False).stdout.strip()
+                if parent and self._git('rev-parse', f'{parent}^{{tree}}').stdout.strip() == tree:
+                    return {'success': True, 'message': 'No changes to commit', 'files': 0}
+                
+                commit_args = ['commit-tree', tree, '-m', commit_message]
+                if parent:
+                    commit_args += ['-p', parent]
+                commit_sha = self._git(*commit_args).stdout.strip()
+                
+                update_args = ['update-ref', 'HEAD', commit_sha]
+                if parent:
+                    update_args.append(parent)
+                self._git(*update_args)
+                
+                if self.on_commit is not None:
+                    self.on_commit(commit_sha, commit_message)
+            
+            return {
+                'success': True,
+                'message': 'Successfully committed to git',
+                'commit': commit_sha,
+                'files': len(paths)
+            }
+        
+        except subprocess.CalledProcessError as e:
+            return {
+                'success': False,
+                'error': f'Git command failed: {e.stderr or str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Unexpected error: {str(e)}'
+            }
+    
     def commit_to_github(self, commit_message: str) -> Dict:
         """
-        Commit generated code to GitHub
+        Commit the whole workspace to git (full-tree fallback for commit_changes)
         
         Args:
             commit_message: Git commit message
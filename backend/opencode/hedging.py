@@ -0,0 +1,188 @@
+"""
+Hedged Execution
+Launches a duplicate attempt of a task that runs longer than its role usually
+takes; the first successful attempt wins and the other one is cancelled
+"""
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.db.models import Count, Q
+
+from .fsutil import clone_file
+from .models import TaskExecution
+
+# A task is hedged once it runs past this percentile of its role's successful durations
+HEDGE_PERCENTILE = float(os.environ.get('OPENCODE_HEDGE_PERCENTILE', 95))
+
+# Successful executions of a role needed before its tasks are hedged
+MIN_SAMPLES = int(os.environ.get('OPENCODE_HEDGE_MIN_SAMPLES', 10))
+
+# Never hedge earlier than this; duplicating short tasks costs more than it saves
+MIN_HEDGE_SECONDS = float(os.environ.get('OPENCODE_HEDGE_MIN_SECONDS', 30))
+
+# Most recent executions per role the percentile is computed from
+HISTORY_SAMPLES = 200
+
+# How often the coordinator checks the run's cancel event
+POLL_SECONDS = 0.5
+
+Attempt = Callable[[threading.Event], Dict]
+
+
+def hedging_enabled() -> bool:
+    return os.environ.get('OPENCODE_HEDGING', 'False').lower() == 'true'
+
+
+def hedge_threshold(role: str) -> Optional[float]:
+    """
+    Seconds after which a task of this role gets a duplicate attempt
+
+    Returns:
+        Threshold, or None while the role has too little history
+    """
+    durations = sorted(
+        TaskExecution.objects.filter(role=role, kind='task', success=True)
+        .values_list('duration_seconds', flat=True)[:HISTORY_SAMPLES]
+    )
+    if len(durations) < MIN_SAMPLES:
+        return None
+    index = min(len(durations) - 1, int(len(durations) * HEDGE_PERCENTILE / 100))
+    return max(durations[index], MIN_HEDGE_SECONDS)
+
+
+def hedge_stats(**filters) -> Dict:
+    """
+    Hedge rate (hedged / executions) and win rate (hedge finished first / hedged)
+
+    Args:
+        filters: TaskExecution filters, e.g. project=project or role='backend_developer'
+    """
+    counts = TaskExecution.objects.filter(**filters).aggregate(
+        executions=Count('id'),
+        hedged=Count('id', filter=Q(hedged=True)),
+        hedge_wins=Count('id', filter=Q(hedge_won=True)),
+    )
+    return {
+        **counts,
+        'hedge_rate': round(counts['hedged'] / counts['executions'], 3) if counts['executions'] else 0.0,
+        'win_rate': round(counts['hedge_wins'] / counts['hedged'], 3) if counts['hedged'] else 0.0,
+    }
+
+
+class IsolatedWorkspace:
+    """
+    Copy-on-write clone of a workspace's files as they were before a task ran
+
+    A hedged attempt runs in the clone so it neither sees nor clobbers the
+    primary attempt's partial output. Dependency directories are not cloned;
+    the executor restores them from the dependency cache.
+    """
+
+    def __init__(self, project_dir: str, paths: Iterable[str]):
+        self.source = Path(project_dir)
+        self.path = Path(tempfile.mkdtemp(prefix='opencode-hedge-'))
+        for relative_path in paths:
+            try:
+                clone_file(self.source / relative_path, self.path / relative_path, 'reflink')
+            except FileNotFoundError:
+                continue  # Deleted by a concurrently running task
+
+    def sync_back(self, paths: Iterable[str]):
+        """Make the given workspace paths match the clone (copied, or deleted if absent)"""
+        for relative_path in paths:
+            source, target = self.path / relative_path, self.source / relative_path
+            if source.is_file():
+                target.unlink(missing_ok=True)
+                clone_file(source, target, 'reflink')
+            else:
+                target.unlink(missing_ok=True)
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def run_hedged(
+    primary: Attempt,
+    start_hedge: Callable[[], Optional[Attempt]],
+    hedge_after: float,
+    cancel_event: Optional[threading.Event] = None
+) -> Tuple[Dict, Dict]:
+    """
+    Run an attempt, adding a duplicate once it has run for hedge_after seconds
+
+    Each attempt is called on its own thread with its own cancel event. The first
+    successful result wins and the other attempt is cancelled; if both fail the
+    primary's result is returned. Returns only after both attempts have exited.
+
+    Args:
+        primary: Attempt that starts immediately
+        start_hedge: Prepares the duplicate attempt; may return None to decline
+            for now (it is asked again at the next poll)
+        hedge_after: Seconds before the duplicate is launched
+        cancel_event: Optional event that cancels both attempts
+
+    Returns:
+        (winning result, {'hedged', 'winner', 'hedge_after_seconds', 'hedge_started_at'})
+    """
+    results: queue.Queue = queue.Queue()
+    attempts: Dict[str, threading.Event] = {}
+
+    def launch(name: str, attempt: Attempt):
+        attempt_cancel = threading.Event()
+        attempts[name] = attempt_cancel
+
+        def target():
+            try:
+                result = attempt(attempt_cancel)
+            except Exception as e:
+                result = {'success': False, 'error': f'Unexpected error: {e}'}
+            results.put((name, result))
+
+        threading.Thread(target=target, daemon=True).start()
+
+    started = time.monotonic()
+    launch('primary', primary)
+    info = {'hedged': False, 'winner': 'primary', 'hedge_after_seconds': round(hedge_after, 1)}
+    finished: Dict[str, Dict] = {}
+
+    while len(finished) < len(attempts):
+        if cancel_event is not None and cancel_event.is_set():
+            for attempt_cancel in attempts.values():
+                attempt_cancel.set()
+
+        wait = POLL_SECONDS
+        if not info['hedged']:
+            wait = min(wait, max(started + hedge_after - time.monotonic(), 0.01))
+        try:
+            name, result = results.get(timeout=wait)
+        except queue.Empty:
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if not info['hedged'] and not cancelled and time.monotonic() - started >= hedge_after:
+                hedge = start_hedge()
+                if hedge is not None:
+                    info['hedged'] = True
+                    info['hedge_started_at'] = round(time.monotonic() - started, 1)
+                    launch('hedge', hedge)
+            continue
+
+        finished[name] = result
+        if result.get('success'):
+            info['winner'] = name
+            # Cancel the slower attempt and wait for it, so it is not still writing
+            for other, attempt_cancel in attempts.items():
+                if other not in finished:
+                    attempt_cancel.set()
+            while len(finished) < len(attempts):
+                other, other_result = results.get()
+                finished[other] = other_result
+            return result, info
+
+    return finished['primary'], info
+
+# Made with Bob
@@ -0,0 +1,235 @@
+"""
+Background Jobs
+Queues planning and development runs as Celery tasks with per-project idempotency,
+cooperative cancellation and recovery of jobs whose worker died
+"""
+import logging
+import os
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from projects.models import Project
+from .models import Job
+from .events import publish_event
+from .tracing import job_scope
+
+logger = logging.getLogger(__name__)
+
+# How often a running job checks whether cancellation was requested
+CANCEL_POLL_SECONDS = 2.0
+
+# How often a running job's worker records that it is alive
+HEARTBEAT_SECONDS = float(os.environ.get('OPENCODE_JOB_HEARTBEAT_SECONDS', 10))
+
+# A running job without a heartbeat for this long has lost its worker
+STALE_AFTER_SECONDS = float(os.environ.get('OPENCODE_JOB_STALE_SECONDS', 120))
+
+
+def _stale(queryset: QuerySet) -> QuerySet:
+    """Running jobs whose worker stopped sending heartbeats"""
+    cutoff = timezone.now() - timedelta(seconds=STALE_AFTER_SECONDS)
+    return queryset.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+
+def reclaim_stale_jobs(**filters) -> int:
+    """
+    Finish running jobs whose worker died (crash or restart mid-job)
+
+    They end 'cancelled' when cancellation was requested and 'failed' otherwise,
+    so the project can queue the job again; a new development run resumes from
+    the checkpoints of the tasks that completed.
+
+    Args:
+        filters: Job filters, e.g. project=project, kind='development'
+
+    Returns:
+        Number of jobs reclaimed
+    """
+    reclaimed = 0
+    for job in _stale(Job.objects.filter(**filters)):
+        status = 'cancelled' if job.cancel_requested else 'failed'
+        error = f'Worker stopped responding (no heartbeat for {STALE_AFTER_SECONDS:.0f}s)'
+        # Still stale: a redelivered task may have re-claimed the job meanwhile
+        if _stale(Job.objects.filter(pk=job.pk)).update(status=status, error=error, finished_at=timezone.now()):
+            reclaimed += 1
+            logger.warning(f"Job {job.id} lost its worker, marked {status}")
+            publish_event(job.project_id, 'job.status', job_id=job.id, kind=job.kind, status=status, error=error)
+    return reclaimed
+
+
+def enqueue_job(project: Project, kind: str, lane: str = 'interactive') -> Tuple[Job, bool]:
+    """
+    Queue a job, or return the project's already active job of that kind
+
+    Args:
+        project: Project the job runs for
+        kind: 'planning' or 'development'
+        lane: Scheduler priority lane ('interactive' or 'bulk')
+
+    Returns:
+        (job, created)
+    """
+    reclaim_stale_jobs(project=project, kind=kind)
+    active = Job.objects.filter(project=project, kind=kind, status__in=Job.ACTIVE_STATUSES).first()
+    if active:
+        return active, False
+
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(project=project, kind=kind, lane=lane)
+    except IntegrityError:
+        # Another request queued the same job concurrently
+        return Job.objects.get(project=project, kind=kind, status__in=Job.ACTIVE_STATUSES), False
+
+    # Only publish once the row is visible to workers
+    publish_event(project.id, 'job.status', job_id=job.id, kind=kind, status=job.status)
+    transaction.on_commit(lambda: _publish(job))
+    return job, True
+
+
+def _publish(job: Job):
+    from .tasks import run_job_task
+
+    try:
+        async_result = run_job_task.delay(job.id)
+    except Exception as e:  # Broker unreachable
+        logger.error(f"Failed to queue job {job.id}: {e}")
+        Job.objects.filter(pk=job.pk).update(
+            status='failed', error=f'Failed to queue job: {e}', finished_at=timezone.now()
+        )
+        return
+    Job.objects.filter(pk=job.pk).update(celery_task_id=async_result.id or '')
+
+
+def cancel_job(job: Job) -> Job:
+    """
+    Request cancellation of a job
+
+    Queued jobs are cancelled immediately; running jobs stop at the next check
+    (running OpenCode processes are killed; planning stops between its LLM
+    calls), and a running job whose worker died is cancelled right away. A
+    running job that finishes before it notices keeps its outcome.
+    """
+    if not job.is_active:
+        return job
+
+    updated = Job.objects.filter(pk=job.pk, status='queued').update(
+        status='cancelled', cancel_requested=True, finished_at=timezone.now()
+    )
+    if updated:
+        if job.celery_task_id:
+            from config.celery import app
+            app.control.revoke(job.celery_task_id)
+    else:
+        Job.objects.filter(pk=job.pk, status='running').update(cancel_requested=True)
+        reclaim_stale_jobs(pk=job.pk)
+
+    job.refresh_from_db()
+    publish_event(job.project_id, 'job.status', job_id=job.id, kind=job.kind,
+                  status=job.status, cancel_requested=job.cancel_requested)
+    return job
+
+
+def _watch_job(job_id: int, cancel_event: threading.Event, done: threading.Event):
+    """
+    Record heartbeats for the job and set cancel_event once cancellation is requested
+    """
+    last_heartbeat = timezone.now()
+    try:
+        while not done.wait(CANCEL_POLL_SECONDS):
+            try:
+                if timezone.now() - last_heartbeat >= timedelta(seconds=HEARTBEAT_SECONDS):
+                    last_heartbeat = timezone.now()
+                    Job.objects.filter(pk=job_id, status='running').update(heartbeat_at=last_heartbeat)
+                if not cancel_event.is_set() and Job.objects.filter(pk=job_id, cancel_requested=True).exists():
+                    cancel_event.set()
+            except DatabaseError as e:  # e.g. SQLite busy; try again next poll
+                logger.warning(f"Job {job_id} watcher: {e}")
+    finally:
+        close_old_connections()
+
+
+def _run_planning(job: Job, cancel_event: threading.Event) -> Dict:
+    from planning.services import generate_project_plan
+
+    result = generate_project_plan(job.project_id, cancel_event=cancel_event)
+    if not result['success']:
+        return result
+    return {
+        'success': True,
+        'planning_document_id': result['planning_document'].id,
+        'agents_created': result['agents_created'],
+    }
+
+
+def _run_development(job: Job, cancel_event: threading.Event) -> Dict:
+    from .orchestrator import start_project_development
+
+    return start_project_development(job.project_id, cancel_event=cancel_event, lane=job.lane)
+
+
+JOB_RUNNERS: Dict[str, Callable[[Job, threading.Event], Dict]] = {
+    'planning': _run_planning,
+    'development': _run_development,
+}
+
+
+def run_job(job_id: int) -> Optional[Dict]:
+    """
+    Execute a queued job (called by the Celery worker)
+
+    A job left running by a worker that died is re-claimed when its task is
+    delivered again (acks_late); development runs then resume from checkpoints.
+    """
+    # Claim the job; a cancelled job, or one running on a live worker, is left alone
+    now = timezone.now()
+    claimable = Job.objects.filter(pk=job_id, cancel_requested=False)
+    resumed = bool(_stale(claimable).update(heartbeat_at=now))
+    claimed = resumed or claimable.filter(status='queued').update(
+        status='running', started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        logger.info(f"Job {job_id} is no longer queued, skipping")
+        return None
+
+    job = Job.objects.select_related('project').get(pk=job_id)
+    if resumed:
+        logger.warning(f"Job {job_id} was left running by a worker that died, resuming it")
+    publish_event(job.project_id, 'job.status', job_id=job.id, kind=job.kind, status='running', resumed=resumed)
+    cancel_event = threading.Event()
+    done = threading.Event()
+    watcher = threading.Thread(
+        target=_watch_job, args=(job.id, cancel_event, done), daemon=True
+    )
+    watcher.start()
+
+    try:
+        with job_scope(job.id):
+            result = JOB_RUNNERS[job.kind](job, cancel_event)
+        # A cancel that arrived too late to stop anything leaves the outcome as it is
+        if result.get('cancelled'):
+            status = 'cancelled'
+        else:
+            status = 'succeeded' if result.get('success') else 'failed'
+        error = '' if result.get('success') else result.get('error', '')
+    except Exception as e:
+        logger.exception(f"Job {job_id} crashed")
+        result, status, error = {'success': False, 'error': str(e)}, 'failed', str(e)
+    finally:
+        done.set()
+        watcher.join()
+
+    Job.objects.filter(pk=job_id).update(
+        status=status, result=result, error=error, finished_at=timezone.now()
+    )
+    publish_event(job.project_id, 'job.status', job_id=job.id, kind=job.kind, status=status, error=error)
+    return result
+
+# Made with Bob
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0001_initial"),
+        ("projects", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_key", models.CharField(max_length=100)),
+                ("prompt_hash", models.CharField(max_length=64)),
+                ("input_tree_hash", models.CharField(max_length=64)),
+                ("output_tree_hash", models.CharField(max_length=64)),
+                ("paths", models.JSONField(blank=True, default=list)),
+                ("result", models.JSONField(blank=True, default=dict)),
+                ("completed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_checkpoints",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["completed_at"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="taskcheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("project", "task_key"), name="unique_task_checkpoint"
+            ),
+        ),
+    ]
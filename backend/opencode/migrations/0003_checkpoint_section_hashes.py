@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0002_task_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskcheckpoint",
+            name="section_hashes",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
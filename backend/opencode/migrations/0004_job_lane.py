@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0003_checkpoint_section_hashes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="lane",
+            field=models.CharField(
+                choices=[("interactive", "Interactive"), ("bulk", "Bulk")],
+                default="interactive",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0004_job_lane"),
+        ("projects", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskBreakdown",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source_hash", models.CharField(max_length=64)),
+                ("tasks", models.JSONField(default=list)),
+                ("repairs", models.JSONField(blank=True, default=list)),
+                ("tokens_used", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now=True)),
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_breakdown",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+        ),
+    ]
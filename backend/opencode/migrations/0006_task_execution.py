@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0005_task_breakdown"),
+        ("projects", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskExecution",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_key", models.CharField(max_length=100)),
+                ("role", models.CharField(max_length=50)),
+                ("duration_seconds", models.FloatField()),
+                ("success", models.BooleanField(default=False)),
+                ("hedged", models.BooleanField(default=False)),
+                ("hedge_won", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_executions",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["role", "-created_at"], name="task_execution_role_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0009_job_heartbeat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskexecution",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("task", "Task"),
+                    ("retry", "Retry after a failed execution"),
+                    ("fixup", "Static analysis fix-up"),
+                ],
+                default="task",
+                max_length=10,
+            ),
+        ),
+    ]
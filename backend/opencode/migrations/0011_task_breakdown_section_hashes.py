@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-19 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("opencode", "0010_task_execution_kind"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskbreakdown",
+            name="section_hashes",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,290 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Q
+from projects.models import Project
+
+
+class Job(models.Model):
+    """Background job (planning or development run) executed by a Celery worker"""
+
+    KIND_CHOICES = [
+        ('planning', 'Planning'),
+        ('development', 'Development'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    LANE_CHOICES = [
+        ('interactive', 'Interactive'),
+        ('bulk', 'Bulk'),
+    ]
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    # Scheduler priority lane for the job's task executions
+    lane = models.CharField(max_length=20, choices=LANE_CHOICES, default='interactive')
+    celery_task_id = models.CharField(max_length=255, blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Last sign of life from the worker running the job (stale = worker died)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # At most one queued/running job of each kind per project
+            models.UniqueConstraint(
+                fields=['project', 'kind'],
+                condition=Q(status__in=['queued', 'running']),
+                name='unique_active_job_per_project'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job for {self.project.name} ({self.status})"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in self.ACTIVE_STATUSES
+
+
+class TaskCheckpoint(models.Model):
+    """
+    Last completed execution of a development task, with its input fingerprints
+
+    A re-run skips the task while the fingerprints still match.
+    """
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_checkpoints')
+    task_key = models.CharField(max_length=100)
+    prompt_hash = models.CharField(max_length=64)
+    # Hashes of the planning document sections the task's prompt is built from
+    section_hashes = models.JSONField(default=dict, blank=True)
+    # Combined output trees of the task's dependencies (the workspace it built on)
+    input_tree_hash = models.CharField(max_length=64)
+    # Content of the task's change set (changed and deleted paths) when it completed
+    output_tree_hash = models.CharField(max_length=64)
+    paths = models.JSONField(default=list, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    completed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['completed_at']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'task_key'], name='unique_task_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_key} checkpoint for {self.project.name}"
+
+
+class TaskBreakdown(models.Model):
+    """
+    Validated task graph generated from a project's planning document
+
+    Kept while the planning document and team are unchanged, so re-runs get the
+    same task keys (and can reuse their checkpoints). A regenerated breakdown is
+    merged into the earlier one rather than replacing it.
+    """
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='task_breakdown')
+    source_hash = models.CharField(max_length=64)
+    # Planning section hashes the breakdown was generated from, to tell which
+    # tasks an edit affects when it is regenerated
+    section_hashes = models.JSONField(default=dict, blank=True)
+    tasks = models.JSONField(default=list)
+    # Dependency references that had to be dropped or cycles that were broken
+    repairs = models.JSONField(default=list, blank=True)
+    tokens_used = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Task breakdown for {self.project.name} ({len(self.tasks)} tasks)"
+
+
+class TaskExecution(models.Model):
+    """
+    Duration of one development task execution
+
+    The history per role sets the point after which a running task is hedged.
+    Only first attempts count: retries follow a failure and fix-ups run a
+    different, usually much smaller prompt.
+    """
+
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('retry', 'Retry after a failed execution'),
+        ('fixup', 'Static analysis fix-up'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_executions')
+    task_key = models.CharField(max_length=100)
+    role = models.CharField(max_length=50)  # Agent role (task key for agent-less tasks)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='task')
+    duration_seconds = models.FloatField()
+    success = models.BooleanField(default=False)
+    # A duplicate attempt was launched, and whether it finished first
+    hedged = models.BooleanField(default=False)
+    hedge_won = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['role', '-created_at'], name='task_execution_role_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_key} ({self.role}) in {self.duration_seconds:.1f}s"
+
+
+class Run(models.Model):
+    """One planning or development run of a project, with its timed spans"""
+
+    KIND_CHOICES = [
+        ('planning', 'Planning'),
+        ('development', 'Development'),
+    ]
+
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='runs')
+    job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True, related_name='runs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    summary = models.JSONField(default=dict, blank=True)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} run of {self.project.name} ({self.status})"
+
+
+class RunSpan(models.Model):
+    """Timed step of a run (LLM call, task, OpenCode execution, persistence, commit...)"""
+
+    KIND_CHOICES = [
+        ('llm', 'LLM call'),
+        ('task', 'Task'),
+        ('queue', 'Scheduler wait'),
+        ('execute', 'OpenCode execution'),
+        ('static_analysis', 'Static analysis'),
+        ('tests', 'Test run'),
+        ('persist', 'Result persistence'),
+        ('checkpoint', 'Checkpoint'),
+        ('commit', 'Git commit'),
+        ('step', 'Step'),
+    ]
+
+    run = models.ForeignKey(Run, on_delete=models.CASCADE, related_name='spans')
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    task_key = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, default='ok')  # 'ok' or 'error'
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    # Start relative to the run's start
+    offset_seconds = models.FloatField()
+    duration_seconds = models.FloatField()
+    attributes = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['offset_seconds']
+
+    def __str__(self):
+        return f"{self.kind}:{self.name} ({self.duration_seconds:.2f}s)"
+
+
+class Budget(models.Model):
+    """
+    Token and cost limits of a project (over its lifetime) or a user (per calendar month)
+
+    Empty limits fall back to the OPENCODE_*_BUDGET settings; no limit means unlimited.
+    """
+
+    project = models.OneToOneField(
+        Project, on_delete=models.CASCADE, null=True, blank=True, related_name='budget'
+    )
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='opencode_budget'
+    )
+    token_limit = models.BigIntegerField(null=True, blank=True)
+    cost_limit = models.FloatField(null=True, blank=True)  # USD
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=Q(project__isnull=False, user__isnull=True) | Q(project__isnull=True, user__isnull=False),
+                name='budget_single_scope',
+            ),
+        ]
+
+    def __str__(self):
+        scope = f"project {self.project_id}" if self.project_id else f"user {self.user_id}"
+        return f"Budget for {scope}: {self.token_limit} tokens, ${self.cost_limit}"
+
+
+class LedgerEntry(models.Model):
+    """Tokens and estimated cost of one LLM call or OpenCode execution"""
+
+    SOURCE_CHOICES = [
+        ('llm', 'LLM API call'),
+        ('execution', 'OpenCode execution'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='ledger_entries')
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries'
+    )
+    run = models.ForeignKey(Run, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    task_key = models.CharField(max_length=100, blank=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    model = models.CharField(max_length=100, blank=True)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    cost = models.FloatField(default=0.0)  # Estimated USD
+    # Token counts estimated from text length (the call reported no usage)
+    estimated = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'ledger entries'
+        indexes = [
+            models.Index(fields=['project', 'created_at'], name='ledger_project_idx'),
+            models.Index(fields=['user', 'created_at'], name='ledger_user_idx'),
+        ]
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def __str__(self):
+        return f"{self.source} {self.model}: {self.total_tokens} tokens (${self.cost:.4f})"
+
+# Made with Bob
@@ -2,36 +2,96 @@
 OpenCode Orchestrator
 Manages the entire project development workflow using OpenCode
 """
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 from pathlib import Path
+import asyncio
 import os
+import threading
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
 
 from projects.models import Project
 from agents.models import Agent
 from tasks.models import Task, TaskOutput, OutputFile
 from planning.models import PlanningDocument
-from .executor import OpenCodeExecutor, create_task_prompt
+from codebase.blob_store import get_blob_store
+from orchestration.task_manager import TaskManager
+from .executor import OpenCodeExecutor
+from .test_runner import TestRunner
+from .static_analysis import StaticAnalyzer
+from .checkpoints import CheckpointStore
+from .breakdown import get_task_breakdown, task_sections
+from .progress import ProgressReporter
+from .scaffolds import get_scaffold_library
+from .remote import get_agent_registry
+from .events import publish_event
+from .scheduler import get_scheduler
+from .publisher import get_commit_publisher
+from .summaries import render_upstream_context, summarize_files
+from .simulation import Simulation
+from .hedging import (
+    IsolatedWorkspace, hedge_stats, hedge_threshold, hedging_enabled, run_hedged
+)
+from .models import TaskExecution
+from .budget import EXECUTION_FALLBACK_MODEL, EXECUTION_MODEL, BudgetGuard, budget_scope
+from .usage import usage_from_output
+from .tracing import span, timing_breakdown, trace_run
+from .workspace import WorkspaceQuotaExceeded, get_workspace_manager
+
+# SQLite allows one writer; a transaction that reads first fails instead of waiting
+# when another connection is writing, so runs in this process take turns
+_db_write_lock = threading.Lock()
+
+# Rows per INSERT/UPDATE statement when saving task output files (SQLite caps
+# the number of variables in one statement)
+OUTPUT_FILE_BATCH_SIZE = int(os.environ.get('OPENCODE_OUTPUT_FILE_BATCH_SIZE', 500))
 
 
 class ProjectOrchestrator:
     """Orchestrates project development using OpenCode"""
     
-    def __init__(self, project: Project):
+    def __init__(
+        self,
+        project: Project,
+        cancel_event: Optional[threading.Event] = None,
+        lane: str = 'interactive',
+        simulation: Optional[Simulation] = None
+    ):
+        """
+        Args:
+            project: Project to develop
+            cancel_event: Optional event that stops the run (running OpenCode
+                processes are killed, pending tasks are not started)
+            lane: Scheduler priority lane ('interactive' or 'bulk')
+            simulation: Replace the LLM and OpenCode with simulated responses
+                and work in a temporary workspace (load testing)
+        """
         self.project = project
+        self.cancel_event = cancel_event or threading.Event()
+        self.lane = lane
+        # Shares execution slots fairly with other runs in this process
+        self.scheduler = get_scheduler()
+        self.simulation = simulation
+        self.workspaces = simulation.workspaces if simulation else get_workspace_manager()
         self.project_dir = self._get_project_directory()
         self.executor = OpenCodeExecutor(self.project_dir)
+        self.scaffolds = get_scaffold_library()
+        self.agents = get_agent_registry()
+        # Concurrent tasks (of this and other runs) serialize multi-statement DB writes
+        self._db_lock = _db_write_lock
+        # Token/cost ledger and budgets: cheaper models when low, no new tasks when spent
+        self.budget = BudgetGuard(project, db_lock=self._db_lock)
+        # Duplicate straggling local executions (OPENCODE_HEDGING)
+        self.hedging = hedging_enabled() and simulation is None
+        # Output summaries of this run's completed tasks, by task id
+        self._tasks_by_id: Dict[str, Dict] = {}
+        self._summaries: Dict[str, Dict] = {}
     
     def _get_project_directory(self) -> str:
-        """Get or create project directory"""
-        # Create projects directory in workspace
-        workspace_dir = Path(os.getcwd()).parent / 'generated_projects'
-        workspace_dir.mkdir(exist_ok=True)
-        
-        # Create project-specific directory
-        project_dir = workspace_dir / f"project_{self.project.id}_{self.project.name.replace(' ', '_')}"
-        project_dir.mkdir(exist_ok=True)
-        
-        return str(project_dir)
+        """Get or create project directory (restored from archive if it was evicted)"""
+        return str(self.workspaces.acquire(self.project))
     
     def start_development(self) -> Dict:
         """
@@ -41,14 +101,46 @@ class ProjectOrchestrator:
         1. Check OpenCode installation
         2. Get planning document
         3. Generate tasks from PRD
-        4. Execute tasks in parallel
-        5. Commit to GitHub
+        4. Execute the task graph (independent tasks in parallel), skipping
+           tasks checkpointed by an earlier run whose inputs are unchanged
+        5. Commit each task's change set as it completes, pushing the commits to
+           the linked GitHub repository in the background
+        
+        Every LLM call and OpenCode execution is debited to the budget ledger; the
+        run switches to cheaper models as a budget runs low and stops starting
+        tasks once one is spent.
         
         Returns:
             Dictionary with development results
         """
-        # Step 1: Check OpenCode
-        if not self.executor.check_opencode_installed():
+        try:
+            with trace_run(self.project, 'development', db_lock=self._db_lock) as tracer:
+                self.budget.run = tracer.run
+                with budget_scope(self.budget):
+                    result = self._run_development()
+                result['budget'] = self.budget.summary()
+                tracer.status = (
+                    'cancelled' if result.get('cancelled') or self.budget.stopped else
+                    'succeeded' if result.get('success') and not result.get('tasks_failed') else 'failed'
+                )
+                tracer.summary = {
+                    key: result[key] for key in (
+                        'error', 'tasks_executed', 'tasks_successful', 'tasks_failed',
+                        'tasks_resumed', 'queue_wait_seconds', 'budget'
+                    ) if key in result
+                }
+            result['run_id'] = tracer.run.id
+            if self.simulation is not None:
+                result['timing'] = timing_breakdown(tracer.run)
+            return result
+        finally:
+            # Unpin the workspace so it can be archived once cold
+            self.workspaces.release(self.project)
+    
+    def _run_development(self) -> Dict:
+        """Run the development workflow in the acquired workspace"""
+        # Step 1: Check OpenCode (remote agents bring their own installation)
+        if self.simulation is None and not self.agents.has_agents() and not self.executor.check_opencode_installed():
             return {
                 'success': False,
                 'error': 'OpenCode is not installed. Please install it first.',
@@ -73,14 +165,63 @@ class ProjectOrchestrator:
             }
         
         # Step 4: Generate tasks
-        tasks = self._generate_tasks_from_prd(planning_doc, agents)
+        with span('generate tasks', 'step') as plan_span:
+            tasks = self._generate_tasks_from_prd(planning_doc, agents)
+            with self._db_lock:
+                self._persist_task_graph(tasks)
+            plan_span.set(tasks=len(tasks))
+        self._publish('run.started', tasks=[
+            {'key': t['id'], 'title': t['title'], 'dependencies': t['dependencies']} for t in tasks
+        ])
         
-        # Step 5: Execute tasks
-        results = self._execute_tasks(tasks)
+        # Step 5: Execute tasks (each task's change set is committed as it completes).
+        # Checkpointed tasks whose planning sections and inputs are unchanged are reused.
+        self.checkpoints = CheckpointStore(self.project, self.project_dir, planning_doc)
+        changed_sections = self.checkpoints.changed_sections()
+        if changed_sections:
+            print(f"📝 Planning sections changed since last run: {', '.join(changed_sections)}")
+        # Completed tasks' output summaries are passed to the prompts of their dependents
+        self._tasks_by_id = {t['id']: t for t in tasks}
+        self._summaries = {}
+        
+        # Each task's commit is pushed to the linked GitHub repository while later tasks run
+        publisher = None
+        if self.simulation is None:
+            publisher = get_commit_publisher(self.executor, self.project, db_lock=self._db_lock)
+        if publisher is not None:
+            self.executor.on_commit = publisher.submit
+        try:
+            results = self._execute_tasks(tasks)
+        finally:
+            push_result = None
+            if publisher is not None:
+                self.executor.on_commit = None
+                with span('push tail', 'commit') as push_span:
+                    push_result = publisher.close()
+                    push_span.set(pushes=push_result['pushes'], pushed=push_result['pushed'])
+                print(f"⬆️ Push tail after last task: {push_result['tail_seconds']}s")
+        
+        # Step 6: Summarize per-task commits
+        commits = [r['commit_result'] for r in results if r.get('commit_result')]
+        commits += [
+            fixup['commit_result']
+            for r in results
+            for fixup in r.get('static_analysis', {}).get('fixups', [])
+            if fixup.get('commit_result')
+        ]
+        commit_result = {
+            'success': all(c.get('success') for c in commits),
+            'commits': [c['commit'] for c in commits if c.get('commit')],
+        }
         
-        # Step 6: Commit to GitHub
-        commit_result = self.executor.commit_to_github(
-            f"Auto-generated code for {self.project.name}"
+        # Cancelled only if the cancel stopped a task; one arriving after the last task changes nothing
+        cancelled = any(r.get('cancelled') for r in results)
+        self._publish(
+            'run.finished',
+            tasks_successful=sum(1 for r in results if r.get('success')),
+            tasks_failed=sum(1 for r in results if not r.get('success')),
+            cancelled=cancelled,
+            commits=commit_result['commits'],
         )
         
         return {
@@ -89,7 +230,14 @@ class ProjectOrchestrator:
             'tasks_executed': len(results),
             'tasks_successful': sum(1 for r in results if r.get('success')),
             'tasks_failed': sum(1 for r in results if not r.get('success')),
+            'tasks_resumed': sum(1 for r in results if r.get('resumed')),
+            'changed_sections': changed_sections,
+            'queue_wait_seconds': round(sum(r.get('queue_wait_seconds', 0) for r in results), 3),
+            'scheduler': self.scheduler.get_status(),
+            'hedging': self._hedging_summary(results),
             'commit_result': commit_result,
+            'push_result': push_result,
+            'cancelled': cancelled,
             'results': results
         }
     
@@ -98,20 +246,24 @@ class ProjectOrchestrator:
         planning_doc: PlanningDocument,
         agents: List[Agent]
     ) -> List[Dict]:
-        """Generate executable tasks from PRD"""
-        tasks = []
+        """
+        Generate the execution DAG
         
-        # Parse PRD sections
-        prd_content = planning_doc.full_document
+        Uses the LLM task breakdown of the planning document (many small tasks)
+        when available, otherwise the fixed setup → backend ∥ frontend → tests plan.
+        """
+        if os.environ.get('OPENCODE_TASK_BREAKDOWN', 'True').lower() == 'true':
+            roles = list(agents.values_list('role', flat=True))
+            with span('task breakdown', 'llm', simulated=self.simulation is not None):
+                if self.simulation is not None:
+                    breakdown = self.simulation.task_breakdown(planning_doc, roles)
+                else:
+                    breakdown = get_task_breakdown(planning_doc, roles)
+            if breakdown:
+                print(f"🗂️ Using task breakdown ({len(breakdown.tasks)} tasks)")
+                return self._generate_tasks_from_breakdown(planning_doc, agents, breakdown.tasks)
         
-        # Task 1: Setup project structure
-        tasks.append({
-            'id': 'setup',
-            'title': 'Setup Project Structure',
-            'prompt': self._create_setup_prompt(planning_doc),
-            'agent_role': 'build',
-            'agent': agents.filter(role='backend_developer').first()
-        })
+        tasks = [self._create_setup_task(planning_doc, agents)]
         
         # Task 2: Implement backend
         if agents.filter(role='backend_developer').exists():
@@ -119,6 +271,8 @@ class ProjectOrchestrator:
                 'id': 'backend',
                 'title': 'Implement Backend API',
                 'prompt': self._create_backend_prompt(planning_doc),
+                'dependencies': ['setup'],
+                'sections': ['technical_requirements', 'feature_specifications'],
                 'agent_role': 'build',
                 'agent': agents.filter(role='backend_developer').first()
             })
@@ -129,22 +283,157 @@ class ProjectOrchestrator:
                 'id': 'frontend',
                 'title': 'Implement Frontend UI',
                 'prompt': self._create_frontend_prompt(planning_doc),
+                'dependencies': ['setup'],
+                'sections': ['feature_specifications', 'tech_stack'],
                 'agent_role': 'build',
                 'agent': agents.filter(role='frontend_developer').first()
             })
         
         # Task 4: Add tests
         if agents.filter(role='qa_engineer').exists():
+            tasks.append(self._create_tests_task(
+                planning_doc, agents,
+                # Tests need everything that was implemented
+                [t['id'] for t in tasks if t['id'] != 'setup'] or ['setup']
+            ))
+        
+        return tasks
+    
+    def _generate_tasks_from_breakdown(
+        self,
+        planning_doc: PlanningDocument,
+        agents: List[Agent],
+        nodes: List[Dict]
+    ) -> List[Dict]:
+        """Build the DAG from validated breakdown nodes (see breakdown.build_task_graph)"""
+        tasks = [self._create_setup_task(planning_doc, agents)]
+        titles = {node['key']: node['title'] for node in nodes}
+        
+        for node in nodes:
             tasks.append({
-                'id': 'tests',
-                'title': 'Add Tests',
-                'prompt': self._create_test_prompt(planning_doc),
+                'id': node['key'],
+                'title': node['title'],
+                'prompt': self._create_breakdown_prompt(planning_doc, node, titles),
+                # Root tasks build on the project structure
+                'dependencies': node['dependencies'] or ['setup'],
+                # The node was derived from these sections; the prompt lists the tech stack
+                'sections': task_sections(node) + ['tech_stack'],
+                'priority': node['priority'],
+                # Larger tasks advance the project's fair-share pass further
+                'cost': node['estimated_hours'],
                 'agent_role': 'build',
-                'agent': agents.filter(role='qa_engineer').first()
+                'agent': self._agent_for_role(agents, node['role'])
             })
         
+        # Run the generated test suite once everything else is done
+        if agents.filter(role='qa_engineer').exists():
+            depended_on = {dependency for node in nodes for dependency in node['dependencies']}
+            tasks.append(self._create_tests_task(
+                planning_doc, agents,
+                [node['key'] for node in nodes if node['key'] not in depended_on]
+            ))
+        
         return tasks
     
+    def _create_setup_task(self, planning_doc: PlanningDocument, agents: List[Agent]) -> Dict:
+        """Task 1: Setup project structure (from a cached scaffold when available)"""
+        return {
+            'id': 'setup',
+            'title': 'Setup Project Structure',
+            'prompt': self._create_setup_prompt(planning_doc),
+            'patch_prompt': self._create_setup_patch_prompt(planning_doc),
+            'tech_stack': planning_doc.tech_stack,
+            'dependencies': [],
+            'sections': ['executive_summary', 'tech_stack'],
+            'agent_role': 'build',
+            'agent': agents.filter(role='backend_developer').first()
+        }
+    
+    def _create_tests_task(self, planning_doc: PlanningDocument, agents: List[Agent], dependencies: List[str]) -> Dict:
+        """Final task: add tests, then run the generated suite"""
+        return {
+            'id': 'tests',
+            'title': 'Add Tests',
+            'prompt': self._create_test_prompt(planning_doc),
+            'dependencies': dependencies,
+            'sections': [],
+            'agent_role': 'build',
+            'agent': agents.filter(role='qa_engineer').first()
+        }
+    
+    def _agent_for_role(self, agents: List[Agent], role: str) -> Optional[Agent]:
+        """Match a breakdown role name to a project agent (closest role, else a developer)"""
+        role_key = role.lower().replace(' ', '_').replace('-', '_')
+        by_role = {agent.role: agent for agent in agents}
+        if role_key in by_role:
+            return by_role[role_key]
+        for agent_role, agent in by_role.items():
+            if agent_role in role_key or role_key in agent_role:
+                return agent
+        return by_role.get('backend_developer') or next(iter(by_role.values()), None)
+    
+    def _persist_task_graph(self, tasks: List[Dict]):
+        """
+        Create the Task rows of the graph up front and store their dependencies
+        
+        Rows of tasks that are no longer in the graph (a superseded breakdown)
+        are deleted; manually created tasks are left alone.
+        """
+        records = {}
+        for task_info in tasks:
+            if not task_info.get('agent'):
+                continue
+            task, created = self._get_task_record(task_info, {
+                'description': task_info['prompt'][:500],
+                'assigned_to': task_info['agent'],
+                'status': 'pending',
+                'priority': task_info.get('priority', 'high')
+            })
+            if not created:
+                Task.objects.filter(pk=task.pk).update(
+                    title=task_info['title'],
+                    description=task_info['prompt'][:500],
+                    assigned_to=task_info['agent'],
+                    priority=task_info.get('priority', 'high')
+                )
+            records[task_info['id']] = task
+        
+        superseded = Task.objects.filter(project=self.project).exclude(key='').exclude(key__in=list(records))
+        superseded_count = superseded.count()
+        if superseded_count:
+            superseded.delete()
+            print(f"🗑️ Removed {superseded_count} task(s) of a superseded breakdown")
+        
+        for task_info in tasks:
+            if task_info['id'] in records:
+                records[task_info['id']].dependencies.set([
+                    records[dependency] for dependency in task_info['dependencies']
+                    if dependency in records and dependency != task_info['id']
+                ])
+    
+    def _get_task_record(self, task_info: Dict, defaults: Dict) -> Tuple[Task, bool]:
+        """
+        Get or create the Task row of a graph task, keyed by its task key
+        
+        Titles may repeat within a graph, so they are only used to adopt rows
+        created before task keys were stored.
+        
+        Returns:
+            (task, created)
+        """
+        task = Task.objects.filter(project=self.project, key=task_info['id']).first()
+        if task is None:
+            task = Task.objects.filter(project=self.project, key='', title=task_info['title']).first()
+            if task is not None:
+                Task.objects.filter(pk=task.pk).update(key=task_info['id'])
+                task.key = task_info['id']
+        if task is not None:
+            return task, False
+        task = Task.objects.create(
+            project=self.project, key=task_info['id'], title=task_info['title'], **defaults
+        )
+        return task, True
+    
     def _create_setup_prompt(self, planning_doc: PlanningDocument) -> str:
         """Create prompt for project setup"""
         tech_stack = planning_doc.tech_stack
@@ -170,6 +459,28 @@ class ProjectOrchestrator:
 {planning_doc.executive_summary}
 
 Please create a well-organized project structure following best practices.
+"""
+        return prompt
+    
+    def _create_setup_patch_prompt(self, planning_doc: PlanningDocument) -> str:
+        """Create prompt for adapting a materialized scaffold template"""
+        prompt = f"""# Adapt Project Scaffold
+
+## Project: {self.project.name}
+{self.project.description}
+
+The project structure, package manifests, configuration files, .gitignore and
+README.md already exist in this directory. Do not recreate them.
+
+## Tasks
+1. Update project metadata (name, description) where it is still generic
+2. Adjust README.md to describe this project
+3. Add only configuration that this project specifically needs
+
+## Requirements
+{planning_doc.executive_summary}
+
+Keep changes minimal; the scaffold already follows best practices.
 """
         return prompt
     
@@ -216,6 +527,35 @@ Frontend: {', '.join(planning_doc.tech_stack.get('frontend', []))}
 5. Add styling and responsive design
 
 Please create a modern, user-friendly interface.
+"""
+        return prompt
+    
+    def _create_breakdown_prompt(self, planning_doc: PlanningDocument, node: Dict, titles: Dict[str, str]) -> str:
+        """Create prompt for one task of the breakdown"""
+        tech_stack = planning_doc.tech_stack
+        deliverables = '\n'.join(f"- {d}" for d in node['deliverables']) or '- See task description'
+        builds_on = '\n'.join(f"- {titles[d]}" for d in node['dependencies']) or '- Project structure setup'
+        
+        prompt = f"""# {node['title']}
+
+## Project: {self.project.name}
+
+## Task
+{node['description'] or node['title']}
+
+## Deliverables
+{deliverables}
+
+## Builds On (already implemented)
+{builds_on}
+
+## Tech Stack
+- Frontend: {', '.join(tech_stack.get('frontend', []))}
+- Backend: {', '.join(tech_stack.get('backend', []))}
+- Database: {tech_stack.get('database', 'N/A')}
+
+This task is one part of a larger plan; other tasks cover the remaining work.
+Implement only this task, reuse existing code and keep changes focused.
 """
         return prompt
     
@@ -236,75 +576,680 @@ Please ensure good test coverage and follow testing best practices.
         return prompt
     
     def _execute_tasks(self, tasks: List[Dict]) -> List[Dict]:
-        """Execute tasks using OpenCode"""
-        results = []
+        """
+        Execute tasks as a dependency graph using OpenCode
+        
+        Independent tasks (e.g. backend and frontend) run concurrently, so the
+        run takes as long as its critical path. Dependents of failed tasks are skipped.
+        """
+        manager = TaskManager(
+            max_retries=1,
+            max_parallel=int(os.environ.get('OPENCODE_MAX_PARALLEL_TASKS', self.executor.pool.max_processes))
+        )
+        manager.add_tasks(tasks)
+        results: Dict[str, Dict] = {}
+        
+        async def run(task: Dict) -> Dict:
+            result = await asyncio.to_thread(self._execute_single_task, task)
+            results[task['id']] = result
+            if not result['success']:
+                raise RuntimeError(result.get('error') or f"Task {task['id']} failed")
+            return result
+        
+        summary = asyncio.run(manager.execute_all(run))
+        print(f"⏱️ Task graph finished in {summary['duration_seconds']:.1f}s ({summary['status']})")
         
+        ordered = []
         for task in tasks:
-            print(f"🚀 Executing task: {task['title']}")
-            
-            # Execute with OpenCode
-            result = self.executor.execute_task(
-                prompt=task['prompt'],
-                agent_role=task['agent_role']
+            if task['id'] in results:
+                ordered.append(results[task['id']])
+            else:
+                node = manager.tasks[task['id']]
+                ordered.append({
+                    'task_id': task['id'],
+                    'task_title': task['title'],
+                    'success': False,
+                    'skipped': True,
+                    'error': node.error or 'Skipped'
+                })
+                print(f"⏭️ Task {task['title']}: Skipped ({node.error})")
+                self._publish('task.skipped', key=task['id'], title=task['title'], error=node.error)
+        return ordered
+    
+    def _execute_single_task(self, task: Dict) -> Dict:
+        """Execute one task on a worker thread (own DB connection, closed afterwards)"""
+        try:
+            with span(task['title'], 'task', task_key=task['id'],
+                      dependencies=task.get('dependencies', [])) as task_span:
+                result = self._execute_task_steps(task)
+                task_span.set(**{
+                    key: result[key] for key in ('resumed', 'cancelled', 'rerun_reason') if result.get(key)
+                })
+                if not result['success']:
+                    task_span.fail(result.get('error'))
+                return result
+        finally:
+            connection.close()
+    
+    def _execute_task_steps(self, task: Dict) -> Dict:
+        """Resume, execute, analyze, test, persist and checkpoint one task"""
+        if self.cancel_event.is_set():
+            return {
+                'task_id': task['id'],
+                'task_title': task['title'],
+                'success': False,
+                'cancelled': True,
+                'error': 'Development run was cancelled'
+            }
+        
+        # Stop cleanly once a budget is spent: running tasks finish, new ones do not start
+        budget = self.budget.status()
+        if budget['state'] == 'exceeded':
+            if self.budget.stop():
+                print(f"💸 Budget exceeded ({budget['reason']}), not starting further tasks")
+                self._publish('budget.exceeded', reason=budget['reason'], ratio=budget['ratio'])
+            return {
+                'task_id': task['id'],
+                'task_title': task['title'],
+                'success': False,
+                'budget_exceeded': True,
+                'error': f"Budget exceeded: {budget['reason']}"
+            }
+        
+        # Do not grow a workspace that is already over its disk quota
+        try:
+            self.workspaces.check_quota(self.project)
+        except WorkspaceQuotaExceeded as e:
+            print(f"❌ {e}")
+            return {
+                'task_id': task['id'],
+                'task_title': task['title'],
+                'success': False,
+                'error': str(e)
+            }
+        
+        # Resume: reuse the checkpoint of a task whose inputs are unchanged
+        fingerprint = self.checkpoints.fingerprint(task)
+        checkpoint, rerun_reason = self.checkpoints.reusable(task, fingerprint)
+        if checkpoint:
+            print(f"♻️ Task {task['title']}: Unchanged since last run, skipping")
+            # Checkpoints written before summaries existed are summarized from their files
+            self._summaries[task['id']] = checkpoint.result.get('summary') or summarize_files(
+                self.project_dir, [p for p in checkpoint.paths if (Path(self.project_dir) / p).is_file()]
             )
-            
-            # Save to database
-            if task.get('agent'):
-                self._save_task_result(task, result)
-            
-            results.append({
+            self._publish('task.resumed', key=task['id'], title=task['title'])
+            return {
                 'task_id': task['id'],
                 'task_title': task['title'],
-                **result
-            })
+                'success': True,
+                'resumed': True,
+                'changes': {'changed': [], 'deleted': []},
+                'checkpoint': checkpoint.result,
+            }
+        
+        print(f"🚀 Executing task: {task['title']} ({rerun_reason})")
+        
+        # Tell the task what upstream tasks produced (not part of the fingerprint:
+        # the summaries derive from the dependency outputs it already covers)
+        upstream_context = self._upstream_context(task)
+        if upstream_context:
+            task = {**task, 'prompt': task['prompt'] + upstream_context}
+        
+        # Mark the task as running so progress is visible while OpenCode works
+        with self._db_lock:
+            task_record = self._start_task_record(task)
+            self._set_agent_status(task.get('agent'), 'working')
+        self._publish(
+            'task.started', key=task['id'], title=task['title'],
+            task_id=task_record.pk if task_record else None, reason=rerun_reason
+        )
+        reporter = self._create_progress_reporter(task_record, task)
+        
+        # Execute with OpenCode. Tasks running concurrently share the workspace,
+        # so their change sets may overlap; every change still lands in a commit.
+        before = self.executor.snapshot_workspace()
+        if task['id'] == 'setup' and self.simulation is None:
+            task = self._apply_scaffold(task)
+        try:
+            result = self._run_task(task, reporter.report if reporter else None)
+        finally:
+            if reporter:
+                reporter.close()
+        result['changes'] = self.executor.diff_snapshots(
+            before, self.executor.snapshot_workspace()
+        )
+        
+        # Commit exactly this task's change set
+        if result['success']:
+            with span('commit', 'commit', files=len(result['changes']['changed']) + len(result['changes']['deleted'])):
+                result['commit_result'] = self.executor.commit_changes(
+                    result['changes']['changed'],
+                    f"{task['title']}\n\nAuto-generated by OpenCode for {self.project.name}",
+                    deleted=result['changes']['deleted']
+                )
+        
+        # Lint/type-check the change set; errors trigger a targeted fix-up task
+        if result['success']:
+            with span('static analysis', 'static_analysis'):
+                result['static_analysis'] = self._run_static_analysis(task, result['changes'])
+        
+        # Summarize the output once for dependent tasks (stored with the checkpoint)
+        if result['success']:
+            with span('summarize output', 'step'):
+                changed, _ = self._task_file_changes(result)
+                result['summary'] = summarize_files(self.project_dir, changed)
+            self._summaries[task['id']] = result['summary']
+        
+        # Cache a freshly generated setup as the template for this stack
+        if result['success'] and task['id'] == 'setup' and not task.get('scaffold') and self.simulation is None:
+            result['scaffold'] = self.scaffolds.save_template(
+                task['tech_stack'], self.project_dir,
+                result['changes']['changed'], self.project.name
+            )
+        elif task.get('scaffold'):
+            result['scaffold'] = task['scaffold']
+        
+        # Actually run the generated test suite
+        if result['success'] and task['id'] == 'tests':
+            print("🧪 Running generated tests...")
+            with span('tests', 'tests'):
+                result['test_results'] = TestRunner(self.project_dir).run()
+        
+        # Save to database; file bodies go to the blob store first, outside the
+        # write lock, so other runs' DB writes never wait on artifact I/O
+        stored = {}
+        if task.get('agent') and result['success']:
+            with span('store artifacts', 'persist'):
+                stored = self._store_task_files(result)
+        with self._db_lock:
+            if task.get('agent'):
+                with span('persist results', 'persist'):
+                    self._save_task_result(task, result, stored)
+            with span('checkpoint', 'checkpoint'):
+                self._checkpoint_task(task, fingerprint, result)
+            self._set_agent_status(task.get('agent'), 'idle' if result['success'] else 'error')
+        
+        print(f"{'✅' if result['success'] else '❌'} Task {task['title']}: {'Success' if result['success'] else 'Failed'}")
+        self._publish(
+            'task.completed' if result['success'] else 'task.failed',
+            key=task['id'], title=task['title'],
+            task_id=task_record.pk if task_record else None,
+            files_changed=len(result['changes']['changed']),
+            error=result.get('error'),
+        )
+        
+        return {
+            'task_id': task['id'],
+            'task_title': task['title'],
+            'rerun_reason': rerun_reason,
+            **result
+        }
+    
+    def _upstream_context(self, task: Dict) -> str:
+        """Prompt section summarizing the outputs of a task's (transitive) dependencies"""
+        summaries, seen = [], set()
+        frontier = list(task.get('dependencies', []))
+        # Breadth-first, so direct dependencies get the context budget first
+        while frontier:
+            key = frontier.pop(0)
+            if key in seen or key not in self._tasks_by_id:
+                continue
+            seen.add(key)
+            if self._summaries.get(key):
+                summaries.append((self._tasks_by_id[key]['title'], self._summaries[key]))
+            frontier += self._tasks_by_id[key].get('dependencies', [])
+        return render_upstream_context(summaries)
+    
+    def _run_task(self, task: Dict, on_progress=None, fixup: bool = False) -> Dict:
+        """
+        Run a task once the fair scheduler grants this project an execution slot
+        
+        Args:
+            task: Task to run
+            on_progress: Optional progress callback
+            fixup: A static-analysis fix-up of the task (kept out of the hedging history)
+        """
+        user, project = self.project.created_by_id, self.project.id
+        started = time.monotonic()
+        with span('scheduler wait', 'queue', lane=self.lane):
+            acquired = self.scheduler.acquire(
+                user, project, lane=self.lane, cost=task.get('cost', 1.0), cancel_event=self.cancel_event
+            )
+        if not acquired:
+            return {
+                'success': False,
+                'cancelled': True,
+                'error': 'Development run was cancelled'
+            }
+        queue_wait = time.monotonic() - started
+        started = time.monotonic()
+        try:
+            with span('opencode', 'execute', agent_role=task['agent_role']) as execute_span:
+                result = self._dispatch_task(task, on_progress)
+                if result.get('hedge', {}).get('hedged'):
+                    execute_span.set(hedge=result['hedge'])
+                if not result.get('success'):
+                    execute_span.fail(result.get('error'))
+        finally:
+            self.scheduler.release(user, project)
+        result['queue_wait_seconds'] = round(queue_wait, 3)
+        # Simulated durations must not feed the hedging history
+        if not result.get('cancelled') and self.simulation is None:
+            self._record_execution(task, result, time.monotonic() - started, fixup)
+        return result
+    
+    def _dispatch_task(self, task: Dict, on_progress=None) -> Dict:
+        """
+        Run a task on the least loaded remote agent, or locally when none is available
+        
+        The execution's token usage is debited to the budget ledger.
+        """
+        model = self.budget.model_for(EXECUTION_MODEL, EXECUTION_FALLBACK_MODEL)
+        
+        def on_usage(usage: Dict):
+            self.budget.debit('execution', usage, task_key=task['id'])
+        
+        if self.simulation is not None:
+            return self.simulation.execute_task(
+                self.project_dir, task, self._task_role(task), on_progress, self.cancel_event,
+                model=model, on_usage=on_usage
+            )
+        
+        if self.agents.has_agents():
+            result = self.agents.execute_task(
+                self.project_dir,
+                self.workspaces.workspace_name(self.project),
+                task['prompt'],
+                agent_role=task['agent_role'],
+                on_progress=on_progress,
+                model=model,
+                cancel_event=self.cancel_event
+            )
+            if result is not None:
+                # Agents running an older release report no usage; estimate it here
+                on_usage(result.get('usage') or usage_from_output(task['prompt'], result.get('stdout', ''), model))
+                return result
+            print("⚠️ No remote agent available, running locally")
+        
+        if self.hedging:
+            hedge_after = hedge_threshold(self._task_role(task))
+            if hedge_after is not None:
+                return self._execute_hedged(task, on_progress, hedge_after, model, on_usage)
+        
+        return self.executor.execute_task(
+            prompt=task['prompt'],
+            agent_role=task['agent_role'],
+            on_progress=on_progress,
+            cancel_event=self.cancel_event,
+            model=model,
+            on_usage=on_usage
+        )
+    
+    def _execute_hedged(self, task: Dict, on_progress, hedge_after: float, model=None, on_usage=None) -> Dict:
+        """
+        Run a task locally and launch a duplicate attempt in an isolated copy of
+        the workspace once it runs longer than hedge_after seconds
+        
+        The duplicate only uses an idle scheduler slot. When it wins, its change set
+        is copied into the workspace and the primary's partial changes are undone.
+        Both attempts are debited to the budget.
+        """
+        user, project = self.project.created_by_id, self.project.id
+        before = self.executor.snapshot_workspace()
+        isolated = IsolatedWorkspace(self.project_dir, before)
+        hedge = {}
+        
+        def primary(cancel_event):
+            return self.executor.execute_task(
+                prompt=task['prompt'],
+                agent_role=task['agent_role'],
+                on_progress=on_progress,
+                cancel_event=cancel_event,
+                model=model,
+                on_usage=on_usage
+            )
+        
+        def start_hedge():
+            if not self.scheduler.try_acquire(user, project, lane=self.lane, cost=task.get('cost', 1.0)):
+                return None
+            hedge['slot'] = True
+            executor = OpenCodeExecutor(
+                str(isolated.path),
+                pool=self.executor.pool,
+                dependency_cache=self.executor.dependency_cache
+            )
+            hedge_before = executor.snapshot_workspace()
+            print(f"🐢 Task {task['title']}: running past {hedge_after:.0f}s, launching a hedged attempt")
+            self._publish('task.hedged', key=task['id'], title=task['title'], after_seconds=round(hedge_after, 1))
             
-            print(f"{'✅' if result['success'] else '❌'} Task {task['title']}: {'Success' if result['success'] else 'Failed'}")
+            def attempt(cancel_event):
+                result = executor.execute_task(
+                    prompt=task['prompt'],
+                    agent_role=task['agent_role'],
+                    cancel_event=cancel_event,
+                    model=model,
+                    on_usage=on_usage
+                )
+                hedge['changes'] = executor.diff_snapshots(hedge_before, executor.snapshot_workspace())
+                return result
+            return attempt
         
-        return results
+        try:
+            result, info = run_hedged(primary, start_hedge, hedge_after, self.cancel_event)
+            if info['winner'] == 'hedge':
+                primary_changes = self.executor.diff_snapshots(before, self.executor.snapshot_workspace())
+                isolated.sync_back({
+                    *primary_changes['changed'], *primary_changes['deleted'],
+                    *hedge['changes']['changed'], *hedge['changes']['deleted'],
+                })
+                print(f"🏁 Task {task['title']}: hedged attempt finished first")
+        finally:
+            if hedge.get('slot'):
+                self.scheduler.release(user, project)
+            isolated.cleanup()
+        
+        result['hedge'] = info
+        return result
     
-    def _save_task_result(self, task_info: Dict, result: Dict):
-        """Save task execution result to database"""
-        # Create or update task
-        task, created = Task.objects.get_or_create(
-            project=self.project,
-            title=task_info['title'],
-            defaults={
-                'description': task_info['prompt'][:500],
-                'assigned_to': task_info.get('agent'),
-                'status': 'completed' if result['success'] else 'failed',
-                'priority': 'high'
+    def _task_role(self, task: Dict) -> str:
+        """Role whose duration history a task is compared with"""
+        return task['agent'].role if task.get('agent') else task['id']
+    
+    def _record_execution(self, task: Dict, result: Dict, duration: float, fixup: bool = False):
+        """
+        Add a task execution to its role's duration history
+        
+        Executions following a failed one of the same task are recorded as retries
+        and fix-ups as such, so only first attempts set the hedging threshold.
+        """
+        hedge = result.get('hedge') or {}
+        with self._db_lock:
+            if fixup:
+                kind = 'fixup'
+            else:
+                previous = TaskExecution.objects.filter(
+                    project=self.project, task_key=task['id']
+                ).exclude(kind='fixup').first()
+                kind = 'retry' if previous is not None and not previous.success else 'task'
+            TaskExecution.objects.create(
+                project=self.project,
+                task_key=task['id'],
+                role=self._task_role(task),
+                kind=kind,
+                duration_seconds=round(duration, 3),
+                success=bool(result.get('success')),
+                hedged=bool(hedge.get('hedged')),
+                hedge_won=hedge.get('winner') == 'hedge',
+            )
+    
+    def _hedging_summary(self, results: List[Dict]) -> Dict:
+        """Hedges of this run next to the hedge and win rates of all runs"""
+        hedged = [r['hedge'] for r in results if r.get('hedge', {}).get('hedged')]
+        return {
+            'enabled': self.hedging,
+            'tasks_hedged': len(hedged),
+            'hedge_wins': sum(1 for h in hedged if h['winner'] == 'hedge'),
+            'overall': hedge_stats(),
+        }
+    
+    def _apply_scaffold(self, task: Dict) -> Dict:
+        """Materialize a cached template for the setup task and switch to the patch prompt"""
+        materialized = self.scaffolds.materialize(
+            task['tech_stack'], self.project_dir, self.project.name
+        )
+        if not materialized:
+            return task
+        
+        print(f"📦 Materialized scaffold template ({len(materialized)} files)")
+        return {
+            **task,
+            'prompt': task['patch_prompt'],
+            'scaffold': self.scaffolds.stack_key(task['tech_stack']),
+        }
+    
+    def _run_static_analysis(self, task: Dict, changes: Dict) -> Dict:
+        """
+        Analyze a task's changed files and run fix-up tasks for the files with errors
+        
+        Fix-up rounds are limited by OPENCODE_STATIC_FIXUP_ROUNDS (0 only reports).
+        """
+        analyzer = StaticAnalyzer(self.project_dir)
+        paths = set(changes['changed'])
+        analysis = analyzer.run(sorted(paths), self._detect_language)
+        fixups = []
+        
+        for _ in range(int(os.environ.get('OPENCODE_STATIC_FIXUP_ROUNDS', 1))):
+            if not analysis['errors']:
+                break
+            print(f"🔧 {analysis['errors']} static analysis errors in {task['title']}, running fix-up task")
+            
+            before = self.executor.snapshot_workspace()
+            fixup = self._run_task({**task, 'prompt': self._create_fixup_prompt(task, analysis)}, fixup=True)
+            fixup_changes = self.executor.diff_snapshots(before, self.executor.snapshot_workspace())
+            
+            fixup_summary = {
+                'success': fixup['success'],
+                'error': fixup.get('error'),
+                'changes': fixup_changes,
             }
+            if fixup['success'] and (fixup_changes['changed'] or fixup_changes['deleted']):
+                with span('commit fix-up', 'commit'):
+                    fixup_summary['commit_result'] = self.executor.commit_changes(
+                        fixup_changes['changed'],
+                        f"Fix static analysis errors: {task['title']}\n\nAuto-generated by OpenCode for {self.project.name}",
+                        deleted=fixup_changes['deleted']
+                    )
+            fixups.append(fixup_summary)
+            
+            paths = (paths | set(fixup_changes['changed'])) - set(fixup_changes['deleted'])
+            analysis = analyzer.run(sorted(paths), self._detect_language)
+        
+        analysis['fixups'] = fixups
+        return analysis
+    
+    def _create_fixup_prompt(self, task: Dict, analysis: Dict, max_errors: int = 50) -> str:
+        """Create a targeted prompt listing only the files and lines that failed checks"""
+        errors = [f for f in analysis['findings'] if f['severity'] == 'error'][:max_errors]
+        by_file: Dict[str, List[str]] = {}
+        for finding in errors:
+            code = f" [{finding['code']}]" if finding['code'] else ''
+            by_file.setdefault(finding['path'], []).append(
+                f"- line {finding['line']}: {finding['message']}{code} ({finding['tool']})"
+            )
+        error_list = '\n\n'.join(
+            f"### {path}\n" + '\n'.join(lines) for path, lines in sorted(by_file.items())
         )
         
+        prompt = f"""# Fix Static Analysis Errors
+
+## Project: {self.project.name}
+## Task: {task['title']}
+
+The following errors were reported by syntax checkers, linters and type checkers:
+
+{error_list}
+
+## Instructions
+1. Fix only the errors listed above
+2. Do not modify other files or rewrite working code
+3. Keep the existing behavior and structure
+"""
+        return prompt
+    
+    def _start_task_record(self, task_info: Dict):
+        """Create or reset the Task row before execution"""
+        if not task_info.get('agent'):
+            return None
+        
+        defaults = {
+            'description': task_info['prompt'][:500],
+            'assigned_to': task_info.get('agent'),
+            'status': 'in_progress',
+            'progress': 0,
+            'priority': task_info.get('priority', 'high'),
+            'completed_at': None
+        }
+        task, created = self._get_task_record(task_info, defaults)
         if not created:
-            task.status = 'completed' if result['success'] else 'failed'
-            task.save()
+            Task.objects.filter(pk=task.pk).update(updated_at=timezone.now(), **defaults)
+        return task
+    
+    def _create_progress_reporter(self, task_record, task_info: Dict):
+        """Rate-limited writer of live progress estimates into Task.progress"""
+        if task_record is None:
+            return None
         
-        # Save output
-        if result['success']:
-            output, _ = TaskOutput.objects.get_or_create(
+        def write(progress: int):
+            # Shares the lock so it cannot interleave with another task's transaction
+            with self._db_lock:
+                Task.objects.filter(pk=task_record.pk).update(
+                    progress=progress,
+                    updated_at=timezone.now()
+                )
+            self._publish('task.progress', key=task_info['id'], task_id=task_record.pk, progress=progress)
+        
+        # The flusher thread owns its own DB connection; close it when done
+        return ProgressReporter(write, on_close=lambda: connection.close()).start()
+    
+    def _set_agent_status(self, agent: Optional[Agent], status: str):
+        """Update an agent's status and announce the change"""
+        if agent is None:
+            return
+        Agent.objects.filter(pk=agent.pk).update(status=status, updated_at=timezone.now())
+        self._publish('agent.status', agent_id=agent.pk, name=agent.name, status=status)
+    
+    def _publish(self, event_type: str, **data):
+        """Push a run event to clients subscribed to this project"""
+        publish_event(self.project.id, event_type, **data)
+    
+    def _store_task_files(self, result: Dict) -> Dict[str, Tuple[str, int]]:
+        """
+        Store the bodies of the files a task (and its static-analysis fix-ups)
+        changed in the blob store, in parallel
+        
+        Called before taking the DB write lock; blob GC keeps unreferenced blobs
+        for a grace period, so they survive until their rows are committed.
+        
+        Returns:
+            Workspace-relative path -> (digest, size)
+        """
+        changed, _ = self._task_file_changes(result)
+        if not changed:
+            return {}
+        project_dir = Path(self.project_dir)
+        stored_by_path = get_blob_store().put_files(
+            [project_dir / path for path in sorted(changed)]
+        )
+        return {
+            str(full_path.relative_to(project_dir)): digest_size
+            for full_path, digest_size in stored_by_path.items()
+        }
+    
+    def _save_task_result(self, task_info: Dict, result: Dict, stored: Dict[str, Tuple[str, int]]):
+        """
+        Save task execution result to database
+        
+        Runs in one transaction and only writes rows: the task's file bodies
+        were already stored (see _store_task_files) and its OutputFile rows are
+        written in bulk.
+        """
+        status = 'completed' if result['success'] else 'failed'
+        
+        with transaction.atomic():
+            task, created = self._get_task_record(task_info, {
+                'description': task_info['prompt'][:500],
+                'assigned_to': task_info.get('agent'),
+                'status': status,
+                'priority': task_info.get('priority', 'high')
+            })
+            
+            update_fields = {'status': status}
+            if result['success']:
+                update_fields.update(progress=100, completed_at=timezone.now())
+            if not created or result['success']:
+                Task.objects.filter(pk=task.pk).update(updated_at=timezone.now(), **update_fields)
+            
+            if not result['success']:
+                return
+            
+            output, created = TaskOutput.objects.get_or_create(
                 task=task,
                 defaults={
                     'output_type': 'code',
                     'content': result.get('stdout', ''),
-                    'metadata': result.get('output', {})
+                    'metadata': self._build_output_metadata(result)
                 }
             )
+            if not created:
+                TaskOutput.objects.filter(pk=output.pk).update(
+                    content=result.get('stdout', ''),
+                    metadata=self._build_output_metadata(result)
+                )
             
-            # Save generated files
-            files = self.executor.get_generated_files()
-            for file_path in files:
-                full_path = Path(self.project_dir) / file_path
-                if full_path.exists():
-                    OutputFile.objects.get_or_create(
-                        task_output=output,
-                        path=str(file_path),
-                        defaults={
-                            'name': full_path.name,
-                            'content': full_path.read_text(errors='ignore')[:10000],  # Limit size
-                            'language': self._detect_language(file_path)
-                        }
-                    )
+            # The output lists the files this run of the task wrote; rows for files
+            # it no longer touches (or deleted) are dropped
+            existing = {f.path: f for f in OutputFile.objects.filter(task_output=output)}
+            stale = [f.pk for path, f in existing.items() if path not in stored]
+            if stale:
+                OutputFile.objects.filter(pk__in=stale).delete()
+            
+            to_create, to_update = [], []
+            for path, (digest, size) in stored.items():
+                fields = {
+                    'name': Path(path).name,
+                    'blob_digest': digest,
+                    'size': size,
+                    'language': self._detect_language(path),
+                }
+                row = existing.get(path)
+                if row is None:
+                    to_create.append(OutputFile(task_output=output, path=path, **fields))
+                elif any(getattr(row, name) != value for name, value in fields.items()):
+                    for name, value in fields.items():
+                        setattr(row, name, value)
+                    to_update.append(row)
+            
+            OutputFile.objects.bulk_create(to_create, batch_size=OUTPUT_FILE_BATCH_SIZE)
+            OutputFile.objects.bulk_update(
+                to_update, ['name', 'blob_digest', 'size', 'language'],
+                batch_size=OUTPUT_FILE_BATCH_SIZE
+            )
+    
+    def _task_file_changes(self, result: Dict) -> Tuple[Set[str], Set[str]]:
+        """Net (changed, deleted) paths of a task and its static-analysis fix-ups"""
+        changed, deleted = set(), set()
+        changes = [result.get('changes') or {}]
+        changes += [f['changes'] for f in result.get('static_analysis', {}).get('fixups', [])]
+        for change in changes:
+            changed = (changed | set(change.get('changed', []))) - set(change.get('deleted', []))
+            deleted = (deleted | set(change.get('deleted', []))) - set(change.get('changed', []))
+        return changed, deleted
+    
+    def _checkpoint_task(self, task_info: Dict, fingerprint: Dict, result: Dict):
+        """Checkpoint a completed task (or drop the stale checkpoint of a failed one)"""
+        if not result['success']:
+            self.checkpoints.invalidate(task_info)
+            return
+        
+        changed, deleted = self._task_file_changes(result)
+        paths = sorted(changed | deleted)
+        
+        commits = [result.get('commit_result') or {}]
+        commits += [f.get('commit_result') or {} for f in result.get('static_analysis', {}).get('fixups', [])]
+        self.checkpoints.save(task_info, fingerprint, paths, {
+            'commits': [c['commit'] for c in commits if c.get('commit')],
+            'files_changed': len(paths),
+            'summary': result.get('summary'),
+        })
+    
+    def _build_output_metadata(self, result: Dict) -> Dict:
+        """Combine OpenCode output with post-task stage results"""
+        output = result.get('output', {})
+        metadata = dict(output) if isinstance(output, dict) else {'output': output}
+        for stage in ('test_results', 'static_analysis', 'summary'):
+            if stage in result:
+                metadata[stage] = result[stage]
+        return metadata
     
     def _detect_language(self, file_path: str) -> str:
         """Detect programming language from file extension"""
@@ -323,19 +1268,28 @@ Please ensure good test coverage and follow testing best practices.
         return ext_map.get(ext, 'text')
 
 
-def start_project_development(project_id: int) -> Dict:
+def start_project_development(
+    project_id: int,
+    cancel_event: Optional[threading.Event] = None,
+    lane: str = 'interactive',
+    simulation: Optional[Simulation] = None
+) -> Dict:
     """
     Main entry point to start project development
     
     Args:
         project_id: Project ID
+        cancel_event: Optional event that cancels the run when set
+        lane: Scheduler priority lane ('interactive' or 'bulk')
+        simulation: Run with simulated LLM/OpenCode responses in a temporary
+            workspace; the result then includes a 'timing' breakdown
     
     Returns:
         Dictionary with development results
     """
     try:
         project = Project.objects.get(id=project_id)
-        orchestrator = ProjectOrchestrator(project)
+        orchestrator = ProjectOrchestrator(project, cancel_event=cancel_event, lane=lane, simulation=simulation)
         return orchestrator.start_development()
     
     except Project.DoesNotExist:
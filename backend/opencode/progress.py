@@ -0,0 +1,181 @@
+"""
+Task Progress
+Derives a live progress estimate from OpenCode's JSON event stream and
+publishes it through coalesced, rate-limited updates
+"""
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+# Tool names that write to the workspace
+WRITE_TOOLS = {'write', 'edit', 'patch', 'multiedit', 'create', 'str_replace'}
+
+# Progress never reaches 100 before the process exits successfully
+MAX_RUNNING_PROGRESS = 95
+
+
+def _walk(value: Any) -> Iterator[Dict]:
+    """Yield every dict nested inside an event"""
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from _walk(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk(child)
+
+
+class ProgressEstimator:
+    """
+    Incrementally parses OpenCode JSON events (one object per line).
+
+    Signals used, in order of preference:
+    - todo lists reported by the agent (completed / total)
+    - finished steps and files touched (saturating curve)
+    - elapsed time relative to the task timeout
+    """
+
+    def __init__(self, timeout: int = 300, step_scale: float = 8.0):
+        self.timeout = timeout
+        self.step_scale = step_scale
+        self.started_at = time.monotonic()
+        self.events = 0
+        self.steps_done = 0
+        self.files_touched: Set[str] = set()
+        self.todos_total = 0
+        self.todos_done = 0
+
+    def feed_line(self, line: str) -> Optional[int]:
+        """
+        Consume one stdout line
+
+        Returns:
+            The new progress estimate, or None if the line was not an event
+        """
+        line = line.strip()
+        if not line.startswith('{'):
+            return None
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
+        self.events += 1
+        event_type = str(event.get('type', '')).lower()
+        if 'step' in event_type and ('finish' in event_type or 'end' in event_type):
+            self.steps_done += 1
+
+        for node in _walk(event):
+            tool = str(node.get('tool', '')).lower()
+            if tool in WRITE_TOOLS:
+                for node_with_path in _walk(node):
+                    path = node_with_path.get('filePath') or node_with_path.get('path') or node_with_path.get('file')
+                    if isinstance(path, str):
+                        self.files_touched.add(path)
+                        break
+            todos = node.get('todos')
+            if isinstance(todos, list) and todos:
+                self.todos_total = len(todos)
+                self.todos_done = sum(
+                    1 for t in todos
+                    if isinstance(t, dict) and t.get('status') in ('completed', 'done')
+                )
+
+        return self.estimate()
+
+    def estimate(self) -> int:
+        """Current progress estimate in percent"""
+        if self.todos_total:
+            by_todos = MAX_RUNNING_PROGRESS * self.todos_done / self.todos_total
+        else:
+            by_todos = 0.0
+
+        work = self.steps_done + 0.5 * len(self.files_touched)
+        by_work = MAX_RUNNING_PROGRESS * (1 - math.exp(-work / self.step_scale))
+
+        elapsed = time.monotonic() - self.started_at
+        by_time = MAX_RUNNING_PROGRESS * min(elapsed / self.timeout, 1.0) if self.timeout else 0.0
+
+        return int(min(MAX_RUNNING_PROGRESS, max(by_todos, by_work, by_time * 0.5)))
+
+    def summary(self) -> Dict:
+        return {
+            'events': self.events,
+            'steps_done': self.steps_done,
+            'files_touched': sorted(self.files_touched),
+            'todos_done': self.todos_done,
+            'todos_total': self.todos_total,
+            'estimate': self.estimate(),
+        }
+
+
+class ProgressReporter:
+    """
+    Coalesces progress updates and writes them at most once per interval.
+
+    Callers may report as often as they like; a background thread flushes only
+    the latest value, and only when it moved by at least min_delta.
+    """
+
+    def __init__(self, write: Callable[[int], None], min_interval: float = 2.0, min_delta: int = 1,
+                 on_close: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            write: Persists a progress value (e.g. a single UPDATE query)
+            min_interval: Minimum seconds between writes
+            min_delta: Minimum change in percent worth writing
+            on_close: Called on the flusher thread after the last write (e.g. close DB connection)
+        """
+        self.write = write
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.on_close = on_close
+        self.writes = 0
+
+        self._latest: Optional[int] = None
+        self._written: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> 'ProgressReporter':
+        self._thread.start()
+        return self
+
+    def report(self, progress: Optional[int]):
+        """Record the latest progress value (cheap, never touches the database)"""
+        if progress is None:
+            return
+        with self._lock:
+            # Progress only moves forward
+            if self._latest is None or progress > self._latest:
+                self._latest = progress
+
+    def _flush(self, force: bool = False):
+        with self._lock:
+            latest = self._latest
+        if latest is None or latest == self._written:
+            return
+        if not force and self._written is not None and latest - self._written < self.min_delta:
+            return
+        self.write(latest)
+        self._written = latest
+        self.writes += 1
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.min_interval):
+                self._flush()
+            self._flush(force=True)
+        finally:
+            if self.on_close:
+                self.on_close()
+
+    def close(self):
+        """Flush the final value and stop the background thread"""
+        self._stop.set()
+        self._thread.join()
+
+# Made with Bob
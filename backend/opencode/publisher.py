@@ -0,0 +1,220 @@
+"""
+Commit Publisher
+Pushes each task's commit to the project's linked GitHub repository from a
+background thread, overlapping the upload with the next tasks' execution
+"""
+import base64
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.db import connection
+
+from github_integration.models import GitHubCommit, GitHubRepository
+from .events import publish_event
+from .executor import OpenCodeExecutor
+
+logger = logging.getLogger(__name__)
+
+# Commits waiting for upload; a task that finds the queue full waits (backpressure)
+UPLOAD_QUEUE_SIZE = int(os.environ.get('OPENCODE_PUSH_QUEUE_SIZE', 16))
+
+# Seconds one git push/fetch may take
+PUSH_TIMEOUT = int(os.environ.get('OPENCODE_PUSH_TIMEOUT', 120))
+
+# Attempts per push before the commits are left for the next one
+PUSH_ATTEMPTS = 3
+
+
+def push_enabled() -> bool:
+    return os.environ.get('OPENCODE_GITHUB_PUSH', 'True').lower() == 'true'
+
+
+class CommitPublisher:
+    """
+    Ordered, coalescing uploader of a workspace's commits
+
+    Commits are submitted in the order they are made (under the executor's git
+    lock), so each queued commit descends from the ones before it. The uploader
+    pushes the newest queued commit, which fast-forwards the remote branch over
+    every commit queued behind the previous push.
+    """
+
+    _STOP = object()
+
+    def __init__(self, executor: OpenCodeExecutor, repository: GitHubRepository,
+                 db_lock: Optional[threading.Lock] = None):
+        self.executor = executor
+        self.repository = repository
+        self.project_id = repository.project_id
+        self.branch = repository.default_branch or 'main'
+        self.author = repository.github_account.username
+        self._token = repository.github_account.get_access_token()
+        self._db_lock = db_lock or threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._rejected = False
+        self.stats = {
+            'branch': self.branch,
+            'submitted': 0,
+            'pushed': 0,
+            'pushes': 0,
+            'failed_pushes': 0,
+            'last_pushed': None,
+            'errors': [],
+        }
+
+    def _git(self, *args: str, timeout: Optional[int] = None) -> subprocess.CompletedProcess:
+        """Run git against the remote; the token travels in the environment, not argv"""
+        credentials = base64.b64encode(f"x-access-token:{self._token}".encode()).decode()
+        env = {
+            **os.environ,
+            'GIT_TERMINAL_PROMPT': '0',
+            'GIT_CONFIG_COUNT': '1',
+            'GIT_CONFIG_KEY_0': 'http.extraHeader',
+            'GIT_CONFIG_VALUE_0': f"Authorization: Basic {credentials}",
+        }
+        return subprocess.run(
+            ['git', *args],
+            cwd=str(self.executor.project_path),
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=timeout,
+        )
+
+    def _seed_history(self):
+        """
+        Start a workspace without commits from the remote branch, so the first
+        push fast-forwards it (the remote's files stay in the tree, not on disk)
+        """
+        with self.executor._git_lock:
+            self.executor._ensure_git_repository()
+            if self.executor._git('rev-parse', '-q', '--verify', 'HEAD', check=False).stdout.strip():
+                return
+            fetched = self._git('fetch', '--quiet', self.repository.clone_url, self.branch, timeout=PUSH_TIMEOUT)
+            if fetched.returncode != 0:
+                return  # Empty remote (or no such branch yet); the first push creates it
+            remote_tip = self.executor._git('rev-parse', 'FETCH_HEAD').stdout.strip()
+            self.executor._git('update-ref', 'HEAD', remote_tip)
+            self.executor._git('read-tree', remote_tip)
+
+    def start(self) -> 'CommitPublisher':
+        self._seed_history()
+        self._thread = threading.Thread(target=self._run, name=f'publisher-{self.project_id}', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, commit_sha: str, message: str):
+        """Queue a new commit for upload (called in commit order)"""
+        self.stats['submitted'] += 1
+        self._queue.put((commit_sha, message))
+
+    def close(self) -> Dict:
+        """
+        Upload what is still queued and stop
+
+        Returns:
+            Push statistics, including how long the tail after the last task took
+        """
+        started = time.monotonic()
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self.stats['tail_seconds'] = round(time.monotonic() - started, 3)
+        self.stats['success'] = not self.stats['errors'] and self.stats['pushed'] == self.stats['submitted']
+        return self.stats
+
+    def _run(self):
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is self._STOP:
+                    break
+                # Everything queued meanwhile descends from this commit; one push covers it all
+                batch = [item]
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                if not self._rejected:
+                    self._push(batch)
+        finally:
+            connection.close()
+
+    def _push(self, batch: List[tuple]):
+        sha = batch[-1][0]
+        error = ''
+        for attempt in range(PUSH_ATTEMPTS):
+            try:
+                result = self._git(
+                    'push', '--porcelain', self.repository.clone_url, f'{sha}:refs/heads/{self.branch}',
+                    timeout=PUSH_TIMEOUT
+                )
+            except subprocess.TimeoutExpired:
+                error = f'git push timed out after {PUSH_TIMEOUT} seconds'
+                continue
+            if result.returncode == 0:
+                break
+            error = (result.stderr or result.stdout).strip()
+            if 'non-fast-forward' in error or '[rejected]' in result.stdout:
+                # The remote branch has commits the workspace lacks; never force
+                self._rejected = True
+                error = f'Push to {self.branch} rejected (remote has diverged): {error}'
+                break
+            time.sleep(2 ** attempt)
+        else:
+            result = None
+
+        self.stats['pushes'] += 1
+        if result is None or result.returncode != 0:
+            self.stats['failed_pushes'] += 1
+            self.stats['errors'].append(error[-500:])
+            logger.warning(f"Pushing {sha[:7]} to {self.repository.full_name} failed: {error}")
+            publish_event(self.project_id, 'push.failed', sha=sha, error=error[-500:])
+            return
+
+        self.stats['pushed'] += len(batch)
+        self.stats['last_pushed'] = sha
+        print(f"⬆️ Pushed {len(batch)} commit(s) to {self.repository.full_name}@{self.branch}")
+        publish_event(self.project_id, 'push.completed', sha=sha, commits=len(batch), branch=self.branch)
+        with self._db_lock:
+            GitHubCommit.objects.bulk_create([
+                GitHubCommit(
+                    repository=self.repository,
+                    sha=commit_sha,
+                    message=message,
+                    author=self.author,
+                    branch=self.branch,
+                )
+                for commit_sha, message in batch
+            ])
+
+
+def get_commit_publisher(executor: OpenCodeExecutor, project,
+                         db_lock: Optional[threading.Lock] = None) -> Optional[CommitPublisher]:
+    """Start a publisher for the project's linked repository (None if unlinked or disabled)"""
+    if not push_enabled():
+        return None
+    repository = (
+        GitHubRepository.objects.select_related('github_account').filter(project=project).first()
+    )
+    if repository is None:
+        return None
+    try:
+        return CommitPublisher(executor, repository, db_lock=db_lock).start()
+    except Exception as e:
+        logger.warning(f"Not pushing to {repository.full_name}: {e}")
+        return None
+
+# Made with Bob
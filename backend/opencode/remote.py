@@ -0,0 +1,556 @@
+"""
+Remote Executor Agents
+Runs OpenCode tasks on worker nodes; workspaces are synced with rolling-checksum deltas
+
+Start agents on a worker node (from backend/):
+    OPENCODE_REMOTE_AUTHKEY=secret python -m opencode.remote --host 0.0.0.0 --port 7601 --capacity 4
+
+Loopback setup with three agents on one box:
+    OPENCODE_REMOTE_AUTHKEY=secret python -m opencode.remote --port 7601 --agents 3
+    OPENCODE_REMOTE_AGENTS=127.0.0.1:7601,127.0.0.1:7602,127.0.0.1:7603
+"""
+import argparse
+import logging
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from multiprocessing.connection import Client, Listener, AuthenticationError
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .delta import LocalTree, sync_trees
+from .executor import OpenCodeExecutor
+from .fsutil import BACKEND_DIR, clone_tree
+from .sandbox import SandboxLimits, SandboxPool
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+# Suffix of the per-task copies a project's workspace is forked into on an agent
+TASK_WORKSPACE_MARKER = '.task-'
+
+# Requests that can be cancelled while they run, and how often their connection is checked
+CANCELLABLE_METHODS = ('execute',)
+CANCEL_POLL_SECONDS = 0.2
+
+
+class RemoteAgentError(Exception):
+    """Raised when an agent rejects a request or cannot be reached"""
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.strip().rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class AgentServer:
+    """
+    Worker agent serving OpenCode executions over multiprocessing.connection.
+
+    Every request is a dict {'method', 'params'}; replies are ('ok', value),
+    ('error', message) or, during execute, any number of ('progress', value).
+    While an execute runs, the client may send {'method': 'cancel'} (or hang
+    up) to kill its OpenCode process. Connections are authenticated with a
+    shared authkey (messages are pickled, so agents must only listen on trusted
+    networks).
+    """
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes, root: str,
+                 capacity: int = 2, pool: Optional[SandboxPool] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.capacity = capacity
+        self.pool = pool or SandboxPool(max_processes=capacity, limits=SandboxLimits.from_env())
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+
+        self._trees: Dict[str, LocalTree] = {}
+        # Held while a workspace is written or forked, so a fork never sees a half-applied sync
+        self._tree_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._stop = threading.Event()
+
+        # Task copies left behind by a previous run of the agent
+        for leftover in self.root.glob(f'*{TASK_WORKSPACE_MARKER}*'):
+            shutil.rmtree(leftover, ignore_errors=True)
+
+    def _tree(self, workspace: str) -> LocalTree:
+        if not WORKSPACE_ID_PATTERN.match(workspace) or workspace in ('.', '..'):
+            raise ValueError(f"Invalid workspace id: {workspace}")
+        with self._lock:
+            if workspace not in self._trees:
+                self._trees[workspace] = LocalTree(str(self.root / workspace))
+            return self._trees[workspace]
+
+    def _tree_lock(self, workspace: str) -> threading.Lock:
+        with self._lock:
+            return self._tree_locks[workspace]
+
+    # Lifecycle
+
+    def serve_forever(self):
+        logger.info(f"OpenCode agent listening on {self.address} (capacity {self.capacity})")
+        while not self._stop.is_set():
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError as e:
+                logger.warning(f"Rejected agent connection: {e}")
+                continue
+            except OSError:
+                if self._stop.is_set():
+                    break
+                raise
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def start(self) -> threading.Thread:
+        """Serve on a background thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self._stop.set()
+        self.listener.close()
+
+    # Request handling
+
+    def _handle(self, conn):
+        send_lock = threading.Lock()
+
+        def send(message):
+            with send_lock:
+                conn.send(message)
+
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                method = request.get('method')
+                if method == 'cancel':
+                    continue  # Arrived after the request it was meant for finished
+                handler = getattr(self, f"_rpc_{method}", None)
+                params = dict(request.get('params', {}))
+                watcher = None
+                if method in CANCELLABLE_METHODS:
+                    params['cancel_event'] = threading.Event()
+                    done = threading.Event()
+                    watcher = threading.Thread(
+                        target=self._watch_cancel, args=(conn, done, params['cancel_event']), daemon=True
+                    )
+                    watcher.start()
+                try:
+                    if handler is None:
+                        raise ValueError(f"Unknown method: {method}")
+                    reply = ('ok', handler(send, **params))
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                if watcher is not None:
+                    done.set()
+                    watcher.join()
+                try:
+                    send(reply)
+                except OSError:
+                    return
+
+    def _watch_cancel(self, conn, done: threading.Event, cancel_event: threading.Event):
+        """Set cancel_event when the client cancels (or hangs up) before done is set"""
+        while not done.is_set():
+            try:
+                if not conn.poll(CANCEL_POLL_SECONDS):
+                    continue
+                message = conn.recv()
+            except (EOFError, OSError):
+                cancel_event.set()
+                return
+            if isinstance(message, dict) and message.get('method') == 'cancel':
+                cancel_event.set()
+
+    def _rpc_status(self, send) -> Dict:
+        with self._lock:
+            running = self._running
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            load = None
+        return {
+            'hostname': socket.gethostname(),
+            'capacity': self.capacity,
+            'running': running,
+            'free': max(0, self.capacity - running),
+            'load': load,
+        }
+
+    def _rpc_manifest(self, send, workspace: str, paths: Optional[List[str]] = None) -> Dict:
+        return self._tree(workspace).manifest(paths)
+
+    def _rpc_signatures(self, send, workspace: str, paths: List[str]) -> Dict:
+        return self._tree(workspace).signatures(paths)
+
+    def _rpc_deltas(self, send, workspace: str, requests: Dict) -> Dict:
+        return self._tree(workspace).deltas(requests)
+
+    def _rpc_apply(self, send, workspace: str, deltas: Dict, modes: Dict, deleted: List[str]) -> int:
+        tree = self._tree(workspace)
+        with self._tree_lock(workspace):
+            return tree.apply(deltas, modes, deleted)
+
+    def _rpc_fork(self, send, workspace: str, base: str) -> bool:
+        """Create workspace as a private copy of base (copy-on-write where supported)"""
+        source = self._tree(base)
+        if not WORKSPACE_ID_PATTERN.match(workspace) or workspace in ('.', '..'):
+            raise ValueError(f"Invalid workspace id: {workspace}")
+        target = self.root / workspace
+        shutil.rmtree(target, ignore_errors=True)
+        with self._tree_lock(base):
+            clone_tree(source.root, target, 'reflink')
+            digests = dict(source._digests)
+        tree = LocalTree(str(target))
+        # The copy keeps mtimes, so the base's digests stay valid
+        tree._digests = digests
+        with self._lock:
+            self._trees[workspace] = tree
+        return True
+
+    def _rpc_execute(self, send, workspace: str, prompt: str, agent_role: str = 'build',
+                     timeout: int = 300, model: Optional[str] = None,
+                     cancel_event: Optional[threading.Event] = None) -> Dict:
+        tree = self._tree(workspace)
+        executor = OpenCodeExecutor(str(tree.root), pool=self.pool)
+
+        def forward_progress(progress: Optional[int]):
+            if progress is not None:
+                send(('progress', progress))
+
+        with self._lock:
+            self._running += 1
+        try:
+            before = executor.snapshot_workspace()
+            result = executor.execute_task(
+                prompt,
+                agent_role=agent_role,
+                timeout=timeout,
+                on_progress=forward_progress,
+                cancel_event=cancel_event,
+                model=model
+            )
+            result['changes'] = executor.diff_snapshots(before, executor.snapshot_workspace())
+            result['agent'] = socket.gethostname()
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _rpc_drop(self, send, workspace: str) -> bool:
+        tree = self._tree(workspace)
+        with self._lock:
+            self._trees.pop(workspace, None)
+        shutil.rmtree(tree.root, ignore_errors=True)
+        with self._lock:
+            self._tree_locks.pop(workspace, None)
+        return True
+
+
+class AgentSession:
+    """One authenticated connection to an agent"""
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes):
+        try:
+            self.conn = Client(address, authkey=authkey)
+        except (OSError, AuthenticationError) as e:
+            raise RemoteAgentError(f"Cannot connect to agent {address}: {e}") from e
+
+    def call(self, method: str, on_progress: Optional[Callable[[int], None]] = None,
+             cancel_event: Optional[threading.Event] = None, **params):
+        """
+        Call an agent method and wait for its reply
+
+        Args:
+            method: Agent method ('status', 'execute', ...)
+            on_progress: Optional callback receiving progress messages
+            cancel_event: Optional event; when set, the agent is asked to cancel
+                the request (see CANCELLABLE_METHODS) and its reply is awaited
+        """
+        done = threading.Event()
+        if cancel_event is not None:
+            threading.Thread(target=self._cancel_when_set, args=(cancel_event, done), daemon=True).start()
+        try:
+            self.conn.send({'method': method, 'params': params})
+            while True:
+                kind, value = self.conn.recv()
+                if kind == 'progress':
+                    if on_progress:
+                        on_progress(value)
+                    continue
+                if kind == 'error':
+                    raise RemoteAgentError(value)
+                return value
+        except (EOFError, OSError) as e:
+            raise RemoteAgentError(f"Agent connection lost: {e}") from e
+        finally:
+            done.set()
+
+    def _cancel_when_set(self, cancel_event: threading.Event, done: threading.Event):
+        while not done.is_set():
+            if cancel_event.wait(CANCEL_POLL_SECONDS):
+                if not done.is_set():
+                    try:
+                        self.conn.send({'method': 'cancel'})
+                    except OSError:
+                        pass  # Connection lost; the agent cancels when it notices
+                return
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> 'AgentSession':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RemoteTree:
+    """Agent-side workspace with the LocalTree sync interface"""
+
+    def __init__(self, session: AgentSession, workspace: str):
+        self.session = session
+        self.workspace = workspace
+
+    def manifest(self, paths: Optional[List[str]] = None) -> Dict:
+        return self.session.call('manifest', workspace=self.workspace, paths=paths)
+
+    def signatures(self, paths: List[str]) -> Dict:
+        return self.session.call('signatures', workspace=self.workspace, paths=paths)
+
+    def deltas(self, requests: Dict) -> Dict:
+        return self.session.call('deltas', workspace=self.workspace, requests=requests)
+
+    def apply(self, deltas: Dict, modes: Dict, deleted: List[str] = ()) -> int:
+        return self.session.call('apply', workspace=self.workspace, deltas=deltas,
+                                 modes=modes, deleted=list(deleted))
+
+
+class RemoteAgent:
+    """Client for one agent"""
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+
+    @property
+    def name(self) -> str:
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def session(self) -> AgentSession:
+        return AgentSession(self.address, self.authkey)
+
+    def status(self) -> Dict:
+        with self.session() as session:
+            return session.call('status')
+
+    def execute_task(self, project_path: str, workspace: str, prompt: str,
+                     agent_role: str = 'build', timeout: int = 300,
+                     on_progress: Optional[Callable[[int], None]] = None,
+                     model: Optional[str] = None,
+                     cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Push the workspace, run the task on the agent and pull back its change set
+
+        The push mirrors the project's workspace into its base copy on the agent,
+        where nothing runs; the task then runs in a private fork of that copy. So
+        tasks of the same project running concurrently on one agent never see (or
+        delete) each other's files, and only files the task changed or deleted
+        are pulled back. Setting cancel_event kills the task's OpenCode process
+        on the agent; the changes it made until then are still pulled back.
+        """
+        local = LocalTree(project_path)
+        task_workspace = f"{workspace}{TASK_WORKSPACE_MARKER}{uuid.uuid4().hex[:12]}"
+        with self.session() as session:
+            pushed = sync_trees(local, RemoteTree(session, workspace))
+            session.call('fork', workspace=task_workspace, base=workspace)
+            remote = RemoteTree(session, task_workspace)
+            try:
+                result = session.call(
+                    'execute',
+                    on_progress=on_progress,
+                    cancel_event=cancel_event,
+                    workspace=task_workspace,
+                    prompt=prompt,
+                    agent_role=agent_role,
+                    timeout=timeout,
+                    model=model
+                )
+                changes = result.get('changes', {'changed': [], 'deleted': []})
+                pulled = sync_trees(remote, local, paths=changes['changed'], deleted=changes['deleted'])
+            finally:
+                try:
+                    session.call('drop', workspace=task_workspace)
+                except RemoteAgentError:
+                    pass  # Connection lost; the agent removes leftovers when it restarts
+        result['sync'] = {'agent': self.name, 'push': pushed, 'pull': pulled}
+        return result
+
+
+class AgentRegistry:
+    """
+    Registered agents and capacity-based scheduling.
+
+    Each task goes to the reachable agent with the most free slots, counting
+    slots this process has already reserved but not yet started.
+    """
+
+    def __init__(self, agents: Optional[List[RemoteAgent]] = None, poll_interval: float = 1.0):
+        self.agents: List[RemoteAgent] = list(agents or [])
+        self.poll_interval = poll_interval
+        self._reserved = Counter()
+        self._lock = threading.Lock()
+
+    def register(self, agent: RemoteAgent):
+        with self._lock:
+            if all(a.address != agent.address for a in self.agents):
+                self.agents.append(agent)
+
+    def has_agents(self) -> bool:
+        return bool(self.agents)
+
+    def get_status(self) -> List[Dict]:
+        statuses = []
+        for agent in list(self.agents):
+            try:
+                statuses.append({'agent': agent.name, 'reachable': True, **agent.status()})
+            except RemoteAgentError as e:
+                statuses.append({'agent': agent.name, 'reachable': False, 'error': str(e)})
+        return statuses
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[RemoteAgent]:
+        """
+        Reserve a slot on the agent with the most free capacity
+
+        Waits while every reachable agent is busy. Returns None when no agent is
+        reachable or the timeout expires.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            free = {}
+            for agent in list(self.agents):
+                try:
+                    free[agent.name] = (agent, agent.status()['free'])
+                except RemoteAgentError as e:
+                    logger.warning(f"Agent {agent.name} unavailable: {e}")
+            if not free:
+                return None
+
+            with self._lock:
+                candidates = [
+                    (slots - self._reserved[name], agent)
+                    for name, (agent, slots) in free.items()
+                    if slots - self._reserved[name] > 0
+                ]
+                if candidates:
+                    _, agent = max(candidates, key=lambda c: c[0])
+                    self._reserved[agent.name] += 1
+                    return agent
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def release(self, agent: RemoteAgent):
+        with self._lock:
+            self._reserved[agent.name] -= 1
+            if self._reserved[agent.name] <= 0:
+                del self._reserved[agent.name]
+
+    def execute_task(self, project_path: str, workspace: str, prompt: str,
+                     agent_role: str = 'build', timeout: int = 300,
+                     on_progress: Optional[Callable[[int], None]] = None,
+                     model: Optional[str] = None,
+                     cancel_event: Optional[threading.Event] = None) -> Optional[Dict]:
+        """
+        Run a task on the least loaded agent
+
+        Returns:
+            The execution result, or None when no agent could run it (caller runs locally)
+        """
+        agent = self.acquire()
+        if agent is None:
+            return None
+        try:
+            return agent.execute_task(
+                project_path, workspace, prompt, agent_role, timeout, on_progress, model, cancel_event
+            )
+        except RemoteAgentError as e:
+            logger.warning(f"Remote execution on {agent.name} failed: {e}")
+            return None
+        finally:
+            self.release(agent)
+
+
+# Singleton instance
+_registry_instance = None
+
+
+def get_agent_registry() -> AgentRegistry:
+    """Get or create the registry of agents listed in OPENCODE_REMOTE_AGENTS"""
+    global _registry_instance
+    if _registry_instance is None:
+        addresses = [a for a in os.environ.get('OPENCODE_REMOTE_AGENTS', '').split(',') if a.strip()]
+        authkey = os.environ.get('OPENCODE_REMOTE_AUTHKEY', '')
+        if addresses and not authkey:
+            logger.warning("OPENCODE_REMOTE_AGENTS is set without OPENCODE_REMOTE_AUTHKEY; remote agents disabled")
+            addresses = []
+        _registry_instance = AgentRegistry(
+            [RemoteAgent(parse_address(a), authkey.encode()) for a in addresses]
+        )
+    return _registry_instance
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run OpenCode executor agents')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7601)
+    parser.add_argument('--capacity', type=int, default=2, help='Concurrent tasks per agent')
+    parser.add_argument('--agents', type=int, default=1, help='Agents to start on consecutive ports')
+    parser.add_argument('--root', default=os.environ.get(
+        'OPENCODE_AGENT_WORKSPACE_DIR', str(BACKEND_DIR.parent / 'agent_workspaces')
+    ))
+    args = parser.parse_args(argv)
+
+    authkey = os.environ.get('OPENCODE_REMOTE_AUTHKEY')
+    if not authkey:
+        parser.error('OPENCODE_REMOTE_AUTHKEY must be set')
+
+    logging.basicConfig(level=logging.INFO)
+    servers = [
+        AgentServer(
+            (args.host, args.port + i),
+            authkey.encode(),
+            str(Path(args.root) / f"agent_{args.port + i}"),
+            capacity=args.capacity
+        )
+        for i in range(args.agents)
+    ]
+    for server in servers:
+        server.start()
+        print(f"Agent listening on {server.address[0]}:{server.address[1]}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.close()
+
+
+if __name__ == '__main__':
+    main()
+
+# Made with Bob
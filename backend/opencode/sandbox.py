@@ -0,0 +1,419 @@
+"""
+Sandbox Pool
+Runs executor subprocesses under per-process resource limits with host-load admission control
+"""
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# How often a running command checks its cancel event
+CANCEL_POLL_SECONDS = 0.5
+
+
+class SandboxCancelled(Exception):
+    """Raised when a sandboxed command is killed because its cancel event was set"""
+
+
+class SandboxLimits:
+    """
+    Per-process resource limits applied to every sandboxed command
+
+    Memory is limited by the cgroup's memory.max when a cgroup is configured and
+    by RLIMIT_DATA otherwise. RLIMIT_AS is off by default: Node, Bun and other
+    JIT runtimes reserve far more address space than they ever touch and fail
+    to start under it.
+    """
+
+    def __init__(
+        self,
+        cpu_seconds: int = 600,
+        memory_mb: int = 8192,
+        max_open_files: int = 1024,
+        wall_clock_seconds: int = 300,
+        address_space_mb: int = 0
+    ):
+        """
+        Args:
+            cpu_seconds: CPU time limit (RLIMIT_CPU / cgroup cpu.max budget)
+            memory_mb: Memory limit in megabytes (cgroup memory.max, else
+                RLIMIT_DATA), 0 disables it
+            max_open_files: Open file descriptor limit (RLIMIT_NOFILE)
+            wall_clock_seconds: Default wall-clock timeout for a command
+            address_space_mb: Virtual address space limit (RLIMIT_AS) in
+                megabytes, 0 (the default) disables it
+        """
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_open_files = max_open_files
+        self.wall_clock_seconds = wall_clock_seconds
+        self.address_space_mb = address_space_mb
+
+    @classmethod
+    def from_env(cls) -> 'SandboxLimits':
+        """Build limits from OPENCODE_SANDBOX_* environment variables"""
+        return cls(
+            cpu_seconds=int(os.environ.get('OPENCODE_SANDBOX_CPU_SECONDS', 600)),
+            memory_mb=int(os.environ.get('OPENCODE_SANDBOX_MEMORY_MB', 8192)),
+            max_open_files=int(os.environ.get('OPENCODE_SANDBOX_MAX_FILES', 1024)),
+            wall_clock_seconds=int(os.environ.get('OPENCODE_SANDBOX_WALL_SECONDS', 300)),
+            address_space_mb=int(os.environ.get('OPENCODE_SANDBOX_ADDRESS_SPACE_MB', 0)),
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'cpu_seconds': self.cpu_seconds,
+            'memory_mb': self.memory_mb,
+            'max_open_files': self.max_open_files,
+            'wall_clock_seconds': self.wall_clock_seconds,
+            'address_space_mb': self.address_space_mb,
+        }
+
+
+class SandboxPool:
+    """
+    Bounded pool of sandboxed executor processes.
+
+    Features:
+    - Fixed number of concurrent processes
+    - Admission control based on host load average
+    - rlimits on every child, cgroup v2 limits when a delegated cgroup is configured
+    - Queued callers wait for capacity instead of oversubscribing the host
+    """
+
+    def __init__(
+        self,
+        max_processes: Optional[int] = None,
+        max_load_per_cpu: float = 1.5,
+        limits: Optional[SandboxLimits] = None,
+        cgroup_root: Optional[str] = None,
+        poll_interval: float = 1.0
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.max_processes = max_processes or max(1, cpu_count // 2)
+        self.max_load_per_cpu = max_load_per_cpu
+        self.limits = limits or SandboxLimits()
+        self.cgroup_root = Path(cgroup_root) if cgroup_root else None
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'total_wait_seconds': 0.0,
+            'timeouts': 0,
+            'cancelled': 0,
+        }
+
+    # Admission control
+
+    def _host_overloaded(self) -> bool:
+        """Check if the 1-minute load average exceeds the allowed load per CPU"""
+        try:
+            load_1m = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            return False
+        return load_1m / (os.cpu_count() or 1) > self.max_load_per_cpu
+
+    def _has_capacity(self) -> bool:
+        if self._running >= self.max_processes:
+            return False
+        # Always admit when nothing of ours is running so external load cannot starve the queue
+        return self._running == 0 or not self._host_overloaded()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for an execution slot
+
+        Args:
+            timeout: Maximum seconds to wait, None waits forever
+
+        Returns:
+            True if a slot was acquired
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+
+        with self._condition:
+            queued = False
+            while not self._has_capacity():
+                if not queued:
+                    queued = True
+                    self._waiting += 1
+                    self.stats['queued'] += 1
+
+                remaining = self.poll_interval
+                if deadline is not None:
+                    remaining = min(remaining, deadline - time.monotonic())
+                    if remaining <= 0:
+                        self._waiting -= 1
+                        return False
+                # Wake up periodically to re-check host load
+                self._condition.wait(remaining)
+
+            if queued:
+                self._waiting -= 1
+            self._running += 1
+            self.stats['admitted'] += 1
+            self.stats['total_wait_seconds'] += time.monotonic() - started
+            return True
+
+    def release(self):
+        """Release an execution slot"""
+        with self._condition:
+            self._running -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """Context manager holding an execution slot"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    # Process limits
+
+    def _create_cgroup(self) -> Optional[Path]:
+        """Create a child cgroup with memory and CPU limits, if a cgroup root is configured"""
+        if not self.cgroup_root or not (self.cgroup_root / 'cgroup.procs').exists():
+            return None
+
+        cgroup = self.cgroup_root / f"sandbox-{uuid.uuid4().hex[:12]}"
+        try:
+            cgroup.mkdir()
+            if self.limits.memory_mb:
+                (cgroup / 'memory.max').write_text(str(self.limits.memory_mb * 1024 * 1024))
+            # One CPU worth of bandwidth per process
+            (cgroup / 'cpu.max').write_text('100000 100000')
+            (cgroup / 'pids.max').write_text('512')
+        except OSError:
+            self._remove_cgroup(cgroup)
+            return None
+        return cgroup
+
+    def _remove_cgroup(self, cgroup: Optional[Path]):
+        if cgroup is None:
+            return
+        try:
+            cgroup.rmdir()
+        except OSError:
+            pass
+
+    def _apply_limits(self, process: subprocess.Popen, cgroup: Optional[Path]):
+        """
+        Move a just-started command into its cgroup and set its rlimits
+
+        Done from the parent rather than in a preexec_fn: this process runs many
+        threads (Celery's thread pool, the publisher, progress and heartbeat
+        threads), and a forked child that needs a lock another thread held at
+        fork time deadlocks before it execs. The command runs unconstrained for
+        the instant between its exec and these calls. rlimits need prlimit
+        (Linux); elsewhere only the wall-clock timeout applies.
+        """
+        limits = self.limits
+        if cgroup is not None:
+            try:
+                (cgroup / 'cgroup.procs').write_text(str(process.pid))
+            except OSError as e:
+                logger.warning(f"Could not move sandboxed process into {cgroup}: {e}")
+                cgroup = None
+
+        if resource is None or not hasattr(resource, 'prlimit'):
+            return
+        rlimits = [
+            (resource.RLIMIT_CPU, limits.cpu_seconds),
+            (resource.RLIMIT_NOFILE, limits.max_open_files),
+        ]
+        if limits.memory_mb and cgroup is None:
+            # Counts heap and private writable mappings, not reserved address space
+            rlimits.append((resource.RLIMIT_DATA, limits.memory_mb * 1024 * 1024))
+        if limits.address_space_mb:
+            rlimits.append((resource.RLIMIT_AS, limits.address_space_mb * 1024 * 1024))
+        try:
+            for name, value in rlimits:
+                resource.prlimit(process.pid, name, (value, value))
+        except ProcessLookupError:
+            pass  # Already exited
+        except OSError:
+            self._kill(process)
+            process.communicate()
+            raise
+
+    def _kill(self, process: subprocess.Popen):
+        """Kill the whole process group of a sandboxed command"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            process.kill()
+
+    # Execution
+
+    def _wait(self, process: subprocess.Popen, timeout: float,
+              cancel_event: Optional[threading.Event]):
+        """Wait for exit; raises TimeoutExpired or SandboxCancelled"""
+        if cancel_event is None:
+            process.wait(timeout=timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            if cancel_event.is_set():
+                raise SandboxCancelled(f"Command cancelled: {process.args}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            try:
+                process.wait(timeout=min(CANCEL_POLL_SECONDS, remaining))
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+    def _communicate_streaming(
+        self,
+        process: subprocess.Popen,
+        timeout: float,
+        on_stdout_line: Callable[[str], None],
+        cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[str, str]:
+        """Like communicate(), but hands every stdout line to a callback as it arrives"""
+        stdout_lines: List[str] = []
+        stderr_chunks: List[str] = []
+
+        def read_stdout():
+            for line in process.stdout:
+                stdout_lines.append(line)
+                try:
+                    on_stdout_line(line)
+                except Exception as e:  # A broken callback must not kill the process
+                    logger.warning(f"stdout callback failed: {e}")
+
+        def read_stderr():
+            stderr_chunks.append(process.stderr.read())
+
+        readers = [threading.Thread(target=read_stdout, daemon=True),
+                   threading.Thread(target=read_stderr, daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        try:
+            self._wait(process, timeout, cancel_event)
+        finally:
+            if process.poll() is None:
+                self._kill(process)
+            for reader in readers:
+                reader.join()
+        return ''.join(stdout_lines), ''.join(stderr_chunks)
+
+    def run(
+        self,
+        cmd: List[str],
+        cwd: Optional[str] = None,
+        timeout: Optional[int] = None,
+        env: Optional[Dict[str, str]] = None,
+        on_stdout_line: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a command inside the sandbox, waiting for a slot first
+
+        Mirrors subprocess.run(capture_output=True, text=True) and raises
+        subprocess.TimeoutExpired when the wall-clock limit is hit.
+
+        Args:
+            on_stdout_line: Optional callback receiving stdout line by line while the command runs
+            cancel_event: Optional event; when set, the command's process group is killed
+                and SandboxCancelled is raised
+        """
+        timeout = timeout or self.limits.wall_clock_seconds
+
+        with self.slot():
+            cgroup = self._create_cgroup()
+            try:
+                process = subprocess.Popen(
+                    cmd,
+                    cwd=cwd,
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    bufsize=1 if on_stdout_line else -1,
+                    start_new_session=True
+                )
+                self._apply_limits(process, cgroup)
+                # Streaming readers also let us poll for cancellation without losing output
+                streaming = on_stdout_line or cancel_event is not None
+                try:
+                    if streaming:
+                        stdout, stderr = self._communicate_streaming(
+                            process, timeout, on_stdout_line or (lambda line: None), cancel_event
+                        )
+                    else:
+                        stdout, stderr = process.communicate(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    if not streaming:
+                        self._kill(process)
+                        process.communicate()
+                    with self._condition:
+                        self.stats['timeouts'] += 1
+                    raise
+                except SandboxCancelled:
+                    with self._condition:
+                        self.stats['cancelled'] += 1
+                    raise
+                return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+            finally:
+                self._remove_cgroup(cgroup)
+
+    def get_status(self) -> Dict:
+        """Get current pool status"""
+        with self._condition:
+            try:
+                load = os.getloadavg()
+            except (AttributeError, OSError):
+                load = None
+            return {
+                'max_processes': self.max_processes,
+                'running': self._running,
+                'waiting': self._waiting,
+                'host_load': load,
+                'limits': self.limits.to_dict(),
+                **self.stats,
+            }
+
+
+# Singleton instance
+_pool_instance = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Get or create the process-wide sandbox pool"""
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is None:
+            max_processes = os.environ.get('OPENCODE_SANDBOX_MAX_PROCESSES')
+            _pool_instance = SandboxPool(
+                max_processes=int(max_processes) if max_processes else None,
+                max_load_per_cpu=float(os.environ.get('OPENCODE_SANDBOX_MAX_LOAD', 1.5)),
+                limits=SandboxLimits.from_env(),
+                cgroup_root=os.environ.get('OPENCODE_SANDBOX_CGROUP_ROOT'),
+            )
+        return _pool_instance
+
+# Made with Bob
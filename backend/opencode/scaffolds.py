@@ -0,0 +1,230 @@
+"""
+Scaffold Library
+Pre-built project skeletons keyed by normalized tech stack, so the
+"Setup Project Structure" task does not regenerate boilerplate every run
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .fsutil import BACKEND_DIR, clone_file, locked_json_file
+
+logger = logging.getLogger(__name__)
+
+# Placeholders substituted for project-specific names when a template is saved
+PLACEHOLDERS = {
+    'name': '__PROJECT_NAME__',
+    'slug': '__PROJECT_SLUG__',
+    'module': '__PROJECT_MODULE__',
+}
+
+# Files larger than this are cloned verbatim instead of scanned for placeholders
+MAX_TEMPLATED_FILE_BYTES = 256 * 1024
+
+# Very short project names are left alone; replacing them would mangle unrelated text
+MIN_PLACEHOLDER_LENGTH = 3
+
+
+def _normalize_name(value) -> str:
+    """'React 18.2' -> 'react', 'Node.js' -> 'node.js'"""
+    name = str(value).strip().lower()
+    name = re.sub(r'\s*v?\d+(\.\d+)*\s*$', '', name)
+    return re.sub(r'\s+', ' ', name)
+
+
+def normalize_tech_stack(tech_stack: Dict) -> Dict:
+    """Normalize a PlanningDocument.tech_stack so equivalent stacks compare equal"""
+    normalized = {}
+    for section in ('frontend', 'backend', 'database'):
+        value = tech_stack.get(section) or []
+        if isinstance(value, str):
+            value = [value]
+        names = sorted({_normalize_name(v) for v in value if str(v).strip()})
+        if names:
+            normalized[section] = names
+    return normalized
+
+
+def project_names(project_name: str) -> Dict[str, str]:
+    """Project name variants that templates replace with placeholders"""
+    slug = re.sub(r'[^a-z0-9]+', '-', project_name.lower()).strip('-')
+    return {
+        'name': project_name,
+        'slug': slug,
+        'module': slug.replace('-', '_'),
+    }
+
+
+class ScaffoldLibrary:
+    """
+    Library of project skeletons.
+
+    Layout: <root>/<stack key>/files/... plus <root>/index.json
+    """
+
+    def __init__(self, root: str, link_mode: str = 'reflink'):
+        self.root = Path(root)
+        self.link_mode = link_mode
+        self.index_path = self.root / 'index.json'
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def stack_key(tech_stack: Dict) -> Optional[str]:
+        normalized = normalize_tech_stack(tech_stack)
+        if not normalized:
+            return None
+        canonical = json.dumps(normalized, sort_keys=True)
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    def get_template(self, tech_stack: Dict) -> Optional[Dict]:
+        """Get template metadata for a stack, or None if the stack is unknown"""
+        key = self.stack_key(tech_stack)
+        if key is None or not (self.root / key / 'files').is_dir():
+            return None
+        with locked_json_file(self.index_path) as index:
+            entry = index.get(key)
+        return {'key': key, **entry} if entry else None
+
+    def materialize(self, tech_stack: Dict, workspace: str, project_name: str) -> List[str]:
+        """
+        Copy a stack's template into a workspace without overwriting existing files
+
+        Returns:
+            List of materialized relative paths (empty if there is no template)
+        """
+        template = self.get_template(tech_stack)
+        if template is None:
+            return []
+
+        workspace = Path(workspace)
+        files_dir = self.root / template['key'] / 'files'
+        names = project_names(project_name)
+        materialized = []
+
+        for relative_path in template['files']:
+            source = files_dir / relative_path
+            target = workspace / relative_path
+            if target.exists() or not source.is_file():
+                continue
+
+            if relative_path in template.get('templated', []):
+                content = source.read_text(encoding='utf-8')
+                for variant, placeholder in PLACEHOLDERS.items():
+                    content = content.replace(placeholder, names[variant])
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(content, encoding='utf-8')
+                shutil.copymode(source, target)
+            else:
+                clone_file(source, target, self.link_mode)
+            materialized.append(relative_path)
+
+        with locked_json_file(self.index_path) as index:
+            if template['key'] in index:
+                index[template['key']]['uses'] = index[template['key']].get('uses', 0) + 1
+                index[template['key']]['last_used'] = time.time()
+
+        logger.info(f"Materialized scaffold {template['key']} ({len(materialized)} files)")
+        return materialized
+
+    def save_template(self, tech_stack: Dict, workspace: str, paths: Iterable[str],
+                      project_name: str) -> Optional[str]:
+        """
+        Cache generated setup files as the template for this stack
+
+        Project name variants are replaced with placeholders so the template can
+        be reused by other projects. Existing templates are left untouched.
+
+        Returns:
+            Template key, or None if nothing was saved
+        """
+        key = self.stack_key(tech_stack)
+        paths = sorted(set(paths))
+        if key is None or not paths or (self.root / key).exists():
+            return None
+
+        workspace = Path(workspace)
+        staging = self.root / f"{key}.{os.getpid()}.partial"
+        files_dir = staging / 'files'
+        names = project_names(project_name)
+        saved, templated = [], []
+
+        try:
+            for relative_path in paths:
+                source = workspace / relative_path
+                if not source.is_file():
+                    continue
+                target = files_dir / relative_path
+                target.parent.mkdir(parents=True, exist_ok=True)
+
+                content = None
+                if source.stat().st_size <= MAX_TEMPLATED_FILE_BYTES:
+                    try:
+                        content = source.read_text(encoding='utf-8')
+                    except UnicodeDecodeError:
+                        content = None
+
+                replaced = content
+                if content is not None:
+                    # Longest variants first so 'my-app' is not half-replaced by a shorter match
+                    for variant in sorted(names, key=lambda v: len(names[v]), reverse=True):
+                        if len(names[variant]) >= MIN_PLACEHOLDER_LENGTH:
+                            replaced = replaced.replace(names[variant], PLACEHOLDERS[variant])
+
+                if content is not None and replaced != content:
+                    target.write_text(replaced, encoding='utf-8')
+                    shutil.copymode(source, target)
+                    templated.append(relative_path)
+                else:
+                    shutil.copy2(source, target)
+                saved.append(relative_path)
+
+            if not saved:
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+
+            with locked_json_file(self.index_path) as index:
+                if key in index:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    return None
+                os.replace(staging, self.root / key)
+                index[key] = {
+                    'stack': normalize_tech_stack(tech_stack),
+                    'files': saved,
+                    'templated': templated,
+                    'created_at': time.time(),
+                    'uses': 0,
+                }
+        except OSError as e:
+            logger.warning(f"Failed to save scaffold template {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+
+        logger.info(f"Saved scaffold template {key} ({len(saved)} files)")
+        return key
+
+
+# Singleton instance
+_library_instance = None
+
+
+def get_scaffold_library() -> ScaffoldLibrary:
+    """Get or create the scaffold library"""
+    global _library_instance
+    if _library_instance is None:
+        root = os.environ.get(
+            'OPENCODE_SCAFFOLD_DIR',
+            str(BACKEND_DIR.parent / 'scaffolds')
+        )
+        _library_instance = ScaffoldLibrary(
+            root,
+            link_mode=os.environ.get('OPENCODE_SCAFFOLD_LINK_MODE', 'reflink'),
+        )
+    return _library_instance
+
+# Made with Bob
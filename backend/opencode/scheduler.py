@@ -0,0 +1,339 @@
+"""
+Fair Scheduler
+Shares a fixed pool of execution slots between concurrent development runs
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Hashable, Optional, Tuple
+
+# Priority lanes, highest first. A waiting request in a higher lane is always
+# granted before any request in a lower one.
+LANES = ('interactive', 'bulk')
+
+# How often a waiting caller checks its cancel event
+CANCEL_POLL_SECONDS = 0.5
+
+# Queue-wait samples kept per lane and user for percentiles
+WAIT_SAMPLES = 1000
+
+
+class _Request:
+    __slots__ = ('user', 'project', 'lane', 'cost', 'enqueued_at', 'granted')
+
+    def __init__(self, user: Hashable, project: Hashable, lane: str, cost: float):
+        self.user = user
+        self.project = project
+        self.lane = lane
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.granted = threading.Event()
+
+
+def _summarize(waits: Deque[float]) -> Dict:
+    if not waits:
+        return {'samples': 0, 'mean_seconds': 0.0, 'p95_seconds': 0.0, 'max_seconds': 0.0}
+    ordered = sorted(waits)
+    return {
+        'samples': len(ordered),
+        'mean_seconds': round(sum(ordered) / len(ordered), 3),
+        'p95_seconds': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_seconds': round(ordered[-1], 3),
+    }
+
+
+class FairScheduler:
+    """
+    Weighted fair queuing of task executions over a fixed number of slots.
+
+    Features:
+    - Strict priority lanes (interactive re-runs ahead of bulk regeneration)
+    - Hierarchical stride scheduling: slots are shared between users by weight,
+      and each user's share between their projects by weight
+    - Per-user and per-project concurrency caps
+    - Queue-wait metrics per lane and user
+
+    Every grant advances the tenant's pass by cost / weight and the tenant with
+    the lowest pass goes next. A tenant that was idle starts at the lowest pass
+    of the active tenants, so idle time does not bank credit.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        user_cap: Optional[int] = None,
+        project_cap: Optional[int] = None
+    ):
+        self.slots = slots
+        self.user_cap = user_cap
+        self.project_cap = project_cap
+
+        self._lock = threading.Lock()
+        self._free = slots
+        # lane -> user -> project -> waiting requests
+        self._queues: Dict[str, Dict[Hashable, Dict[Hashable, Deque[_Request]]]] = {
+            lane: defaultdict(lambda: defaultdict(deque)) for lane in LANES
+        }
+        self._user_pass: Dict[Hashable, float] = {}
+        self._project_pass: Dict[Tuple[Hashable, Hashable], float] = {}
+        self._user_weights: Dict[Hashable, float] = {}
+        self._project_weights: Dict[Hashable, float] = {}
+        self._running_users: Dict[Hashable, int] = defaultdict(int)
+        self._running_projects: Dict[Hashable, int] = defaultdict(int)
+
+        self._lane_waits: Dict[str, Deque[float]] = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._user_waits: Dict[Hashable, Deque[float]] = defaultdict(lambda: deque(maxlen=WAIT_SAMPLES))
+        self.stats = {'granted': 0, 'queued': 0, 'cancelled': 0, 'timeouts': 0}
+
+    # Weights
+
+    def set_user_weight(self, user: Hashable, weight: float):
+        with self._lock:
+            self._user_weights[user] = weight
+
+    def set_project_weight(self, project: Hashable, weight: float):
+        with self._lock:
+            self._project_weights[project] = weight
+
+    # Bookkeeping (called with the lock held)
+
+    def _waiting(self, user: Hashable, project: Hashable = None) -> bool:
+        for lane in LANES:
+            projects = self._queues[lane].get(user)
+            if not projects:
+                continue
+            if project is None and any(projects.values()):
+                return True
+            if project is not None and projects.get(project):
+                return True
+        return False
+
+    def _activate(self, user: Hashable, project: Hashable):
+        """Bring an idle user or project up to the current virtual time"""
+        if not self._waiting(user) and not self._running_users[user]:
+            active = [
+                self._user_pass[u] for u in self._user_pass
+                if u != user and (self._waiting(u) or self._running_users[u])
+            ]
+            self._user_pass[user] = max(self._user_pass.get(user, 0.0), min(active, default=0.0))
+
+        key = (user, project)
+        if not self._waiting(user, project) and not self._running_projects[project]:
+            active = [
+                self._project_pass[k] for k in self._project_pass
+                if k[0] == user and k != key and (self._waiting(user, k[1]) or self._running_projects[k[1]])
+            ]
+            self._project_pass[key] = max(self._project_pass.get(key, 0.0), min(active, default=0.0))
+
+    def _eligible(self, user: Hashable, project: Hashable) -> bool:
+        if self.user_cap and self._running_users[user] >= self.user_cap:
+            return False
+        if self.project_cap and self._running_projects[project] >= self.project_cap:
+            return False
+        return True
+
+    def _next_request(self) -> Optional[_Request]:
+        for lane in LANES:
+            candidates = []
+            for user, projects in self._queues[lane].items():
+                ready = [p for p, queue in projects.items() if queue and self._eligible(user, p)]
+                if ready:
+                    candidates.append((self._user_pass[user], str(user), user, ready))
+            if not candidates:
+                continue
+
+            _, _, user, ready = min(candidates, key=lambda c: c[:2])
+            project = min(ready, key=lambda p: (self._project_pass[(user, p)], str(p)))
+            queue = self._queues[lane][user][project]
+            request = queue.popleft()
+            if not queue:
+                del self._queues[lane][user][project]
+                if not self._queues[lane][user]:
+                    del self._queues[lane][user]
+            return request
+        return None
+
+    def _grant(self, user: Hashable, project: Hashable, cost: float):
+        self._free -= 1
+        self._running_users[user] += 1
+        self._running_projects[project] += 1
+        self._user_pass[user] += cost / self._user_weights.get(user, 1.0)
+        self._project_pass[(user, project)] += cost / self._project_weights.get(project, 1.0)
+        self.stats['granted'] += 1
+
+    def _dispatch(self):
+        while self._free > 0:
+            request = self._next_request()
+            if request is None:
+                return
+
+            user = request.user
+            self._grant(user, request.project, request.cost)
+
+            wait = time.monotonic() - request.enqueued_at
+            self._lane_waits[request.lane].append(wait)
+            self._user_waits[user].append(wait)
+            request.granted.set()
+
+    # Public API
+
+    def acquire(
+        self,
+        user: Hashable,
+        project: Hashable,
+        lane: str = 'interactive',
+        cost: float = 1.0,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Wait for an execution slot
+
+        Args:
+            user: Tenant the work is billed to
+            project: Project within the tenant
+            lane: Priority lane ('interactive' or 'bulk')
+            cost: Relative size of the work (advances the tenant's pass)
+            timeout: Maximum seconds to wait, None waits forever
+            cancel_event: Optional event that abandons the wait when set
+
+        Returns:
+            True if a slot was acquired (release it with release())
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+
+        request = _Request(user, project, lane, cost)
+        with self._lock:
+            self._activate(user, project)
+            self._queues[lane][user][project].append(request)
+            self._dispatch()
+            if not request.granted.is_set():
+                self.stats['queued'] += 1
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = CANCEL_POLL_SECONDS if cancel_event is not None else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                wait = remaining if wait is None else min(wait, remaining)
+            if request.granted.wait(max(wait, 0) if wait is not None else None):
+                return True
+
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            timed_out = deadline is not None and time.monotonic() >= deadline
+            if not cancelled and not timed_out:
+                continue
+
+            with self._lock:
+                if request.granted.is_set():
+                    # Granted while giving up; hand the slot on
+                    self._release(user, project)
+                else:
+                    self._queues[lane][user][project].remove(request)
+                    if not self._queues[lane][user][project]:
+                        del self._queues[lane][user][project]
+                self.stats['cancelled' if cancelled else 'timeouts'] += 1
+            return False
+
+    def try_acquire(
+        self,
+        user: Hashable,
+        project: Hashable,
+        lane: str = 'interactive',
+        cost: float = 1.0
+    ) -> bool:
+        """
+        Take a slot only if one is idle and nobody is waiting (never queues)
+
+        For speculative work such as hedged attempts, which should only use
+        capacity no queued request wants.
+
+        Returns:
+            True if a slot was acquired (release it with release())
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+
+        with self._lock:
+            waiting = any(
+                queue for users in self._queues.values()
+                for projects in users.values() for queue in projects.values()
+            )
+            if self._free <= 0 or waiting or not self._eligible(user, project):
+                return False
+            self._activate(user, project)
+            self._grant(user, project, cost)
+            return True
+
+    def _release(self, user: Hashable, project: Hashable):
+        self._free += 1
+        self._running_users[user] -= 1
+        self._running_projects[project] -= 1
+        self._dispatch()
+
+    def release(self, user: Hashable, project: Hashable):
+        """Release a slot acquired for this user and project"""
+        with self._lock:
+            self._release(user, project)
+
+    def get_status(self) -> Dict:
+        """Get slot usage, queue depths and queue-wait metrics"""
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'running': self.slots - self._free,
+                'user_cap': self.user_cap,
+                'project_cap': self.project_cap,
+                'waiting': {
+                    lane: sum(len(q) for projects in users.values() for q in projects.values())
+                    for lane, users in self._queues.items()
+                },
+                'running_per_user': {str(u): n for u, n in self._running_users.items() if n},
+                'running_per_project': {str(p): n for p, n in self._running_projects.items() if n},
+                'queue_wait': {
+                    'lanes': {lane: _summarize(waits) for lane, waits in self._lane_waits.items()},
+                    'users': {str(u): _summarize(waits) for u, waits in self._user_waits.items()},
+                },
+                **self.stats,
+            }
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    """Parse 'key=weight,key=weight' (e.g. '3=2,7=0.5')"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        key, _, weight = item.partition('=')
+        weights[key.strip()] = float(weight)
+    return weights
+
+
+# Singleton instance
+_scheduler_instance = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Get or create the process-wide scheduler"""
+    global _scheduler_instance
+    with _scheduler_lock:
+        if _scheduler_instance is None:
+            from .sandbox import get_sandbox_pool
+
+            slots = os.environ.get('OPENCODE_SCHEDULER_SLOTS')
+            user_cap = os.environ.get('OPENCODE_SCHEDULER_USER_CAP')
+            project_cap = os.environ.get('OPENCODE_SCHEDULER_PROJECT_CAP')
+            _scheduler_instance = FairScheduler(
+                slots=int(slots) if slots else get_sandbox_pool().max_processes,
+                user_cap=int(user_cap) if user_cap else None,
+                project_cap=int(project_cap) if project_cap else None,
+            )
+            # Weights are keyed by user/project id
+            for user, weight in _parse_weights(os.environ.get('OPENCODE_SCHEDULER_USER_WEIGHTS', '')).items():
+                _scheduler_instance.set_user_weight(int(user), weight)
+            for project, weight in _parse_weights(os.environ.get('OPENCODE_SCHEDULER_PROJECT_WEIGHTS', '')).items():
+                _scheduler_instance.set_project_weight(int(project), weight)
+        return _scheduler_instance
+
+# Made with Bob
@@ -0,0 +1,91 @@
+from rest_framework import serializers
+from .budget import ledger_usage
+from .models import Budget, Job, LedgerEntry, Run, RunSpan
+
+
+class JobSerializer(serializers.ModelSerializer):
+    is_active = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'project', 'kind', 'lane', 'status', 'is_active', 'cancel_requested',
+            'result', 'error', 'created_at', 'started_at', 'finished_at', 'heartbeat_at'
+        ]
+        read_only_fields = fields
+
+
+class RunSpanSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RunSpan
+        fields = [
+            'id', 'parent', 'name', 'kind', 'task_key', 'status', 'started_at', 'finished_at',
+            'offset_seconds', 'duration_seconds', 'attributes'
+        ]
+        read_only_fields = fields
+
+
+class RunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Run
+        fields = [
+            'id', 'project', 'job', 'kind', 'status', 'summary',
+            'started_at', 'finished_at', 'duration_seconds'
+        ]
+        read_only_fields = fields
+
+
+class RunDetailSerializer(RunSerializer):
+    spans = RunSpanSerializer(many=True, read_only=True)
+
+    class Meta(RunSerializer.Meta):
+        fields = RunSerializer.Meta.fields + ['spans']
+        read_only_fields = fields
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """A project budget, or the requesting user's monthly budget when no project is given"""
+
+    scope = serializers.SerializerMethodField()
+    used = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Budget
+        fields = [
+            'id', 'project', 'scope', 'token_limit', 'cost_limit', 'used', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'scope', 'used', 'created_at', 'updated_at']
+
+    def get_scope(self, obj):
+        return 'project' if obj.project_id else 'user'
+
+    def get_used(self, obj):
+        if obj.project_id:
+            return ledger_usage(project_id=obj.project_id)
+        return ledger_usage(user_id=obj.user_id)
+
+    def validate_project(self, value):
+        if value is not None and value.created_by_id != self.context['request'].user.id:
+            raise serializers.ValidationError('Project not found')
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        project = attrs.get('project', self.instance.project if self.instance else None)
+        if self.instance is None and project is None and Budget.objects.filter(user=user).exists():
+            raise serializers.ValidationError('You already have a monthly budget; update it instead')
+        return attrs
+
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    total_tokens = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = LedgerEntry
+        fields = [
+            'id', 'project', 'run', 'task_key', 'source', 'model', 'prompt_tokens',
+            'completion_tokens', 'total_tokens', 'cost', 'estimated', 'created_at'
+        ]
+        read_only_fields = fields
+
+# Made with Bob
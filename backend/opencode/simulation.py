@@ -0,0 +1,233 @@
+"""
+Simulation Mode
+Runs the development pipeline with the LLM task breakdown and OpenCode
+executions replaced by recorded or synthetic responses, in throwaway
+workspaces, so the orchestrator, scheduler and persistence can be load-tested
+"""
+import math
+import random
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .breakdown import build_task_graph
+from .usage import estimate_cost, estimate_tokens
+from .models import TaskBreakdown, TaskExecution
+
+# Median seconds of a synthetic execution per role when no history is recorded
+SYNTHETIC_MEDIAN_SECONDS = {
+    'setup': 60.0,
+    'tests': 120.0,
+}
+DEFAULT_MEDIAN_SECONDS = 90.0
+
+# Spread (sigma of the log) of synthetic execution times; long tails like real runs
+SYNTHETIC_SIGMA = 0.5
+
+# Recorded executions per role durations are sampled from
+RECORDED_SAMPLES = 200
+
+# Median completion tokens a synthetic execution spends per file it writes
+SYNTHETIC_TOKENS_PER_FILE = 1500
+
+# Roles the synthetic breakdown assigns tasks to when the project has none of its own
+DEFAULT_ROLES = ['backend_developer', 'frontend_developer']
+
+
+class TemporaryWorkspaces:
+    """
+    Stand-in for the WorkspaceManager: every run gets a fresh temporary directory,
+    deleted when the run releases it (no archiving, no quotas)
+    """
+
+    def __init__(self):
+        self._paths: Dict[int, Path] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def workspace_name(project) -> str:
+        return f"simulated_{project.id}"
+
+    def acquire(self, project) -> Path:
+        with self._lock:
+            if project.id not in self._paths:
+                self._paths[project.id] = Path(tempfile.mkdtemp(prefix=f'opencode-sim-{project.id}-'))
+            return self._paths[project.id]
+
+    def release(self, project):
+        with self._lock:
+            path = self._paths.pop(project.id, None)
+        if path is not None:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def check_quota(self, project) -> Dict:
+        return {'within_quota': True}
+
+
+class Simulation:
+    """
+    Recorded/synthetic stand-ins for the LLM and OpenCode during a development run
+
+    Execution times are sampled from the role's recorded TaskExecution history
+    when it has at least min_recorded samples, otherwise from a lognormal
+    distribution; either way they are multiplied by time_scale. Executions write
+    small Python modules, so commits, static analysis, summaries and persistence
+    do real work.
+    """
+
+    def __init__(
+        self,
+        time_scale: float = 0.01,
+        llm_seconds: float = 20.0,
+        breakdown_tasks: int = 6,
+        files_per_task: int = 3,
+        failure_rate: float = 0.0,
+        min_recorded: int = 10,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            time_scale: Multiplier applied to every simulated duration
+            llm_seconds: Unscaled latency of a task breakdown LLM call
+            breakdown_tasks: Tasks in a synthetic breakdown (0 keeps the fixed
+                setup → backend ∥ frontend → tests plan)
+            files_per_task: Files each simulated execution writes
+            failure_rate: Probability that a simulated execution fails
+            min_recorded: Recorded executions a role needs before they are replayed
+            seed: Random seed for reproducible runs
+        """
+        self.time_scale = time_scale
+        self.llm_seconds = llm_seconds
+        self.breakdown_tasks = breakdown_tasks
+        self.files_per_task = files_per_task
+        self.failure_rate = failure_rate
+        self.min_recorded = min_recorded
+        self.workspaces = TemporaryWorkspaces()
+        self._random = random.Random(seed)
+        self._recorded: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _sample(self, role: str) -> Tuple[float, str]:
+        """Unscaled execution seconds for a role and where they came from"""
+        with self._lock:
+            if role not in self._recorded:
+                self._recorded[role] = list(
+                    TaskExecution.objects.filter(role=role, kind='task', success=True)
+                    .values_list('duration_seconds', flat=True)[:RECORDED_SAMPLES]
+                )
+            recorded = self._recorded[role]
+            if len(recorded) >= self.min_recorded:
+                return self._random.choice(recorded), 'recorded'
+            median = SYNTHETIC_MEDIAN_SECONDS.get(role, DEFAULT_MEDIAN_SECONDS)
+            return self._random.lognormvariate(math.log(median), SYNTHETIC_SIGMA), 'synthetic'
+
+    def task_breakdown(self, planning_doc, roles: List[str]) -> Optional[TaskBreakdown]:
+        """
+        The project's recorded breakdown, or a synthetic one after a simulated LLM call
+
+        Synthetic breakdowns are not saved, so they never stand in for a real one later.
+        """
+        recorded = TaskBreakdown.objects.filter(project=planning_doc.project).first()
+        if recorded:
+            return recorded
+        if self.breakdown_tasks <= 0:
+            return None
+
+        threading.Event().wait(self.llm_seconds * self.time_scale)
+        roles = [role for role in roles if role != 'qa_engineer'] or DEFAULT_ROLES
+        with self._lock:
+            raw = [
+                {
+                    'id': f'sim-{i}',
+                    'title': f'Simulated feature {i}',
+                    'description': 'Simulated task',
+                    'assigned_role': self._random.choice(roles),
+                    'priority': self._random.choice(['high', 'medium', 'low']),
+                    'estimated_hours': self._random.choice([1, 2, 4]),
+                    # Each task builds on up to two earlier ones
+                    'dependencies': self._random.sample([f'sim-{j}' for j in range(1, i)], min(i - 1, 2)),
+                }
+                for i in range(1, self.breakdown_tasks + 1)
+            ]
+        nodes, _ = build_task_graph(raw, reserved_keys=('setup', 'tests'))
+        return TaskBreakdown(project=planning_doc.project, tasks=nodes)
+
+    def execute_task(
+        self,
+        project_dir: str,
+        task: Dict,
+        role: str,
+        on_progress: Optional[Callable[[int], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        model: Optional[str] = None,
+        on_usage: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Simulate an OpenCode execution: wait the sampled time (cancellable),
+        reporting progress and writing files along the way, and report synthetic
+        token usage (the prompt plus a lognormal completion per file)
+
+        Returns:
+            Result dictionary shaped like OpenCodeExecutor.execute_task's
+        """
+        seconds, source = self._sample(role)
+        duration = seconds * self.time_scale
+        with self._lock:
+            fails = self._random.random() < self.failure_rate
+            completion_tokens = int(self._random.lognormvariate(
+                math.log(SYNTHETIC_TOKENS_PER_FILE * max(self.files_per_task, 1)), SYNTHETIC_SIGMA
+            ))
+        prompt_tokens = estimate_tokens(task['prompt'])
+        usage = {
+            'model': model or '',
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cost': estimate_cost(model, prompt_tokens, completion_tokens),
+            'estimated': True,
+        }
+        cancel_event = cancel_event or threading.Event()
+        steps = max(self.files_per_task, 1)
+        module_dir = Path(project_dir) / 'simulated' / task['id'].replace('-', '_')
+
+        for step in range(steps):
+            if cancel_event.wait(duration / steps):
+                if on_usage:
+                    on_usage({**usage, 'completion_tokens': 0, 'cost': estimate_cost(model, prompt_tokens, 0)})
+                return {
+                    'success': False,
+                    'cancelled': True,
+                    'error': 'OpenCode execution was cancelled'
+                }
+            if step < self.files_per_task:
+                module_dir.mkdir(parents=True, exist_ok=True)
+                (module_dir / f'module_{step}.py').write_text(
+                    f'"""Simulated output of {task["title"]}"""\n\n\n'
+                    f'class Feature{step}:\n    name = "{task["id"]}"\n\n    def run(self):\n        return {step}\n\n\n'
+                    f'def handler_{step}(request):\n    return Feature{step}().run()\n'
+                )
+            if on_progress:
+                on_progress(int(95 * (step + 1) / steps))
+
+        output = {'simulated': True, 'source': source, 'duration_seconds': round(duration, 3)}
+        if on_usage:
+            on_usage(usage)
+        if fails:
+            return {
+                'success': False,
+                'error': 'OpenCode execution failed with code 1 (simulated)',
+                'output': output,
+                'stdout': '',
+                'stderr': 'simulated failure',
+                'usage': usage
+            }
+        return {
+            'success': True,
+            'output': output,
+            'stdout': '',
+            'stderr': '',
+            'usage': usage,
+        }
+
+# Made with Bob
@@ -0,0 +1,381 @@
+"""
+Static Analysis
+Runs syntax checks, linters and type checkers on a task's changed files in parallel,
+with findings cached by file content hash
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .executor import SNAPSHOT_IGNORED_DIRS, INTERNAL_FILE_PREFIX
+from .sandbox import SandboxPool, get_sandbox_pool
+
+CACHE_FILE = f'{INTERNAL_FILE_PREFIX}static_cache.json'
+
+# Language (as detected by the orchestrator) -> file extensions
+LANGUAGE_EXTENSIONS = {
+    'python': {'.py'},
+    'javascript': {'.js', '.jsx', '.mjs', '.cjs'},
+    'typescript': {'.ts', '.tsx'},
+    'json': {'.json'},
+}
+
+# Maximum files passed to one tool invocation
+BATCH_SIZE = 200
+
+# Lint codes that indicate broken code rather than style
+RUFF_ERROR_PREFIXES = ('E9', 'F63', 'F7', 'F82')
+
+
+def _finding(path: str, line: int, column: int, severity: str, tool: str,
+             code: Optional[str], message: str) -> Dict:
+    return {
+        'path': path,
+        'line': line,
+        'column': column,
+        'severity': severity,
+        'tool': tool,
+        'code': code,
+        'message': message.strip(),
+    }
+
+
+class StaticAnalyzer:
+    """
+    Per-language static analysis of generated code.
+
+    Features:
+    - In-process syntax checks (Python, JSON) plus `node --check` for JavaScript
+    - Linters and type checkers (ruff/pyflakes, mypy, eslint, tsc) when installed,
+      preferring the workspace's own .venv / node_modules copies
+    - Only the given changed files are analyzed
+    - Findings cached per tool by content hash; project-wide checks (mypy, tsc)
+      also key on the hash of all sources of that language
+    """
+
+    def __init__(self, project_path: str, pool: Optional[SandboxPool] = None, timeout: int = 300):
+        self.project_path = Path(project_path)
+        self.pool = pool or get_sandbox_pool()
+        self.timeout = timeout
+        self.cache_path = self.project_path / CACHE_FILE
+        self.checks = {
+            'python': [
+                {'tool': 'syntax', 'scope': 'file', 'check': self._python_syntax},
+                {'tool': 'ruff', 'scope': 'file', 'command': self._ruff_command, 'parse': self._parse_ruff,
+                 'fallback': 'pyflakes'},
+                {'tool': 'pyflakes', 'scope': 'file', 'command': self._pyflakes_command,
+                 'parse': self._parse_pyflakes, 'only_as_fallback': True},
+                {'tool': 'mypy', 'scope': 'project', 'command': self._mypy_command, 'parse': self._parse_mypy},
+            ],
+            'javascript': [
+                {'tool': 'node', 'scope': 'file', 'command': self._node_check_command,
+                 'parse': self._parse_node_check, 'per_file': True},
+                {'tool': 'eslint', 'scope': 'file', 'command': self._eslint_command, 'parse': self._parse_eslint},
+            ],
+            'typescript': [
+                {'tool': 'eslint', 'scope': 'file', 'command': self._eslint_command, 'parse': self._parse_eslint},
+                {'tool': 'tsc', 'scope': 'project', 'command': self._tsc_command, 'parse': self._parse_tsc},
+            ],
+            'json': [
+                {'tool': 'json', 'scope': 'file', 'check': self._json_syntax},
+            ],
+        }
+
+    # Tool discovery
+
+    def _find_tool(self, name: str) -> Optional[str]:
+        for local in (self.project_path / '.venv' / 'bin' / name,
+                      self.project_path / 'node_modules' / '.bin' / name):
+            if local.exists():
+                return str(local)
+        return shutil.which(name)
+
+    def _ruff_command(self, files: List[str]) -> Optional[List[str]]:
+        ruff = self._find_tool('ruff')
+        return [ruff, 'check', '--output-format=json', '--exit-zero', '--no-cache', *files] if ruff else None
+
+    def _pyflakes_command(self, files: List[str]) -> Optional[List[str]]:
+        pyflakes = self._find_tool('pyflakes')
+        return [pyflakes, *files] if pyflakes else None
+
+    def _mypy_command(self, files: List[str]) -> Optional[List[str]]:
+        mypy = self._find_tool('mypy')
+        if not mypy:
+            return None
+        return [mypy, '--ignore-missing-imports', '--follow-imports=silent', '--show-column-numbers',
+                '--no-error-summary', '--no-pretty', '--no-incremental', *files]
+
+    def _node_check_command(self, files: List[str]) -> Optional[List[str]]:
+        node = shutil.which('node')
+        # JSX is not plain JavaScript; leave it to eslint
+        return [node, '--check', files[0]] if node and not files[0].endswith('.jsx') else None
+
+    def _eslint_command(self, files: List[str]) -> Optional[List[str]]:
+        # Only the project's own eslint: its config decides what is an error
+        eslint = self.project_path / 'node_modules' / '.bin' / 'eslint'
+        return [str(eslint), '--format', 'json', '--no-error-on-unmatched-pattern', *files] if eslint.exists() else None
+
+    def _tsc_command(self, files: List[str]) -> Optional[List[str]]:
+        tsc = self.project_path / 'node_modules' / '.bin' / 'tsc'
+        if not tsc.exists() or not (self.project_path / 'tsconfig.json').exists():
+            return None
+        return [str(tsc), '--noEmit', '--pretty', 'false', '-p', '.']
+
+    # In-process checks
+
+    def _python_syntax(self, path: str) -> List[Dict]:
+        try:
+            source = (self.project_path / path).read_bytes()
+            compile(source, path, 'exec', dont_inherit=True)
+        except SyntaxError as e:
+            return [_finding(path, e.lineno or 0, e.offset or 0, 'error', 'syntax', 'SyntaxError', e.msg)]
+        except ValueError as e:  # Null bytes
+            return [_finding(path, 0, 0, 'error', 'syntax', 'ValueError', str(e))]
+        return []
+
+    def _json_syntax(self, path: str) -> List[Dict]:
+        try:
+            json.loads((self.project_path / path).read_text(encoding='utf-8'))
+        except json.JSONDecodeError as e:
+            return [_finding(path, e.lineno, e.colno, 'error', 'json', 'JSONDecodeError', e.msg)]
+        except UnicodeDecodeError as e:
+            return [_finding(path, 0, 0, 'error', 'json', 'UnicodeDecodeError', str(e))]
+        return []
+
+    # Output parsers: (stdout, stderr) -> findings with paths relative to the project
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.join(self.project_path, path), self.project_path)
+
+    def _parse_ruff(self, output: str, errors: str = '') -> List[Dict]:
+        try:
+            items = json.loads(output or '[]')
+        except json.JSONDecodeError:
+            return []
+        findings = []
+        for item in items:
+            code = item.get('code') or 'E999'
+            location = item.get('location') or {}
+            findings.append(_finding(
+                self._relative(item.get('filename', '')),
+                location.get('row', 0), location.get('column', 0),
+                'error' if code.startswith(RUFF_ERROR_PREFIXES) else 'warning',
+                'ruff', code, item.get('message', '')
+            ))
+        return findings
+
+    def _parse_pyflakes(self, output: str, errors: str = '') -> List[Dict]:
+        output = f'{output}\n{errors}'
+        findings = []
+        for match in re.finditer(r'^(.+?):(\d+):(?:(\d+):?)? (.+)$', output, re.MULTILINE):
+            message = match.group(4)
+            severity = 'error' if 'undefined name' in message or 'syntax' in message.lower() else 'warning'
+            findings.append(_finding(
+                self._relative(match.group(1)), int(match.group(2)), int(match.group(3) or 0),
+                severity, 'pyflakes', None, message
+            ))
+        return findings
+
+    def _parse_mypy(self, output: str, errors: str = '') -> List[Dict]:
+        findings = []
+        pattern = r'^(.+?):(\d+):(?:(\d+):)? (error|warning|note): (.+?)(?:  \[([\w-]+)\])?$'
+        for match in re.finditer(pattern, output, re.MULTILINE):
+            if match.group(4) == 'note':
+                continue
+            findings.append(_finding(
+                self._relative(match.group(1)), int(match.group(2)), int(match.group(3) or 0),
+                match.group(4), 'mypy', match.group(6), match.group(5)
+            ))
+        return findings
+
+    def _parse_node_check(self, output: str, errors: str = '') -> List[Dict]:
+        output = errors
+        match = re.match(r'^(.+?):(\d+)\n', output)
+        if not match:
+            return []
+        error = re.search(r'^(\w*Error): (.+)$', output, re.MULTILINE)
+        return [_finding(
+            self._relative(match.group(1)), int(match.group(2)), 0, 'error', 'node',
+            error.group(1) if error else 'SyntaxError', error.group(2) if error else output.splitlines()[-1]
+        )]
+
+    def _parse_eslint(self, output: str, errors: str = '') -> List[Dict]:
+        try:
+            reports = json.loads(output or '[]')
+        except json.JSONDecodeError:
+            return []
+        findings = []
+        for report in reports:
+            for message in report.get('messages', []):
+                findings.append(_finding(
+                    self._relative(report.get('filePath', '')),
+                    message.get('line', 0), message.get('column', 0),
+                    'error' if message.get('severity') == 2 else 'warning',
+                    'eslint', message.get('ruleId'), message.get('message', '')
+                ))
+        return findings
+
+    def _parse_tsc(self, output: str, errors: str = '') -> List[Dict]:
+        findings = []
+        for match in re.finditer(r'^(.+?)\((\d+),(\d+)\): (error|warning) (TS\d+): (.+)$', output, re.MULTILINE):
+            findings.append(_finding(
+                self._relative(match.group(1)), int(match.group(2)), int(match.group(3)),
+                match.group(4), 'tsc', match.group(5), match.group(6)
+            ))
+        return findings
+
+    # Caching
+
+    def _hash_file(self, path: str) -> str:
+        try:
+            return hashlib.sha256((self.project_path / path).read_bytes()).hexdigest()
+        except FileNotFoundError:
+            return ''
+
+    def _hash_language_sources(self, language: str) -> str:
+        """Hash of every source file of a language, for checks that follow imports"""
+        extensions = LANGUAGE_EXTENSIONS[language]
+        sha = hashlib.sha256()
+        for root, dirs, names in os.walk(self.project_path):
+            dirs[:] = sorted(d for d in dirs if d not in SNAPSHOT_IGNORED_DIRS)
+            for name in sorted(names):
+                if Path(name).suffix in extensions or name in ('tsconfig.json', 'package.json'):
+                    path = Path(root, name)
+                    sha.update(str(path.relative_to(self.project_path)).encode() + b'\0')
+                    sha.update(path.read_bytes())
+        return sha.hexdigest()
+
+    def _load_cache(self) -> Dict:
+        try:
+            return json.loads(self.cache_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self, cache: Dict):
+        self.cache_path.write_text(json.dumps(cache, indent=2))
+
+    # Execution
+
+    def _resolve_fallback(self, check: Dict, language: str) -> Dict:
+        """Swap a missing tool for its fallback (e.g. ruff -> pyflakes)"""
+        if 'fallback' not in check or check['command'](['.']) is not None:
+            return check
+        return next((c for c in self.checks[language] if c['tool'] == check['fallback']), check)
+
+    def _run_command(self, check: Dict, files: List[str]) -> Optional[List[Dict]]:
+        """Run an external tool on a batch; None means the tool is unavailable"""
+        cmd = check['command'](files)
+        if cmd is None:
+            return None
+        try:
+            result = self.pool.run(cmd, cwd=str(self.project_path), timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return [_finding(f, 0, 0, 'warning', check['tool'], 'timeout',
+                             f"{check['tool']} timed out after {self.timeout} seconds") for f in files]
+        except (FileNotFoundError, PermissionError):
+            return None
+        return check['parse'](result.stdout, result.stderr)
+
+    def _run_batch(self, check: Dict, files: List[str]) -> Optional[List[Dict]]:
+        if 'check' in check:
+            return [finding for path in files for finding in check['check'](path)]
+        if check.get('per_file'):
+            findings = []
+            for path in files:
+                file_findings = self._run_command(check, [path])
+                if file_findings is not None:
+                    findings.extend(file_findings)
+            return findings
+        return self._run_command(check, files)
+
+    def run(self, paths: List[str], detect_language: Callable[[str], str]) -> Dict:
+        """
+        Analyze changed files
+
+        Args:
+            paths: Changed files relative to the project
+            detect_language: Maps a path to a language name (the orchestrator's detector)
+
+        Returns:
+            Dictionary with status, error/warning counts, findings and cache statistics
+        """
+        started = time.monotonic()
+        by_language: Dict[str, List[str]] = {}
+        for path in paths:
+            language = detect_language(path)
+            if language in self.checks and (self.project_path / path).is_file():
+                by_language.setdefault(language, []).append(path)
+
+        cache = self._load_cache()
+        findings: List[Dict] = []
+        jobs = []
+        cached_results = 0
+        available = {}
+
+        with ThreadPoolExecutor(max_workers=self.pool.max_processes) as executor:
+            for language, files in by_language.items():
+                project_hash = None
+                for check in self.checks[language]:
+                    if check.get('only_as_fallback'):
+                        continue
+                    check = self._resolve_fallback(check, language)
+                    if check['scope'] == 'project' and project_hash is None:
+                        project_hash = self._hash_language_sources(language)
+
+                    tool_cache = cache.setdefault(check['tool'], {})
+                    keys, pending = {}, []
+                    for path in files:
+                        key = self._hash_file(path)
+                        if check['scope'] == 'project':
+                            key = hashlib.sha256((key + project_hash).encode()).hexdigest()
+                        keys[path] = key
+                        entry = tool_cache.get(path)
+                        if entry and entry.get('key') == key:
+                            findings.extend(entry['findings'])
+                            cached_results += 1
+                        else:
+                            pending.append(path)
+
+                    for start in range(0, len(pending), BATCH_SIZE):
+                        batch = pending[start:start + BATCH_SIZE]
+                        jobs.append((check, batch, keys, executor.submit(self._run_batch, check, batch)))
+
+            for check, batch, keys, future in jobs:
+                batch_findings = future.result()
+                if batch_findings is None:
+                    # Tool not installed: nothing cached, retried on the next run
+                    available[check['tool']] = False
+                    continue
+
+                available[check['tool']] = True
+                tool_cache = cache.setdefault(check['tool'], {})
+                per_file = {path: [] for path in batch}
+                for finding in batch_findings:
+                    if finding['path'] in per_file:
+                        per_file[finding['path']].append(finding)
+                for path, file_findings in per_file.items():
+                    tool_cache[path] = {'key': keys[path], 'findings': file_findings}
+                    findings.extend(file_findings)
+
+        self._save_cache(cache)
+
+        errors = [f for f in findings if f['severity'] == 'error']
+        return {
+            'status': 'failed' if errors else 'passed',
+            'errors': len(errors),
+            'warnings': len(findings) - len(errors),
+            'findings': sorted(findings, key=lambda f: (f['path'], f['line'], f['column'])),
+            'checked_files': sum(len(files) for files in by_language.values()),
+            'cached_results': cached_results,
+            'unavailable_tools': sorted(tool for tool, ok in available.items() if not ok),
+            'duration_seconds': round(time.monotonic() - started, 3),
+        }
+
+# Made with Bob
@@ -0,0 +1,189 @@
+"""
+Artifact Summaries
+Compact, deterministic summaries of what a task produced (files, API surface,
+key types), passed to dependent tasks' prompts instead of whole files
+"""
+import ast
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bound on the upstream-context section of one prompt
+MAX_CONTEXT_CHARS = int(os.environ.get('OPENCODE_SUMMARY_MAX_CHARS', 6000))
+
+# Files larger than this are listed but not parsed
+MAX_PARSE_BYTES = 256 * 1024
+
+# Entries kept per summary list (the rest are counted)
+MAX_ENTRIES = 60
+
+HTTP_METHODS = 'get|post|put|patch|delete'
+
+# Route declarations: Django path()/re_path(), DRF router.register, Flask/FastAPI/Express handlers
+ROUTE_PATTERNS = [
+    (re.compile(r"""\b(?:re_)?path\(\s*r?['"]([^'"]*)['"]"""), 'ANY'),
+    (re.compile(r"""\brouter\.register\(\s*r?['"]([^'"]*)['"]"""), 'REST'),
+    (re.compile(rf"""@\w+\.({HTTP_METHODS}|route)\(\s*['"]([^'"]+)['"]"""), None),
+    (re.compile(rf"""\b(?:app|router)\.({HTTP_METHODS})\(\s*['"`]([^'"`]+)['"`]"""), None),
+]
+
+# Exported JavaScript/TypeScript declarations
+JS_EXPORT = re.compile(
+    r'^export\s+(?:default\s+)?(?:async\s+)?(function|const|let|class|interface|type|enum)\s+(\w+)',
+    re.MULTILINE
+)
+TS_TYPE = re.compile(r'^(?:export\s+)?(interface|type)\s+(\w+)[^{=\n]*(?:=\s*)?(\{[^}]*\})?', re.MULTILINE)
+TS_FIELD = re.compile(r'^\s*(?:readonly\s+)?(\w+)\??\s*:', re.MULTILINE)
+
+JS_SUFFIXES = {'.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'}
+
+
+def _summarize_python(source: str) -> Tuple[List[str], List[str]]:
+    """(public top-level symbols, classes with their fields/methods)"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return [], []
+    symbols, types = [], []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith('_'):
+            args = [a.arg for a in node.args.args if a.arg not in ('self', 'cls')]
+            symbols.append(f"{node.name}({', '.join(args)})")
+        elif isinstance(node, ast.ClassDef) and not node.name.startswith('_'):
+            bases = [ast.unparse(base) for base in node.bases]
+            members = []
+            for item in node.body:
+                if isinstance(item, ast.Assign) and isinstance(item.targets[0], ast.Name):
+                    members.append(item.targets[0].id)
+                elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                    members.append(item.target.id)
+                elif isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and not item.name.startswith('_'):
+                    members.append(f"{item.name}()")
+            symbols.append(node.name)
+            signature = f"{node.name}({', '.join(bases)})" if bases else node.name
+            types.append(f"{signature}: {', '.join(members[:15])}" if members else signature)
+    return symbols, types
+
+
+def _summarize_javascript(source: str) -> Tuple[List[str], List[str]]:
+    """(exported symbols, interfaces/types with their fields)"""
+    symbols = [name for _, name in JS_EXPORT.findall(source)]
+    types = []
+    for kind, name, body in TS_TYPE.findall(source):
+        fields = TS_FIELD.findall(body)
+        types.append(f"{kind} {name} {{ {', '.join(fields[:15])} }}" if fields else f"{kind} {name}")
+    return symbols, types
+
+
+def _routes(source: str) -> List[str]:
+    routes = []
+    for pattern, method in ROUTE_PATTERNS:
+        for match in pattern.findall(source):
+            if method is None:
+                verb, route = match
+                routes.append(f"{'ANY' if verb == 'route' else verb.upper()} {route}")
+            else:
+                routes.append(f"{method} {match or '/'}")
+    return routes
+
+
+def _capped(entries: List[str]) -> List[str]:
+    entries = list(dict.fromkeys(entries))
+    if len(entries) > MAX_ENTRIES:
+        return entries[:MAX_ENTRIES] + [f"... {len(entries) - MAX_ENTRIES} more"]
+    return entries
+
+
+def summarize_files(project_dir: str, paths: Iterable[str]) -> Dict:
+    """
+    Summarize a task's output files
+
+    Args:
+        project_dir: Workspace root
+        paths: Workspace-relative paths the task added or modified
+
+    Returns:
+        {'files': [...], 'api': [...routes], 'symbols': {path: [...]}, 'types': [...]}
+    """
+    root = Path(project_dir)
+    files = sorted(paths)
+    api, types = [], []
+    symbols: Dict[str, List[str]] = {}
+    for relative_path in files:
+        full_path = root / relative_path
+        suffix = full_path.suffix.lower()
+        if suffix != '.py' and suffix not in JS_SUFFIXES:
+            continue
+        try:
+            if full_path.stat().st_size > MAX_PARSE_BYTES:
+                continue
+            source = full_path.read_text(errors='replace')
+        except OSError:
+            continue
+
+        if suffix == '.py':
+            file_symbols, file_types = _summarize_python(source)
+        else:
+            file_symbols, file_types = _summarize_javascript(source)
+        if file_symbols:
+            symbols[relative_path] = file_symbols[:20]
+        types += file_types
+        api += _routes(source)
+
+    return {
+        'files': _capped(files),
+        'api': _capped(api),
+        'symbols': dict(list(symbols.items())[:MAX_ENTRIES]),
+        'types': _capped(types),
+    }
+
+
+def render_summary(title: str, summary: Dict) -> str:
+    """Markdown block describing one upstream task's output"""
+    lines = [f"### {title}"]
+    if summary.get('files'):
+        lines.append(f"Files: {', '.join(summary['files'])}")
+    if summary.get('api'):
+        lines.append("API:")
+        lines += [f"- {route}" for route in summary['api']]
+    if summary.get('types'):
+        lines.append("Types:")
+        lines += [f"- {definition}" for definition in summary['types']]
+    if summary.get('symbols'):
+        lines.append("Exports:")
+        lines += [f"- {path}: {', '.join(names)}" for path, names in summary['symbols'].items()]
+    return '\n'.join(lines)
+
+
+def render_upstream_context(summaries: List[Tuple[str, Dict]], max_chars: Optional[int] = None) -> str:
+    """
+    Prompt section with upstream tasks' summaries, nearest first, within a size budget
+
+    Args:
+        summaries: (task title, summary) pairs, most relevant first
+        max_chars: Budget for the section (defaults to OPENCODE_SUMMARY_MAX_CHARS)
+
+    Returns:
+        The section, or '' when there is nothing to add
+    """
+    budget = MAX_CONTEXT_CHARS if max_chars is None else max_chars
+    header = (
+        "\n## Work Already Done\n"
+        "These files were produced by earlier tasks. Build on them (read the files for details) "
+        "and keep the names below consistent; do not recreate them.\n\n"
+    )
+    blocks, used = [], len(header)
+    for title, summary in summaries:
+        block = render_summary(title, summary)
+        if used + len(block) + 2 > budget:
+            # Fall back to the file list alone before dropping the task entirely
+            block = render_summary(title, {'files': summary.get('files', [])})
+            if used + len(block) + 2 > budget:
+                blocks.append(f"### {title}\n(summary omitted: context budget reached)")
+                break
+        blocks.append(block)
+        used += len(block) + 2
+    return header + '\n\n'.join(blocks) + '\n' if blocks else ''
+
+# Made with Bob
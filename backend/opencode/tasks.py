@@ -0,0 +1,35 @@
+"""
+Celery tasks for background planning and development jobs
+"""
+from celery import shared_task
+
+from tasks.models import collect_artifact_garbage
+
+from .jobs import reclaim_stale_jobs, run_job
+from .workspace import get_workspace_manager
+
+
+@shared_task(name='opencode.run_job')
+def run_job_task(job_id: int):
+    """Run a queued Job; status and result are stored on the Job row"""
+    run_job(job_id)
+
+
+@shared_task(name='opencode.reclaim_stale_jobs')
+def reclaim_stale_jobs_task():
+    """Finish jobs whose worker died so their projects can run again (celery beat)"""
+    reclaim_stale_jobs()
+
+
+@shared_task(name='opencode.collect_artifact_garbage')
+def collect_artifact_garbage_task():
+    """Delete artifact blobs no OutputFile references any more (celery beat)"""
+    return collect_artifact_garbage()
+
+
+@shared_task(name='opencode.archive_workspaces')
+def archive_workspaces_task():
+    """Archive cold workspaces and enforce the workspace size limit (celery beat)"""
+    return get_workspace_manager().housekeeping()
+
+# Made with Bob
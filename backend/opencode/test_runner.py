@@ -0,0 +1,425 @@
+"""
+Test Runner
+Runs a generated project's test suites in parallel shards inside the sandbox pool
+"""
+import ast
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from .executor import SNAPSHOT_IGNORED_DIRS, INTERNAL_FILE_PREFIX
+from .sandbox import SandboxPool, get_sandbox_pool
+
+CACHE_FILE = f'{INTERNAL_FILE_PREFIX}test_cache.json'
+
+PYTHON_EXTENSIONS = {'.py'}
+JS_EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'}
+
+# Top-level files every test of a suite depends on besides its imports
+PYTHON_CONFIG_FILES = ('pytest.ini', 'pyproject.toml', 'setup.cfg', 'tox.ini', 'requirements.txt')
+JS_CONFIG_FILES = (
+    'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'tsconfig.json',
+    'babel.config.js', 'jest.config.js', 'jest.config.ts', 'vitest.config.js', 'vitest.config.ts',
+    'vite.config.js', 'vite.config.ts',
+)
+
+# Module specifiers of import/export ... from, import(), require() and bare imports
+_JS_IMPORT = re.compile(r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"]([^'"]+)['"]""")
+
+
+def _is_python_test(path: Path) -> bool:
+    return path.suffix == '.py' and (path.name.startswith('test_') or path.stem.endswith('_test'))
+
+
+def _is_js_test(path: Path) -> bool:
+    if path.suffix not in JS_EXTENSIONS:
+        return False
+    return '.test.' in path.name or '.spec.' in path.name or '__tests__' in path.parts
+
+
+def _python_imports(relative_path: Path, text: str, known: Set[Path]) -> Optional[List[Path]]:
+    """
+    Project files a Python module imports (None if it does not parse)
+
+    Absolute imports are looked up from the project root, src/ and the directory
+    pytest puts on sys.path for the module (its first ancestor without __init__.py).
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+
+    base = relative_path.parent
+    while base != Path('.') and base / '__init__.py' in known:
+        base = base.parent
+    roots = [Path('.'), Path('src'), base]
+    found = []
+
+    def resolve(parts: List[str], bases: List[Path]):
+        for root in bases:
+            # Importing a.b.c runs the __init__.py of a and a.b as well
+            for depth in range(1, len(parts) + 1):
+                init = root.joinpath(*parts[:depth], '__init__.py')
+                if init in known:
+                    found.append(init)
+            if parts and root.joinpath(*parts[:-1], parts[-1] + '.py') in known:
+                found.append(root.joinpath(*parts[:-1], parts[-1] + '.py'))
+            elif not parts and root / '__init__.py' in known:
+                found.append(root / '__init__.py')
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                resolve(alias.name.split('.'), roots)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                package = relative_path.parent
+                for _ in range(node.level - 1):
+                    package = package.parent
+                bases = [package]
+            else:
+                bases = roots
+            module = node.module.split('.') if node.module else []
+            resolve(module, bases)
+            # from package import submodule
+            for alias in node.names:
+                resolve(module + [alias.name], bases)
+    return found
+
+
+def _js_imports(relative_path: Path, text: str, known: Set[Path]) -> List[Path]:
+    """
+    Project files a JavaScript/TypeScript module imports
+
+    Relative specifiers and the '@/' alias (project root or src/) are resolved;
+    packages are covered by the suite's package.json and lockfile.
+    """
+    found = []
+    for specifier in _JS_IMPORT.findall(text):
+        if specifier.startswith('.'):
+            bases = [Path(os.path.normpath(relative_path.parent / specifier))]
+        elif specifier.startswith('@/'):
+            bases = [Path(specifier[2:]), Path('src', specifier[2:])]
+        else:
+            continue
+        for base in bases:
+            candidates = [base] + [Path(f"{base}{ext}") for ext in sorted(JS_EXTENSIONS)] \
+                + [base / f'index{ext}' for ext in sorted(JS_EXTENSIONS)]
+            match = next((c for c in candidates if c in known), None)
+            if match is not None:
+                found.append(match)
+                break
+    return found
+
+
+class TestRunner:
+    """
+    Runs generated tests with per-file result caching.
+
+    Features:
+    - Suite detection (pytest for Python, jest/vitest for JavaScript/TypeScript)
+    - Parallel shards executed through the sandbox pool
+    - Results cached per test file, keyed by the content of the test, the project
+      modules it imports (transitively) and the suite's configuration files, so
+      a source change only re-runs the tests that import it
+
+    Imports are found statically. Dynamic imports (importlib, computed require
+    paths) and data files a test reads are not part of its key, so a change to
+    only those can leave a stale cached pass; a Python test that does not parse
+    is keyed on the whole suite instead.
+    """
+
+    def __init__(self, project_path: str, shards: Optional[int] = None,
+                 pool: Optional[SandboxPool] = None, timeout: int = 600):
+        self.project_path = Path(project_path)
+        self.pool = pool or get_sandbox_pool()
+        self.shards = shards or int(os.environ.get('OPENCODE_TEST_SHARDS', self.pool.max_processes))
+        self.timeout = timeout
+        self.cache_path = self.project_path / CACHE_FILE
+        self._known_files: Set[Path] = set()
+        self._imports: Dict[Path, Optional[List[Path]]] = {}
+
+    # Discovery
+
+    def _walk_files(self) -> List[Path]:
+        files = []
+        for root, dirs, names in os.walk(self.project_path):
+            dirs[:] = [d for d in dirs if d not in SNAPSHOT_IGNORED_DIRS]
+            for name in names:
+                if not name.startswith(INTERNAL_FILE_PREFIX):
+                    files.append(Path(root, name).relative_to(self.project_path))
+        return sorted(files)
+
+    def _js_runner(self) -> Optional[str]:
+        package_json = self.project_path / 'package.json'
+        if not package_json.exists():
+            return None
+        try:
+            package = json.loads(package_json.read_text())
+        except json.JSONDecodeError:
+            return None
+        deps = {**package.get('dependencies', {}), **package.get('devDependencies', {})}
+        for runner in ('vitest', 'jest'):
+            if runner in deps:
+                return runner
+        return None
+
+    def discover(self) -> List[Dict]:
+        """Find test suites in the workspace"""
+        files = self._walk_files()
+        self._known_files = set(files)
+        self._imports = {}
+        suites = []
+
+        python_tests = [f for f in files if _is_python_test(f)]
+        if python_tests:
+            suites.append({
+                'language': 'python',
+                'runner': 'pytest',
+                'tests': python_tests,
+                'sources': [f for f in files if f.suffix in PYTHON_EXTENSIONS and f not in python_tests],
+            })
+
+        js_runner = self._js_runner()
+        js_tests = [f for f in files if _is_js_test(f)]
+        if js_runner and js_tests:
+            suites.append({
+                'language': 'javascript',
+                'runner': js_runner,
+                'tests': js_tests,
+                'sources': [
+                    *(f for f in files if f.suffix in JS_EXTENSIONS and f not in js_tests),
+                    Path('package.json'),
+                ],
+            })
+
+        return suites
+
+    # Caching
+
+    def _hash_files(self, files: List[Path]) -> str:
+        sha = hashlib.sha256()
+        for relative_path in files:
+            sha.update(str(relative_path).encode() + b'\0')
+            try:
+                sha.update((self.project_path / relative_path).read_bytes())
+            except FileNotFoundError:
+                continue
+            sha.update(b'\0')
+        return sha.hexdigest()
+
+    def _module_imports(self, suite: Dict, relative_path: Path) -> Optional[List[Path]]:
+        if relative_path not in self._imports:
+            try:
+                text = (self.project_path / relative_path).read_text(errors='replace')
+            except FileNotFoundError:
+                text = ''
+            if suite['language'] == 'python':
+                self._imports[relative_path] = _python_imports(relative_path, text, self._known_files)
+            else:
+                self._imports[relative_path] = _js_imports(relative_path, text, self._known_files)
+        return self._imports[relative_path]
+
+    def _test_dependencies(self, suite: Dict, test_file: Path) -> List[Path]:
+        """
+        Files whose content a test's cached result depends on
+
+        The test, the project modules it imports (transitively), for Python the
+        conftest.py files above it, and the suite's configuration files. Falls
+        back to every source file of the suite when a module does not parse.
+        """
+        config_names = PYTHON_CONFIG_FILES if suite['language'] == 'python' else JS_CONFIG_FILES
+        config = [Path(name) for name in config_names if Path(name) in self._known_files]
+
+        stack = [test_file]
+        if suite['language'] == 'python':
+            stack += [
+                directory / 'conftest.py' for directory in [test_file.parent, *test_file.parent.parents]
+                if directory / 'conftest.py' in self._known_files
+            ]
+        seen: Set[Path] = set()
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            imports = self._module_imports(suite, path)
+            if imports is None:
+                return sorted({test_file, *suite['sources'], *config})
+            stack.extend(imports)
+        return sorted(seen | set(config))
+
+    def cache_keys(self, suite: Dict) -> Dict[str, str]:
+        """Cache key of each test file of a discovered suite"""
+        return {
+            str(test_file): self._hash_files(self._test_dependencies(suite, test_file))
+            for test_file in suite['tests']
+        }
+
+    def _load_cache(self) -> Dict:
+        try:
+            return json.loads(self.cache_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_cache(self, cache: Dict):
+        self.cache_path.write_text(json.dumps(cache, indent=2))
+
+    # Execution
+
+    def _python_command(self) -> List[str]:
+        venv_python = self.project_path / '.venv' / 'bin' / 'python'
+        return [str(venv_python) if venv_python.exists() else 'python', '-m', 'pytest']
+
+    def _shard_command(self, suite: Dict, files: List[str], report_path: Path) -> List[str]:
+        if suite['runner'] == 'pytest':
+            return self._python_command() + [
+                '-q', '-o', 'junit_family=xunit1', f'--junitxml={report_path}', *files
+            ]
+        if suite['runner'] == 'vitest':
+            return ['npx', '--no-install', 'vitest', 'run', '--reporter=json',
+                    f'--outputFile={report_path}', *files]
+        return ['npx', '--no-install', 'jest', '--json', f'--outputFile={report_path}', *files]
+
+    def _parse_report(self, suite: Dict, report_path: Path, files: List[str]) -> Dict[str, bool]:
+        """Map each test file of the shard to passed/failed"""
+        results = {}
+        try:
+            if suite['runner'] == 'pytest':
+                for case in ET.parse(report_path).getroot().iter('testcase'):
+                    failed = case.find('failure') is not None or case.find('error') is not None
+                    file_attr = case.get('file') or case.get('classname', '').replace('.', '/') + '.py'
+                    results[file_attr] = results.get(file_attr, True) and not failed
+            else:
+                report = json.loads(report_path.read_text())
+                for test_result in report.get('testResults', []):
+                    path = os.path.relpath(test_result.get('name', ''), self.project_path)
+                    results[path] = test_result.get('status') == 'passed'
+        except (FileNotFoundError, ET.ParseError, json.JSONDecodeError):
+            pass
+        # Files missing from the report inherit nothing: treat them as failed
+        return {f: results.get(f, False) for f in files}
+
+    def _run_shard(self, suite: Dict, index: int, files: List[str]) -> Dict:
+        report_path = self.project_path / f'{INTERNAL_FILE_PREFIX}test_report_{suite["language"]}_{index}'
+        started = time.monotonic()
+        try:
+            result = self.pool.run(
+                self._shard_command(suite, files, report_path),
+                cwd=str(self.project_path),
+                timeout=self.timeout
+            )
+            returncode, output = result.returncode, (result.stdout + result.stderr)
+        except subprocess.TimeoutExpired:
+            returncode, output = None, f'Timed out after {self.timeout} seconds'
+        except FileNotFoundError as e:
+            returncode, output = None, f'Test runner not available: {e}'
+
+        file_results = self._parse_report(suite, report_path, files)
+        if returncode == 0:
+            file_results = {f: True for f in files}
+        report_path.unlink(missing_ok=True)
+
+        return {
+            'shard': index,
+            'files': files,
+            'passed': returncode == 0,
+            'returncode': returncode,
+            'duration_seconds': round(time.monotonic() - started, 3),
+            'file_results': file_results,
+            'output_tail': output[-2000:],
+        }
+
+    def _make_shards(self, files: List[str], durations: Dict[str, float]) -> List[List[str]]:
+        """Greedy balance of files across shards by previous duration (or file size)"""
+        def weight(f):
+            if f in durations:
+                return durations[f]
+            try:
+                return (self.project_path / f).stat().st_size / 10000
+            except FileNotFoundError:
+                return 0.0
+
+        shard_count = max(1, min(self.shards, len(files)))
+        shards = [[] for _ in range(shard_count)]
+        loads = [0.0] * shard_count
+        for f in sorted(files, key=weight, reverse=True):
+            target = loads.index(min(loads))
+            shards[target].append(f)
+            loads[target] += weight(f)
+        return [s for s in shards if s]
+
+    def run(self) -> Dict:
+        """
+        Run all discovered suites
+
+        Returns:
+            Dictionary with overall status, per-suite shard results and durations
+        """
+        started = time.monotonic()
+        suites = self.discover()
+        if not suites:
+            return {'status': 'skipped', 'reason': 'No test suites found', 'suites': []}
+
+        cache = self._load_cache()
+        summaries = []
+
+        with ThreadPoolExecutor(max_workers=self.shards) as pool:
+            for suite in suites:
+                suite_cache = cache.setdefault(suite['language'], {})
+
+                pending, cached = [], []
+                keys = self.cache_keys(suite)
+                for test_file, key in keys.items():
+                    entry = suite_cache.get(test_file)
+                    if entry and entry.get('key') == key and entry.get('passed'):
+                        cached.append(test_file)
+                    else:
+                        pending.append(test_file)
+
+                durations = {f: e.get('duration_seconds', 0.0) for f, e in suite_cache.items()}
+                futures = [
+                    pool.submit(self._run_shard, suite, i, shard)
+                    for i, shard in enumerate(self._make_shards(pending, durations))
+                ] if pending else []
+                shard_results = [f.result() for f in futures]
+
+                failed_files = []
+                for shard in shard_results:
+                    per_file = shard['duration_seconds'] / len(shard['files'])
+                    for test_file, passed in shard['file_results'].items():
+                        suite_cache[test_file] = {
+                            'key': keys.get(test_file),
+                            'passed': passed,
+                            'duration_seconds': round(per_file, 3),
+                        }
+                        if not passed:
+                            failed_files.append(test_file)
+
+                summaries.append({
+                    'language': suite['language'],
+                    'runner': suite['runner'],
+                    'total_files': len(suite['tests']),
+                    'cached_files': cached,
+                    'failed_files': sorted(failed_files),
+                    'passed': not failed_files,
+                    'shards': [{k: v for k, v in s.items() if k != 'file_results'} for s in shard_results],
+                    'duration_seconds': round(max((s['duration_seconds'] for s in shard_results), default=0.0), 3),
+                })
+
+        self._save_cache(cache)
+
+        return {
+            'status': 'passed' if all(s['passed'] for s in summaries) else 'failed',
+            'suites': summaries,
+            'duration_seconds': round(time.monotonic() - started, 3),
+        }
+
+# Made with Bob
@@ -0,0 +1,25 @@
+"""
+Test Factories
+Projects ready for a (simulated) development run
+"""
+from django.contrib.auth.models import User
+
+from agents.models import Agent
+from planning.models import PlanningDocument
+from projects.models import Project
+
+
+def make_project(username: str = 'owner', name: str = 'Shop') -> Project:
+    """Create a project with a planning document and a backend, frontend and QA agent"""
+    owner = User.objects.create_user(username)
+    project = Project.objects.create(name=name, description='test project', created_by=owner)
+    PlanningDocument.objects.create(
+        project=project,
+        executive_summary='Test project',
+        tech_stack={'backend': ['Django'], 'frontend': ['React']},
+    )
+    for role in ('backend_developer', 'frontend_developer', 'qa_engineer'):
+        Agent.objects.create(project=project, name=role, role=role, department='development')
+    return project
+
+# Made with Bob
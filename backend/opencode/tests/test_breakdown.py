@@ -0,0 +1,262 @@
+"""
+Task Breakdown Tests
+Dependency reference resolution, cycle repair, breakdown caching and carrying
+tasks over to a regenerated breakdown
+"""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from planning.models import PlanningDocument
+from projects.models import Project
+from opencode.breakdown import MAX_TASKS, build_task_graph, get_task_breakdown, merge_task_graph
+from opencode.models import TaskBreakdown
+
+
+def _dependencies(nodes):
+    return {node['key']: node['dependencies'] for node in nodes}
+
+
+class BuildTaskGraphTests(SimpleTestCase):
+
+    def test_references_resolve_by_id_title_and_position(self):
+        nodes, repairs = build_task_graph([
+            {'id': 'models', 'title': 'Data Models'},
+            {'id': 'api', 'title': 'REST API', 'dependencies': ['models']},
+            {'id': 'ui', 'title': 'Frontend', 'dependencies': ['rest api', 'Task 1']},
+            {'id': 'docs', 'title': 'Docs', 'dependencies': [2, 'task_3', 't1']},
+        ])
+
+        self.assertEqual(_dependencies(nodes), {
+            'models': [],
+            'api': ['models'],
+            'ui': ['api', 'models'],
+            'docs': ['api', 'ui', 'models'],
+        })
+        self.assertEqual(repairs, [])
+
+    def test_keys_are_slugs_made_unique_and_kept_off_reserved_keys(self):
+        nodes, _ = build_task_graph([
+            {'title': 'Build API'},
+            {'title': 'Build API'},
+            {'id': 'Setup', 'title': 'Project setup'},
+        ], reserved_keys=('setup', 'tests'))
+
+        self.assertEqual([node['key'] for node in nodes], ['build-api', 'build-api-2', 'setup-2'])
+
+    def test_duplicate_titles_resolve_to_the_first_task(self):
+        nodes, _ = build_task_graph([
+            {'id': 'a', 'title': 'Build API'},
+            {'id': 'b', 'title': 'Build API'},
+            {'id': 'c', 'title': 'Tests', 'dependencies': ['Build API', 'b']},
+        ])
+
+        self.assertEqual(_dependencies(nodes)['c'], ['a', 'b'])
+
+    def test_unknown_self_and_repeated_references_are_dropped(self):
+        nodes, repairs = build_task_graph([
+            {'id': 'a', 'title': 'A'},
+            {'id': 'b', 'title': 'B', 'dependencies': ['b', 'ghost', 'a', 'A']},
+        ])
+
+        self.assertEqual(_dependencies(nodes)['b'], ['a'])
+        self.assertEqual(repairs, [
+            "b: dropped dependency on itself",
+            "b: dropped unknown dependency 'ghost'",
+        ])
+
+    def test_scalar_dependencies_are_accepted(self):
+        nodes, _ = build_task_graph([
+            {'id': 'a', 'title': 'A'},
+            {'id': 'b', 'title': 'B', 'dependencies': 'a'},
+        ])
+
+        self.assertEqual(_dependencies(nodes)['b'], ['a'])
+
+    def test_cycles_are_broken(self):
+        nodes, repairs = build_task_graph([
+            {'id': 'a', 'title': 'A', 'dependencies': ['c']},
+            {'id': 'b', 'title': 'B', 'dependencies': ['a']},
+            {'id': 'c', 'title': 'C', 'dependencies': ['b']},
+            {'id': 'd', 'title': 'D', 'dependencies': ['d', 'a']},
+        ])
+
+        self.assertEqual(_dependencies(nodes), {'a': ['c'], 'b': [], 'c': ['b'], 'd': ['a']})
+        self.assertIn("b: dropped dependency 'a' to break a cycle", repairs)
+        self._assert_acyclic(nodes)
+
+    def test_two_task_cycle_keeps_one_edge(self):
+        nodes, repairs = build_task_graph([
+            {'id': 'a', 'title': 'A', 'dependencies': ['b']},
+            {'id': 'b', 'title': 'B', 'dependencies': ['a']},
+        ])
+
+        self.assertEqual(sum(len(node['dependencies']) for node in nodes), 1)
+        self.assertEqual(len(repairs), 1)
+        self._assert_acyclic(nodes)
+
+    def test_invalid_fields_fall_back_to_defaults(self):
+        nodes, repairs = build_task_graph([
+            'not a task',
+            {'id': 'x'},
+            {'id': 'a', 'title': '  A  ', 'priority': 'URGENT', 'estimated_hours': 'soon',
+             'deliverables': ['api.py', None, '']},
+            {'id': 'b', 'title': 'B', 'priority': 'Low', 'estimated_hours': 0},
+        ])
+
+        a, b = nodes
+        self.assertEqual((a['title'], a['priority'], a['estimated_hours'], a['deliverables']),
+                         ('A', 'medium', 1.0, ['api.py']))
+        self.assertEqual((b['priority'], b['estimated_hours']), ('low', 1.0))
+        self.assertEqual(repairs, ["Dropped task #1: no title", "Dropped task #2: no title"])
+
+    def test_runaway_breakdowns_are_truncated(self):
+        nodes, repairs = build_task_graph([{'title': f'Task {i}'} for i in range(MAX_TASKS + 3)])
+
+        self.assertEqual(len(nodes), MAX_TASKS)
+        self.assertEqual(len(repairs), 3)
+
+    def test_sections_are_validated(self):
+        nodes, _ = build_task_graph([
+            {'id': 'a', 'title': 'A', 'sections': ['Feature_Specifications', 'timeline']},
+            {'id': 'b', 'title': 'B', 'sections': 'executive_summary'},
+            {'id': 'c', 'title': 'C'},
+        ])
+
+        self.assertEqual([node['sections'] for node in nodes], [
+            ['feature_specifications'],
+            ['executive_summary'],
+            ['technical_requirements', 'feature_specifications'],
+        ])
+
+    def _assert_acyclic(self, nodes):
+        remaining = _dependencies(nodes)
+        while remaining:
+            ready = [key for key, dependencies in remaining.items() if not set(dependencies) & set(remaining)]
+            self.assertTrue(ready, f"cycle left in {remaining}")
+            for key in ready:
+                del remaining[key]
+
+
+class MergeTaskGraphTests(SimpleTestCase):
+
+    def setUp(self):
+        self.previous, _ = build_task_graph([
+            {'id': 'models', 'title': 'Data Models', 'description': 'v1', 'sections': ['technical_requirements']},
+            {'id': 'cart', 'title': 'Cart', 'description': 'v1', 'dependencies': ['models'],
+             'sections': ['feature_specifications']},
+            {'id': 'about', 'title': 'About Page', 'description': 'v1', 'sections': ['executive_summary']},
+        ])
+
+    def _merge(self, raw, changed):
+        nodes, _ = build_task_graph(raw)
+        merged, repairs = merge_task_graph(self.previous, nodes, changed)
+        return {node['key']: node for node in merged}, repairs
+
+    def test_unaffected_tasks_are_kept_as_they_were(self):
+        merged, _ = self._merge([
+            {'id': 'data-models', 'title': 'Data models', 'description': 'reworded',
+             'sections': ['technical_requirements']},
+            {'id': 'shopping-cart', 'title': 'Cart', 'description': 'v2', 'dependencies': ['data-models'],
+             'sections': ['feature_specifications']},
+        ], changed=['feature_specifications'])
+
+        self.assertEqual(sorted(merged), ['about', 'cart', 'models'])
+        self.assertEqual(merged['models'], self.previous[0])
+        self.assertEqual(merged['about'], self.previous[2])
+        # Changed task: new content under the earlier key, dependencies renamed
+        self.assertEqual((merged['cart']['description'], merged['cart']['dependencies']), ('v2', ['models']))
+
+    def test_tasks_of_changed_sections_can_be_dropped_and_added(self):
+        merged, _ = self._merge([
+            {'id': 'models', 'title': 'Data Models', 'sections': ['technical_requirements']},
+            {'id': 'team', 'title': 'Team Page', 'dependencies': ['models'], 'sections': ['executive_summary']},
+        ], changed=['executive_summary'])
+
+        # 'about' was derived from the edited section and is gone; 'cart' was not and stays
+        self.assertEqual(sorted(merged), ['cart', 'models', 'team'])
+        self.assertEqual(merged['cart'], self.previous[1])
+        self.assertEqual(merged['team']['dependencies'], ['models'])
+
+    def test_nothing_changed_keeps_the_earlier_graph(self):
+        merged, repairs = self._merge([{'id': 'x', 'title': 'Everything', 'dependencies': []}], changed=[])
+
+        self.assertEqual([merged[node['key']] for node in self.previous], self.previous)
+        self.assertIn('x', merged)
+        self.assertEqual(repairs, [])
+
+
+class GetTaskBreakdownTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Shop', description='shop', created_by=owner)
+        self.planning_doc = PlanningDocument.objects.create(
+            project=self.project, full_document='# Shop', tech_stack={'backend': ['Django']}
+        )
+        self.client_mock = mock.Mock(api_key='key')
+        self.client_mock.generate_task_breakdown.return_value = {
+            'success': True,
+            'tasks': {'tasks': [
+                {'id': 'api', 'title': 'API', 'dependencies': ['api']},
+                {'id': 'ui', 'title': 'UI', 'dependencies': ['API']},
+            ]},
+            'tokens_used': 120,
+        }
+        patcher = mock.patch('opencode.breakdown.get_opencode_client', return_value=self.client_mock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_breakdown_is_stored_with_its_repairs(self):
+        breakdown = get_task_breakdown(self.planning_doc, ['backend_developer'])
+
+        self.assertEqual(_dependencies(breakdown.tasks), {'api': [], 'ui': ['api']})
+        self.assertEqual(breakdown.repairs, ["api: dropped dependency on itself"])
+        self.assertEqual(breakdown.tokens_used, 120)
+
+    def test_unchanged_plan_reuses_the_breakdown(self):
+        first = get_task_breakdown(self.planning_doc, ['backend_developer'])
+        second = get_task_breakdown(self.planning_doc, ['backend_developer'])
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(self.client_mock.generate_task_breakdown.call_count, 1)
+
+    def test_changed_plan_or_team_regenerates_it(self):
+        get_task_breakdown(self.planning_doc, ['backend_developer'])
+        get_task_breakdown(self.planning_doc, ['backend_developer', 'qa_engineer'])
+        self.planning_doc.full_document = '# Shop v2'
+        get_task_breakdown(self.planning_doc, ['backend_developer', 'qa_engineer'])
+
+        self.assertEqual(self.client_mock.generate_task_breakdown.call_count, 3)
+        self.assertEqual(TaskBreakdown.objects.filter(project=self.project).count(), 1)
+
+    def test_planning_edit_keeps_the_keys_of_unaffected_tasks(self):
+        self.planning_doc.feature_specifications = 'Cart'
+        first = get_task_breakdown(self.planning_doc, ['backend_developer'])
+        self.client_mock.generate_task_breakdown.return_value = {
+            'success': True,
+            'tasks': {'tasks': [
+                {'id': 'backend-api', 'title': 'API', 'description': 'reworded'},
+                {'id': 'frontend', 'title': 'UI', 'dependencies': ['backend-api']},
+            ]},
+        }
+        self.planning_doc.full_document = '# Shop v2'
+        self.planning_doc.executive_summary = 'Now with a blog'
+
+        second = get_task_breakdown(self.planning_doc, ['backend_developer'])
+
+        self.assertEqual(second.tasks, first.tasks)
+        self.assertEqual(
+            self.client_mock.generate_task_breakdown.call_args.kwargs['existing_tasks'], first.tasks
+        )
+
+    def test_failed_or_empty_breakdown_returns_none(self):
+        self.client_mock.generate_task_breakdown.return_value = {'success': False, 'error': 'timeout'}
+        self.assertIsNone(get_task_breakdown(self.planning_doc, ['backend_developer']))
+
+        self.client_mock.generate_task_breakdown.return_value = {'success': True, 'tasks': []}
+        self.assertIsNone(get_task_breakdown(self.planning_doc, ['backend_developer']))
+        self.assertFalse(TaskBreakdown.objects.exists())
+
+# Made with Bob
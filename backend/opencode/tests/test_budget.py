@@ -0,0 +1,169 @@
+"""
+Budget Tests
+Budget states, model degradation and runs stopping once a budget is spent
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+
+from codebase.blob_store import BlobStore
+from projects.models import Project
+from tasks.models import Task
+from opencode.budget import BudgetGuard, budget_scope, current_budget
+from opencode.client import OpenCodeClient
+from opencode.dependency_cache import DependencyCache
+from opencode.models import Budget, LedgerEntry, Run
+from opencode.orchestrator import start_project_development
+from opencode.scaffolds import ScaffoldLibrary
+from opencode.simulation import Simulation
+from opencode.tests.factories import make_project
+
+
+def _usage(tokens: int, cost: float = 0.0):
+    return {'model': 'gpt-4', 'prompt_tokens': tokens, 'completion_tokens': 0, 'cost': cost}
+
+
+@mock.patch.dict(os.environ, {
+    name: '' for name in (
+        'OPENCODE_PROJECT_TOKEN_BUDGET', 'OPENCODE_PROJECT_COST_BUDGET',
+        'OPENCODE_USER_TOKEN_BUDGET', 'OPENCODE_USER_COST_BUDGET',
+        'OPENCODE_RUN_TOKEN_BUDGET', 'OPENCODE_RUN_COST_BUDGET',
+    )
+})
+class BudgetGuardTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Shop', description='shop', created_by=self.owner)
+        self.guard = BudgetGuard(self.project)
+
+    def test_unlimited_budget_stays_ok(self):
+        self.guard.debit('llm', _usage(10 ** 6, 100.0))
+
+        status = self.guard.status()
+        self.assertEqual((status['state'], status['scopes']), ('ok', {}))
+
+    def test_project_budget_degrades_then_is_exceeded(self):
+        Budget.objects.create(project=self.project, token_limit=1000)
+
+        self.guard.debit('llm', _usage(700))
+        self.assertEqual(self.guard.status()['state'], 'ok')
+        self.assertEqual(self.guard.model_for('gpt-4', 'gpt-4o-mini'), 'gpt-4')
+
+        self.guard.debit('execution', _usage(150), task_key='api')
+        status = self.guard.status()
+        self.assertEqual(status['state'], 'degraded')
+        self.assertEqual(status['reason'], 'project tokens budget 85% used')
+        self.assertEqual(self.guard.model_for('gpt-4', 'gpt-4o-mini'), 'gpt-4o-mini')
+        self.assertEqual(self.guard.model_for('gpt-4', None), 'gpt-4')
+
+        self.guard.debit('execution', _usage(150), task_key='ui')
+        self.assertEqual(self.guard.status()['state'], 'exceeded')
+
+    def test_project_budget_counts_earlier_runs(self):
+        Budget.objects.create(project=self.project, cost_limit=1.0)
+        BudgetGuard(self.project).debit('llm', _usage(10, 0.6))
+
+        self.guard.debit('llm', _usage(10, 0.5))
+
+        self.assertEqual(self.guard.status()['state'], 'exceeded')
+        self.assertEqual(self.guard.summary()['cost'], 0.5)
+
+    def test_user_budget_spans_projects(self):
+        Budget.objects.create(user=self.owner, token_limit=100)
+        other = Project.objects.create(name='Blog', description='blog', created_by=self.owner)
+        BudgetGuard(other).debit('llm', _usage(100))
+
+        self.assertEqual(self.guard.status()['state'], 'exceeded')
+
+    def test_run_budget_only_counts_this_guard(self):
+        BudgetGuard(self.project).debit('llm', _usage(500))
+
+        with mock.patch.dict(os.environ, {'OPENCODE_RUN_TOKEN_BUDGET': '100'}):
+            self.assertEqual(self.guard.status()['state'], 'ok')
+            self.guard.debit('llm', _usage(100))
+            self.assertEqual(self.guard.status()['state'], 'exceeded')
+
+    def test_debits_are_recorded_in_the_ledger(self):
+        self.guard.debit('execution', dict(_usage(40, 0.01), completion_tokens=2, estimated=True), task_key='api')
+
+        entry = LedgerEntry.objects.get()
+        self.assertEqual(
+            (entry.project, entry.user, entry.source, entry.task_key, entry.prompt_tokens, entry.estimated),
+            (self.project, self.owner, 'execution', 'api', 40, True)
+        )
+        self.assertEqual(self.guard.summary()['calls'], 1)
+
+    def test_only_the_first_stop_reports(self):
+        self.assertTrue(self.guard.stop())
+        self.assertFalse(self.guard.stop())
+        self.assertTrue(self.guard.summary()['stopped'])
+
+    def test_llm_calls_are_refused_once_the_budget_is_spent(self):
+        Budget.objects.create(project=self.project, token_limit=100)
+        self.guard.debit('llm', _usage(100))
+        client = OpenCodeClient(api_key='key')
+
+        with budget_scope(self.guard), mock.patch('opencode.client.requests.post') as post:
+            self.assertIs(current_budget(), self.guard)
+            result = client.generate_code('Write a function')
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['budget_exceeded'])
+        post.assert_not_called()
+        self.assertIsNone(current_budget())
+
+
+class BudgetEarlyStopTests(TransactionTestCase):
+    """A simulated development run that spends its project budget part way"""
+
+    def setUp(self):
+        scratch = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, scratch, True)
+        for patcher in (
+            mock.patch('codebase.blob_store._store_instance', BlobStore(str(scratch / 'artifacts'))),
+            mock.patch('opencode.scaffolds._library_instance', ScaffoldLibrary(str(scratch / 'scaffolds'))),
+            mock.patch(
+                'opencode.dependency_cache._cache_instance',
+                DependencyCache(str(scratch / 'dependencies'), max_bytes=2 ** 30)
+            ),
+            mock.patch.dict(os.environ, {'OPENCODE_GITHUB_PUSH': 'False'}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.project = make_project()
+
+    def _develop(self):
+        return start_project_development(self.project.id, simulation=Simulation(time_scale=0.001, seed=1))
+
+    def test_spent_budget_stops_new_tasks(self):
+        # Each simulated execution uses a few thousand tokens; the 7-task plan needs far more
+        Budget.objects.create(project=self.project, token_limit=10000)
+
+        result = self._develop()
+
+        budget = result['budget']
+        self.assertTrue(budget['stopped'])
+        self.assertEqual(budget['status']['state'], 'exceeded')
+        self.assertGreater(budget['calls'], 0)
+        # Tasks already running finish; nothing starts after the budget is spent
+        self.assertLess(budget['calls'], 7)
+        self.assertEqual(LedgerEntry.objects.filter(project=self.project).count(), budget['calls'])
+        self.assertFalse(Task.objects.filter(project=self.project, key='tests', status='completed').exists())
+        self.assertEqual(Run.objects.get(id=result['run_id']).status, 'cancelled')
+
+    def test_run_within_budget_completes(self):
+        Budget.objects.create(project=self.project, token_limit=10 ** 7)
+
+        result = self._develop()
+
+        self.assertFalse(result['budget']['stopped'])
+        self.assertEqual(result['tasks_failed'], 0)
+        self.assertEqual(result['budget']['calls'], result['tasks_executed'])
+
+# Made with Bob
@@ -0,0 +1,133 @@
+"""
+Task Checkpoint Tests
+Reuse of completed tasks across runs and what invalidates them
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from planning.models import PlanningDocument
+from projects.models import Project
+from opencode.checkpoints import CheckpointStore
+from opencode.models import TaskCheckpoint
+
+
+class CheckpointStoreTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Shop', description='shop', created_by=owner)
+        self.planning_doc = PlanningDocument.objects.create(
+            project=self.project,
+            executive_summary='A shop',
+            feature_specifications='Cart and checkout',
+            tech_stack={'backend': ['Django']},
+        )
+        self.workspace = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.workspace, True)
+
+        self.models = {'id': 'models', 'prompt': 'Write the models', 'sections': ['tech_stack'],
+                       'dependencies': []}
+        self.api = {'id': 'api', 'prompt': 'Write the API', 'sections': ['feature_specifications'],
+                    'dependencies': ['models']}
+
+    def _store(self) -> CheckpointStore:
+        """Checkpoint store of a new run"""
+        return CheckpointStore(self.project, str(self.workspace), self.planning_doc)
+
+    def _complete(self, store: CheckpointStore, task, files):
+        for name, content in files.items():
+            (self.workspace / name).write_text(content)
+        return store.save(task, store.fingerprint(task), list(files), {'success': True})
+
+    def _first_run(self):
+        store = self._store()
+        self._complete(store, self.models, {'models.py': 'class Item: pass\n'})
+        self._complete(store, self.api, {'api.py': 'def items(): pass\n'})
+
+    def _reuse(self, store: CheckpointStore, task):
+        return store.reusable(task, store.fingerprint(task))
+
+    def test_unchanged_tasks_are_reused_by_the_next_run(self):
+        self._first_run()
+        store = self._store()
+
+        for task in (self.models, self.api):
+            checkpoint, reason = self._reuse(store, task)
+            self.assertIsNotNone(checkpoint, reason)
+            self.assertEqual(checkpoint.result, {'success': True})
+
+    def test_task_without_checkpoint_runs(self):
+        checkpoint, reason = self._reuse(self._store(), self.models)
+
+        self.assertIsNone(checkpoint)
+        self.assertEqual(reason, 'not completed before')
+
+    def test_changed_prompt_invalidates(self):
+        self._first_run()
+
+        checkpoint, reason = self._reuse(self._store(), dict(self.models, prompt='Write better models'))
+
+        self.assertIsNone(checkpoint)
+        self.assertEqual(reason, 'prompt changed')
+
+    def test_changed_section_only_reruns_tasks_built_from_it(self):
+        self._first_run()
+        self.planning_doc.feature_specifications = 'Cart, checkout and coupons'
+        store = self._store()
+
+        self.assertEqual(store.changed_sections(), ['feature_specifications'])
+        self.assertIsNotNone(self._reuse(store, self.models)[0])
+        checkpoint, reason = self._reuse(store, self.api)
+        self.assertIsNone(checkpoint)
+        self.assertEqual(reason, 'planning sections changed (feature_specifications)')
+
+    def test_json_sections_compare_by_content(self):
+        self._first_run()
+        self.planning_doc.tech_stack = {'backend': ['Django']}
+
+        self.assertEqual(self._store().changed_sections(), [])
+
+    def test_modified_or_deleted_output_invalidates(self):
+        self._first_run()
+        (self.workspace / 'models.py').write_text('class Item: changed = True\n')
+
+        checkpoint, reason = self._reuse(self._store(), self.models)
+        self.assertIsNone(checkpoint)
+        self.assertEqual(reason, 'its files were modified in the workspace')
+
+        self._first_run()
+        (self.workspace / 'api.py').unlink()
+        self.assertIsNone(self._reuse(self._store(), self.api)[0])
+
+    def test_rerun_with_new_output_invalidates_dependents(self):
+        self._first_run()
+        store = self._store()
+        self._complete(store, self.models, {'models.py': 'class Item:\n    price = 0\n'})
+
+        checkpoint, reason = self._reuse(store, self.api)
+
+        self.assertIsNone(checkpoint)
+        self.assertEqual(reason, 'dependencies produced new output')
+
+    def test_rerun_with_same_output_keeps_dependents(self):
+        self._first_run()
+        store = self._store()
+        self._complete(store, self.models, {'models.py': 'class Item: pass\n'})
+
+        self.assertIsNotNone(self._reuse(store, self.api)[0])
+
+    def test_invalidate_forgets_the_checkpoint(self):
+        self._first_run()
+        store = self._store()
+
+        store.invalidate(self.models)
+
+        self.assertIsNone(self._reuse(store, self.models)[0])
+        self.assertFalse(TaskCheckpoint.objects.filter(project=self.project, task_key='models').exists())
+        self.assertTrue(TaskCheckpoint.objects.filter(project=self.project, task_key='api').exists())
+
+# Made with Bob
@@ -0,0 +1,176 @@
+"""
+Delta Sync Tests
+Round trips of the rolling-checksum delta and syncing between workspace trees
+"""
+import os
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from opencode.delta import BLOCK_SIZE, LocalTree, delta, patch, signature, sync_trees
+
+
+def _round_trip(old: bytes, new: bytes):
+    ops = delta(signature(old), new)
+    return patch(old, ops), ops
+
+
+def _literal_size(ops) -> int:
+    return sum(len(op[1]) for op in ops if op[0] == 'data')
+
+
+class DeltaRoundTripTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.old = bytes(rng.getrandbits(8) for _ in range(BLOCK_SIZE * 10 + 123))
+
+    def test_edits_round_trip(self):
+        old = self.old
+        edits = {
+            'identical': old,
+            'insert in the middle': old[:5000] + b'inserted line\n' + old[5000:],
+            'delete a range': old[:3000] + old[3100:],
+            'replace bytes': old[:7000] + b'X' * 10 + old[7010:],
+            'prepend': b'# header\n' + old,
+            'append': old + b'\n# footer\n',
+            'truncate': old[:BLOCK_SIZE * 3 + 5],
+            'shuffle blocks': old[BLOCK_SIZE * 5:] + old[:BLOCK_SIZE * 5],
+            'empty': b'',
+        }
+        for name, new in edits.items():
+            with self.subTest(name):
+                result, _ = _round_trip(old, new)
+                self.assertEqual(result, new)
+
+    def test_small_edits_resend_little(self):
+        new = self.old[:5000] + b'inserted line\n' + self.old[5000:]
+
+        _, ops = _round_trip(self.old, new)
+
+        self.assertLess(_literal_size(ops), 2 * BLOCK_SIZE)
+        self.assertGreaterEqual(sum(op[2] for op in ops if op[0] == 'copy'), 8)
+
+    def test_identical_data_is_all_copies(self):
+        _, ops = _round_trip(self.old, self.old)
+
+        self.assertEqual(ops, [('copy', 0, len(signature(self.old)['blocks']))])
+
+    def test_new_and_empty_files_are_sent_whole(self):
+        self.assertEqual(patch(b'', delta(None, b'hello')), b'hello')
+        self.assertEqual(patch(b'', delta(signature(b''), b'hello')), b'hello')
+        self.assertEqual(delta(None, b''), [])
+
+    def test_short_files_round_trip(self):
+        for old, new in [(b'abc', b'abcd'), (b'abcd', b'abc'), (b'x' * 10, b'x' * 10), (b'a', b'')]:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(_round_trip(old, new)[0], new)
+
+    def test_random_edits_round_trip(self):
+        rng = random.Random(11)
+        for _ in range(25):
+            new = bytearray(self.old)
+            for _ in range(rng.randint(1, 5)):
+                at = rng.randrange(len(new) + 1)
+                if rng.random() < 0.5:
+                    new[at:at] = bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 300)))
+                else:
+                    del new[at:at + rng.randint(1, 300)]
+            self.assertEqual(_round_trip(self.old, bytes(new))[0], bytes(new))
+
+
+class SyncTreesTests(SimpleTestCase):
+
+    def setUp(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        self.source_root = root / 'source'
+        self.destination_root = root / 'destination'
+        self.source = LocalTree(str(self.source_root))
+        self.destination = LocalTree(str(self.destination_root))
+
+    def _write(self, root: Path, relative_path: str, content: bytes):
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def _files(self, root: Path):
+        return {
+            str(path.relative_to(root)): path.read_bytes()
+            for path in root.rglob('*') if path.is_file()
+        }
+
+    def test_mirror_copies_updates_and_deletes(self):
+        body = os.urandom(BLOCK_SIZE * 4)
+        self._write(self.source_root, 'src/app.py', body)
+        self._write(self.source_root, 'README.md', b'readme')
+        self._write(self.destination_root, 'src/app.py', body[:BLOCK_SIZE * 3])
+        self._write(self.destination_root, 'stale.txt', b'old')
+
+        stats = sync_trees(self.source, self.destination)
+
+        self.assertEqual(self._files(self.destination_root), self._files(self.source_root))
+        self.assertEqual(stats['files_sent'], 2)
+        self.assertEqual(stats['files_deleted'], 1)
+        self.assertEqual(stats['matched_bytes'], BLOCK_SIZE * 3)
+
+    def test_second_sync_sends_nothing(self):
+        self._write(self.source_root, 'a.txt', b'a')
+        sync_trees(self.source, self.destination)
+
+        stats = sync_trees(self.source, self.destination)
+
+        self.assertEqual((stats['files_sent'], stats['files_deleted']), (0, 0))
+
+    def test_sync_back_picks_up_edits(self):
+        self._write(self.source_root, 'a.txt', b'one\n' * 1000)
+        sync_trees(self.source, self.destination)
+        self._write(self.destination_root, 'a.txt', b'one\n' * 999 + b'two\n')
+        self._write(self.destination_root, 'new/b.txt', b'b')
+
+        sync_trees(self.destination, self.source)
+
+        self.assertEqual(self._files(self.source_root), self._files(self.destination_root))
+
+    def test_path_sync_leaves_other_files_alone(self):
+        self._write(self.source_root, 'a.txt', b'new a')
+        self._write(self.source_root, 'b.txt', b'new b')
+        self._write(self.destination_root, 'b.txt', b'old b')
+        self._write(self.destination_root, 'gone.txt', b'gone')
+        self._write(self.destination_root, 'other.txt', b'other')
+
+        stats = sync_trees(self.source, self.destination, paths=['a.txt', 'gone.txt'], deleted=['gone.txt'])
+
+        self.assertEqual(self._files(self.destination_root), {
+            'a.txt': b'new a', 'b.txt': b'old b', 'other.txt': b'other',
+        })
+        self.assertEqual((stats['files_sent'], stats['files_deleted']), (1, 1))
+
+    def test_modes_are_synced(self):
+        self._write(self.source_root, 'run.sh', b'#!/bin/sh\n')
+        (self.source_root / 'run.sh').chmod(0o755)
+
+        sync_trees(self.source, self.destination)
+
+        self.assertEqual((self.destination_root / 'run.sh').stat().st_mode & 0o777, 0o755)
+
+    def test_ignored_directories_and_internal_files_are_skipped(self):
+        self._write(self.source_root, 'node_modules/pkg/index.js', b'x')
+        self._write(self.source_root, '.git/HEAD', b'ref')
+        self._write(self.source_root, '.opencode_prompt.md', b'prompt')
+        self._write(self.source_root, 'app.js', b'app')
+
+        sync_trees(self.source, self.destination)
+
+        self.assertEqual(self._files(self.destination_root), {'app.js': b'app'})
+
+    def test_paths_outside_the_tree_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.destination.apply({'../escape.txt': delta(None, b'x')}, {})
+        with self.assertRaises(ValueError):
+            self.destination.apply({'/tmp/escape.txt': delta(None, b'x')}, {})
+
+# Made with Bob
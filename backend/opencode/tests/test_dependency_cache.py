@@ -0,0 +1,95 @@
+"""
+Dependency Cache Tests
+Restoring cached dependency trees, pinning entries while they are cloned and
+falling back to a copy when a copy-on-write clone fails
+"""
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from opencode.dependency_cache import DependencyCache
+from opencode.fsutil import clone_tree
+
+
+class DependencyCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.scratch = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.scratch, True)
+        self.cache = DependencyCache(str(self.scratch / 'cache'), max_bytes=10 ** 6)
+
+    def _workspace(self, name: str, lock: str = '{"lockfileVersion": 3}', installed: bool = True) -> Path:
+        workspace = self.scratch / name
+        workspace.mkdir()
+        (workspace / 'package-lock.json').write_text(lock)
+        if installed:
+            (workspace / 'node_modules' / 'left-pad').mkdir(parents=True)
+            (workspace / 'node_modules' / 'left-pad' / 'index.js').write_text('module.exports = 1;')
+        return workspace
+
+    def test_stored_dependencies_are_restored(self):
+        self.assertEqual(self.cache.store(str(self._workspace('first'))), ['node_modules'])
+        fresh = self._workspace('second', installed=False)
+
+        self.assertEqual(self.cache.restore(str(fresh)), ['node_modules'])
+
+        self.assertTrue((fresh / 'node_modules' / 'left-pad' / 'index.js').is_file())
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 0))
+
+    def test_entry_is_pinned_while_it_is_cloned(self):
+        self.cache.store(str(self._workspace('first')))
+        self.cache.max_bytes = 0
+        fresh = self._workspace('second', installed=False)
+
+        def clone_while_another_worker_evicts(source, target, mode):
+            # The index is not locked during the clone, and the entry survives eviction
+            with self.cache._locked_index() as index:
+                self.cache._evict(index)
+                self.assertEqual(len(index['entries']), 1)
+            shutil.copytree(source, target)
+
+        with mock.patch('opencode.dependency_cache.clone_tree', clone_while_another_worker_evicts):
+            self.assertEqual(self.cache.restore(str(fresh)), ['node_modules'])
+
+        with self.cache._locked_index() as index:
+            entry = next(iter(index['entries'].values()))
+            self.assertEqual(entry['pins'], {})
+            self.cache._evict(index)
+            self.assertEqual(index['entries'], {})
+
+    def test_failed_clone_counts_as_a_miss(self):
+        self.cache.store(str(self._workspace('first')))
+        fresh = self._workspace('second', installed=False)
+
+        with mock.patch('opencode.dependency_cache.clone_tree', side_effect=OSError('disk full')), \
+                self.assertLogs('opencode.dependency_cache', 'WARNING'):
+            self.assertEqual(self.cache.restore(str(fresh)), [])
+
+        self.assertFalse((fresh / 'node_modules').exists())
+        self.assertEqual(self.cache.get_stats()['misses'], 1)
+
+
+class CloneTreeTests(SimpleTestCase):
+
+    def test_partial_reflink_copy_falls_back_to_a_full_copy(self):
+        scratch = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, scratch, True)
+        (scratch / 'source' / 'pkg').mkdir(parents=True)
+        (scratch / 'source' / 'pkg' / 'a.js').write_text('a')
+        target = scratch / 'target'
+
+        def partial_cp(cmd, **kwargs):
+            (target / 'pkg').mkdir(parents=True)
+            return subprocess.CompletedProcess(cmd, 1, b'', b'cp: No space left on device')
+
+        with mock.patch('opencode.fsutil.subprocess.run', partial_cp):
+            clone_tree(scratch / 'source', target, 'reflink')
+
+        self.assertEqual((target / 'pkg' / 'a.js').read_text(), 'a')
+
+# Made with Bob
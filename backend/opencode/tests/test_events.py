@@ -0,0 +1,27 @@
+"""
+Event Stream Tests
+The snapshot a client receives when it connects to a project's event stream
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from projects.models import Project
+from tasks.models import Task
+from opencode.views import _snapshot
+
+
+class SnapshotTests(TestCase):
+
+    def test_tasks_carry_the_key_live_events_match_on(self):
+        owner = User.objects.create_user('owner')
+        project = Project.objects.create(name='Shop', description='shop', created_by=owner)
+        Task.objects.create(project=project, key='api', title='API', description='api', status='in_progress', progress=40)
+
+        tasks = _snapshot(project)['data']['tasks']
+
+        self.assertEqual(
+            [(task['key'], task['status'], task['progress']) for task in tasks],
+            [('api', 'in_progress', 40)]
+        )
+
+# Made with Bob
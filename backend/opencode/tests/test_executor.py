@@ -0,0 +1,112 @@
+"""
+Executor Commit Tests
+Committing exact change sets with git index plumbing: added, modified, deleted
+and ignored paths, and commits from concurrent tasks
+"""
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from opencode.executor import OpenCodeExecutor
+
+
+class CommitChangesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.workspace = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.workspace, True)
+        self.executor = OpenCodeExecutor(str(self.workspace), pool=mock.Mock(), dependency_cache=mock.Mock())
+
+    def _write(self, path: str, content: str):
+        target = self.workspace / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+
+    def _git(self, *args: str) -> str:
+        return self.executor._git(*args).stdout
+
+    def _tracked(self) -> list:
+        return sorted(self._git('ls-tree', '-r', '--name-only', 'HEAD').split())
+
+    def test_added_modified_and_deleted_paths_are_committed(self):
+        self._write('app.py', 'v1')
+        self._write('old.py', 'gone soon')
+        first = self.executor.commit_changes(['app.py', 'old.py'], 'First task')
+        self.assertTrue(first['success'])
+        self.assertEqual(first['files'], 2)
+
+        self._write('app.py', 'v2')
+        self._write('src/new.py', 'new')
+        (self.workspace / 'old.py').unlink()
+        second = self.executor.commit_changes(['app.py', 'src/new.py'], 'Second task', deleted=['old.py'])
+
+        self.assertTrue(second['success'])
+        self.assertEqual(second['files'], 3)
+        self.assertEqual(self._tracked(), ['app.py', 'src/new.py'])
+        self.assertEqual(self._git('show', 'HEAD:app.py'), 'v2')
+        self.assertEqual(self._git('rev-parse', 'HEAD^').strip(), first['commit'])
+        self.assertEqual(self._git('log', '-1', '--format=%s').strip(), 'Second task')
+
+    def test_only_the_change_set_is_staged(self):
+        self._write('app.py', 'v1')
+        self._write('scratch.txt', 'not part of the task')
+
+        self.executor.commit_changes(['app.py'], 'Task')
+
+        self.assertEqual(self._tracked(), ['app.py'])
+
+    def test_ignored_paths_are_left_out(self):
+        self._write('.gitignore', '*.log\nbuild/\n')
+        self._write('app.py', 'v1')
+        self._write('debug.log', 'noise')
+        self._write('build/out.js', 'bundle')
+
+        result = self.executor.commit_changes(['.gitignore', 'app.py', 'debug.log', 'build/out.js'], 'Task')
+
+        self.assertEqual(result['files'], 2)
+        self.assertEqual(self._tracked(), ['.gitignore', 'app.py'])
+
+    def test_ignored_only_or_unchanged_change_set_makes_no_commit(self):
+        self._write('.gitignore', '*.log\n')
+        self._write('debug.log', 'noise')
+        self.executor.commit_changes(['.gitignore'], 'Ignore logs')
+        head = self._git('rev-parse', 'HEAD')
+
+        self.assertEqual(self.executor.commit_changes(['debug.log'], 'Logs')['files'], 0)
+        self.assertEqual(self.executor.commit_changes(['.gitignore'], 'Again')['files'], 0)
+        self.assertEqual(self._git('rev-parse', 'HEAD'), head)
+
+    def test_concurrent_commits_are_serialised(self):
+        self._write('base.py', 'base')
+        self.executor.commit_changes(['base.py'], 'Base')
+        self._write('backend.py', 'api')
+        self._write('frontend.js', 'ui')
+        committed = []
+        self.executor.on_commit = lambda sha, message: committed.append(message)
+        results = {}
+        start = threading.Barrier(2)
+
+        def commit(path: str):
+            start.wait()
+            results[path] = self.executor.commit_changes([path], f'Add {path}')
+
+        threads = [threading.Thread(target=commit, args=(path,)) for path in ('backend.py', 'frontend.js')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(result['success'] for result in results.values()))
+        self.assertEqual(self._tracked(), ['backend.py', 'base.py', 'frontend.js'])
+        # Linear history in on_commit order: neither commit lost the other's file
+        history = self._git('log', '--format=%s').split('\n')[:2]
+        self.assertEqual(history, list(reversed(committed)))
+        self.assertEqual(self._git('rev-list', '--count', 'HEAD').strip(), '3')
+        subprocess.run(['git', 'fsck', '--no-progress'], cwd=self.workspace, check=True, capture_output=True)
+
+# Made with Bob
@@ -0,0 +1,222 @@
+"""
+Hedged Execution Tests
+Which attempt wins, cancellation of the loser, isolated hedge workspaces and
+the duration history hedging is triggered from
+"""
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from projects.models import Project
+from opencode.hedging import IsolatedWorkspace, hedge_threshold, run_hedged
+from opencode.models import TaskExecution
+from opencode.orchestrator import ProjectOrchestrator
+
+
+class _Attempt:
+    """Attempt that succeeds (or fails) after a delay unless it is cancelled first"""
+
+    def __init__(self, seconds: float, success: bool = True):
+        self.seconds = seconds
+        self.success = success
+        self.started = threading.Event()
+        self.cancelled = False
+        self.exited = False
+
+    def __call__(self, cancel: threading.Event):
+        self.started.set()
+        try:
+            if cancel.wait(self.seconds):
+                self.cancelled = True
+                return {'success': False, 'error': 'cancelled'}
+            return {'success': self.success, 'attempt': id(self)}
+        finally:
+            self.exited = True
+
+
+@mock.patch('opencode.hedging.POLL_SECONDS', 0.02)
+class RunHedgedTests(SimpleTestCase):
+
+    def test_fast_primary_is_never_hedged(self):
+        primary = _Attempt(0.01)
+        start_hedge = mock.Mock()
+
+        result, info = run_hedged(primary, start_hedge, hedge_after=1.0)
+
+        self.assertEqual(result['attempt'], id(primary))
+        self.assertEqual((info['hedged'], info['winner']), (False, 'primary'))
+        start_hedge.assert_not_called()
+
+    def test_hedge_wins_and_the_primary_is_cancelled(self):
+        primary, hedge = _Attempt(10), _Attempt(0.01)
+
+        result, info = run_hedged(primary, lambda: hedge, hedge_after=0.05)
+
+        self.assertEqual(result['attempt'], id(hedge))
+        self.assertEqual((info['hedged'], info['winner']), (True, 'hedge'))
+        self.assertTrue(primary.cancelled)
+        self.assertTrue(primary.exited, 'run_hedged returned while the loser was still running')
+
+    def test_primary_wins_and_the_hedge_is_cancelled(self):
+        primary, hedge = _Attempt(0.2), _Attempt(10)
+
+        result, info = run_hedged(primary, lambda: hedge, hedge_after=0.05)
+
+        self.assertEqual(result['attempt'], id(primary))
+        self.assertEqual((info['hedged'], info['winner']), (True, 'primary'))
+        self.assertTrue(hedge.started.is_set())
+        self.assertTrue(hedge.cancelled)
+        self.assertTrue(hedge.exited)
+
+    def test_failed_attempt_does_not_win(self):
+        primary, hedge = _Attempt(0.2, success=False), _Attempt(0.4)
+
+        result, info = run_hedged(primary, lambda: hedge, hedge_after=0.05)
+
+        self.assertEqual(info['winner'], 'hedge')
+        self.assertTrue(result['success'])
+
+    def test_primary_result_is_returned_when_both_fail(self):
+        primary, hedge = _Attempt(0.1, success=False), _Attempt(0.05, success=False)
+
+        result, info = run_hedged(primary, lambda: hedge, hedge_after=0.05)
+
+        self.assertEqual(result['attempt'], id(primary))
+        self.assertEqual((info['hedged'], info['winner']), (True, 'primary'))
+
+    def test_declined_hedge_is_asked_again(self):
+        primary, hedge = _Attempt(10), _Attempt(0.01)
+        offers = iter([None, None, hedge])
+
+        result, info = run_hedged(primary, lambda: next(offers), hedge_after=0.05)
+
+        self.assertEqual(info['winner'], 'hedge')
+        self.assertTrue(primary.cancelled)
+
+    def test_run_cancel_stops_both_attempts(self):
+        primary, hedge = _Attempt(10), _Attempt(10)
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+
+        started = time.monotonic()
+        result, info = run_hedged(primary, lambda: hedge, hedge_after=0.05, cancel_event=cancel)
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(result['success'])
+        self.assertTrue(primary.cancelled and hedge.cancelled)
+
+    def test_no_hedge_starts_after_the_run_is_cancelled(self):
+        primary = _Attempt(10)
+        start_hedge = mock.Mock()
+        cancel = threading.Event()
+        cancel.set()
+
+        result, info = run_hedged(primary, start_hedge, hedge_after=0.05, cancel_event=cancel)
+
+        self.assertFalse(info['hedged'])
+        start_hedge.assert_not_called()
+
+    def test_raising_attempt_counts_as_failed(self):
+        def primary(cancel):
+            raise RuntimeError('boom')
+
+        result, info = run_hedged(primary, mock.Mock(), hedge_after=10)
+
+        self.assertEqual(result, {'success': False, 'error': 'Unexpected error: boom'})
+
+
+class IsolatedWorkspaceTests(SimpleTestCase):
+
+    def setUp(self):
+        self.project_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.project_dir, True)
+        (self.project_dir / 'src').mkdir()
+        (self.project_dir / 'src' / 'app.py').write_text('v1')
+        (self.project_dir / 'old.py').write_text('old')
+
+    def test_clone_is_isolated_and_synced_back(self):
+        workspace = IsolatedWorkspace(str(self.project_dir), ['src/app.py', 'old.py', 'missing.py'])
+        self.addCleanup(workspace.cleanup)
+
+        (workspace.path / 'src' / 'app.py').write_text('v2')
+        (workspace.path / 'new.py').write_text('new')
+        (workspace.path / 'old.py').unlink()
+        self.assertEqual((self.project_dir / 'src' / 'app.py').read_text(), 'v1')
+
+        workspace.sync_back(['src/app.py', 'new.py', 'old.py'])
+
+        self.assertEqual((self.project_dir / 'src' / 'app.py').read_text(), 'v2')
+        self.assertEqual((self.project_dir / 'new.py').read_text(), 'new')
+        self.assertFalse((self.project_dir / 'old.py').exists())
+
+    def test_cleanup_removes_the_clone(self):
+        workspace = IsolatedWorkspace(str(self.project_dir), ['src/app.py'])
+
+        workspace.cleanup()
+
+        self.assertFalse(workspace.path.exists())
+        self.assertTrue((self.project_dir / 'src' / 'app.py').exists())
+
+
+@mock.patch('opencode.hedging.MIN_SAMPLES', 3)
+@mock.patch('opencode.hedging.MIN_HEDGE_SECONDS', 1)
+class HedgeThresholdTests(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Shop', description='shop', created_by=owner)
+        # Just enough of an orchestrator to record executions
+        self.orchestrator = SimpleNamespace(
+            project=self.project, _db_lock=nullcontext(), _task_role=lambda task: 'backend_developer'
+        )
+
+    def _execution(self, seconds: float, kind: str = 'task', success: bool = True, task_key: str = 'api'):
+        TaskExecution.objects.create(
+            project=self.project, task_key=task_key, role='backend_developer',
+            duration_seconds=seconds, success=success, kind=kind
+        )
+
+    def _record(self, task_key: str, success: bool, fixup: bool = False) -> str:
+        ProjectOrchestrator._record_execution(
+            self.orchestrator, {'id': task_key}, {'success': success}, 10.0, fixup
+        )
+        return TaskExecution.objects.filter(task_key=task_key).first().kind
+
+    def test_too_little_history_does_not_hedge(self):
+        self._execution(10)
+        self._execution(20)
+
+        self.assertIsNone(hedge_threshold('backend_developer'))
+
+    def test_threshold_is_a_percentile_of_successful_first_attempts(self):
+        for seconds in (10, 20, 30, 40):
+            self._execution(seconds)
+        self._execution(500, success=False)
+
+        self.assertEqual(hedge_threshold('backend_developer'), 40)
+
+    def test_retries_and_fixups_do_not_skew_the_threshold(self):
+        for seconds in (10, 20, 30, 40):
+            self._execution(seconds)
+        for _ in range(10):
+            self._execution(2, kind='fixup')
+            self._execution(400, kind='retry')
+
+        self.assertEqual(hedge_threshold('backend_developer'), 40)
+
+    def test_executions_are_tagged_by_kind(self):
+        self.assertEqual(self._record('api', success=False), 'task')
+        self.assertEqual(self._record('api', success=False, fixup=True), 'fixup')
+        self.assertEqual(self._record('api', success=True), 'retry')
+        self.assertEqual(self._record('api', success=True), 'task')
+        self.assertEqual(self._record('ui', success=True), 'task')
+
+# Made with Bob
@@ -0,0 +1,257 @@
+"""
+Background Job Tests
+Per-project deduplication, cancellation and recovery of jobs whose worker died
+"""
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from planning.models import PlanningDocument
+from projects.models import Project, ProjectRequirement
+from opencode import jobs
+from opencode.jobs import STALE_AFTER_SECONDS, cancel_job, enqueue_job, reclaim_stale_jobs, run_job
+from opencode.models import Job
+
+
+class JobTestCase(TestCase):
+
+    def setUp(self):
+        owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Shop', description='shop', created_by=owner)
+        self.other_project = Project.objects.create(name='Blog', description='blog', created_by=owner)
+        patcher = mock.patch('opencode.tasks.run_job_task.delay', return_value=mock.Mock(id='celery-1'))
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enqueue(self, project=None, kind='development'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return enqueue_job(project or self.project, kind)
+
+    def _running_job(self, heartbeat_age: float, **fields) -> Job:
+        started = timezone.now() - timedelta(seconds=STALE_AFTER_SECONDS * 10)
+        return Job.objects.create(
+            project=self.project, kind='development', status='running', started_at=started,
+            heartbeat_at=timezone.now() - timedelta(seconds=heartbeat_age), **fields
+        )
+
+
+class EnqueueJobTests(JobTestCase):
+
+    def test_active_job_is_returned_instead_of_a_duplicate(self):
+        job, created = self._enqueue()
+        again, created_again = self._enqueue()
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+        self.delay.assert_called_once_with(job.id)
+        self.assertEqual(Job.objects.get(pk=job.pk).celery_task_id, 'celery-1')
+
+    def test_running_job_is_also_deduplicated(self):
+        job, _ = self._enqueue()
+        Job.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now(), heartbeat_at=timezone.now())
+
+        again, created = self._enqueue()
+
+        self.assertEqual((again.pk, created), (job.pk, False))
+
+    def test_jobs_are_deduplicated_per_project_and_kind(self):
+        development, _ = self._enqueue()
+        planning, planning_created = self._enqueue(kind='planning')
+        other, other_created = self._enqueue(project=self.other_project)
+
+        self.assertTrue(planning_created and other_created)
+        self.assertEqual(len({development.pk, planning.pk, other.pk}), 3)
+
+    def test_finished_job_does_not_block_a_new_one(self):
+        job, _ = self._enqueue()
+        Job.objects.filter(pk=job.pk).update(status='succeeded', finished_at=timezone.now())
+
+        again, created = self._enqueue()
+
+        self.assertTrue(created)
+        self.assertNotEqual(again.pk, job.pk)
+
+    def test_database_allows_one_active_job_per_project_and_kind(self):
+        Job.objects.create(project=self.project, kind='development')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(project=self.project, kind='development', status='running')
+
+    def test_unreachable_broker_fails_the_job(self):
+        self.delay.side_effect = ConnectionError('broker down')
+
+        job, _ = self._enqueue()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('broker down', job.error)
+        self.assertTrue(self._enqueue()[1])
+
+
+class StaleJobTests(JobTestCase):
+
+    def test_enqueue_replaces_a_job_whose_worker_died(self):
+        stale = self._running_job(heartbeat_age=STALE_AFTER_SECONDS * 2)
+
+        job, created = self._enqueue()
+
+        self.assertTrue(created)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertIn('no heartbeat', stale.error)
+
+    def test_live_job_is_left_alone(self):
+        live = self._running_job(heartbeat_age=1)
+
+        self.assertEqual(reclaim_stale_jobs(), 0)
+        self.assertEqual(self._enqueue(), (live, False))
+
+    def test_job_without_heartbeat_is_stale_once_it_started_long_ago(self):
+        job = self._running_job(heartbeat_age=0)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=None)
+
+        self.assertEqual(reclaim_stale_jobs(project=self.project), 1)
+
+    def test_cancelling_a_job_whose_worker_died_finishes_it(self):
+        stale = self._running_job(heartbeat_age=STALE_AFTER_SECONDS * 2)
+
+        job = cancel_job(stale)
+
+        self.assertEqual((job.status, job.cancel_requested), ('cancelled', True))
+
+    def test_cancelling_a_live_job_only_requests_it(self):
+        live = self._running_job(heartbeat_age=1)
+
+        job = cancel_job(live)
+
+        self.assertEqual((job.status, job.cancel_requested), ('running', True))
+
+
+class RunJobTests(JobTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.runner = mock.Mock(return_value={'success': True, 'tasks_executed': 3})
+        patcher = mock.patch.dict(jobs.JOB_RUNNERS, {'development': self.runner})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_queued_job_runs_once(self):
+        job, _ = self._enqueue()
+
+        self.assertEqual(run_job(job.id), {'success': True, 'tasks_executed': 3})
+        self.assertIsNone(run_job(job.id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'success': True, 'tasks_executed': 3})
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+        self.runner.assert_called_once()
+
+    def test_failed_and_crashed_runs_fail_the_job(self):
+        self.runner.return_value = {'success': False, 'error': 'no planning document'}
+        job, _ = self._enqueue()
+        run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('failed', 'no planning document'))
+
+        self.runner.side_effect = RuntimeError('boom')
+        job, _ = self._enqueue()
+        with self.assertLogs('opencode.jobs', 'ERROR'):
+            run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('failed', 'boom'))
+
+    def test_redelivered_task_resumes_a_job_whose_worker_died(self):
+        stale = self._running_job(heartbeat_age=STALE_AFTER_SECONDS * 2)
+
+        self.assertEqual(run_job(stale.id)['success'], True)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'succeeded')
+
+    def test_job_running_on_a_live_worker_is_not_run_twice(self):
+        live = self._running_job(heartbeat_age=1)
+
+        self.assertIsNone(run_job(live.id))
+        self.runner.assert_not_called()
+
+    def test_job_stopped_by_a_cancel_is_cancelled(self):
+        self.runner.return_value = {'success': False, 'cancelled': True, 'error': 'Development run was cancelled'}
+        job, _ = self._enqueue()
+
+        run_job(job.id)
+
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'cancelled')
+
+    def test_cancel_arriving_after_the_work_finished_keeps_the_outcome(self):
+        def finish_then_get_cancelled(job, cancel_event):
+            cancel_event.set()
+            return {'success': True}
+        self.runner.side_effect = finish_then_get_cancelled
+        job, _ = self._enqueue()
+
+        run_job(job.id)
+
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'succeeded')
+
+    def test_cancelled_job_is_not_run(self):
+        job, _ = self._enqueue()
+        with mock.patch('config.celery.app.control.revoke') as revoke:
+            cancel_job(Job.objects.get(pk=job.pk))
+        revoke.assert_called_once_with('celery-1')
+
+        self.assertIsNone(run_job(job.id))
+        self.runner.assert_not_called()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'cancelled')
+
+
+class PlanningJobTests(JobTestCase):
+
+    def setUp(self):
+        super().setUp()
+        ProjectRequirement.objects.create(project=self.project, category='scope', question='What?', answer='A shop')
+        self.cancel_event = threading.Event()
+        self.client_mock = mock.Mock()
+        self.client_mock.analyze_requirements.return_value = {'success': True, 'analysis': {}, 'tokens_used': 10}
+        self.client_mock.generate_prd.return_value = {'success': True, 'content': '# Shop', 'tokens_used': 20}
+        patcher = mock.patch('planning.services.get_opencode_client', return_value=self.client_mock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run_planning(self):
+        job, _ = self._enqueue(kind='planning')
+        return jobs._run_planning(job, self.cancel_event)
+
+    def test_cancel_stops_planning_between_llm_calls(self):
+        def analyze_then_get_cancelled(requirements):
+            self.cancel_event.set()
+            return {'success': True, 'analysis': {}, 'tokens_used': 10}
+        self.client_mock.analyze_requirements.side_effect = analyze_then_get_cancelled
+
+        result = self._run_planning()
+
+        self.assertTrue(result['cancelled'])
+        self.client_mock.generate_prd.assert_not_called()
+        self.assertFalse(PlanningDocument.objects.filter(project=self.project).exists())
+
+    def test_cancel_after_the_document_is_saved_is_ignored(self):
+        def create_agents(creator):
+            self.cancel_event.set()
+            return []
+
+        with mock.patch('planning.services.AgentAutoCreator.create_agents', create_agents):
+            result = self._run_planning()
+
+        self.assertTrue(result['success'])
+        self.assertNotIn('cancelled', result)
+        self.assertTrue(PlanningDocument.objects.filter(project=self.project).exists())
+
+# Made with Bob
@@ -0,0 +1,155 @@
+"""
+Commit Publisher Tests
+Coalesced pushes, the bounded upload queue and token handling, pushing to a
+local bare repository
+"""
+import base64
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from cryptography.fernet import Fernet
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+
+from github_integration.models import GitHubAccount, GitHubCommit, GitHubRepository
+from opencode import publisher
+from opencode.executor import OpenCodeExecutor
+from opencode.publisher import CommitPublisher
+from opencode.tests.factories import make_project
+
+TOKEN = 'ghs_test_token'
+
+
+class CommitPublisherTests(TransactionTestCase):
+
+    def setUp(self):
+        self.scratch = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.scratch, True)
+        self.remote = self.scratch / 'remote.git'
+        subprocess.run(['git', 'init', '-q', '--bare', str(self.remote)], check=True)
+
+        patcher = mock.patch.dict(os.environ, {'GITHUB_TOKEN_ENCRYPTION_KEY': Fernet.generate_key().decode()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        project = make_project()
+        account = GitHubAccount(user=User.objects.get(username='owner'), github_id=1, username='octocat')
+        account.set_access_token(TOKEN)
+        account.save()
+        self.repository = GitHubRepository.objects.create(
+            project=project, github_account=account, repo_id=1, name='shop', full_name='octocat/shop',
+            html_url='https://github.com/octocat/shop', clone_url=str(self.remote), default_branch='main',
+        )
+        self.executor = self._executor('workspace')
+
+    def _executor(self, name: str) -> OpenCodeExecutor:
+        return OpenCodeExecutor(str(self.scratch / name), pool=mock.Mock(), dependency_cache=mock.Mock())
+
+    def _commit(self, executor: OpenCodeExecutor, path: str) -> tuple:
+        (executor.project_path / path).write_text(path)
+        result = executor.commit_changes([path], f'Add {path}')
+        return result['commit'], f'Add {path}'
+
+    def _remote_tip(self) -> str:
+        return subprocess.run(
+            ['git', 'rev-parse', 'refs/heads/main'], cwd=self.remote, capture_output=True, text=True
+        ).stdout.strip()
+
+    def test_queued_commits_are_coalesced_into_one_push(self):
+        commits = [self._commit(self.executor, f'{name}.py') for name in ('models', 'api', 'ui')]
+        uploader = CommitPublisher(self.executor, self.repository)
+        for sha, message in commits:
+            uploader.submit(sha, message)
+
+        stats = uploader.start().close()
+
+        self.assertTrue(stats['success'])
+        self.assertEqual((stats['submitted'], stats['pushed'], stats['pushes']), (3, 3, 1))
+        self.assertEqual(self._remote_tip(), commits[-1][0])
+        self.assertEqual(
+            sorted(GitHubCommit.objects.values_list('sha', flat=True)), sorted(sha for sha, _ in commits)
+        )
+
+    def test_full_queue_blocks_submit_until_the_uploader_catches_up(self):
+        commits = [self._commit(self.executor, f'{name}.py') for name in ('models', 'api', 'ui')]
+        with mock.patch.object(publisher, 'UPLOAD_QUEUE_SIZE', 2):
+            uploader = CommitPublisher(self.executor, self.repository)
+        uploader.submit(*commits[0])
+        uploader.submit(*commits[1])
+
+        blocked = threading.Thread(target=uploader.submit, args=commits[2])
+        blocked.start()
+        blocked.join(0.3)
+        self.assertTrue(blocked.is_alive())
+
+        uploader.start()
+        blocked.join(10)
+        self.assertFalse(blocked.is_alive())
+        stats = uploader.close()
+
+        self.assertEqual(stats['pushed'], 3)
+        self.assertEqual(self._remote_tip(), commits[-1][0])
+
+    def test_token_is_sent_as_a_header_and_never_in_argv(self):
+        calls = []
+        run = subprocess.run
+
+        def recording_run(args, **kwargs):
+            calls.append((args, kwargs.get('env')))
+            return run(args, **kwargs)
+
+        uploader = CommitPublisher(self.executor, self.repository)
+        sha, message = self._commit(self.executor, 'app.py')
+        with mock.patch('opencode.publisher.subprocess.run', recording_run):
+            uploader.submit(sha, message)
+            uploader.start().close()
+
+        self.assertEqual(self._remote_tip(), sha)
+        pushes = [(args, env) for args, env in calls if args[1] == 'push']
+        self.assertEqual(len(pushes), 1)
+        args, env = pushes[0]
+        self.assertNotIn(TOKEN, ' '.join(args))
+        self.assertEqual(env['GIT_CONFIG_KEY_0'], 'http.extraHeader')
+        scheme, credentials = env['GIT_CONFIG_VALUE_0'].split(': ', 1)[1].split(' ')
+        self.assertEqual((scheme, base64.b64decode(credentials).decode()), ('Basic', f'x-access-token:{TOKEN}'))
+
+    def test_new_workspace_continues_the_remote_branch(self):
+        first = CommitPublisher(self.executor, self.repository).start()
+        first.submit(*self._commit(self.executor, 'models.py'))
+        first.close()
+
+        rerun = self._executor('rerun')
+        second = CommitPublisher(rerun, self.repository).start()
+        sha, message = self._commit(rerun, 'api.py')
+        second.submit(sha, message)
+        stats = second.close()
+
+        self.assertTrue(stats['success'])
+        self.assertEqual(self._remote_tip(), sha)
+        tree = subprocess.run(['git', 'ls-tree', '--name-only', sha], cwd=self.remote,
+                              capture_output=True, text=True).stdout.split()
+        self.assertEqual(tree, ['api.py', 'models.py'])
+
+    def test_diverged_remote_is_never_forced(self):
+        other = self._executor('other')
+        pushed = CommitPublisher(other, self.repository).start()
+        remote_sha, message = self._commit(other, 'theirs.py')
+        pushed.submit(remote_sha, message)
+        pushed.close()
+        self._commit(self.executor, 'ours.py')
+
+        uploader = CommitPublisher(self.executor, self.repository).start()
+        uploader.submit(*self._commit(self.executor, 'more.py'))
+        uploader.submit(*self._commit(self.executor, 'most.py'))
+        stats = uploader.close()
+
+        self.assertFalse(stats['success'])
+        self.assertIn('rejected', stats['errors'][0])
+        self.assertEqual(self._remote_tip(), remote_sha)
+
+# Made with Bob
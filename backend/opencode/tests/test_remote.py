@@ -0,0 +1,91 @@
+"""
+Remote Agent Tests
+Running a task on a loopback agent, and cancelling it there
+"""
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from opencode.executor import OpenCodeExecutor
+from opencode.remote import AgentRegistry, AgentServer, RemoteAgent
+
+AUTHKEY = b'secret'
+
+
+class _FakeExecutor(OpenCodeExecutor):
+    """Writes a file, then works for work_seconds unless it is cancelled first"""
+
+    work_seconds = 0.05
+    started = None
+
+    def __init__(self, project_path: str, pool=None):
+        super().__init__(project_path, pool=pool, dependency_cache=mock.Mock())
+
+    def execute_task(self, prompt, agent_role='build', timeout=300, on_progress=None,
+                     cancel_event=None, model=None, on_usage=None):
+        (self.project_path / 'partial.py').write_text(prompt)
+        on_progress(10)
+        self.started.set()
+        if cancel_event.wait(self.work_seconds):
+            return {'success': False, 'cancelled': True, 'error': 'OpenCode execution was cancelled'}
+        return {'success': True}
+
+
+class RemoteExecutionTests(SimpleTestCase):
+
+    def setUp(self):
+        scratch = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, scratch, True)
+        self.project_dir = scratch / 'project'
+        self.project_dir.mkdir()
+        (self.project_dir / 'app.py').write_text('app')
+
+        patcher = mock.patch('opencode.remote.OpenCodeExecutor', _FakeExecutor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _FakeExecutor.started = threading.Event()
+
+        self.server = AgentServer(('127.0.0.1', 0), AUTHKEY, str(scratch / 'agent'), pool=mock.Mock())
+        self.server.start()
+        self.addCleanup(self.server.close)
+        self.agent = RemoteAgent(self.server.address, AUTHKEY)
+
+    def test_task_runs_on_the_agent_and_its_changes_are_pulled_back(self):
+        progress = []
+
+        result = AgentRegistry([self.agent]).execute_task(
+            str(self.project_dir), 'shop', 'print(1)', on_progress=progress.append, cancel_event=threading.Event()
+        )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(progress, [10])
+        self.assertEqual(result['changes'], {'changed': ['partial.py'], 'deleted': []})
+        self.assertEqual((self.project_dir / 'partial.py').read_text(), 'print(1)')
+
+    @mock.patch.object(_FakeExecutor, 'work_seconds', 30)
+    def test_cancel_stops_the_task_on_the_agent(self):
+        cancel = threading.Event()
+        threading.Thread(target=lambda: _FakeExecutor.started.wait(10) and cancel.set(), daemon=True).start()
+
+        started = time.monotonic()
+        result = self.agent.execute_task(str(self.project_dir), 'shop', 'print(1)', cancel_event=cancel)
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertTrue(result['cancelled'])
+        # Changes made before the cancel are still pulled back
+        self.assertEqual((self.project_dir / 'partial.py').read_text(), 'print(1)')
+
+    def test_cancel_arriving_after_the_task_finished_is_ignored(self):
+        with self.agent.session() as session:
+            session.call('fork', workspace='shop.task-1', base='shop')
+            self.assertTrue(session.call('execute', workspace='shop.task-1', prompt='x')['success'])
+            session.conn.send({'method': 'cancel'})
+
+            self.assertEqual(session.call('status')['running'], 0)
+
+# Made with Bob
@@ -0,0 +1,75 @@
+"""
+Sandbox Tests
+Resource limits applied to sandboxed commands
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from opencode.sandbox import SandboxLimits, SandboxPool
+
+PRINT_LIMITS = (
+    'import json, resource; print(json.dumps({name: resource.getrlimit(getattr(resource, name))[0] '
+    'for name in ("RLIMIT_DATA", "RLIMIT_AS", "RLIMIT_NOFILE")}))'
+)
+
+
+@unittest.skipUnless(os.name == 'posix', 'rlimits are POSIX only')
+class SandboxLimitTests(SimpleTestCase):
+
+    def _limits_in_child(self, limits: SandboxLimits):
+        result = SandboxPool(max_processes=1, limits=limits).run([sys.executable, '-c', PRINT_LIMITS])
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def test_memory_is_limited_without_capping_address_space(self):
+        limits = self._limits_in_child(SandboxLimits(memory_mb=512, max_open_files=256))
+
+        self.assertEqual(limits['RLIMIT_DATA'], 512 * 1024 * 1024)
+        self.assertEqual(limits['RLIMIT_AS'], -1)
+        self.assertEqual(limits['RLIMIT_NOFILE'], 256)
+
+    def test_address_space_cap_is_opt_in(self):
+        limits = self._limits_in_child(SandboxLimits(memory_mb=0, address_space_mb=4096))
+
+        self.assertEqual(limits['RLIMIT_AS'], 4096 * 1024 * 1024)
+        self.assertEqual(limits['RLIMIT_DATA'], -1)
+
+    def test_allocations_over_the_memory_limit_fail(self):
+        pool = SandboxPool(max_processes=1, limits=SandboxLimits(memory_mb=256))
+
+        result = pool.run([sys.executable, '-c', 'bytearray(512 * 1024 * 1024)'])
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('MemoryError', result.stderr)
+
+    def test_limits_are_applied_without_a_preexec_fn(self):
+        with mock.patch('opencode.sandbox.subprocess.Popen', wraps=subprocess.Popen) as popen:
+            limits = self._limits_in_child(SandboxLimits(memory_mb=512, max_open_files=256))
+
+        self.assertNotIn('preexec_fn', popen.call_args.kwargs)
+        self.assertEqual(limits['RLIMIT_NOFILE'], 256)
+
+    def test_timeouts_are_counted(self):
+        pool = SandboxPool(max_processes=1)
+
+        with self.assertRaises(subprocess.TimeoutExpired):
+            pool.run([sys.executable, '-c', 'import time; time.sleep(10)'], timeout=0.5)
+
+        self.assertEqual(pool.get_status()['timeouts'], 1)
+
+    @unittest.skipUnless(shutil.which('node'), 'node is not installed')
+    def test_node_starts_under_the_memory_limit(self):
+        pool = SandboxPool(max_processes=1, limits=SandboxLimits(memory_mb=512))
+
+        result = pool.run(['node', '-e', 'console.log("ok")'])
+
+        self.assertEqual((result.returncode, result.stdout.strip()), (0, 'ok'), result.stderr)
+
+# Made with Bob
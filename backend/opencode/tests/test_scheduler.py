@@ -0,0 +1,183 @@
+"""
+Fair Scheduler Tests
+Grant order between tenants, priority lanes and concurrency caps
+"""
+import queue
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from opencode.scheduler import FairScheduler
+
+
+class FairSchedulerOrderTests(SimpleTestCase):
+    """One slot, held by the test, handed to queued requests one at a time"""
+
+    def setUp(self):
+        self.scheduler = FairScheduler(slots=1)
+        self.granted: queue.Queue = queue.Queue()
+        self.assertTrue(self.scheduler.acquire('holder', 'holder-project'))
+        self.holding = ('holder', 'holder-project')
+
+    def _enqueue(self, user, project, **kwargs):
+        """Queue a request from a waiting thread and return once it is queued"""
+        queued = self.scheduler.stats['queued']
+
+        def wait():
+            if self.scheduler.acquire(user, project, timeout=10, **kwargs):
+                self.granted.put((user, project))
+
+        threading.Thread(target=wait, daemon=True).start()
+        deadline = time.monotonic() + 5
+        while self.scheduler.stats['queued'] == queued:
+            self.assertLess(time.monotonic(), deadline, 'request was never queued')
+            time.sleep(0.005)
+
+    def _drain(self, count):
+        """Release the held slot count times and return who got it each time"""
+        order = []
+        for _ in range(count):
+            self.scheduler.release(*self.holding)
+            self.holding = self.granted.get(timeout=5)
+            order.append(self.holding)
+        return order
+
+    def test_equal_weights_alternate_between_users(self):
+        for _ in range(3):
+            self._enqueue('alice', 'a1')
+        for _ in range(3):
+            self._enqueue('bob', 'b1')
+
+        users = [user for user, _ in self._drain(6)]
+
+        self.assertEqual(users, ['alice', 'bob'] * 3)
+
+    def test_slots_follow_user_weights(self):
+        self.scheduler.set_user_weight('alice', 2)
+        for _ in range(6):
+            self._enqueue('alice', 'a1')
+        for _ in range(6):
+            self._enqueue('bob', 'b1')
+
+        users = [user for user, _ in self._drain(6)]
+
+        self.assertEqual(users.count('alice'), 4)
+        self.assertEqual(users.count('bob'), 2)
+
+    def test_projects_share_their_users_slots(self):
+        for _ in range(2):
+            self._enqueue('alice', 'a1')
+        for _ in range(2):
+            self._enqueue('alice', 'a2')
+        self._enqueue('bob', 'b1')
+
+        order = self._drain(5)
+
+        self.assertEqual(order[:2], [('alice', 'a1'), ('bob', 'b1')])
+        self.assertEqual([p for _, p in order if p != 'b1'], ['a1', 'a2', 'a1', 'a2'])
+
+    def test_idle_user_does_not_bank_credit(self):
+        # Alice ran alone for a while; Bob arriving later must not get a burst of slots
+        self.scheduler.release(*self.holding)
+        for _ in range(5):
+            self.assertTrue(self.scheduler.acquire('alice', 'a1'))
+            self.scheduler.release('alice', 'a1')
+        self.assertTrue(self.scheduler.acquire('alice', 'a1'))
+        self.holding = ('alice', 'a1')
+        for _ in range(2):
+            self._enqueue('alice', 'a1')
+        for _ in range(2):
+            self._enqueue('bob', 'b1')
+
+        users = [user for user, _ in self._drain(4)]
+
+        self.assertEqual(users, ['alice', 'bob', 'alice', 'bob'])
+
+    def test_interactive_lane_goes_before_bulk(self):
+        self._enqueue('alice', 'a1', lane='bulk')
+        self._enqueue('bob', 'b1', lane='bulk')
+        self._enqueue('carol', 'c1', lane='interactive')
+
+        users = [user for user, _ in self._drain(3)]
+
+        self.assertEqual(users[0], 'carol')
+
+    def test_unknown_lane_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.acquire('alice', 'a1', lane='urgent')
+
+
+class FairSchedulerCapTests(SimpleTestCase):
+
+    def test_user_cap_leaves_slots_to_other_users(self):
+        scheduler = FairScheduler(slots=3, user_cap=1)
+        self.assertTrue(scheduler.acquire('alice', 'a1'))
+
+        self.assertFalse(scheduler.try_acquire('alice', 'a2'))
+        self.assertFalse(scheduler.acquire('alice', 'a2', timeout=0.1))
+        self.assertTrue(scheduler.try_acquire('bob', 'b1'))
+
+        status = scheduler.get_status()
+        self.assertEqual(status['running'], 2)
+        self.assertEqual(status['running_per_user'], {'alice': 1, 'bob': 1})
+        self.assertEqual(status['timeouts'], 1)
+        self.assertEqual(status['waiting'], {'interactive': 0, 'bulk': 0})
+
+    def test_project_cap_applies_within_a_user(self):
+        scheduler = FairScheduler(slots=3, project_cap=1)
+        self.assertTrue(scheduler.acquire('alice', 'a1'))
+
+        self.assertFalse(scheduler.try_acquire('alice', 'a1'))
+        self.assertTrue(scheduler.try_acquire('alice', 'a2'))
+
+    def test_capped_request_is_granted_once_the_user_releases(self):
+        scheduler = FairScheduler(slots=2, user_cap=1)
+        self.assertTrue(scheduler.acquire('alice', 'a1'))
+        granted = threading.Event()
+
+        def wait():
+            if scheduler.acquire('alice', 'a2', timeout=10):
+                granted.set()
+
+        thread = threading.Thread(target=wait, daemon=True)
+        thread.start()
+        self.assertFalse(granted.wait(0.2))
+
+        scheduler.release('alice', 'a1')
+
+        self.assertTrue(granted.wait(5))
+        self.assertEqual(scheduler.get_status()['running_per_project'], {'a2': 1})
+
+    def test_try_acquire_never_jumps_the_queue(self):
+        scheduler = FairScheduler(slots=1)
+        self.assertTrue(scheduler.acquire('alice', 'a1'))
+        waiter = threading.Thread(target=scheduler.acquire, args=('bob', 'b1'), kwargs={'timeout': 10}, daemon=True)
+        waiter.start()
+        deadline = time.monotonic() + 5
+        while not scheduler.get_status()['waiting']['interactive']:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+        scheduler.release('alice', 'a1')
+        waiter.join(5)
+
+        # Bob took the freed slot; with it busy a speculative request gets nothing
+        self.assertEqual(scheduler.get_status()['running_per_user'], {'bob': 1})
+        self.assertFalse(scheduler.try_acquire('carol', 'c1'))
+
+    def test_cancel_event_abandons_the_wait(self):
+        scheduler = FairScheduler(slots=1)
+        self.assertTrue(scheduler.acquire('alice', 'a1'))
+        cancel = threading.Event()
+        cancel.set()
+
+        self.assertFalse(scheduler.acquire('bob', 'b1', cancel_event=cancel))
+
+        status = scheduler.get_status()
+        self.assertEqual(status['cancelled'], 1)
+        self.assertEqual(status['waiting']['interactive'], 0)
+        scheduler.release('alice', 'a1')
+        self.assertTrue(scheduler.try_acquire('bob', 'b1'))
+
+# Made with Bob
@@ -0,0 +1,157 @@
+"""
+Test Runner Tests
+Per-test cache keys from imports, and cached results skipping unchanged tests
+"""
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from opencode.test_runner import TestRunner
+
+
+class _FakePool:
+    """Sandbox pool stand-in: every shard passes and its test files are recorded"""
+
+    max_processes = 2
+
+    def __init__(self):
+        self.ran = []
+
+    def run(self, cmd, cwd=None, timeout=None):
+        self.ran += [arg for arg in cmd if arg.endswith(('.py', '.js'))]
+        return subprocess.CompletedProcess(cmd, 0, '', '')
+
+
+class RunnerTestCase(SimpleTestCase):
+
+    files = {}
+
+    def setUp(self):
+        self.project = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.project, True)
+        for relative_path, content in self.files.items():
+            self._write(relative_path, content)
+        self.pool = _FakePool()
+
+    def _write(self, relative_path: str, content: str):
+        path = self.project / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def _runner(self) -> TestRunner:
+        return TestRunner(str(self.project), shards=2, pool=self.pool)
+
+    def _keys(self, language: str):
+        runner = self._runner()
+        suite = next(s for s in runner.discover() if s['language'] == language)
+        return runner.cache_keys(suite)
+
+    def _changed_keys(self, language: str, relative_path: str, content: str):
+        before = self._keys(language)
+        self._write(relative_path, content)
+        after = self._keys(language)
+        return sorted(test for test in before if before[test] != after[test])
+
+
+class PythonCacheKeyTests(RunnerTestCase):
+
+    files = {
+        'app/__init__.py': '',
+        'app/models.py': 'class Item:\n    pass\n',
+        'app/views.py': 'from .models import Item\n',
+        'app/utils.py': 'def slug(text):\n    return text\n',
+        'tests/conftest.py': '',
+        'tests/test_models.py': 'from app.models import Item\n',
+        'tests/test_views.py': 'import app.views\n',
+        'tests/test_utils.py': 'from app import utils\n',
+        'pyproject.toml': '[project]\n',
+    }
+
+    def test_source_change_only_invalidates_tests_importing_it(self):
+        self.assertEqual(
+            self._changed_keys('python', 'app/utils.py', 'def slug(text):\n    return text.lower()\n'),
+            ['tests/test_utils.py']
+        )
+
+    def test_transitive_imports_are_followed(self):
+        self.assertEqual(
+            self._changed_keys('python', 'app/models.py', 'class Item:\n    price = 0\n'),
+            ['tests/test_models.py', 'tests/test_views.py']
+        )
+
+    def test_package_init_conftest_and_config_invalidate_their_tests(self):
+        every_test = ['tests/test_models.py', 'tests/test_utils.py', 'tests/test_views.py']
+        self.assertEqual(self._changed_keys('python', 'app/__init__.py', 'VERSION = 2\n'), every_test)
+        self.assertEqual(self._changed_keys('python', 'tests/conftest.py', 'import pytest\n'), every_test)
+        self.assertEqual(self._changed_keys('python', 'pyproject.toml', '[project]\nname = "x"\n'), every_test)
+
+    def test_new_unimported_module_invalidates_nothing(self):
+        self.assertEqual(self._changed_keys('python', 'app/admin.py', 'ADMIN = True\n'), [])
+
+    def test_unparsable_module_falls_back_to_the_whole_suite(self):
+        self._write('app/views.py', 'from .models import (\n')
+
+        self.assertEqual(
+            self._changed_keys('python', 'app/utils.py', 'def slug(text):\n    return text.upper()\n'),
+            ['tests/test_utils.py', 'tests/test_views.py']
+        )
+
+
+class JavaScriptCacheKeyTests(RunnerTestCase):
+
+    files = {
+        'package.json': '{"devDependencies": {"jest": "29.0.0"}}',
+        'src/sum.js': 'export const sum = (a, b) => a + b;\n',
+        'src/lib/api.ts': "import { sum } from '../sum';\nexport const api = sum;\n",
+        'src/lib/index.ts': "export * from './api';\n",
+        'src/sum.test.js': "import { sum } from './sum';\n",
+        'src/api.test.ts': "const lib = require('@/lib');\n",
+        'src/other.test.js': "import React from 'react';\n",
+    }
+
+    def test_relative_alias_and_index_imports_are_followed(self):
+        self.assertEqual(
+            self._changed_keys('javascript', 'src/sum.js', 'export const sum = (a, b) => b + a;\n'),
+            ['src/api.test.ts', 'src/sum.test.js']
+        )
+        self.assertEqual(
+            self._changed_keys('javascript', 'src/lib/api.ts', 'export const api = 1;\n'),
+            ['src/api.test.ts']
+        )
+
+    def test_package_json_invalidates_every_test(self):
+        self.assertEqual(
+            self._changed_keys('javascript', 'package.json', '{"devDependencies": {"jest": "29.1.0"}}'),
+            ['src/api.test.ts', 'src/other.test.js', 'src/sum.test.js']
+        )
+
+
+class CachedRunTests(RunnerTestCase):
+
+    files = PythonCacheKeyTests.files
+
+    def test_rerun_only_runs_tests_whose_inputs_changed(self):
+        first = self._runner().run()
+        self.assertEqual(first['status'], 'passed')
+        self.assertEqual(sorted(self.pool.ran), ['tests/test_models.py', 'tests/test_utils.py', 'tests/test_views.py'])
+
+        self.pool.ran.clear()
+        self._write('app/views.py', 'from .models import Item\n\nVIEWS = []\n')
+        second = self._runner().run()
+
+        self.assertEqual(self.pool.ran, ['tests/test_views.py'])
+        self.assertEqual(sorted(second['suites'][0]['cached_files']), ['tests/test_models.py', 'tests/test_utils.py'])
+
+    def test_unchanged_project_runs_nothing(self):
+        self._runner().run()
+        self.pool.ran.clear()
+
+        result = self._runner().run()
+
+        self.assertEqual(self.pool.ran, [])
+        self.assertEqual(result['status'], 'passed')
+
+# Made with Bob
@@ -0,0 +1,81 @@
+"""
+Run Tracing Tests
+Critical path of runs whose task spans ran in parallel
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+
+from opencode.models import Run, RunSpan
+from opencode.tracing import critical_path, timing_breakdown
+from opencode.tests.factories import make_project
+
+
+class CriticalPathTests(TestCase):
+
+    def setUp(self):
+        self.started = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.run = Run.objects.create(
+            project=make_project(), kind='development', status='succeeded',
+            started_at=self.started, duration_seconds=10.0,
+        )
+
+    def _span(self, name: str, kind: str, start: float, end: float, task_key: str = '',
+              dependencies=None, parent: RunSpan = None) -> RunSpan:
+        attributes = {'dependencies': dependencies} if dependencies is not None else {}
+        return RunSpan.objects.create(
+            run=self.run, parent=parent, name=name, kind=kind, task_key=task_key,
+            started_at=self.started + timedelta(seconds=start),
+            finished_at=self.started + timedelta(seconds=end),
+            offset_seconds=start, duration_seconds=end - start, attributes=attributes,
+        )
+
+    def _parallel_tasks(self, ui_end: float, api_end: float):
+        """
+        setup -> models -> api --+
+              -> ui -------------+-> checkout
+        """
+        self._span('Planning', 'step', 0.0, 1.0)
+        self._span('Models', 'task', 1.0, 3.0, 'models', dependencies=[])
+        ui = self._span('UI', 'task', 1.0, ui_end, 'ui', dependencies=[])
+        self._span('Build UI', 'execute', 1.2, ui_end - 0.2, 'ui', parent=ui)
+        self._span('API', 'task', 3.0, api_end, 'api', dependencies=['models'])
+        start = max(ui_end, api_end) + 0.5
+        self._span('Checkout', 'task', start, start + 2.0, 'checkout', dependencies=['api', 'ui'])
+
+    def _steps(self, path):
+        return [step['task_key'] or step['name'] for step in path['path']]
+
+    def test_path_follows_the_dependency_that_finished_last(self):
+        self._parallel_tasks(ui_end=6.0, api_end=5.0)
+
+        path = critical_path(self.run)
+
+        self.assertEqual(self._steps(path), ['Planning', 'ui', 'checkout'])
+        self.assertEqual(path['path_seconds'], 8.0)
+        self.assertEqual(path['wait_seconds'], 0.5)
+        self.assertEqual(path['path'][1]['breakdown'], {'execute': 4.6})
+
+    def test_slower_parallel_chain_becomes_the_path(self):
+        self._parallel_tasks(ui_end=4.0, api_end=7.0)
+
+        path = critical_path(self.run)
+
+        self.assertEqual(self._steps(path), ['Planning', 'models', 'api', 'checkout'])
+        self.assertEqual([step['wait_before_seconds'] for step in path['path']], [0.0, 0.0, 0.0, 0.5])
+
+    def test_step_without_dependencies_is_gated_by_the_last_span_before_it(self):
+        self._parallel_tasks(ui_end=6.0, api_end=5.0)
+        self._span('Push to GitHub', 'commit', 9.0, 10.0)
+
+        breakdown = timing_breakdown(self.run)
+
+        self.assertEqual(breakdown['critical_path'], ['Planning', 'ui', 'checkout', 'Push to GitHub'])
+        self.assertEqual(breakdown['critical_path_seconds'], 9.0)
+
+    def test_run_without_spans_has_an_empty_path(self):
+        path = critical_path(self.run)
+
+        self.assertEqual((path['path'], path['path_seconds']), ([], 0.0))
+
+# Made with Bob
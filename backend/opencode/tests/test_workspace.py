@@ -0,0 +1,104 @@
+"""
+Workspace Manager Tests
+Pins shared across processes, archiving and restoring outside the index lock,
+and quota checks that skip rebuildable dependency trees
+"""
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from opencode.workspace import WorkspaceManager, WorkspaceQuotaExceeded
+
+
+class WorkspaceManagerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.scratch = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.scratch, True)
+        self.project = SimpleNamespace(id=7, name='Shop')
+
+    def _manager(self, **kwargs) -> WorkspaceManager:
+        # Two managers on the same root stand in for two worker processes
+        options = {'quota_bytes': 10 ** 6, 'max_total_bytes': 10 ** 9, 'cold_after_seconds': 3600}
+        options.update(kwargs)
+        return WorkspaceManager(str(self.scratch), **options)
+
+    def _populate(self, path: Path):
+        (path / 'src').mkdir(exist_ok=True)
+        (path / 'src' / 'app.js').write_text('console.log(1);')
+        (path / 'node_modules' / 'left-pad').mkdir(parents=True, exist_ok=True)
+        (path / 'node_modules' / 'left-pad' / 'index.js').write_text('x' * 4096)
+
+    def test_cold_workspace_is_archived_and_restored(self):
+        manager = self._manager()
+        path = manager.acquire(self.project)
+        self._populate(path)
+        manager.release(self.project)
+
+        self.assertEqual(manager.archive_cold(max_idle_seconds=-1), [manager.workspace_name(self.project)])
+        self.assertFalse(path.exists())
+        self.assertEqual(list(self.scratch.glob('.trash-*')), [])
+
+        restored = self._manager().acquire(self.project)
+        self.assertEqual((restored / 'src' / 'app.js').read_text(), 'console.log(1);')
+        self.assertFalse((restored / 'node_modules').exists())
+        self.assertEqual(manager.get_stats()['archived'], 0)
+
+    def test_workspace_pinned_by_another_process_is_not_archived(self):
+        worker = self._manager()
+        housekeeper = self._manager(max_total_bytes=0)
+        self._populate(worker.acquire(self.project))
+        worker.update_usage(self.project)
+
+        self.assertEqual(housekeeper.housekeeping(), {'archived_for_space': [], 'archived_cold': []})
+
+        worker.release(self.project)
+        self.assertEqual(housekeeper.enforce_total_limit(), [worker.workspace_name(self.project)])
+
+    def test_acquire_while_archiving_keeps_the_workspace(self):
+        manager = self._manager()
+        path = manager.acquire(self.project)
+        self._populate(path)
+        manager.release(self.project)
+        write_archive = manager._write_archive
+
+        def acquired_by_another_worker(name):
+            # The index is not locked while the tarball is written
+            self._manager().acquire(self.project)
+            return write_archive(name)
+
+        with mock.patch.object(manager, '_write_archive', acquired_by_another_worker), \
+                self.assertLogs('opencode.workspace', 'INFO'):
+            self.assertEqual(manager.archive_cold(max_idle_seconds=-1), [])
+
+        self.assertTrue((path / 'src' / 'app.js').is_file())
+        self.assertEqual(list(manager.archive_dir.iterdir()), [])
+        with manager._locked_index() as index:
+            self.assertNotIn('archiving', index[manager.workspace_name(self.project)])
+
+    def test_acquire_and_release_do_not_archive(self):
+        manager = self._manager(max_total_bytes=0)
+        self._populate(manager.acquire(self.project))
+
+        with mock.patch.object(manager, '_archive_entries') as archive:
+            manager.release(self.project)
+            manager.acquire(self.project)
+
+        archive.assert_not_called()
+
+    def test_quota_ignores_dependency_trees(self):
+        manager = self._manager(quota_bytes=1024)
+        path = manager.acquire(self.project)
+        self._populate(path)
+
+        self.assertEqual(manager.check_quota(self.project)['bytes'], len('console.log(1);'))
+
+        (path / 'src' / 'bundle.js').write_text('x' * 2048)
+        with self.assertRaises(WorkspaceQuotaExceeded):
+            manager.check_quota(self.project)
+
+# Made with Bob
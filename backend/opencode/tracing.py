@@ -0,0 +1,346 @@
+"""
+Run Tracing
+Records planning and development runs as Run rows with nested, timed RunSpans,
+and finds the critical path and slowest spans of recorded runs
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterator, List, Optional
+
+from django.db import transaction
+
+from projects.models import Project
+from .models import Run, RunSpan
+
+# Spans starting within this many seconds of a predecessor's end count as gated by it
+GATE_TOLERANCE_SECONDS = 0.05
+
+_current_run: contextvars.ContextVar = contextvars.ContextVar('current_run', default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+_current_job: contextvars.ContextVar = contextvars.ContextVar('current_job', default=None)
+
+
+class Span:
+    """An open or finished span; attributes can be added while it runs"""
+
+    def __init__(self, name: str, kind: str, parent: Optional['Span'], task_key: str, attributes: Dict):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.task_key = task_key
+        self.attributes = attributes
+        self.status = 'ok'
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.depth = parent.depth + 1 if parent else 0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: Optional[str] = None):
+        self.status = 'error'
+        if error:
+            self.attributes['error'] = str(error)[:1000]
+
+
+class RunTracer:
+    """
+    Collects the spans of one run
+
+    The Run row is written when the run starts; spans are kept in memory and
+    written in bulk when it finishes, so tracing adds no writes to hot paths.
+    """
+
+    def __init__(self, project: Project, kind: str, db_lock: Optional[threading.Lock] = None):
+        # The orchestrator's write lock, so run writes never collide with its transactions
+        self._db_lock = db_lock or nullcontext()
+        with self._db_lock:
+            self.run = Run.objects.create(
+                project=project, kind=kind, job_id=_current_job.get(),
+                started_at=datetime.now(dt_timezone.utc)
+            )
+        self.status = 'succeeded'
+        self.summary: Dict = {}
+        self._started = time.monotonic()
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def open(self, name: str, kind: str, parent: Optional[Span], task_key: str, attributes: Dict) -> Span:
+        span = Span(name, kind, parent, task_key, attributes)
+        with self._lock:
+            self._spans.append(span)
+        return span
+
+    def _timestamp(self, monotonic: float) -> datetime:
+        return self.run.started_at + timedelta(seconds=monotonic - self._started)
+
+    def finish(self):
+        """Write the spans and close the run"""
+        now = time.monotonic()
+        with self._lock:
+            spans = list(self._spans)
+
+        rows: Dict[int, RunSpan] = {}
+        with self._db_lock, transaction.atomic():
+            # Parents are written before their children so the children can link to them
+            for depth in sorted({span.depth for span in spans}):
+                level = []
+                for span in spans:
+                    if span.depth != depth:
+                        continue
+                    finished = span.finished if span.finished is not None else now
+                    rows[id(span)] = RunSpan(
+                        run=self.run,
+                        parent=rows.get(id(span.parent)) if span.parent else None,
+                        name=span.name[:255],
+                        kind=span.kind,
+                        task_key=span.task_key,
+                        status=span.status,
+                        started_at=self._timestamp(span.started),
+                        finished_at=self._timestamp(finished),
+                        offset_seconds=round(span.started - self._started, 4),
+                        duration_seconds=round(finished - span.started, 4),
+                        attributes=span.attributes,
+                    )
+                    level.append(rows[id(span)])
+                RunSpan.objects.bulk_create(level)
+
+            self.run.status = self.status
+            self.run.summary = self.summary
+            self.run.finished_at = self._timestamp(now)
+            self.run.duration_seconds = round(now - self._started, 4)
+            Run.objects.filter(pk=self.run.pk).update(
+                status=self.run.status,
+                summary=self.run.summary,
+                finished_at=self.run.finished_at,
+                duration_seconds=self.run.duration_seconds,
+            )
+
+
+@contextmanager
+def trace_run(project: Project, kind: str, db_lock: Optional[threading.Lock] = None) -> Iterator[RunTracer]:
+    """
+    Record a run; spans opened inside the block (on this thread, or on threads
+    started with asyncio.to_thread) belong to it
+
+    Set tracer.status / tracer.summary before leaving the block. A block that
+    raises is recorded as failed. Pass db_lock when the run's other writes are
+    serialized by one.
+    """
+    tracer = RunTracer(project, kind, db_lock=db_lock)
+    run_token = _current_run.set(tracer)
+    span_token = _current_span.set(None)
+    try:
+        yield tracer
+    except BaseException as e:
+        tracer.status = 'failed'
+        tracer.summary.setdefault('error', str(e))
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_run.reset(run_token)
+        tracer.finish()
+
+
+@contextmanager
+def span(name: str, kind: str = 'step', task_key: str = '', **attributes) -> Iterator[Span]:
+    """
+    Time a block as a span of the current run, nested under the enclosing span
+
+    Outside a traced run the span is measured but not recorded.
+    """
+    tracer = _current_run.get()
+    parent = _current_span.get()
+    if tracer is None:
+        current = Span(name, kind, None, task_key, attributes)
+    else:
+        current = tracer.open(name, kind, parent, task_key or (parent.task_key if parent else ''), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        current.finished = time.monotonic()
+        _current_span.reset(token)
+
+
+@contextmanager
+def job_scope(job_id: int):
+    """Link runs started inside the block to a background job"""
+    token = _current_job.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+# Analysis
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def critical_path(run: Run) -> Dict:
+    """
+    Chain of top-level spans that determined the run's duration
+
+    Walks back from the span that finished last. A task span's predecessor is
+    the dependency that finished last; other spans are gated by whichever
+    top-level span finished last before they started. Gaps between a span and
+    its predecessor are waiting (scheduler slots, orchestration overhead).
+    """
+    spans = list(run.spans.all())
+    top = [s for s in spans if s.parent_id is None]
+    if not top:
+        return {'run': run.id, 'duration_seconds': run.duration_seconds, 'path': [],
+                'path_seconds': 0.0, 'wait_seconds': 0.0}
+
+    by_task = {s.task_key: s for s in top if s.kind == 'task' and s.task_key}
+    breakdown: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for s in spans:
+        if s.parent_id is not None:
+            breakdown[s.parent_id][s.kind] += s.duration_seconds
+
+    def end(s: RunSpan) -> float:
+        return s.offset_seconds + s.duration_seconds
+
+    def predecessor(s: RunSpan) -> Optional[RunSpan]:
+        dependencies = s.attributes.get('dependencies') if s.kind == 'task' else None
+        if dependencies:
+            candidates = [by_task[key] for key in dependencies if key in by_task]
+        else:
+            candidates = [
+                other for other in top
+                if other.pk != s.pk and end(other) <= s.offset_seconds + GATE_TOLERANCE_SECONDS
+            ]
+        return max(candidates, key=end, default=None)
+
+    path = []
+    current: Optional[RunSpan] = max(top, key=end)
+    seen = set()
+    while current is not None and current.pk not in seen:
+        seen.add(current.pk)
+        previous = predecessor(current)
+        wait = current.offset_seconds - (end(previous) if previous else 0.0)
+        path.append({
+            'span': current.id,
+            'name': current.name,
+            'kind': current.kind,
+            'task_key': current.task_key,
+            'status': current.status,
+            'offset_seconds': round(current.offset_seconds, 3),
+            'duration_seconds': round(current.duration_seconds, 3),
+            'wait_before_seconds': round(max(wait, 0.0), 3),
+            'breakdown': {kind: round(seconds, 3) for kind, seconds in breakdown[current.id].items()},
+        })
+        current = previous
+    path.reverse()
+
+    return {
+        'run': run.id,
+        'duration_seconds': run.duration_seconds,
+        'path': path,
+        'path_seconds': round(sum(p['duration_seconds'] for p in path), 3),
+        'wait_seconds': round(sum(p['wait_before_seconds'] for p in path), 3),
+    }
+
+
+def timing_breakdown(run: Run) -> Dict:
+    """
+    Where a run's time went: seconds per span kind (summed over spans, so
+    concurrent tasks can add up to more than the wall time) plus its critical path
+    """
+    by_kind: Dict[str, float] = defaultdict(float)
+    counts: Dict[str, int] = defaultdict(int)
+    for kind, duration in run.spans.values_list('kind', 'duration_seconds'):
+        by_kind[kind] += duration
+        counts[kind] += 1
+    path = critical_path(run)
+    return {
+        'run': run.id,
+        'wall_seconds': run.duration_seconds,
+        'by_kind': {
+            kind: {'seconds': round(seconds, 3), 'spans': counts[kind]}
+            for kind, seconds in sorted(by_kind.items(), key=lambda item: item[1], reverse=True)
+        },
+        'critical_path_seconds': path['path_seconds'],
+        'critical_path_wait_seconds': path['wait_seconds'],
+        'critical_path': [step['task_key'] or step['name'] for step in path['path']],
+    }
+
+
+def slowest_spans(runs: List[Run], limit: int = 10) -> Dict:
+    """
+    Slowest span types (kind and name) and individual spans across runs
+
+    Returns:
+        {'by_name': [...aggregates, by total time], 'spans': [...slowest spans]}
+    """
+    spans = list(RunSpan.objects.filter(run__in=runs).order_by('-duration_seconds'))
+    groups: Dict[tuple, List[float]] = defaultdict(list)
+    for s in spans:
+        groups[(s.kind, s.name)].append(s.duration_seconds)
+
+    by_name = []
+    for (kind, name), durations in groups.items():
+        ordered = sorted(durations)
+        by_name.append({
+            'kind': kind,
+            'name': name,
+            'count': len(ordered),
+            'total_seconds': round(sum(ordered), 3),
+            'mean_seconds': round(sum(ordered) / len(ordered), 3),
+            'p95_seconds': round(_percentile(ordered, 95), 3),
+            'max_seconds': round(ordered[-1], 3),
+        })
+    by_name.sort(key=lambda g: g['total_seconds'], reverse=True)
+
+    return {
+        'by_name': by_name[:limit],
+        'spans': [
+            {
+                'span': s.id, 'run': s.run_id, 'name': s.name, 'kind': s.kind,
+                'task_key': s.task_key, 'status': s.status,
+                'duration_seconds': round(s.duration_seconds, 3),
+            }
+            for s in spans[:limit]
+        ],
+    }
+
+
+def analyze_runs(runs: List[Run], limit: int = 10) -> Dict:
+    """Critical paths of the runs, how often each step is on them, and the slowest spans"""
+    paths = [critical_path(run) for run in runs]
+
+    on_path: Dict[tuple, List[float]] = defaultdict(list)
+    for path in paths:
+        for step in path['path']:
+            on_path[(step['kind'], step['task_key'] or step['name'])].append(step['duration_seconds'])
+
+    return {
+        'runs': len(runs),
+        'critical_paths': paths,
+        'critical_path_frequency': sorted(
+            (
+                {
+                    'kind': kind,
+                    'step': step,
+                    'runs': len(durations),
+                    'share': round(len(durations) / len(runs), 3),
+                    'mean_seconds': round(sum(durations) / len(durations), 3),
+                }
+                for (kind, step), durations in on_path.items()
+            ),
+            key=lambda s: (s['runs'], s['mean_seconds']),
+            reverse=True,
+        ),
+        'slowest': slowest_spans(runs, limit=limit),
+    }
+
+# Made with Bob
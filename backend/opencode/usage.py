@@ -0,0 +1,92 @@
+"""
+Token Usage
+Token counts and estimated cost of LLM calls and OpenCode executions (no
+Django imports, so the executor and remote agents can use it standalone)
+"""
+import json
+import os
+from typing import Dict, Optional
+
+# USD per 1K (prompt, completion) tokens; OPENCODE_MODEL_PRICES adds or overrides
+# entries as JSON, e.g. {"gpt-4o": [0.0025, 0.01]}
+MODEL_PRICES = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    **{model: tuple(price) for model, price in json.loads(os.environ.get('OPENCODE_MODEL_PRICES', '{}')).items()},
+}
+
+# Price of models missing from the table (and of executions with no model set)
+DEFAULT_PRICE = (0.01, 0.03)
+
+# Roughly four characters per token for English text and code
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD for a call (provider prefixes like 'openai/' are ignored)"""
+    name = (model or '').split('/')[-1]
+    prompt_price, completion_price = MODEL_PRICES.get(name, DEFAULT_PRICE)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def usage_from_output(prompt: str, stdout: str, model: Optional[str]) -> Dict:
+    """
+    Token usage of an OpenCode execution from its JSON events
+
+    Sums 'tokens' ({input, output}) and 'usage' ({prompt_tokens, completion_tokens})
+    objects and reported 'cost'. Without any, tokens are estimated from the prompt
+    and output length.
+    """
+    prompt_tokens = completion_tokens = 0
+    reported_cost = 0.0
+    found = False
+    for line in (stdout or '').splitlines():
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        stack = [event]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            tokens = node.get('tokens')
+            usage = node.get('usage')
+            if isinstance(tokens, dict) and ('input' in tokens or 'output' in tokens):
+                prompt_tokens += int(tokens.get('input') or 0)
+                completion_tokens += int(tokens.get('output') or 0) + int(tokens.get('reasoning') or 0)
+                found = True
+                if isinstance(node.get('cost'), (int, float)):
+                    reported_cost += node['cost']
+                continue
+            if isinstance(usage, dict) and ('prompt_tokens' in usage or 'completion_tokens' in usage):
+                prompt_tokens += int(usage.get('prompt_tokens') or 0)
+                completion_tokens += int(usage.get('completion_tokens') or 0)
+                found = True
+                continue
+            stack.extend(node.values())
+
+    if not found:
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(stdout)
+    return {
+        'model': model or '',
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cost': reported_cost or estimate_cost(model, prompt_tokens, completion_tokens),
+        'estimated': not found,
+    }
+
+# Made with Bob
@@ -0,0 +1,220 @@
+"""
+Job Views
+API endpoints for background jobs, run history and the project event stream
+"""
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from agents.models import Agent
+from projects.models import Project
+from tasks.models import Task
+from .events import get_event_bus
+from .budget import usage_report
+from .jobs import cancel_job
+from .models import Budget, Job, LedgerEntry, Run
+from .serializers import (
+    BudgetSerializer, JobSerializer, LedgerEntrySerializer, RunSerializer, RunDetailSerializer
+)
+from .tracing import analyze_runs, critical_path
+
+# Comment lines sent while idle keep proxies from closing the stream
+KEEPALIVE_SECONDS = 15
+
+# Most runs analyzed by one critical-path request
+MAX_ANALYZED_RUNS = 100
+
+# Most ledger entries returned by one request
+MAX_LEDGER_ENTRIES = 200
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for background jobs"""
+
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Filter by user's projects"""
+        queryset = Job.objects.filter(project__created_by=self.request.user)
+        project_id = self.request.query_params.get('project')
+        if project_id:
+            queryset = queryset.filter(project_id=project_id)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Cancel a queued or running job
+
+        POST /api/jobs/{id}/cancel/
+        """
+        job = cancel_job(self.get_object())
+        return Response(JobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class RunViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for recorded planning and development runs (detail includes spans)"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer_class(self):
+        return RunDetailSerializer if self.action == 'retrieve' else RunSerializer
+
+    def get_queryset(self):
+        """Filter by user's projects, optionally by project and kind"""
+        queryset = Run.objects.filter(project__created_by=self.request.user)
+        project_id = self.request.query_params.get('project')
+        if project_id:
+            queryset = queryset.filter(project_id=project_id)
+        kind = self.request.query_params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        return queryset
+
+    @action(detail=True, methods=['get'], url_path='critical-path')
+    def run_critical_path(self, request, pk=None):
+        """
+        Critical path of one run
+
+        GET /api/runs/{id}/critical-path/
+        """
+        return Response(critical_path(self.get_object()))
+
+    @action(detail=False, methods=['get'], url_path='critical-path')
+    def recent_critical_paths(self, request):
+        """
+        Critical paths and slowest spans across recent finished runs
+
+        GET /api/runs/critical-path/?project={id}&kind=development&limit=10
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), MAX_ANALYZED_RUNS)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset().exclude(status='running')
+        if not request.query_params.get('kind'):
+            queryset = queryset.filter(kind='development')
+        return Response(analyze_runs(list(queryset[:limit])))
+
+
+class BudgetViewSet(viewsets.ModelViewSet):
+    """ViewSet for token/cost budgets of the user's projects and the user's own monthly budget"""
+
+    serializer_class = BudgetSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Budget.objects.filter(Q(user=self.request.user) | Q(project__created_by=self.request.user))
+
+    def perform_create(self, serializer):
+        if serializer.validated_data.get('project') is None:
+            serializer.save(user=self.request.user)
+        else:
+            serializer.save()
+
+    @action(detail=False, methods=['get'])
+    def usage(self, request):
+        """
+        Aggregated ledger usage of the user's projects
+
+        GET /api/budgets/usage/?project={id}&days=30
+        """
+        try:
+            days = max(int(request.query_params.get('days', 30)), 0)
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        filters = {'project__created_by': request.user}
+        project_id = request.query_params.get('project')
+        if project_id:
+            filters['project_id'] = project_id
+        return Response(usage_report(days=days, **filters))
+
+    @action(detail=False, methods=['get'])
+    def ledger(self, request):
+        """
+        Most recent ledger entries
+
+        GET /api/budgets/ledger/?project={id}&run={id}
+        """
+        queryset = LedgerEntry.objects.filter(project__created_by=request.user)
+        for param in ('project', 'run'):
+            value = request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{f'{param}_id': value})
+        return Response(LedgerEntrySerializer(queryset[:MAX_LEDGER_ENTRIES], many=True).data)
+
+
+def _sse(event: dict) -> str:
+    lines = f"id: {event['id']}\n" if event.get('id') is not None else ''
+    return f"{lines}data: {json.dumps(event, default=str)}\n\n"
+
+
+def _snapshot(project: Project) -> dict:
+    """Current task, agent and job state, sent when a client connects"""
+    jobs = {}
+    for job in Job.objects.filter(project=project).values('id', 'kind', 'status', 'lane', 'error'):
+        jobs.setdefault(job['kind'], job)  # Newest per kind
+    return {
+        'id': None,
+        'type': 'snapshot',
+        'project': project.id,
+        'data': {
+            'tasks': list(Task.objects.filter(project=project).values(
+                'id', 'key', 'title', 'status', 'progress', 'assigned_to_id', 'updated_at'
+            )),
+            'agents': list(Agent.objects.filter(project=project).values('id', 'name', 'role', 'status')),
+            'jobs': jobs,
+        },
+    }
+
+
+async def project_events(request, project_id):
+    """
+    Server-sent event stream of a project's task, agent, job and run events
+
+    GET /api/projects/{id}/events/
+
+    Only the project's owner may subscribe. The first event is a snapshot of the
+    current state; every later event is a change pushed by the orchestrator,
+    planning service or API. Each event's data is JSON with 'type', 'project',
+    'data' and 'timestamp'.
+
+    An async view: under ASGI an open stream holds no worker thread.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    project = await Project.objects.filter(id=project_id, created_by=user).afirst()
+    if project is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    # Subscribe before taking the snapshot so no change falls in between
+    try:
+        subscription = await get_event_bus().subscribe(project.id)
+    except Exception as e:  # Event bus (Redis) unreachable; clients fall back to polling
+        return JsonResponse({'error': f'Event stream unavailable: {e}'}, status=503)
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            yield _sse(await sync_to_async(_snapshot)(project))
+            while True:
+                event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                yield _sse(event) if event else ': keepalive\n\n'
+        finally:
+            await subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+# Made with Bob
@@ -0,0 +1,344 @@
+"""
+Workspace Manager
+Tracks disk usage of generated_projects, enforces quotas and archives cold workspaces
+"""
+import logging
+import os
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fsutil import locked_json_file, tree_size
+
+logger = logging.getLogger(__name__)
+
+# Rebuildable directories left out of archives and quotas (restored from the dependency cache instead)
+ARCHIVE_EXCLUDED_DIRS = {'node_modules', '.venv', 'venv', '__pycache__', '.next',
+                         '.pytest_cache', '.mypy_cache', '.cache'}
+
+# A pin keeps an acquired workspace from being archived; pins of a process that
+# died without releasing expire after this long
+PIN_SECONDS = 24 * 3600
+
+# Archive and restore claims of a process that died expire after this long
+CLAIM_SECONDS = 3600
+
+# How often acquire() checks whether another process finished restoring a workspace
+RESTORE_POLL_SECONDS = 0.5
+
+# Prefix of workspace directories being deleted after they were archived
+TRASH_PREFIX = '.trash-'
+
+
+class WorkspaceQuotaExceeded(Exception):
+    """Raised when a workspace grows beyond its per-project quota"""
+
+
+class WorkspaceManager:
+    """
+    Manages project workspaces under a shared root directory.
+
+    Features:
+    - Index of per-workspace disk usage and last use
+    - Per-project quota checks
+    - Total-size limit enforced by archiving least recently used workspaces
+    - Cold workspaces archived into compressed tarballs and restored on next access
+
+    The index is shared by every process through a file lock, which is only held
+    for index reads and writes: tarballs are written and extracted outside it.
+    Acquired workspaces are pinned in the index, so no process archives them.
+    Archiving runs from housekeeping() (a periodic Celery task), not on access.
+    """
+
+    def __init__(self, root: str, quota_bytes: int, max_total_bytes: int,
+                 cold_after_seconds: int = 7 * 24 * 3600):
+        self.root = Path(root)
+        self.archive_dir = self.root / '.archive'
+        self.index_path = self.root / '.workspace_index.json'
+        self.quota_bytes = quota_bytes
+        self.max_total_bytes = max_total_bytes
+        self.cold_after_seconds = cold_after_seconds
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        # Pins this process holds, per workspace (released in LIFO order)
+        self._pins: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+        # Archived workspaces whose deletion was interrupted
+        for leftover in self.root.glob(f'{TRASH_PREFIX}*'):
+            shutil.rmtree(leftover, ignore_errors=True)
+
+    @staticmethod
+    def workspace_name(project) -> str:
+        return f"project_{project.id}_{project.name.replace(' ', '_')}"
+
+    def _archive_path(self, name: str) -> Path:
+        return self.archive_dir / f"{name}.tar.gz"
+
+    def _locked_index(self):
+        return locked_json_file(self.index_path)
+
+    @staticmethod
+    def _pinned(entry: Dict) -> bool:
+        """Whether any process holds an unexpired pin on the workspace (expired pins are dropped)"""
+        now = time.time()
+        entry['pins'] = {token: expires for token, expires in entry.get('pins', {}).items() if expires > now}
+        return bool(entry['pins'])
+
+    @staticmethod
+    def _claimed(entry: Dict, claim: str) -> bool:
+        """Whether an 'archiving' or 'restoring' claim on the workspace is still in force"""
+        return entry.get(claim, 0) > time.time()
+
+    # Lifecycle
+
+    def acquire(self, project) -> Path:
+        """
+        Get the workspace for a project, restoring it from its archive if needed
+
+        The workspace stays pinned (never archived by any process) until
+        release() is called. An archive is extracted outside the index lock;
+        concurrent callers wait for the one restoring it.
+        """
+        name = self.workspace_name(project)
+        path = self.root / name
+        token = f"{os.getpid()}.{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._pins.setdefault(name, []).append(token)
+
+        while True:
+            with self._locked_index() as index:
+                entry = index.setdefault(name, {'bytes': 0, 'archived': False})
+                self._pinned(entry)
+                entry['pins'][token] = time.time() + PIN_SECONDS
+                entry['last_used'] = time.time()
+                if not entry.get('archived'):
+                    path.mkdir(parents=True, exist_ok=True)
+                    return path
+                restore = not self._claimed(entry, 'restoring')
+                if restore:
+                    entry['restoring'] = time.time() + CLAIM_SECONDS
+
+            if not restore:
+                time.sleep(RESTORE_POLL_SECONDS)
+                continue
+            try:
+                self._restore(name, path)
+            except BaseException:
+                self._unpin(name, token)
+                raise
+            finally:
+                with self._locked_index() as index:
+                    entry = index[name]
+                    entry.pop('restoring', None)
+                    if path.exists():
+                        entry['archived'] = False
+                        entry.pop('archived_bytes', None)
+
+    def release(self, project):
+        """Unpin a workspace and refresh its recorded usage"""
+        name = self.workspace_name(project)
+        self.update_usage(project)
+        with self._lock:
+            tokens = self._pins.get(name)
+            token = tokens[-1] if tokens else None
+        if token is not None:
+            self._unpin(name, token)
+
+    def _unpin(self, name: str, token: str):
+        with self._lock:
+            tokens = self._pins.get(name, [])
+            if token in tokens:
+                tokens.remove(token)
+            if not tokens:
+                self._pins.pop(name, None)
+        with self._locked_index() as index:
+            index.get(name, {}).get('pins', {}).pop(token, None)
+
+    def update_usage(self, project) -> Dict:
+        """
+        Recompute a workspace's disk usage
+
+        Returns:
+            Dictionary with bytes, quota and whether the quota is exceeded
+        """
+        name = self.workspace_name(project)
+        usage = tree_size(self.root / name)
+        with self._locked_index() as index:
+            entry = index.setdefault(name, {'archived': False})
+            entry['bytes'] = usage
+            entry['last_used'] = time.time()
+        return {
+            'bytes': usage,
+            'quota_bytes': self.quota_bytes,
+            'over_quota': bool(self.quota_bytes) and usage > self.quota_bytes,
+        }
+
+    def check_quota(self, project) -> Dict:
+        """
+        Raise WorkspaceQuotaExceeded when the workspace is over quota
+
+        Called before every task, so it neither takes the index lock nor walks
+        rebuildable dependency trees (ARCHIVE_EXCLUDED_DIRS); these are shared
+        clones from the dependency cache and count towards the total size only.
+        """
+        usage = tree_size(self.root / self.workspace_name(project), exclude=ARCHIVE_EXCLUDED_DIRS)
+        if self.quota_bytes and usage > self.quota_bytes:
+            raise WorkspaceQuotaExceeded(
+                f"Workspace uses {usage // (1024 * 1024)} MB, "
+                f"quota is {self.quota_bytes // (1024 * 1024)} MB"
+            )
+        return {'bytes': usage, 'quota_bytes': self.quota_bytes, 'over_quota': False}
+
+    # Archiving
+
+    def _write_archive(self, name: str) -> Path:
+        """Compress a workspace into a temporary tarball next to its archive"""
+        tmp_path = self._archive_path(name).with_suffix(f'.{uuid.uuid4().hex[:12]}.tmp')
+
+        def exclude(tarinfo):
+            if Path(tarinfo.name).name in ARCHIVE_EXCLUDED_DIRS and tarinfo.isdir():
+                return None
+            return tarinfo
+
+        try:
+            with tarfile.open(tmp_path, 'w:gz') as tar:
+                tar.add(self.root / name, arcname=name, filter=exclude)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path
+
+    def _restore(self, name: str, path: Path):
+        archive_path = self._archive_path(name)
+        if not archive_path.exists():
+            logger.warning(f"Archive for {name} is missing, starting with an empty workspace")
+            path.mkdir(parents=True, exist_ok=True)
+            return
+        # Left over by a restore that died part way
+        shutil.rmtree(path, ignore_errors=True)
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            tar.extractall(self.root, filter='data')
+        path.mkdir(parents=True, exist_ok=True)
+        archive_path.unlink()
+        logger.info(f"Restored workspace {name} from archive")
+
+    def _archive_entries(self, names: List[str]) -> List[str]:
+        """
+        Archive workspaces, compressing each outside the index lock
+
+        A workspace is claimed under the lock first, so no other process archives
+        it at the same time. If it is acquired while its tarball is written, the
+        tarball is discarded and the workspace stays.
+        """
+        archived = []
+        for name in names:
+            path = self.root / name
+            with self._locked_index() as index:
+                entry = index.get(name)
+                if (entry is None or entry.get('archived') or self._pinned(entry)
+                        or self._claimed(entry, 'archiving') or not path.exists()):
+                    continue
+                entry['archiving'] = time.time() + CLAIM_SECONDS
+
+            try:
+                tmp_path = self._write_archive(name)
+            except OSError as e:
+                logger.warning(f"Failed to archive workspace {name}: {e}")
+                tmp_path = None
+
+            trash = None
+            with self._locked_index() as index:
+                entry = index.setdefault(name, {'archived': False})
+                entry.pop('archiving', None)
+                if tmp_path is None:
+                    continue
+                if self._pinned(entry):
+                    tmp_path.unlink(missing_ok=True)
+                    logger.info(f"Workspace {name} was acquired while it was archived, keeping it")
+                    continue
+                os.replace(tmp_path, self._archive_path(name))
+                trash = self.root / f"{TRASH_PREFIX}{name}.{uuid.uuid4().hex[:12]}"
+                path.rename(trash)
+                entry['archived_bytes'] = self._archive_path(name).stat().st_size
+                entry['archived'] = True
+                entry['bytes'] = 0
+
+            shutil.rmtree(trash, ignore_errors=True)
+            archived.append(name)
+            logger.info(f"Archived workspace {name}")
+        return archived
+
+    def archive_cold(self, max_idle_seconds: Optional[int] = None) -> List[str]:
+        """Archive every workspace not used for max_idle_seconds"""
+        max_idle_seconds = max_idle_seconds or self.cold_after_seconds
+        cutoff = time.time() - max_idle_seconds
+        with self._locked_index() as index:
+            cold = [
+                name for name, entry in index.items()
+                if not entry.get('archived') and entry.get('last_used', 0) < cutoff
+            ]
+        return self._archive_entries(cold)
+
+    def enforce_total_limit(self) -> List[str]:
+        """Archive least recently used workspaces until live usage fits max_total_bytes"""
+        with self._locked_index() as index:
+            live = [name for name, entry in index.items() if not entry.get('archived')]
+            total = sum(index[name].get('bytes', 0) for name in live)
+            victims = []
+            for name in sorted(live, key=lambda n: index[n].get('last_used', 0)):
+                if total <= self.max_total_bytes:
+                    break
+                if self._pinned(index[name]) or self._claimed(index[name], 'archiving'):
+                    continue
+                victims.append(name)
+                total -= index[name].get('bytes', 0)
+        return self._archive_entries(victims)
+
+    def housekeeping(self) -> Dict:
+        """Enforce the total size limit, then archive cold workspaces (celery beat)"""
+        return {
+            'archived_for_space': self.enforce_total_limit(),
+            'archived_cold': self.archive_cold(),
+        }
+
+    def get_stats(self) -> Dict:
+        """Get usage summary across all workspaces"""
+        with self._locked_index() as index:
+            live = {n: e for n, e in index.items() if not e.get('archived')}
+            return {
+                'workspaces': len(index),
+                'live': len(live),
+                'archived': len(index) - len(live),
+                'live_bytes': sum(e.get('bytes', 0) for e in live.values()),
+                'archived_bytes': sum(e.get('archived_bytes', 0) for e in index.values()),
+                'quota_bytes': self.quota_bytes,
+                'max_total_bytes': self.max_total_bytes,
+            }
+
+
+# Singleton instance
+_manager_instance = None
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """Get or create the workspace manager for generated_projects"""
+    global _manager_instance
+    if _manager_instance is None:
+        root = os.environ.get(
+            'OPENCODE_WORKSPACE_DIR',
+            str(Path(os.getcwd()).parent / 'generated_projects')
+        )
+        _manager_instance = WorkspaceManager(
+            root,
+            quota_bytes=int(os.environ.get('OPENCODE_WORKSPACE_QUOTA_MB', 2048)) * 1024 * 1024,
+            max_total_bytes=int(os.environ.get('OPENCODE_WORKSPACE_TOTAL_MB', 51200)) * 1024 * 1024,
+            cold_after_seconds=int(os.environ.get('OPENCODE_WORKSPACE_COLD_DAYS', 7)) * 24 * 3600,
+        )
+    return _manager_instance
+
+# Made with Bob
@@ -17,7 +17,7 @@ class TaskNode:
     def __init__(self, task_id: str, task_data: Dict[str, Any]):
         self.id = task_id
         self.data = task_data
-        self.status = 'pending'  # pending, in_progress, completed, failed
+        self.status = 'pending'  # pending, in_progress, completed, failed, skipped
         self.dependencies: Set[str] = set(task_data.get('dependencies', []))
         self.result: Optional[Any] = None
         self.error: Optional[str] = None
@@ -45,6 +45,11 @@ class TaskNode:
         self.status = 'failed'
         self.error = error
         self.completed_at = datetime.now()
+    
+    def mark_skipped(self, reason: str):
+        """Mark task as skipped because a dependency did not complete."""
+        self.status = 'skipped'
+        self.error = reason
 
 
 class TaskManager:
@@ -54,7 +59,9 @@ class TaskManager:
     Features:
     - Dependency graph construction
     - Topological sorting
-    - Parallel execution of independent tasks
+    - Parallel execution of independent tasks (a task starts as soon as its
+      dependencies complete, so wall-clock time follows the critical path)
+    - Dependents of failed tasks are skipped
     - Retry logic with exponential backoff
     - Rollback on failure
     """
@@ -65,6 +72,7 @@ class TaskManager:
         self.tasks: Dict[str, TaskNode] = {}
         self.completed_tasks: Set[str] = set()
         self.failed_tasks: Set[str] = set()
+        self.skipped_tasks: Set[str] = set()
         self.execution_log: List[Dict[str, Any]] = []
     
     def add_task(self, task_id: str, task_data: Dict[str, Any]):
@@ -161,6 +169,7 @@ class TaskManager:
                 
                 if attempt < self.max_retries - 1:
                     # Exponential backoff
+                    node.retry_count += 1
                     wait_time = 2 ** attempt
                     self.log_event('task_retry', node.id, {
                         'attempt': attempt + 1,
@@ -175,6 +184,23 @@ class TaskManager:
                     self.log_event('task_failed', node.id, {'error': error_msg})
                     raise
     
+    def skip_blocked_tasks(self) -> List[str]:
+        """Skip pending tasks whose dependencies failed or were skipped (transitively)."""
+        skipped = []
+        changed = True
+        while changed:
+            changed = False
+            blocked_ids = self.failed_tasks | self.skipped_tasks
+            for task_id, node in self.tasks.items():
+                blocked_by = node.dependencies & blocked_ids
+                if node.status == 'pending' and blocked_by:
+                    node.mark_skipped(f"Dependency did not complete: {', '.join(sorted(blocked_by))}")
+                    self.skipped_tasks.add(task_id)
+                    self.log_event('task_skipped', task_id, {'blocked_by': sorted(blocked_by)})
+                    skipped.append(task_id)
+                    changed = True
+        return skipped
+    
     async def execute_batch(self, batch: List[TaskNode], executor_func) -> List[Any]:
         """Execute a batch of tasks in parallel."""
         self.log_event('batch_started', None, {'task_count': len(batch)})
@@ -221,30 +247,47 @@ class TaskManager:
                            [[self.tasks[tid] for tid in b] for b in batches]]
             })
             
-            # Execute each batch
-            for i, batch_ids in enumerate(batches):
-                batch_nodes = [self.tasks[tid] for tid in batch_ids]
-                self.log_event('batch_executing', None, {
-                    'batch_number': i + 1,
-                    'total_batches': len(batches),
-                    'tasks': batch_ids
-                })
+            # Start every task as soon as its dependencies are done instead of
+            # waiting for the whole batch, bounded by max_parallel
+            semaphore = asyncio.Semaphore(self.max_parallel)
+            scheduled: Set[str] = set()
+            running: Dict[asyncio.Task, TaskNode] = {}
+            
+            async def execute_with_semaphore(node):
+                async with semaphore:
+                    return await self.execute_task(node, executor_func)
+            
+            while True:
+                self.skip_blocked_tasks()
+                for node in self.get_executable_tasks():
+                    if node.id not in scheduled:
+                        scheduled.add(node.id)
+                        running[asyncio.create_task(execute_with_semaphore(node))] = node
+                
+                if not running:
+                    break
                 
-                await self.execute_batch(batch_nodes, executor_func)
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    # Failures are already recorded on the node by execute_task
+                    future.exception()
             
             # Execution summary
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
             summary = {
-                'status': 'completed' if not self.failed_tasks else 'partial_failure',
+                'status': 'completed' if not (self.failed_tasks or self.skipped_tasks) else 'partial_failure',
                 'total_tasks': len(self.tasks),
                 'completed_tasks': len(self.completed_tasks),
                 'failed_tasks': len(self.failed_tasks),
+                'skipped_tasks': len(self.skipped_tasks),
                 'duration_seconds': duration,
                 'started_at': start_time.isoformat(),
                 'completed_at': end_time.isoformat(),
-                'failed_task_ids': list(self.failed_tasks)
+                'failed_task_ids': list(self.failed_tasks),
+                'skipped_task_ids': list(self.skipped_tasks)
             }
             
             self.log_event('execution_completed', None, summary)
@@ -298,6 +341,7 @@ class TaskManager:
                                      if t.status == 'in_progress']),
             'completed_tasks': len(self.completed_tasks),
             'failed_tasks': len(self.failed_tasks),
+            'skipped_tasks': len(self.skipped_tasks),
             'tasks': {
                 task_id: {
                     'status': node.status,
@@ -2,10 +2,14 @@
 Planning Services
 Orchestrates the planning document generation process
 """
-from typing import Dict, List
+import threading
+from typing import Dict, List, Optional
 from projects.models import Project, ProjectRequirement
 from .models import PlanningDocument, AgentRecommendation
+from opencode.budget import BudgetGuard, budget_scope
 from opencode.client import get_opencode_client
+from opencode.events import publish_event
+from opencode.tracing import span, trace_run
 
 
 class PlanningService:
@@ -15,7 +19,7 @@ class PlanningService:
         self.project = project
         self.client = get_opencode_client()
     
-    def generate_full_plan(self) -> PlanningDocument:
+    def generate_full_plan(self, cancel_event: Optional[threading.Event] = None) -> Optional[PlanningDocument]:
         """
         Generate complete planning document from project requirements
         
@@ -24,6 +28,12 @@ class PlanningService:
         2. Generate PRD
         3. Create agent recommendations
         4. Save everything to database
+        
+        Args:
+            cancel_event: Optional event checked between the LLM calls
+        
+        Returns:
+            The planning document, or None when cancelled before it was saved
         """
         # Step 1: Get requirements
         requirements = list(
@@ -37,52 +47,62 @@ class PlanningService:
         
         # Step 2: Analyze requirements
         print(f"📊 Analyzing requirements for {self.project.name}...")
-        analysis_result = self.client.analyze_requirements(requirements)
+        with span('analyze requirements', 'llm') as llm_span:
+            analysis_result = self.client.analyze_requirements(requirements)
+            llm_span.set(tokens_used=analysis_result.get('tokens_used', 0))
         
         if not analysis_result.get('success'):
             raise Exception(f"Failed to analyze requirements: {analysis_result.get('error')}")
         
         analysis = analysis_result['analysis']
         tokens_used = analysis_result.get('tokens_used', 0)
+        if cancel_event is not None and cancel_event.is_set():
+            return None
         
         # Step 3: Generate PRD
         print(f"📝 Generating PRD...")
-        prd_result = self.client.generate_prd(
-            project_name=self.project.name,
-            requirements=requirements,
-            analysis=analysis
-        )
+        with span('generate PRD', 'llm') as llm_span:
+            prd_result = self.client.generate_prd(
+                project_name=self.project.name,
+                requirements=requirements,
+                analysis=analysis
+            )
+            llm_span.set(tokens_used=prd_result.get('tokens_used', 0))
         
         if not prd_result.get('success'):
             raise Exception(f"Failed to generate PRD: {prd_result.get('error')}")
         
         prd_content = prd_result['content']
         tokens_used += prd_result.get('tokens_used', 0)
+        # Last chance to stop: once the document is saved, planning runs to completion
+        if cancel_event is not None and cancel_event.is_set():
+            return None
         
         # Step 4: Parse PRD sections
         sections = self._parse_prd_sections(prd_content)
         
         # Step 5: Create or update planning document
-        planning_doc, created = PlanningDocument.objects.update_or_create(
-            project=self.project,
-            defaults={
-                'tech_stack': analysis.get('tech_stack', {}),
-                'required_roles': analysis.get('required_roles', []),
-                'complexity': analysis.get('complexity', 'medium'),
-                'key_features': analysis.get('key_features', []),
-                'challenges': analysis.get('challenges', []),
-                'executive_summary': sections.get('executive_summary', ''),
-                'technical_requirements': sections.get('technical_requirements', ''),
-                'feature_specifications': sections.get('feature_specifications', ''),
-                'development_plan': sections.get('development_plan', ''),
-                'timeline': sections.get('timeline', ''),
-                'full_document': prd_content,
-                'tokens_used': tokens_used,
-            }
-        )
-        
-        # Step 6: Create agent recommendations
-        self._create_agent_recommendations(planning_doc, analysis)
+        with span('save planning document', 'persist'):
+            planning_doc, created = PlanningDocument.objects.update_or_create(
+                project=self.project,
+                defaults={
+                    'tech_stack': analysis.get('tech_stack', {}),
+                    'required_roles': analysis.get('required_roles', []),
+                    'complexity': analysis.get('complexity', 'medium'),
+                    'key_features': analysis.get('key_features', []),
+                    'challenges': analysis.get('challenges', []),
+                    'executive_summary': sections.get('executive_summary', ''),
+                    'technical_requirements': sections.get('technical_requirements', ''),
+                    'feature_specifications': sections.get('feature_specifications', ''),
+                    'development_plan': sections.get('development_plan', ''),
+                    'timeline': sections.get('timeline', ''),
+                    'full_document': prd_content,
+                    'tokens_used': tokens_used,
+                }
+            )
+            
+            # Step 6: Create agent recommendations
+            self._create_agent_recommendations(planning_doc, analysis)
         
         print(f"✅ Planning document generated successfully!")
         print(f"   Tokens used: {tokens_used}")
@@ -283,34 +303,64 @@ class AgentAutoCreator:
             
             created_agents.append(agent)
             print(f"✅ Created agent: {agent.name} ({agent.avatar})")
+            publish_event(
+                self.project.id, 'agent.created',
+                agent_id=agent.pk, name=agent.name, role=agent.role, status=agent.status
+            )
         
         return created_agents
 
 
-def generate_project_plan(project_id: int) -> Dict:
+def generate_project_plan(project_id: int, cancel_event: Optional[threading.Event] = None) -> Dict:
     """
     Main entry point for generating project plan
     
     Args:
         project_id: Project ID
+        cancel_event: Optional event that stops planning before the planning
+            document is saved (afterwards it is ignored)
     
     Returns:
-        Dictionary with planning document and created agents
+        Dictionary with planning document and created agents, or 'cancelled'
     """
     try:
         project = Project.objects.get(id=project_id)
         
-        # Generate planning document
-        service = PlanningService(project)
-        planning_doc = service.generate_full_plan()
-        
-        # Auto-create agents
-        creator = AgentAutoCreator(planning_doc)
-        agents = creator.create_agents()
-        
-        # Update project status
-        project.status = 'in_progress'
-        project.save()
+        # The planning LLM calls are checked against and debited to the project's budget
+        with trace_run(project, 'planning') as tracer, budget_scope(BudgetGuard(project)) as budget:
+            budget.run = tracer.run
+            
+            # Generate planning document
+            publish_event(project.id, 'planning.started')
+            service = PlanningService(project)
+            planning_doc = service.generate_full_plan(cancel_event)
+            if planning_doc is None:
+                tracer.status = 'cancelled'
+                tracer.summary = {'budget': budget.summary()}
+                publish_event(project.id, 'planning.cancelled')
+                return {
+                    'success': False,
+                    'cancelled': True,
+                    'error': 'Planning was cancelled'
+                }
+            
+            # Auto-create agents
+            with span('create agents', 'persist'):
+                creator = AgentAutoCreator(planning_doc)
+                agents = creator.create_agents()
+            
+            # Update project status
+            project.status = 'in_progress'
+            project.save()
+            tracer.summary = {
+                'tokens_used': planning_doc.tokens_used,
+                'agents_created': len(agents),
+                'budget': budget.summary(),
+            }
+        publish_event(
+            project.id, 'planning.completed',
+            planning_document_id=planning_doc.id, agents_created=len(agents)
+        )
         
         return {
             'success': True,
@@ -325,6 +375,7 @@ def generate_project_plan(project_id: int) -> Dict:
             'error': 'Project not found'
         }
     except Exception as e:
+        publish_event(project_id, 'planning.failed', error=str(e))
         return {
             'success': False,
             'error': str(e)
@@ -11,7 +11,8 @@ from django.shortcuts import get_object_or_404
 from projects.models import Project
 from .models import PlanningDocument
 from .serializers import PlanningDocumentSerializer, PlanningDocumentDetailSerializer
-from .services import generate_project_plan
+from opencode.jobs import enqueue_job
+from opencode.serializers import JobSerializer
 
 
 class PlanningDocumentViewSet(viewsets.ReadOnlyModelViewSet):
@@ -66,31 +67,17 @@ class PlanningDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_200_OK
             )
         
-        # Generate planning document
-        try:
-            result = generate_project_plan(project_id)
-            
-            if result['success']:
-                planning_doc = result['planning_document']
-                return Response(
-                    {
-                        'message': 'Planning document generated successfully',
-                        'planning_document': PlanningDocumentDetailSerializer(planning_doc).data,
-                        'agents_created': result['agents_created'],
-                    },
-                    status=status.HTTP_201_CREATED
-                )
-            else:
-                return Response(
-                    {'error': result['error']},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+        # Generate planning document in the background; poll /api/jobs/{id}/
+        job, created = enqueue_job(project, 'planning')
         
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return Response(
+            {
+                'message': 'Planning document generation started' if created
+                else 'Planning document generation already in progress',
+                'job': JobSerializer(job).data,
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=False, methods=['get'], url_path='by-project/(?P<project_id>[^/.]+)')
     def by_project(self, request, project_id=None):
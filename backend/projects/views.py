@@ -6,7 +6,9 @@ from django.db.models import Count, Q, Avg
 from .models import Project
 from .serializers import ProjectSerializer, ProjectCreateSerializer
 from agents.models import Agent
-from opencode.orchestrator import start_project_development
+from opencode.jobs import cancel_job, enqueue_job
+from opencode.models import Job
+from opencode.serializers import JobSerializer
 from tasks.models import Task
 
 
@@ -136,19 +138,77 @@ class ProjectViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='start-development')
     def start_development(self, request, pk=None):
         """
-        Start automated development using OpenCode
+        Start automated development using OpenCode as a background job
         
         POST /api/projects/{id}/start-development/
+        
+        Body (optional): {"priority": "interactive" | "bulk"}
+        
+        Returns 202 with the queued job, or 200 with the job already in progress.
+        """
+        project = self.get_object()
+        
+        lane = request.data.get('priority', 'interactive')
+        if lane not in dict(Job.LANE_CHOICES):
+            return Response(
+                {'error': f'Unknown priority: {lane}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        job, created = enqueue_job(project, 'development', lane=lane)
+        
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+        )
+    
+    @action(detail=True, methods=['get'], url_path='development-status')
+    def development_status(self, request, pk=None):
+        """
+        Get the latest development job for a project
+        
+        GET /api/projects/{id}/development-status/
         """
         project = self.get_object()
         
-        # Start development process
-        result = start_project_development(project.id)
+        job = project.jobs.filter(kind='development').first()
+        if not job:
+            return Response(
+                {'message': 'Development has not been started for this project'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response(JobSerializer(job).data)
+    
+    @action(detail=True, methods=['post'], url_path='cancel-development')
+    def cancel_development(self, request, pk=None):
+        """
+        Cancel the active development job
+        
+        POST /api/projects/{id}/cancel-development/
+        """
+        project = self.get_object()
+        
+        job = project.jobs.filter(kind='development', status__in=Job.ACTIVE_STATUSES).first()
+        if not job:
+            return Response(
+                {'error': 'No development job is running for this project'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response(JobSerializer(cancel_job(job)).data)
+    
+    @action(detail=True, methods=['get'], url_path='development-history')
+    def development_history(self, request, pk=None):
+        """
+        List development jobs for a project, newest first
+        
+        GET /api/projects/{id}/development-history/
+        """
+        project = self.get_object()
         
-        if result['success']:
-            return Response(result, status=status.HTTP_200_OK)
-        else:
-            return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        jobs = project.jobs.filter(kind='development')
+        return Response(JobSerializer(jobs, many=True).data)
 
 
 # Made with Bob
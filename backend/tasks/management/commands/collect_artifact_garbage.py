@@ -0,0 +1,25 @@
+"""
+Delete artifact blobs no longer referenced by any task output file
+"""
+from django.core.management.base import BaseCommand
+
+from tasks.models import collect_artifact_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete artifact store blobs that no OutputFile references'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-seconds', type=int, default=3600,
+            help='Keep unreferenced blobs younger than this (default: 3600)'
+        )
+
+    def handle(self, *args, grace_seconds, **options):
+        stats = collect_artifact_garbage(grace_seconds=grace_seconds)
+        self.stdout.write(self.style.SUCCESS(
+            f"🧹 Scanned {stats['scanned']} blobs, deleted {stats['deleted']} "
+            f"({stats['freed_bytes']} bytes freed)"
+        ))
+
+# Made with Bob
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outputfile",
+            name="blob_digest",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="outputfile",
+            name="size",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="outputfile",
+            name="content",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("agents", "0002_aiserviceapikey"),
+        ("projects", "0001_initial"),
+        ("tasks", "0002_outputfile_blob_digest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="key",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name="task",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("key", ""), _negated=True),
+                fields=("project", "key"),
+                name="unique_task_key_per_project",
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from projects.models import Project
 from agents.models import Agent
+from codebase.blob_store import get_blob_store
 
 
 class Task(models.Model):
@@ -24,6 +25,8 @@ class Task(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
     assigned_to = models.ForeignKey(Agent, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
     title = models.CharField(max_length=255)
+    # Task-graph key of tasks created by the orchestrator (blank for manual tasks)
+    key = models.CharField(max_length=100, blank=True)
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
@@ -35,6 +38,13 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['-priority', '-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'key'],
+                condition=~models.Q(key=''),
+                name='unique_task_key_per_project'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
@@ -66,7 +76,9 @@ class OutputFile(models.Model):
     task_output = models.ForeignKey(TaskOutput, on_delete=models.CASCADE, related_name='files')
     name = models.CharField(max_length=255)
     path = models.CharField(max_length=500)
-    content = models.TextField()
+    content = models.TextField(blank=True)  # Inline content for files without a blob
+    blob_digest = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256 in the artifact store
+    size = models.BigIntegerField(default=0)  # Uncompressed size in bytes
     language = models.CharField(max_length=50, blank=True)  # Programming language
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -75,5 +87,26 @@ class OutputFile(models.Model):
     
     def __str__(self):
         return f"{self.path}/{self.name}"
+    
+    def iter_content(self):
+        """Stream file body as bytes chunks"""
+        if self.blob_digest:
+            yield from get_blob_store().iter_chunks(self.blob_digest)
+        elif self.content:
+            yield self.content.encode('utf-8')
+    
+    def read_text(self) -> str:
+        """Return full file body as text"""
+        return b''.join(self.iter_content()).decode('utf-8', errors='replace')
+
+
+def collect_artifact_garbage(grace_seconds: int = 3600) -> dict:
+    """Delete artifact blobs no longer referenced by any OutputFile row"""
+    ref_counts = dict(
+        OutputFile.objects.exclude(blob_digest='')
+        .values_list('blob_digest')
+        .annotate(refs=models.Count('id'))
+    )
+    return get_blob_store().collect_garbage(ref_counts, grace_seconds=grace_seconds)
 
 # Made with Bob
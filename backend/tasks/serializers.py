@@ -1,12 +1,23 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import Task, TaskOutput, OutputFile
 
 
 class OutputFileSerializer(serializers.ModelSerializer):
+    """File metadata; the body is streamed from content_url"""
+    content_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = OutputFile
-        fields = ['id', 'name', 'path', 'content', 'language', 'created_at']
+        fields = ['id', 'name', 'path', 'blob_digest', 'size', 'language', 'content_url', 'created_at']
         read_only_fields = ['id', 'created_at']
+    
+    def get_content_url(self, obj):
+        return reverse(
+            'task-file-content',
+            kwargs={'pk': obj.task_output.task_id, 'file_id': obj.id},
+            request=self.context.get('request')
+        )
 
 
 class TaskOutputSerializer(serializers.ModelSerializer):
@@ -28,12 +39,12 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = [
             'id', 'project', 'assigned_to', 'assigned_to_name',
-            'title', 'description', 'status', 'status_display',
+            'title', 'key', 'description', 'status', 'status_display',
             'priority', 'priority_display', 'progress',
             'dependencies', 'created_at', 'updated_at', 'completed_at',
             'output'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'key', 'created_at', 'updated_at']
 
 
 class TaskCreateSerializer(serializers.ModelSerializer):
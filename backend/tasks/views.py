@@ -1,8 +1,12 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Task
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from codebase.blob_store import get_blob_store
+from .models import Task, OutputFile
 from .serializers import TaskSerializer, TaskCreateSerializer
+from opencode.events import publish_event
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -54,6 +58,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         if progress == 100 and task.status != 'completed':
             task.status = 'completed'
         task.save()
+        publish_event(task.project_id, 'task.progress', task_id=task.pk, progress=progress, status=task.status)
         
         serializer = self.get_serializer(task)
         return Response(serializer.data)
@@ -73,8 +78,34 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         task.status = new_status
         task.save()
+        publish_event(task.project_id, 'task.status', task_id=task.pk, status=new_status)
         
         serializer = self.get_serializer(task)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path='files/(?P<file_id>[^/.]+)/content')
+    def file_content(self, request, pk=None, file_id=None):
+        """
+        Stream the full body of a generated file
+        
+        GET /api/tasks/{id}/files/{file_id}/content/
+        """
+        task = self.get_object()
+        output_file = get_object_or_404(OutputFile, id=file_id, task_output__task=task)
+        
+        if output_file.blob_digest and not get_blob_store().exists(output_file.blob_digest):
+            return Response(
+                {'error': 'File content is no longer available'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        response = StreamingHttpResponse(
+            output_file.iter_content(),
+            content_type='application/octet-stream'
+        )
+        if output_file.blob_digest:
+            response['Content-Length'] = str(output_file.size)
+        response['Content-Disposition'] = f'inline; filename="{output_file.name}"'
+        return response
 
 # Made with Bob
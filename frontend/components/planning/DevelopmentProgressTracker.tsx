@@ -1,7 +1,7 @@
 'use client';
 
 import { useState, useEffect, useRef } from 'react';
-import { api } from '@/lib/api';
+import { api, ProjectEvent } from '@/lib/api';
 import PixelButton from '@/components/pixel/PixelButton';
 
 interface DevelopmentProgressTrackerProps {
@@ -32,6 +32,18 @@ interface DevelopmentStatus {
   error_message?: string;
 }
 
+// Task model statuses as shown by the tracker
+const toTaskStatus = (status: string): TaskProgress['status'] => {
+  switch (status) {
+    case 'completed': return 'completed';
+    case 'failed':
+    case 'blocked': return 'failed';
+    case 'in_progress':
+    case 'review': return 'in_progress';
+    default: return 'pending';
+  }
+};
+
 export default function DevelopmentProgressTracker({
   isOpen,
   projectId,
@@ -44,24 +56,10 @@ export default function DevelopmentProgressTracker({
   const logsEndRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
-    if (isOpen) {
-      loadStatus();
-      // Simulate progress for demo
-      const interval = setInterval(() => {
-        setStatus(prev => {
-          if (!prev) return null;
-          const newProgress = Math.min(prev.overall_progress + 10, 100);
-          return {
-            ...prev,
-            overall_progress: newProgress,
-            status: newProgress === 100 ? 'completed' : 'in_progress'
-          };
-        });
-      }, 2000);
-      
-      return () => clearInterval(interval);
-    }
-  }, [isOpen]);
+    if (!isOpen) return;
+    // Task, agent and run changes are pushed by the backend; no polling needed
+    return api.subscribeToProjectEvents(projectId, handleEvent);
+  }, [isOpen, projectId]);
 
   useEffect(() => {
     if (status?.status === 'completed') {
@@ -69,27 +67,125 @@ export default function DevelopmentProgressTracker({
     }
   }, [status?.status]);
 
-  const loadStatus = async () => {
-    try {
-      setLoading(false);
-      // Initialize with demo data
-      setStatus({
-        status: 'in_progress',
-        overall_progress: 0,
-        tasks: [
-          { id: '1', title: 'Setup Project Structure', status: 'in_progress', progress: 50 },
-          { id: '2', title: 'Generate Backend API', status: 'pending', progress: 0 },
-          { id: '3', title: 'Generate Frontend UI', status: 'pending', progress: 0 },
-          { id: '4', title: 'Generate Tests', status: 'pending', progress: 0 },
-        ],
-        generated_files: [],
-        logs: [
-          { timestamp: new Date().toISOString(), level: 'info', message: 'Starting development...' }
-        ]
-      });
-    } catch (err) {
-      console.error('Failed to load development status:', err);
-      setLoading(false);
+  const handleEvent = (event: ProjectEvent) => {
+    setLoading(false);
+    setStatus(prev => applyEvent(prev, event));
+  };
+
+  const applyEvent = (prev: DevelopmentStatus | null, event: ProjectEvent): DevelopmentStatus => {
+    const state: DevelopmentStatus = prev || {
+      status: 'pending',
+      overall_progress: 0,
+      tasks: [],
+      generated_files: [],
+      logs: [],
+    };
+    const data = event.data;
+    const log = (level: 'info' | 'warning' | 'error' | 'success', message: string) => [
+      ...state.logs,
+      { timestamp: new Date((event.timestamp || Date.now() / 1000) * 1000).toISOString(), level, message },
+    ];
+    const updateTask = (key: string, changes: Partial<TaskProgress>) =>
+      state.tasks.map(task => (task.id === key ? { ...task, ...changes } : task));
+    const withProgress = (next: DevelopmentStatus): DevelopmentStatus => {
+      const total = next.tasks.length || 1;
+      const progress = next.tasks.reduce(
+        (sum, task) => sum + (task.status === 'completed' || task.status === 'failed' ? 100 : task.progress),
+        0
+      );
+      return { ...next, overall_progress: progress / total };
+    };
+
+    switch (event.type) {
+      case 'snapshot': {
+        // Sent on every (re)connect: seed the task list so later task.* events apply
+        const tasks: TaskProgress[] = data.tasks
+          .filter((task: any) => task.key)
+          .map((task: any) => ({
+            id: task.key,
+            title: task.title,
+            status: toTaskStatus(task.status),
+            progress: task.progress,
+          }));
+        const job = data.jobs?.development;
+        const active = job && (job.status === 'queued' || job.status === 'running');
+        const runStatus: DevelopmentStatus['status'] = active
+          ? 'in_progress'
+          : tasks.some(task => task.status === 'failed')
+            ? 'failed'
+            : tasks.length > 0 && tasks.every(task => task.status === 'completed')
+              ? 'completed'
+              : tasks.some(task => task.status !== 'pending')
+                ? 'in_progress'
+                : state.status;
+        return withProgress({ ...state, status: runStatus, tasks });
+      }
+      case 'run.started':
+        return {
+          ...state,
+          status: 'in_progress',
+          overall_progress: 0,
+          tasks: data.tasks.map((task: any) => ({
+            id: task.key,
+            title: task.title,
+            status: 'pending',
+            progress: 0,
+          })),
+          logs: log('info', 'Starting development...'),
+        };
+      case 'task.started':
+        return withProgress({
+          ...state,
+          tasks: updateTask(data.key, { status: 'in_progress', progress: 0, message: data.reason }),
+          logs: log('info', `Started ${data.title}`),
+        });
+      case 'task.progress':
+        return data.key ? withProgress({ ...state, tasks: updateTask(data.key, { progress: data.progress }) }) : state;
+      case 'task.resumed':
+        return withProgress({
+          ...state,
+          tasks: updateTask(data.key, { status: 'completed', progress: 100, message: 'Unchanged since last run' }),
+          logs: log('info', `Reused ${data.title}`),
+        });
+      case 'task.hedged':
+        return {
+          ...state,
+          tasks: updateTask(data.key, { message: 'Running slow, started a second attempt' }),
+          logs: log('warning', `${data.title}: slower than usual, started a second attempt`),
+        };
+      case 'task.completed':
+        return withProgress({
+          ...state,
+          tasks: updateTask(data.key, { status: 'completed', progress: 100, message: undefined }),
+          logs: log('success', `${data.title}: ${data.files_changed} files changed`),
+        });
+      case 'task.failed':
+      case 'task.skipped':
+        return withProgress({
+          ...state,
+          tasks: updateTask(data.key, { status: 'failed', message: data.error }),
+          logs: log(event.type === 'task.failed' ? 'error' : 'warning', `${data.title}: ${data.error}`),
+        });
+      case 'push.completed':
+        return { ...state, logs: log('info', `Pushed ${data.commits} commit(s) to ${data.branch}`) };
+      case 'push.failed':
+        return { ...state, logs: log('warning', `Push failed: ${data.error}`) };
+      case 'budget.exceeded':
+        return { ...state, logs: log('error', `Budget exceeded (${data.reason}), no further tasks will start`) };
+      case 'run.finished':
+        return {
+          ...state,
+          status: data.tasks_failed === 0 ? 'completed' : 'failed',
+          overall_progress: 100,
+          logs: log(data.tasks_failed === 0 ? 'success' : 'error',
+            `Finished: ${data.tasks_successful} succeeded, ${data.tasks_failed} failed`),
+        };
+      case 'job.status':
+        return data.status === 'failed' || data.status === 'cancelled'
+          ? { ...state, status: 'failed', error_message: data.error, logs: log('error', `Job ${data.status}`) }
+          : state;
+      default:
+        return state;
     }
   };
 
@@ -312,10 +312,20 @@ class ApiClient {
 
   // Planning Document endpoints
   async generatePlanningDocument(projectId: string): Promise<any> {
-    return this.request<any>('/planning/generate/', {
+    const response = await this.request<any>('/planning/generate/', {
       method: 'POST',
       body: JSON.stringify({ project_id: projectId }),
     });
+    if (response.planning_document) {
+      return response.planning_document;
+    }
+
+    // Generation runs as a background job; wait for it, then fetch the document
+    const job = await this.waitForJob(response.job.id);
+    if (job.status !== 'succeeded') {
+      throw new Error(job.error || `Planning job ${job.status}`);
+    }
+    return this.getPlanningDocument(projectId);
   }
 
   async getPlanningDocument(projectId: string): Promise<any> {
@@ -366,6 +376,58 @@ class ApiClient {
   async getDevelopmentHistory(projectId: string): Promise<any[]> {
     return this.request<any[]>(`/projects/${projectId}/development-history/`);
   }
+
+  // Live project events (server-sent events; replaces polling during runs)
+  subscribeToProjectEvents(projectId: string, onEvent: (event: ProjectEvent) => void): () => void {
+    const source = new EventSource(`${this.baseUrl}/projects/${projectId}/events/`, {
+      withCredentials: true,
+    });
+    source.onmessage = (message) => onEvent(JSON.parse(message.data));
+    return () => source.close();
+  }
+
+  // Background job endpoints
+  async getJob(jobId: number): Promise<any> {
+    return this.request<any>(`/jobs/${jobId}/`);
+  }
+
+  async cancelJob(jobId: number): Promise<any> {
+    return this.request<any>(`/jobs/${jobId}/cancel/`, {
+      method: 'POST',
+    });
+  }
+
+  async waitForJob(jobId: number, intervalMs = 2000): Promise<any> {
+    for (;;) {
+      const job = await this.getJob(jobId);
+      if (!job.is_active) {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  }
+
+  // Run history (timed spans per planning/development run)
+  async getRuns(projectId: string, kind?: 'planning' | 'development'): Promise<any[]> {
+    const query = kind ? `&kind=${kind}` : '';
+    return this.request<any[]>(`/runs/?project=${projectId}${query}`);
+  }
+
+  async getRun(runId: number): Promise<any> {
+    return this.request<any>(`/runs/${runId}/`);
+  }
+
+  async getCriticalPathAnalysis(projectId: string, limit = 10): Promise<any> {
+    return this.request<any>(`/runs/critical-path/?project=${projectId}&limit=${limit}`);
+  }
+}
+
+export interface ProjectEvent {
+  id: number | null;
+  type: string;
+  project: number;
+  data: any;
+  timestamp?: number;
 }
 
 // Export singleton instance
@@ -87,10 +87,13 @@ export interface TaskOutput {
 }
 
 export interface OutputFile {
+  id: number;
   name: string;
   path: string;
-  content: string;
+  blob_digest: string;
+  size: number;
   language?: string;
+  content_url: string;
 }
 
 // Survey Types